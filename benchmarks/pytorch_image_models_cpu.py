@@ -0,0 +1,76 @@
+"""
+Benchmark of the inference configurations of the PytorchImageModels technique on cpu
+
+For each configuration, the truncated model is built and then fed with batches of random images: the number of
+images processed per second (after some warmup batches) is reported
+
+Usage (from the root of the repository, so that the local clayrs package is imported):
+
+    python -m benchmarks.pytorch_image_models_cpu --model resnet50 --batch-size 32 --n-batches 10
+
+NOTE: pretrained weights of the model are downloaded by timm the first time the benchmark is run
+"""
+import argparse
+import time
+
+import torch
+
+from clayrs.content_analyzer import PytorchImageModels
+
+CONFIGURATIONS = {
+    'eager': {},
+    'jit': {'jit': True},
+    'channels_last': {'channels_last': True},
+    'jit + channels_last': {'jit': True, 'channels_last': True},
+    'bfloat16': {'precision': 'bfloat16'},
+    'jit + channels_last + bfloat16': {'jit': True, 'channels_last': True, 'precision': 'bfloat16'},
+    'qint8': {'precision': 'qint8'},
+    'jit + qint8': {'jit': True, 'precision': 'qint8'},
+}
+
+
+def benchmark(model_name: str, feature_layer: int, batch_size: int, n_batches: int, n_warmup: int,
+              resize_size: int, configurations: list):
+
+    batch = torch.rand((batch_size, 3, resize_size, resize_size))
+
+    results = {}
+    for configuration_name in configurations:
+        technique = PytorchImageModels(model_name, feature_layer=feature_layer,
+                                       resize_size=(resize_size, resize_size),
+                                       **CONFIGURATIONS[configuration_name])
+
+        for _ in range(n_warmup):
+            technique.produce_batch_repr(batch)
+
+        start = time.perf_counter()
+        for _ in range(n_batches):
+            technique.produce_batch_repr(batch)
+        elapsed = time.perf_counter() - start
+
+        results[configuration_name] = (batch_size * n_batches) / elapsed
+        print(f"{configuration_name:<35} {results[configuration_name]:>10.2f} images/sec")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='resnet18', help="name of the timm model to benchmark")
+    parser.add_argument('--feature-layer', type=int, default=-1, help="layer from which features are retrieved")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--n-batches', type=int, default=10, help="number of timed batches")
+    parser.add_argument('--n-warmup', type=int, default=2, help="number of batches processed before timing")
+    parser.add_argument('--resize-size', type=int, default=227, help="height and width of the random images")
+    parser.add_argument('--threads', type=int, default=None, help="number of threads used by torch")
+    parser.add_argument('--configurations', nargs='+', default=list(CONFIGURATIONS.keys()),
+                        choices=list(CONFIGURATIONS.keys()))
+
+    args = parser.parse_args()
+
+    if args.threads is not None:
+        torch.set_num_threads(args.threads)
+
+    print(f"Model: {args.model}, batch size: {args.batch_size}, torch threads: {torch.get_num_threads()}")
+    benchmark(args.model, args.feature_layer, args.batch_size, args.n_batches, args.n_warmup, args.resize_size,
+              args.configurations)
@@ -0,0 +1,65 @@
+"""
+Benchmark of the selection of the top-k items of a rank
+
+For each user, the top-k items out of the candidate items are selected and the uir rank matrix is built: the full
+sort of the candidates followed by a list comprehension (the way rankers built the rank before) is compared with the
+`top_k_uir()` utility, which selects the winners with argpartition and sorts only them. The time needed to rank
+all the users with both methods is reported
+
+Usage (from the root of the repository, so that the local clayrs package is imported):
+
+    python -m benchmarks.top_k_selection --n-candidates 100000 --k 10 --n-users 100
+"""
+import argparse
+import time
+
+import numpy as np
+
+from clayrs.utils.top_k import top_k_uir
+
+
+def full_sort_uir(user_idx: int, items: np.ndarray, scores: np.ndarray, k: int):
+    sorted_scores_idxs = np.argsort(scores)[::-1][:k]
+    sorted_items = items[sorted_scores_idxs]
+    sorted_scores = scores[sorted_scores_idxs]
+
+    return np.array([[user_idx, item_idx, score] for item_idx, score in zip(sorted_items, sorted_scores)])
+
+
+METHODS = {
+    'full sort': full_sort_uir,
+    'top_k_uir': top_k_uir,
+}
+
+
+def benchmark(n_candidates: int, k: int, n_users: int, seed: int):
+    rng = np.random.default_rng(seed)
+    items = rng.permutation(n_candidates)
+    users_scores = [rng.random(n_candidates) for _ in range(n_users)]
+
+    results = {}
+    for method_name, method in METHODS.items():
+        start = time.perf_counter()
+        for user_idx, scores in enumerate(users_scores):
+            method(user_idx, items, scores, k)
+        elapsed = time.perf_counter() - start
+
+        results[method_name] = elapsed / n_users
+        print(f"{method_name:<15} {results[method_name] * 1000:>10.3f} ms/user")
+
+    print(f"{'speedup':<15} {results['full sort'] / results['top_k_uir']:>10.2f}x")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n-candidates', type=int, default=100000, help="number of candidate items of each user")
+    parser.add_argument('--k', type=int, default=10, help="number of items of the rank of each user")
+    parser.add_argument('--n-users', type=int, default=100, help="number of users ranked")
+    parser.add_argument('--seed', type=int, default=42)
+
+    args = parser.parse_args()
+
+    print(f"Candidates: {args.n_candidates}, k: {args.k}, users: {args.n_users}")
+    benchmark(args.n_candidates, args.k, args.n_users, args.seed)
@@ -13,10 +13,12 @@ if TYPE_CHECKING:
     from clayrs.content_analyzer.config import ContentAnalyzerConfig
     from clayrs.content_analyzer.memory_interfaces.memory_interfaces import InformationInterface
 
-from clayrs.content_analyzer.content_representation.content import Content, IndexField, ContentEncoder
+from clayrs.content_analyzer.content_representation.content import Content, IndexField, ContentEncoder, \
+    FeaturesBagField, FeaturesVocabulary
 from clayrs.utils.const import logger
 from clayrs.utils.context_managers import get_iterator_thread
 from clayrs.content_analyzer.utils.id_merger import id_merger
+from clayrs.content_analyzer.raw_information_source import SpooledSource
 
 
 class ContentAnalyzer:
@@ -68,6 +70,9 @@ class ContentAnalyzer:
             with open(json_path, "w") as data:
                 json.dump(created_contents, data, cls=ContentEncoder, indent=4)
 
+        # vocabularies shared by representations are serialized only once, contents will just reference them
+        self._serialize_vocabularies(created_contents)
+
         # with get_progbar(created_contents) as pbar:
         with get_iterator_thread(self._n_thread, self._serialize_content, created_contents,
                                  keep_order=False, progress_bar=True, total=len(created_contents)) as pbar:
@@ -76,9 +81,29 @@ class ContentAnalyzer:
             for _ in pbar:
                 pass
 
+    def _serialize_vocabularies(self, contents: List[Content]):
+        """
+        This method serializes, in the output directory defined by the content analyzer config, every
+        FeaturesVocabulary referenced by the FeaturesBagField representations of the contents. Each vocabulary is
+        serialized only once, regardless of the number of representations sharing it
+        Args:
+            contents (List[Content]): content instances whose vocabularies will be serialized
+        """
+        vocabularies = {}
+        for content in contents:
+            for field_name in content.field_dict:
+                for row in content.get_field(field_name):
+                    representation = row['representation']
+                    if isinstance(representation, FeaturesBagField) and representation.vocabulary is not None:
+                        vocabularies[representation.vocabulary.vocabulary_id] = representation.vocabulary
+
+        for vocabulary in vocabularies.values():
+            vocabulary.save(self._config.output_directory)
+
     def _serialize_content(self, content: Content):
         """
-        This method serializes a specific content in the output directory defined by the content analyzer config
+        This method serializes a specific content in the output directory defined by the content analyzer config.
+        FeaturesVocabulary instances are not serialized with the content, only their id is
         Args:
             content (Content): content instance that will be serialized
         """
@@ -86,7 +111,7 @@ class ContentAnalyzer:
         file_name = re.sub(r'[^\w\s]', '', content.content_id)
         path = os.path.join(self._config.output_directory, file_name + '.xz')
         with lzma.open(path, 'wb') as f:
-            pickle.dump(content, f, protocol=pickle.HIGHEST_PROTOCOL)
+            _VocabularyReferencePickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(content)
 
     def __check_field_dict(self):
         """
@@ -120,6 +145,18 @@ class ContentAnalyzer:
         return f'ContentAnalyzer(config={self._config})'
 
 
+class _VocabularyReferencePickler(pickle.Pickler):
+    """
+    Pickler which stores only the id of FeaturesVocabulary instances, which are expected to be serialized separately
+    """
+
+    def persistent_id(self, obj):
+        if isinstance(obj, FeaturesVocabulary):
+            return 'FeaturesVocabulary', obj.vocabulary_id
+
+        return None
+
+
 class ContentsProducer:
     """
     Singleton class which encapsulates the creation process of the items,
@@ -164,92 +201,142 @@ class ContentsProducer:
         if self.__config is None:
             raise Exception("You must set a config with set_config()")
 
-        # will store the contents and is the variable that will be returned by the method
-        contents_list = []
+        # the raw source is read only once: the fields needed by the id, by the field configs and by the exogenous
+        # techniques are spooled on disk and every technique will iterate over the spool instead of the file.
+        # The spool is removed even if the content creation fails
+        source = self._spool_source()
+        try:
+            # will store the contents and is the variable that will be returned by the method
+            contents_list = []
 
-        for raw_content in self.__config.source:
-            # construct id from the list of the fields that compound id
-            content_id = id_merger(raw_content, self.__config.id)
-            contents_list.append(Content(content_id))
+            for raw_content in source:
+                # construct id from the list of the fields that compound id
+                content_id = id_merger(raw_content, self.__config.id)
+                contents_list.append(Content(content_id))
 
-        # two lists are instantiated, one for the configuration names (given by the user) and one for the exogenous
-        # properties representations. These lists will maintain the data for the content creation. This is done
-        # because otherwise it would be necessary to append directly to the content. But in the Content class
-        # the representations are kept as dataframes and appending to dataframes is computationally heavy
-        for ex_config in self.__config.exogenous_representation_list:
-            lod_properties = ex_config.exogenous_technique.get_properties(self.__config.source)
-
-            for i in range(len(contents_list)):
-                contents_list[i].append_exogenous_representation(lod_properties[i], ex_config.id)
-
-        # this dictionary will store any representation list that will be kept in one of the the index
-        # the elements will be in the form:
-        #   { memory_interface: {'Plot_0': [FieldRepr for content1, FieldRepr for content2, ...]}}
-        # the 0 after the Plot field name is used to define the representation number associated with the Plot field
-        # since it's possible to store multiple Plot fields in the index
-        index_representations_dict = {}
-
-        for field_name in self.__config.get_field_name_list():
-            logger.info(f"   Processing field: {field_name}   ".center(50, '*'))
-
-            for repr_number, field_config in enumerate(self.__config.get_configs_list(field_name)):
-
-                # technique_result is a list of field representation produced by the content technique
-                # each field repr in the list will refer to a content
-                # technique_result[0] -> contents_list[0]
-                technique_result = field_config.content_technique.produce_content(
-                    field_name, field_config.preprocessing, field_config.postprocessing, self.__config.source)
-
-                if field_config.memory_interface is not None:
-                    memory_interface = field_config.memory_interface
-                    # if the index for the directory in the config hasn't been defined yet in the contents producer,
-                    # the index associated to the field config that is being processed is added to the
-                    # contents producer's memory interfaces list, and will be used for the future field configs with
-                    # an assigned memory interface that has the same directory.
-                    # This means that only the index defined in the first FieldConfig that has one will actually be used
-                    if memory_interface not in self.__memory_interfaces.values():
-                        self.__memory_interfaces[memory_interface.directory] = memory_interface
-                        index_representations_dict[memory_interface] = {}
-                    else:
-                        memory_interface = self.__memory_interfaces[memory_interface.directory]
+            # two lists are instantiated, one for the configuration names (given by the user) and one for the exogenous
+            # properties representations. These lists will maintain the data for the content creation. This is done
+            # because otherwise it would be necessary to append directly to the content. But in the Content class
+            # the representations are kept as dataframes and appending to dataframes is computationally heavy
+            for ex_config in self.__config.exogenous_representation_list:
+                lod_properties = ex_config.exogenous_technique.get_properties(source)
 
-                    if field_config.id is not None:
-                        index_field_name = "{}#{}#{}".format(field_name, str(repr_number), field_config.id)
+                for i in range(len(contents_list)):
+                    contents_list[i].append_exogenous_representation(lod_properties[i], ex_config.id)
+
+            # this dictionary will store any representation list that will be kept in one of the the index
+            # the elements will be in the form:
+            #   { memory_interface: {'Plot_0': [FieldRepr for content1, FieldRepr for content2, ...]}}
+            # the 0 after the Plot field name is used to define the representation number associated with the Plot field
+            # since it's possible to store multiple Plot fields in the index
+            index_representations_dict = {}
+
+            # representations are appended to the contents only once all of them have been produced, since the
+            # representations kept in an index can be referred to only once their positions in the index are known
+            # the elements will be in the form: (field_name, field_config, memory_interface, index_field_name, result)
+            field_results = []
+
+            for field_name in self.__config.get_field_name_list():
+                logger.info(f"   Processing field: {field_name}   ".center(50, '*'))
+
+                for repr_number, field_config in enumerate(self.__config.get_configs_list(field_name)):
+
+                    # technique_result is a list of field representation produced by the content technique
+                    # each field repr in the list will refer to a content
+                    # technique_result[0] -> contents_list[0]
+                    technique_result = field_config.content_technique.produce_content(
+                        field_name, field_config.preprocessing, field_config.postprocessing, source)
+
+                    if field_config.memory_interface is not None:
+                        memory_interface = field_config.memory_interface
+                        # if the index for the directory in the config hasn't been defined yet in the contents
+                        # producer, the index associated to the field config that is being processed is added to the
+                        # contents producer's memory interfaces list, and will be used for the future field configs
+                        # with an assigned memory interface that has the same directory.
+                        # This means that only the index defined in the first FieldConfig that has one will actually
+                        # be used
+                        if memory_interface not in self.__memory_interfaces.values():
+                            self.__memory_interfaces[memory_interface.directory] = memory_interface
+                            index_representations_dict[memory_interface] = {}
+                        else:
+                            memory_interface = self.__memory_interfaces[memory_interface.directory]
+
+                        if field_config.id is not None:
+                            index_field_name = "{}#{}#{}".format(field_name, str(repr_number), field_config.id)
+                        else:
+                            index_field_name = "{}#{}".format(field_name, str(repr_number))
+
+                        index_representations_dict[memory_interface][index_field_name] = technique_result
+                        field_results.append((field_name, field_config, memory_interface, index_field_name, None))
                     else:
-                        index_field_name = "{}#{}".format(field_name, str(repr_number))
-
-                    index_representations_dict[memory_interface][index_field_name] = technique_result
-
-                    # in order to refer to the representation that will be stored in the index, an IndexField repr will
-                    # be added to each content (and it will contain all the necessary information to retrieve the data
-                    # from the index)
-                    technique_result = [IndexField(index_field_name, i, memory_interface)
-                                        for i in range(len(self.__config.source))]
+                        field_results.append((field_name, field_config, None, None, technique_result))
+
+                    del technique_result
+                    gc.collect()
+
+            # after the contents creation process, the data to be indexed will be serialized inside of the memory
+            # interfaces for each created content, a new entry in each index will be created
+            # the entry will be in the following form: {"content_id": id, "Plot_0": "...", "Plot_1": "...", ...}
+            # all the entries are passed to the memory interface at once, so that it can serialize them in bulk and
+            # return the position of each entry in the index
+            index_positions = {}
+            if len(self.__memory_interfaces) != 0:
+                for memory_interface in self.__memory_interfaces.values():
+                    field_representations = index_representations_dict[memory_interface]
+
+                    documents = []
+                    for i in range(0, len(contents_list)):
+                        document = {"content_id": contents_list[i].content_id}
+                        for field_name, representations in field_representations.items():
+                            document[field_name] = str(representations[i].value)
+                        documents.append(document)
+
+                    memory_interface.init_writing(True)
+                    index_positions[memory_interface] = memory_interface.add_documents(documents)
+                    memory_interface.stop_writing()
+
+                    del documents
+                self.__memory_interfaces.clear()
+
+            for field_name, field_config, memory_interface, index_field_name, technique_result in field_results:
+                if memory_interface is not None:
+                    # in order to refer to the representation stored in the index, an IndexField repr will be added
+                    # to each content (and it will contain all the necessary information to retrieve the data from the
+                    # index)
+                    technique_result = [IndexField(index_field_name, position, memory_interface)
+                                        for position in index_positions[memory_interface]]
 
                 for i in range(len(contents_list)):
                     contents_list[i].append_field_representation(field_name, technique_result[i], field_config.id)
 
-                del technique_result
-                gc.collect()
-
-        # after the contents creation process, the data to be indexed will be serialized inside of the memory interfaces
-        # for each created content, a new entry in each index will be created
-        # the entry will be in the following form: {"content_id": id, "Plot_0": "...", "Plot_1": "...", ...}
-        if len(self.__memory_interfaces) != 0:
-            for memory_interface in self.__memory_interfaces.values():
-                memory_interface.init_writing(True)
-                for i in range(0, len(contents_list)):
-                    memory_interface.new_content()
-                    memory_interface.new_field("content_id", contents_list[i].content_id)
-                    for field_name in index_representations_dict[memory_interface].keys():
-                        memory_interface.new_field(
-                            field_name, str(index_representations_dict[memory_interface][field_name][i].value))
-                    memory_interface.serialize_content()
-                memory_interface.stop_writing()
-            self.__memory_interfaces.clear()
+            del field_results
+        finally:
+            source.close()
+
+        del source
+        gc.collect()
 
         return contents_list
 
+    def _spool_source(self) -> SpooledSource:
+        """
+        Reads the raw source of the config once and spools on disk only the fields which will be used in the content
+        creation process: the fields of the id, the fields of the field configs and the fields read by the exogenous
+        techniques. If an exogenous technique may read any field of the raw source (e.g. `PropertiesFromDataset` with
+        no field list), all fields are kept
+        """
+        fields = self.__config.id + self.__config.get_field_name_list()
+        for ex_config in self.__config.exogenous_representation_list:
+            exogenous_fields = ex_config.exogenous_technique.source_fields
+            if exogenous_fields is None:
+                fields = None
+                break
+
+            fields += exogenous_fields
+
+        logger.info(f"Reading raw source {self.__config.source.representative_name}")
+        return SpooledSource(self.__config.source, fields)
+
     def __str__(self):
         return "ContentsProducer"
 
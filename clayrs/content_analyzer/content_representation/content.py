@@ -1,6 +1,10 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Dict, Union, List, Tuple, TYPE_CHECKING
+import lzma
+import os
+import pickle
+import uuid
+from typing import Dict, Union, List, Tuple, Optional, TYPE_CHECKING
 import numpy as np
 import json
 from numbers import Number
@@ -40,20 +44,114 @@ class FieldRepresentation(ABC):
         return str(self)
 
 
+class FeaturesVocabulary:
+    """
+    Class which maps each column of the sparse scores of a FeaturesBagField to the name of its feature.
+
+    A single vocabulary is shared by all the FeaturesBagField produced by a technique for a field, so that feature
+    names are stored only once instead of being duplicated for every content. When contents are serialized by the
+    Content Analyzer, the vocabulary is saved once in the output directory and each serialized content only
+    references it by its id. When contents are loaded, all of them point to the same vocabulary instance
+
+    Args:
+        features: names of the features, where the i-th name is the name of the feature in the i-th column
+        vocabulary_id: unique identifier of the vocabulary. If None, a random one will be generated
+    """
+    __slots__ = ('__features', '__vocabulary_id', '__weakref__')
+
+    def __init__(self, features: Union[List[str], np.ndarray], vocabulary_id: str = None):
+        self.__features = np.asarray(features, dtype=object)
+        self.__vocabulary_id = vocabulary_id if vocabulary_id is not None else uuid.uuid4().hex
+
+    @property
+    def vocabulary_id(self) -> str:
+        return self.__vocabulary_id
+
+    @property
+    def features(self) -> np.ndarray:
+        return self.__features
+
+    @staticmethod
+    def _vocabulary_path(directory: str, vocabulary_id: str):
+        return os.path.join(directory, 'vocabularies', f'{vocabulary_id}.xz')
+
+    def save(self, directory: str):
+        """
+        Serializes the vocabulary in the `vocabularies` subdirectory of the directory specified. Usually this is the
+        directory where contents referencing the vocabulary are serialized
+
+        Args:
+            directory: Path of the directory where the vocabulary will be serialized
+        """
+        vocabulary_path = self._vocabulary_path(directory, self.__vocabulary_id)
+        os.makedirs(os.path.dirname(vocabulary_path), exist_ok=True)
+
+        with lzma.open(vocabulary_path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, directory: str, vocabulary_id: str) -> FeaturesVocabulary:
+        """
+        Loads a vocabulary previously serialized with the `save()` method
+
+        Args:
+            directory: Path of the directory where the vocabulary was serialized
+            vocabulary_id: id of the vocabulary to load
+
+        Returns:
+            The loaded FeaturesVocabulary
+        """
+        with lzma.open(cls._vocabulary_path(directory, vocabulary_id), 'rb') as f:
+            return pickle.load(f)
+
+    def __getitem__(self, position: int) -> str:
+        return self.__features[position]
+
+    def __len__(self):
+        return len(self.__features)
+
+    def __eq__(self, other):
+        # a vocabulary is identified by its id (consistently with its hash), which is the one used to serialize it
+        if isinstance(other, FeaturesVocabulary):
+            return self.__vocabulary_id == other.__vocabulary_id
+        return False
+
+    def __hash__(self):
+        return hash(self.__vocabulary_id)
+
+    def __str__(self):
+        return f"FeaturesVocabulary({self.__vocabulary_id})"
+
+    def __repr__(self):
+        return f"FeaturesVocabulary(features={self.__features}, vocabulary_id={self.__vocabulary_id})"
+
+
 class FeaturesBagField(FieldRepresentation):
     """
     Class for field representation using a bag of features.
     This class can also be used to represent a bag of words: <keyword, score>;
     this representation is produced by the EntityLinking and tf-idf techniques
 
+    Names of the features can be specified either as a list of <position, feature name> tuples or as a
+    `FeaturesVocabulary` shared among all the representations produced for the same field: the latter should be
+    preferred, since only the sparse row is stored for each representation
+
     Args:
         sparse_scores: the sparse matrix where features are stored
+        pos_feature_tuples: list of tuples where the first element is the position of the feature in the sparse
+            matrix and the second one is the name of the feature
+        vocabulary: vocabulary shared among representations which maps each position of the sparse matrix to the
+            name of its feature. If specified, `pos_feature_tuples` must be None
     """
-    __slots__ = ('__scores', '__pos_feature_tuples')
+    __slots__ = ('__scores', '__features')
+
+    def __init__(self, sparse_scores: sparse.csc_matrix, pos_feature_tuples: List[Tuple[int, str]] = None,
+                 vocabulary: FeaturesVocabulary = None):
+        if (pos_feature_tuples is None) == (vocabulary is None):
+            raise ValueError("Exactly one between pos_feature_tuples and vocabulary must be specified!")
 
-    def __init__(self, sparse_scores: sparse.csc_matrix, pos_feature_tuples: List[Tuple[int, str]]):
         self.__scores = sparse_scores
-        self.__pos_feature_tuples = pos_feature_tuples
+        self.__features = vocabulary if vocabulary is not None else pos_feature_tuples
 
     @property
     def value(self) -> sparse.csc_matrix:
@@ -65,19 +163,47 @@ class FeaturesBagField(FieldRepresentation):
         """
         return self.__scores
 
+    @property
+    def vocabulary(self) -> Optional[FeaturesVocabulary]:
+        """
+        Get the vocabulary shared among representations, None if feature names were specified as tuples
+        """
+        return self.__features if isinstance(self.__features, FeaturesVocabulary) else None
+
+    @property
+    def pos_feature_tuples(self) -> List[Tuple[int, str]]:
+        """
+        Get the list of <position, feature name> tuples for the features of the representation. If a vocabulary
+        was specified, tuples are built for the non-zero features only
+        """
+        if isinstance(self.__features, FeaturesVocabulary):
+            return [(pos, self.__features[pos]) for pos in self.__scores.nonzero()[1]]
+
+        return self.__features
+
+    def __setstate__(self, state):
+        _, slots_state = state
+        self.__scores = slots_state['_FeaturesBagField__scores']
+
+        # representations serialized before the introduction of the vocabulary store tuples in a different slot
+        if '_FeaturesBagField__features' in slots_state:
+            self.__features = slots_state['_FeaturesBagField__features']
+        else:
+            self.__features = slots_state['_FeaturesBagField__pos_feature_tuples']
+
     def to_json(self):
         tuple_representation = np.array([(coordinates_tuple, self.value[coordinates_tuple])
                                          for coordinates_tuple in zip(*self.value.nonzero())], dtype=object)
 
         return dict(sparse_tfidf=np.array2string(tuple_representation, threshold=np.inf, separator=','),
-                    pos_word_tuples=str(self.__pos_feature_tuples),
+                    pos_word_tuples=str(self.pos_feature_tuples),
                     len_vocabulary=self.__scores.shape[1])
 
     def __str__(self):
         return str(self.__scores)
 
     def __eq__(self, other):
-        return np.array_equal(self.__scores, other.__scores) and self.__pos_feature_tuples == other.__pos_feature_tuples
+        return np.array_equal(self.__scores, other.__scores) and self.pos_feature_tuples == other.pos_feature_tuples
 
 
 class SimpleField(FieldRepresentation):
@@ -1,10 +1,28 @@
-from typing import List
+from typing import List, Iterable, Iterator
 
 from gensim.models.doc2vec import Doc2Vec, TaggedDocument
 
 from clayrs.content_analyzer.embeddings.embedding_learner.embedding_learner import GensimWordEmbeddingLearner
 
 
+class TaggedCorpus:
+    """
+    Restartable iterable which tags each document of a corpus with its position (starting from `first_tag`), as
+    required by the gensim Doc2Vec model
+
+    Args:
+        corpus: restartable iterable of tokenized documents
+        first_tag: tag of the first document of the corpus
+    """
+
+    def __init__(self, corpus: Iterable[List[str]], first_tag: int = 0):
+        self.__corpus = corpus
+        self.__first_tag = first_tag
+
+    def __iter__(self) -> Iterator[TaggedDocument]:
+        return (TaggedDocument(doc, [i]) for i, doc in enumerate(self.__corpus, start=self.__first_tag))
+
+
 class GensimDoc2Vec(GensimWordEmbeddingLearner):
     """
     Class that implements Doc2Vec model thanks to the Gensim library.
@@ -18,7 +36,10 @@ class GensimDoc2Vec(GensimWordEmbeddingLearner):
     produce contents in the current run
 
     Additional parameters regarding the model itself could be passed, check [gensim documentation](https://radimrehurek.com/gensim/models/doc2vec.html)
-    to see what else can be customized
+    to see what else can be customized (e.g. `workers=4` to train the model with 4 worker threads)
+
+    The training of a fitted model can be continued on new documents by calling `fit(..., update=True)`: new words
+    and new documents are added to the model, which is trained only on the new documents
 
     Args:
         reference: Path of the model to load/where the model trained will be saved if `auto_save=True`. If None the
@@ -29,9 +50,26 @@ class GensimDoc2Vec(GensimWordEmbeddingLearner):
     def __init__(self, reference: str = None, auto_save: bool = True, **kwargs):
         super().__init__(reference, auto_save, ".kv", **kwargs)
 
-    def fit_model(self, corpus: List):
-        tagged_data = [TaggedDocument(doc, [i]) for i, doc in enumerate(corpus)]
-        self.model = Doc2Vec(tagged_data, **self.additional_parameters).wv
+    def fit_model(self, corpus: Iterable[List[str]]):
+        self._set_trainable_model(Doc2Vec(TaggedCorpus(corpus), **self.additional_parameters))
+
+    def update_model(self, corpus: Iterable[List[str]]):
+        trainable_model = self._get_trainable_model()
+
+        # new documents are tagged after the ones the model has been trained on
+        tagged_corpus = TaggedCorpus(corpus, first_tag=len(trainable_model.dv))
+        trainable_model.build_vocab(tagged_corpus, update=True)
+
+        # gensim adds the tags of the new documents to the document vectors without adding rows for them, so vectors
+        # of the new documents are randomly initialized before training
+        trainable_model.dv.resize_vectors(seed=trainable_model.seed)
+        trainable_model.train(tagged_corpus, total_examples=trainable_model.corpus_count,
+                              epochs=trainable_model.epochs)
+
+        self._set_trainable_model(trainable_model)
+
+    def load_trainable_model(self):
+        return Doc2Vec.load(self.trainable_reference)
 
     def __str__(self):
         return "GensimDoc2Vec"
@@ -1,6 +1,9 @@
 from __future__ import annotations
+import json
+import os
+import tempfile
 from abc import abstractmethod
-from typing import List, Union, TYPE_CHECKING
+from typing import List, Union, TYPE_CHECKING, Callable, Iterator, Optional
 
 import numpy as np
 from gensim.models import KeyedVectors
@@ -15,6 +18,110 @@ from clayrs.utils.const import logger
 from clayrs.utils.context_managers import get_progbar
 
 
+class StreamingCorpus:
+    """
+    Restartable iterable over the documents of a raw source, processed in order to be used as training data by an
+    EmbeddingLearner
+
+    Gensim models iterate over the training corpus several times (once to build the vocabulary and once for each
+    training epoch): the first iteration reads the source and preprocesses each document lazily, while the processed
+    documents are spooled to a temporary file on disk (one JSON encoded document for each line), so that every
+    following iteration simply streams them from the file without reading or preprocessing the source again and
+    without keeping the corpus in memory. If the first iteration is interrupted, the next one starts again from
+    scratch. The temporary file is deleted when `close()` is called or when the corpus is garbage collected
+
+    Args:
+        source: raw data from which documents will be extracted
+        field_list: list of fields to consider from the raw data (their contents are concatenated in a single document)
+        preprocessor_list: list of information processors applied to each document
+        data_granularity: function which turns each preprocessed document into the format expected by the model
+            (for example a list of tokens)
+    """
+
+    def __init__(self, source: RawInformationSource, field_list: List[str],
+                 preprocessor_list: List[InformationProcessor], data_granularity: Callable[[str], Union[List[str], str]]):
+        self.__source = source
+        self.__field_list = field_list
+        self.__preprocessor_list = preprocessor_list
+        self.__data_granularity = data_granularity
+
+        self.__spool_dir = tempfile.TemporaryDirectory(prefix="clayrs_corpus_")
+        self.__spool_path = os.path.join(self.__spool_dir.name, "corpus.jsonl")
+        # number of documents spooled, set once the source has been completely read and processed
+        self.__len: Optional[int] = None
+
+    @property
+    def processed(self) -> bool:
+        """
+        True if the source has been completely read and processed
+        """
+        return self.__len is not None
+
+    def _process_source(self) -> Iterator[Union[List[str], str]]:
+        n_docs = 0
+
+        # the source is passed as an iterator, otherwise the progress bar would read it once more to compute its length
+        with open(self.__spool_path, 'w', encoding='utf-8') as spool_file, \
+                get_progbar(iter(self.__source)) as pbar:
+            pbar.set_description(f"Preprocessing {', '.join(self.__field_list)} for all contents")
+
+            for doc in pbar:
+                doc_data = ""
+                for field_name in self.__field_list:
+                    doc_data += " " + doc[field_name].lower()
+                for preprocessor in self.__preprocessor_list:
+                    doc_data = preprocessor.process(doc_data)
+
+                doc_data = self.__data_granularity(doc_data)
+                spool_file.write(json.dumps(doc_data) + "\n")
+                n_docs += 1
+                yield doc_data
+
+        self.__len = n_docs
+
+    def _read_spool(self) -> Iterator[Union[List[str], str]]:
+        with open(self.__spool_path, encoding='utf-8') as spool_file:
+            for line in spool_file:
+                yield json.loads(line)
+
+    def close(self):
+        """
+        Deletes the temporary file where the processed documents are spooled. The corpus can't be iterated anymore
+        after calling this method
+        """
+        self.__spool_dir.cleanup()
+
+    def __iter__(self) -> Iterator[Union[List[str], str]]:
+        if self.processed:
+            return self._read_spool()
+
+        return self._process_source()
+
+    def __len__(self):
+        return self.__len if self.processed else len(self.__source)
+
+
+class MappedCorpus:
+    """
+    Restartable iterable which applies a function to each document of a corpus every time it is iterated, so that
+    derived corpora (e.g. the bag of words of each document) are never materialized in memory
+
+    Args:
+        corpus: restartable iterable of documents
+        map_function: function applied to each document
+    """
+
+    def __init__(self, corpus, map_function: Callable):
+        self.__corpus = corpus
+        self.__map_function = map_function
+
+    def __iter__(self):
+        return (self.__map_function(doc) for doc in self.__corpus)
+
+    def __len__(self):
+        return len(self.__corpus)
+
+
 class EmbeddingLearner(EmbeddingSource):
     """
     Abstract Class for the different kinds of embedding
@@ -29,6 +136,13 @@ class EmbeddingLearner(EmbeddingSource):
     In the example, the model will be fitted on the source located in file_path on the "Plot" and "Genre" fields.
     Preprocessing will also be applied to the text in the source, in this case using NLTK
 
+    The source is streamed to the model through a `StreamingCorpus`, so documents are preprocessed only once even if
+    the model iterates over them multiple times. Learners which implement the `update_model()` method can also
+    continue the training of an already trained model on new documents (without training it from scratch) by calling
+    fit with `update=True`:
+
+        learner.fit(JSONFile(new_items_path), ['Plot', 'Genre'], NLTK(), update=True)
+
     Args:
         reference (str): path where the model is stored. If you want to train the model on the spot, pass the path where
             the model will be stored if you save it
@@ -78,7 +192,8 @@ class EmbeddingLearner(EmbeddingSource):
         raise NotImplementedError
 
     def fit(self, source: RawInformationSource, field_list: List[str],
-            preprocessor_list: Union[List[InformationProcessor], InformationProcessor] = None):
+            preprocessor_list: Union[List[InformationProcessor], InformationProcessor] = None,
+            update: bool = False):
         """
         Method that handles the creation and storing of the model
         If the attribute auto_save is True, it automatically stores the model locally after it has been trained
@@ -88,7 +203,12 @@ class EmbeddingLearner(EmbeddingSource):
             field_list (List[str]): list of fields to consider from the raw data
             preprocessor_list (Union[List[InformationProcessor], InformationProcessor]): either a list or a single
                 information processor that will be used to process the raw data in the fields defined in field list
+            update (bool): if True, the training of the already trained model (fitted by this learner or stored in
+                its reference) continues on the documents of the source instead of training a new model. Only
+                learners which implement the `update_model()` method support it
         """
+        if update and not hasattr(self, 'update_model'):
+            raise ValueError(f"{self} doesn't support incremental training, fit a new model instead")
 
         if preprocessor_list is None:
             preprocessor_list = []
@@ -96,25 +216,52 @@ class EmbeddingLearner(EmbeddingSource):
         if not isinstance(preprocessor_list, list):
             preprocessor_list = [preprocessor_list]
 
-        corpus = self.extract_corpus(source, field_list, preprocessor_list)
+        corpus = self.corpus_iterator(source, field_list, preprocessor_list)
 
-        logger.info("Fitting model with extracted corpus...")
-        self.fit_model(corpus)
+        try:
+            if update:
+                logger.info("Updating model with extracted corpus...")
+                self.update_model(corpus)
+            else:
+                logger.info("Fitting model with extracted corpus...")
+                self.fit_model(corpus)
+        finally:
+            corpus.close()
 
         if self._auto_save and self.reference is not None:
             self.save()
 
     @abstractmethod
-    def fit_model(self, corpus: List):
+    def fit_model(self, corpus: Union[List, StreamingCorpus]):
         """
         This method creates the model, in different ways according to the various implementations.
         The model isn't then returned, but gets stored in the 'model' instance attribute.
 
         Args:
-            corpus (List): data extracted and processed from the raw source which will be used to train the model
+            corpus: data extracted and processed from the raw source which will be used to train the model. It can be
+                iterated multiple times
         """
         raise NotImplementedError
 
+    def corpus_iterator(self, source: RawInformationSource, field_list: List[str],
+                        preprocessor_list: List[InformationProcessor]) -> StreamingCorpus:
+        """
+        Returns a restartable iterable over the data of the source, from the fields specified in the field_list
+        argument, processed using the preprocessor_list passed as argument. Data is processed lazily the first time
+        the iterable is consumed and it's spooled on disk for the following iterations. The iterable should be closed
+        once it is not needed anymore
+
+        Args:
+            source (RawInformationSource): raw data on which the fitting process will be done
+            field_list (List[str]): list of fields to consider from the raw data
+            preprocessor_list (Union[List[InformationProcessor], InformationProcessor]): either a list or a single
+                information processor that will be used to process the raw data in the fields defined in field list
+
+        Returns:
+            corpus (StreamingCorpus): restartable iterable of processed data
+        """
+        return StreamingCorpus(source, field_list, preprocessor_list, self.process_data_granularity)
+
     def extract_corpus(self, source: RawInformationSource, field_list: List[str],
                        preprocessor_list: List[InformationProcessor]) -> list:
         """
@@ -130,20 +277,11 @@ class EmbeddingLearner(EmbeddingSource):
         Returns:
             corpus (list): List of processed data
         """
-        corpus = []
-        # iter the source
-        with get_progbar(list(source)) as pbar:
-
-            for doc in pbar:
-                pbar.set_description(f"Preprocessing {', '.join(field_list)} for all contents")
-                doc_data = ""
-                for field_name in field_list:
-                    # apply preprocessing and save the data in the list
-                    doc_data += " " + doc[field_name].lower()
-                for preprocessor in preprocessor_list:
-                    doc_data = preprocessor.process(doc_data)
-                corpus.append(self.process_data_granularity(doc_data))
-        return corpus
+        corpus = self.corpus_iterator(source, field_list, preprocessor_list)
+        try:
+            return list(corpus)
+        finally:
+            corpus.close()
 
     @abstractmethod
     def process_data_granularity(self, doc_data: str) -> Union[List[str], str]:
@@ -207,11 +345,26 @@ class WordEmbeddingLearner(EmbeddingLearner):
 class GensimWordEmbeddingLearner(WordEmbeddingLearner):
     """
     Class that contains the generic behavior of the Gensim models
+
+    The word vectors are stored in the reference path, while the whole gensim model (needed in order to continue the
+    training with `fit(..., update=True)`) is stored next to it, in the same path with the `.model` extension
     """
 
     def __init__(self, reference: str, auto_save: bool, extension: str, **kwargs):
         super().__init__(reference, auto_save, extension, **kwargs)
 
+        self._trainable_model = None
+
+    @property
+    def trainable_reference(self) -> Optional[str]:
+        """
+        Path where the whole gensim model, which can be further trained, is stored
+        """
+        if self.reference is None:
+            return None
+
+        return os.path.splitext(self.reference)[0] + ".model"
+
     def get_vector_size(self) -> int:
         return self.model.vector_size
 
@@ -221,11 +374,55 @@ class GensimWordEmbeddingLearner(WordEmbeddingLearner):
     def load_model(self):
         return KeyedVectors.load_word2vec_format(self.reference, binary=True)
 
+    @abstractmethod
+    def load_trainable_model(self):
+        """
+        Loads the whole gensim model stored in the trainable reference
+        """
+        raise NotImplementedError
+
+    def _get_trainable_model(self):
+        if self._trainable_model is None:
+            if self.trainable_reference is None or not os.path.isfile(self.trainable_reference):
+                raise FileNotFoundError(f"No trained model to update was found for {self}! Fit a model first")
+
+            self._trainable_model = self.load_trainable_model()
+
+        return self._trainable_model
+
+    def _set_trainable_model(self, trainable_model):
+        self._trainable_model = trainable_model
+        self.model = trainable_model.wv
+
+    def update_model(self, corpus: Union[List, StreamingCorpus]):
+        """
+        This method continues the training of the already trained model on new data. The updated model gets stored in
+        the 'model' instance attribute.
+
+        Args:
+            corpus: data extracted and processed from the raw source which will be used to update the model. It can be
+                iterated multiple times
+        """
+        trainable_model = self._get_trainable_model()
+
+        # new words are added to the vocabulary of the model, then the model is trained only on the new documents
+        trainable_model.build_vocab(corpus, update=True)
+        trainable_model.train(corpus, total_examples=trainable_model.corpus_count, epochs=trainable_model.epochs)
+
+        self._set_trainable_model(trainable_model)
+
+    def unload_model(self):
+        self._trainable_model = None
+        super().unload_model()
+
     def save(self):
         self.model.save_word2vec_format(self.reference, binary=True)
 
+        if self._trainable_model is not None:
+            self._trainable_model.save(self.trainable_reference)
+
     @abstractmethod
-    def fit_model(self, corpus: List):
+    def fit_model(self, corpus: Union[List, StreamingCorpus]):
         raise NotImplementedError
 
     @abstractmethod
@@ -332,6 +529,20 @@ class GensimDocumentEmbeddingLearner(DocumentEmbeddingLearner):
         # gensim requires document data to be tokenized in a list
         return check_tokenized(doc_data)
 
+    @staticmethod
+    def bow_corpus(corpus: Union[List, StreamingCorpus], dictionary) -> MappedCorpus:
+        """
+        Restartable iterable over the bag of words of each document of the corpus, computed with the gensim
+        dictionary passed as argument
+        """
+        return MappedCorpus(corpus, dictionary.doc2bow)
+
+    def _get_trained_model(self):
+        if self.model is None:
+            raise FileNotFoundError(f"No trained model to update was found for {self}! Fit a model first")
+
+        return self.model
+
     def get_embedding_sentence(self, document_tokenized: List[str]) -> np.ndarray:
         raise NotImplementedError
 
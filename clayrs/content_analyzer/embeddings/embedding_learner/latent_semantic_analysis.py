@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Iterable
 
 import gensim
 from gensim.corpora import Dictionary
@@ -24,6 +24,9 @@ class GensimLatentSemanticAnalysis(GensimDocumentEmbeddingLearner):
     Additional parameters regarding the model itself could be passed, check [gensim documentation](https://radimrehurek.com/gensim/models/lsimodel.html)
     to see what else can be customized
 
+    The training of a fitted model can be continued on new documents by calling `fit(..., update=True)`: the
+    vocabulary of the model can't change, so words which are not in the vocabulary are ignored
+
     Args:
         reference: Path of the model to load/where the model trained will be saved if `auto_save=True`. If None the
             trained model won't be saved after training and will only be used to produce contents in the current run
@@ -33,11 +36,15 @@ class GensimLatentSemanticAnalysis(GensimDocumentEmbeddingLearner):
     def __init__(self, reference: str = None, auto_save: bool = True,  **kwargs):
         super().__init__(reference, auto_save, ".model", **kwargs)
 
-    def fit_model(self, corpus: List):
+    def fit_model(self, corpus: Iterable[List[str]]):
         dictionary = Dictionary(corpus)
-        word_docs_matrix = [dictionary.doc2bow(doc) for doc in corpus]
+        word_docs_matrix = self.bow_corpus(corpus, dictionary)
         self.model = LsiModel(word_docs_matrix, id2word=dictionary, **self.additional_parameters)
 
+    def update_model(self, corpus: Iterable[List[str]]):
+        model = self._get_trained_model()
+        model.add_documents(self.bow_corpus(corpus, model.id2word))
+
     def load_model(self):
         return LsiModel.load(self.reference)
 
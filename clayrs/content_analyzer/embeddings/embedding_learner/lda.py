@@ -1,9 +1,9 @@
-from typing import List
+from typing import List, Iterable
 
 import gensim
 import numpy as np
 from gensim.corpora import Dictionary
-from gensim.models import LdaModel
+from gensim.models import LdaModel, LdaMulticore
 
 from clayrs.content_analyzer.embeddings.embedding_learner.embedding_learner import GensimDocumentEmbeddingLearner
 from clayrs.content_analyzer.utils.check_tokenization import check_tokenized
@@ -22,7 +22,11 @@ class GensimLDA(GensimDocumentEmbeddingLearner):
     produce contents in the current run
 
     Additional parameters regarding the model itself could be passed, check [gensim documentation](https://radimrehurek.com/gensim/models/ldamodel.html)
-    to see what else can be customized
+    to see what else can be customized. If the `workers` parameter is passed, the model is trained in parallel
+    using the gensim `LdaMulticore` implementation
+
+    The training of a fitted model can be continued on new documents by calling `fit(..., update=True)`: the
+    vocabulary of the model can't change, so words which are not in the vocabulary are ignored
 
     Args:
         reference: Path of the model to load/where the model trained will be saved if `auto_save=True`. If None the
@@ -33,10 +37,16 @@ class GensimLDA(GensimDocumentEmbeddingLearner):
     def __init__(self, reference: str = None, auto_save: bool = True, **kwargs):
         super().__init__(reference, auto_save, ".model", **kwargs)
 
-    def fit_model(self, corpus: List):
+    def fit_model(self, corpus: Iterable[List[str]]):
         dictionary = Dictionary(corpus)
-        word_docs_matrix = [dictionary.doc2bow(doc) for doc in corpus]
-        self.model = LdaModel(word_docs_matrix, id2word=dictionary, **self.additional_parameters)
+        word_docs_matrix = self.bow_corpus(corpus, dictionary)
+
+        model_class = LdaMulticore if 'workers' in self.additional_parameters else LdaModel
+        self.model = model_class(word_docs_matrix, id2word=dictionary, **self.additional_parameters)
+
+    def update_model(self, corpus: Iterable[List[str]]):
+        model = self._get_trained_model()
+        model.update(self.bow_corpus(corpus, model.id2word))
 
     def load_model(self):
         return LdaModel.load(self.reference)
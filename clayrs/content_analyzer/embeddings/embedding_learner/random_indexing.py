@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Iterable
 
 import numpy as np
 import gensim
@@ -24,6 +24,9 @@ class GensimRandomIndexing(GensimDocumentEmbeddingLearner):
     Additional parameters regarding the model itself could be passed, check [gensim documentation](https://radimrehurek.com/gensim/models/rpmodel.html)
     to see what else can be customized
 
+    The random projections of a fitted model can't be extended to new words, so the training of a RandomIndexing
+    model can't be continued on new documents: `fit(..., update=True)` raises a ValueError, fit a new model instead
+
     Args:
         reference: Path of the model to load/where the model trained will be saved if `auto_save=True`. If None the
             trained model won't be saved after training and will only be used to produce contents in the current run
@@ -33,9 +36,9 @@ class GensimRandomIndexing(GensimDocumentEmbeddingLearner):
     def __init__(self, reference: str = None, auto_save: bool = True, **kwargs):
         super().__init__(reference, auto_save, ".model", **kwargs)
 
-    def fit_model(self, corpus: List):
+    def fit_model(self, corpus: Iterable[List[str]]):
         dictionary = Dictionary(corpus)
-        word_docs_matrix = [dictionary.doc2bow(doc) for doc in corpus]
+        word_docs_matrix = self.bow_corpus(corpus, dictionary)
         self.model = RpModel(word_docs_matrix, id2word=dictionary, **self.additional_parameters)
 
     def load_model(self):
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Iterable
 
 from gensim.models import Word2Vec
 
@@ -18,7 +18,10 @@ class GensimWord2Vec(GensimWordEmbeddingLearner):
     produce contents in the current run
 
     Additional parameters regarding the model itself could be passed, check [gensim documentation](https://radimrehurek.com/gensim/models/word2vec.html)
-    to see what else can be customized
+    to see what else can be customized (e.g. `workers=4` to train the model with 4 worker threads)
+
+    The training of a fitted model can be continued on new documents by calling `fit(..., update=True)`: new words
+    are added to the vocabulary and the model is trained only on the new documents
 
     Args:
         reference: Path of the model to load/where the model trained will be saved if `auto_save=True`. If None the
@@ -29,8 +32,11 @@ class GensimWord2Vec(GensimWordEmbeddingLearner):
     def __init__(self, reference: str = None, auto_save: bool = True, **kwargs):
         super().__init__(reference, auto_save, ".kv", **kwargs)
 
-    def fit_model(self, corpus: List):
-        self.model = Word2Vec(sentences=corpus, **self.additional_parameters).wv
+    def fit_model(self, corpus: Iterable[List[str]]):
+        self._set_trainable_model(Word2Vec(sentences=corpus, **self.additional_parameters))
+
+    def load_trainable_model(self):
+        return Word2Vec.load(self.trainable_reference)
 
     def __str__(self):
         return "GensimWord2Vec"
@@ -5,10 +5,7 @@ from collections import defaultdict
 
 import pandas as pd
 import numpy as np
-from typing import List, TYPE_CHECKING
-from SPARQLWrapper import SPARQLWrapper, JSON, POST, GET
-from SPARQLWrapper.SPARQLExceptions import URITooLong
-from babelpy.babelfy import BabelfyClient
+from typing import List, TYPE_CHECKING, Union, Optional
 
 if TYPE_CHECKING:
     from clayrs.content_analyzer.raw_information_source import RawInformationSource
@@ -16,8 +13,10 @@ if TYPE_CHECKING:
 
 from clayrs.content_analyzer.content_representation.content import PropertiesDict, EntitiesProp
 from clayrs.utils.const import logger
-from clayrs.utils.context_managers import get_progbar
+from clayrs.utils.context_managers import get_iterator_thread
 from clayrs.content_analyzer.utils.check_tokenization import check_not_tokenized
+from clayrs.content_analyzer.utils.sparql_endpoint import SPARQLEndpoint, RemoteSPARQLEndpoint
+from clayrs.content_analyzer.utils.entity_linking_client import EntityLinkingClient, BabelfyLinkingClient
 
 
 class ExogenousPropertiesRetrieval(ABC):
@@ -54,6 +53,14 @@ class ExogenousPropertiesRetrieval(ABC):
         self._check_mode(mode)
         self.__mode = mode
 
+    @property
+    def source_fields(self) -> Optional[List[str]]:
+        """
+        Fields of the raw source read by the technique, or None if the technique may read any field of the raw
+        source
+        """
+        return None
+
     @abstractmethod
     def get_properties(self, raw_source: RawInformationSource) -> List[ExogenousPropertiesRepresentation]:
         raise NotImplementedError
@@ -148,6 +155,10 @@ class PropertiesFromDataset(ExogenousPropertiesRetrieval):
         if mode not in modalities:
             raise ValueError(f"mode={mode} not supported! Valid modalities are {modalities}")
 
+    @property
+    def source_fields(self) -> Optional[List[str]]:
+        return self.__field_name_list
+
     def get_properties(self, raw_source: RawInformationSource) -> List[PropertiesDict]:
 
         logger.info("Extracting exogenous properties from local dataset")
@@ -215,70 +226,74 @@ class DBPediaMappingTechnique(ExogenousPropertiesRetrieval):
             rdfs:label form (e.g. "http://dbpedia.org/ontology/director" rather than "film director")
         max_timeout: Sometimes when mapping content to dbpedia, a batch of query may take longer than the max time
             allowed by the server due to internet issues: the framework will re-try the exact query `max_timeout` times
-            before raising a `TimeoutError`
+            before raising a `TimeoutError`. Only used if `endpoint` is a url
+        endpoint: SPARQL endpoint which will be queried. It can be the url of a remote endpoint or a `SPARQLEndpoint`
+            object (e.g. a `LocalSPARQLEndpoint` backed by an in-process rdflib graph, useful as local stand-in of
+            DBPedia)
+        batch_size: Labels of the contents to map (and uris of the mapped contents) are split in batches of
+            `batch_size` elements, and a separate query is performed for each batch
+        max_workers: Maximum number of batch queries performed concurrently. If set to `0`, `min(32, os.cpu_count() +
+            4)` workers will be used
+        cache_path: Path of the file where the results of each query are persisted, so that following runs won't
+            query the endpoint again for the same data. If None, no result is persisted. Only used if `endpoint` is a
+            url (otherwise the cache of the `SPARQLEndpoint` object is used)
     """
 
     def __init__(self, entity_type: str, label_field: str, lang: str = 'EN',
                  mode: str = 'only_retrieved_evaluated', return_prop_as_uri: bool = False,
-                 max_timeout: int = 5):
+                 max_timeout: int = 5, endpoint: Union[str, SPARQLEndpoint] = "https://dbpedia.org/sparql",
+                 batch_size: int = 100, max_workers: int = 4, cache_path: Optional[str] = None):
         super().__init__(mode)
 
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer!")
+
         self._entity_type = entity_type
         self._label_field = label_field
         self._prop_as_uri = return_prop_as_uri
         self._lang = lang
         self._max_timeout = max_timeout
+        self._batch_size = batch_size
+        self._max_workers = max_workers
 
-        self._sparql = SPARQLWrapper("https://dbpedia.org/sparql")
-        self._sparql.setReturnFormat(JSON)
+        if isinstance(endpoint, str):
+            endpoint = RemoteSPARQLEndpoint(endpoint, max_timeout=max_timeout, cache_path=cache_path)
+
+        self._endpoint = endpoint
 
         self._class_properties = self._get_properties_class()
 
+    @property
+    def endpoint(self) -> SPARQLEndpoint:
+        return self._endpoint
+
     def _query_dbpedia(self, query: str):
+        return self._endpoint.query(query)
 
-        timeout_counter = 0
-        self._sparql.setQuery(query)
-        self._sparql.setMethod(GET)
+    def _split_in_batches(self, elements: list) -> List[list]:
+        return [elements[i:i + self._batch_size] for i in range(0, len(elements), self._batch_size)]
 
-        while True:
-            try:
-                result = self._sparql.query()
-                if result.response.status == 200:
-                    timeout_counter = 0
-                    break
-                elif result.response.status == 206:
-                    if timeout_counter >= self._max_timeout:
-                        raise TimeoutError("Maximum number of trials reached!")
-
-                    logger.warning(f"Timeout occurred! - {timeout_counter + 1} out of {self._max_timeout} possible \n"
-                                   f"The timeout counter will be reset as soon as the request goes through")
-                    timeout_counter += 1
-                    query += '\n'  # add space to avoid query plan cache so that we perform a new request
-                    self._sparql.setQuery(query)
-            except URITooLong:
-                self._sparql.setMethod(POST)
-
-        return result.convert()["results"]["bindings"]
-
-    def _get_uris_all_contents(self, raw_source: RawInformationSource):
+    def _get_uris_batch(self, labels_batch: List[str]) -> list:
         prefixes = "PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> "
         prefixes += "PREFIX dbo: <http://dbpedia.org/ontology/> "
         prefixes += "PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#> "
         prefixes += "PREFIX foaf: <http://xmlns.com/foaf/0.1/> "
 
-        all_contents_labels_original = [str(raw_content[self._label_field]) for raw_content in raw_source]
-
         select_clause = 'SELECT DISTINCT ?uri ?title '
         where_clause = 'WHERE { ' \
-                       '?uri rdf:type dbo:Film . ' \
+                       f'?uri rdf:type {self._entity_type} . ' \
                        '?uri rdfs:label ?title . ' \
                        'BIND(str(?title) as ?str_label) . ' \
                        f'filter langMatches(lang(?title), "{self._lang}") '
 
-        contents_taken = []
+        contents_taken = set()
         results = []
         while True:
-            contents_missing = set(all_contents_labels_original).difference(set(contents_taken))
+            # labels are sorted so that the same batch always produces the same query (and so it can be cached)
+            contents_missing = sorted(set(labels_batch).difference(contents_taken))
+            if not contents_missing:
+                break
+
             values_incomplete = ', '.join(f'"{wrapped}"' for wrapped in contents_missing)
             filter_query = f'filter(?str_label in ({values_incomplete}))'
             query_incomplete = prefixes + select_clause + where_clause + filter_query + "}"
@@ -290,10 +305,22 @@ class DBPediaMappingTechnique(ExogenousPropertiesRetrieval):
                 break
 
             results.extend(result_incomplete)
-            contents_taken.extend([row["title"]["value"] for row in result_incomplete])
+            contents_taken.update(row["title"]["value"] for row in result_incomplete)
+
+        return results
+
+    def _get_uris_all_contents(self, raw_source: RawInformationSource):
+        all_contents_labels_original = [str(raw_content[self._label_field]) for raw_content in raw_source]
 
-            logger.info(f"Contents mapped so far: {len(results)} of {len(all_contents_labels_original)} "
-                        f"(ideal, tipically less are mapped)")
+        labels_batches = self._split_in_batches(sorted(set(all_contents_labels_original)))
+
+        results = []
+        with get_iterator_thread(self._max_workers, self._get_uris_batch, labels_batches,
+                                 keep_order=True, progress_bar=True, total=len(labels_batches)) as pbar:
+            pbar.set_description("Mapping contents to DBPedia")
+
+            for result_batch in pbar:
+                results.extend(result_batch)
 
         logger.info(f"Contents mapped in total: {len(results)}")
 
@@ -337,10 +364,7 @@ class DBPediaMappingTechnique(ExogenousPropertiesRetrieval):
 
         return properties_df
 
-    def _retrieve_properties_contents(self, uris: pd.DataFrame):
-
-        logger.info("Extracting properties for mapped contents...")
-
+    def _retrieve_properties_batch(self, uris_batch: List[str]) -> list:
         query = "PREFIX dbo: <http://dbpedia.org/ontology/> "
         query += "SELECT ?uri ?property ?o WHERE {{ SELECT DISTINCT ?uri ?property ?o WHERE {"
 
@@ -349,7 +373,7 @@ class DBPediaMappingTechnique(ExogenousPropertiesRetrieval):
         query += "} "
 
         query += "VALUES ?uri { "
-        query += " ".join([f"<{uri_item}>" for uri_item in uris['uri']])
+        query += " ".join([f"<{uri_item}>" for uri_item in uris_batch])
         query += "} "
 
         query += "OPTIONAL {?uri ?property ?o . } "
@@ -369,6 +393,22 @@ class DBPediaMappingTechnique(ExogenousPropertiesRetrieval):
 
             results.extend(result_incomplete)
 
+        return results
+
+    def _retrieve_properties_contents(self, uris: pd.DataFrame):
+
+        logger.info("Extracting properties for mapped contents...")
+
+        uris_batches = self._split_in_batches(sorted(set(uris['uri'])))
+
+        results = []
+        with get_iterator_thread(self._max_workers, self._retrieve_properties_batch, uris_batches,
+                                 keep_order=True, progress_bar=True, total=len(uris_batches)) as pbar:
+            pbar.set_description("Retrieving properties from DBPedia")
+
+            for result_batch in pbar:
+                results.extend(result_batch)
+
         result_dict = defaultdict(lambda: defaultdict(list))
         for row in results:
 
@@ -582,6 +622,8 @@ class DBPediaMappingTechnique(ExogenousPropertiesRetrieval):
         elif self.mode == 'all':
             prop_dict_list = self._get_all_properties(uris, all_properties, raw_source)
 
+        self._endpoint.save_cache()
+
         return prop_dict_list
 
     def __str__(self):
@@ -589,7 +631,8 @@ class DBPediaMappingTechnique(ExogenousPropertiesRetrieval):
 
     def __repr__(self):
         return f'DBPediaMappingTechnique(mode={self.mode}, entity type={self._entity_type}, ' \
-               f'label_field={self._label_field}, prop_as_uri={self._prop_as_uri}, max_timeout={self._max_timeout})'
+               f'label_field={self._label_field}, prop_as_uri={self._prop_as_uri}, max_timeout={self._max_timeout}, ' \
+               f'endpoint={self._endpoint!r}, batch_size={self._batch_size}, max_workers={self._max_workers})'
 
 
 class EntityLinking(ExogenousPropertiesRetrieval):
@@ -616,51 +659,85 @@ class BabelPyEntityLinking(EntityLinking):
     * 'globalScore',
     * 'source'
 
+    Contents are linked concurrently (at most `max_workers` requests are in flight at the same time) and contents
+    with the same text are linked only once. The requests are performed by an `EntityLinkingClient`, which caches
+    the entities found for each text and takes care of rate limiting and retries: by default a
+    `BabelfyLinkingClient` is used, but any client can be injected (e.g. one with a different rate limit or one
+    which queries a local stub of the service)
+
     Args:
         field_to_link: Field of the raw source which will be used to search for the content properties in BabelFy
-        api_key: String obtained by registering to babelfy website. If None only few queries can be executed
-        lang: Language of the properties to retrieve
+        api_key: String obtained by registering to babelfy website. If None only few queries can be executed. Only
+            used if no `client` is passed
+        lang: Language of the properties to retrieve. Only used if no `client` is passed
+        client: Client used to link the contents. If None, a `BabelfyLinkingClient` with the specified `api_key`,
+            `lang` and `cache_path` will be used
+        max_workers: Maximum number of requests performed concurrently. If set to `0`, `min(32, os.cpu_count() + 4)`
+            workers will be used
+        cache_path: Path of the file where the entities linked for each text are persisted, so that following runs
+            won't link the same texts again. If None, no entity is persisted. Only used if no `client` is passed
     """
 
-    def __init__(self, field_to_link: str, api_key: str = None, lang: str = "EN"):
+    def __init__(self, field_to_link: str, api_key: str = None, lang: str = "EN",
+                 client: Optional[EntityLinkingClient] = None, max_workers: int = 4, cache_path: Optional[str] = None):
         super().__init__("all_retrieved")  # fixed mode since it doesn't make sense for babelfy
         self.__field_to_link = field_to_link
         self.__api_key = api_key
         self.__lang = lang
-        self.__babel_client = BabelfyClient(self.__api_key, {"lang": lang})
+        self.__max_workers = max_workers
 
-    def get_properties(self, raw_source: RawInformationSource) -> List[EntitiesProp]:
-        properties_list = []
-        logger.info("Performing Entity Linking with BabelFy")
-        with get_progbar(list(raw_source)) as pbar:
-            for raw_content in pbar:
-                data_to_disambiguate = check_not_tokenized(raw_content[self.__field_to_link])
+        if client is None:
+            client = BabelfyLinkingClient(self.__api_key, self.__lang, cache_path=cache_path)
+
+        self.__client = client
+
+    @property
+    def client(self) -> EntityLinkingClient:
+        return self.__client
 
-                self.__babel_client.babelfy(data_to_disambiguate)
+    @property
+    def source_fields(self) -> Optional[List[str]]:
+        return [self.__field_to_link]
+
+    @staticmethod
+    def _entities_to_properties(entities: List[dict]) -> EntitiesProp:
+        properties_content = {}
 
-                properties_content = {}
-                try:
-                    if self.__babel_client.merged_entities is not None:
+        for entity in entities:
+            properties_entity = {'babelSynsetID': '', 'DBPediaURL': '', 'BabelNetURL': '', 'score': '',
+                                 'coherenceScore': '', 'globalScore': '', 'source': ''}
+
+            for key in properties_entity:
+                if entity.get(key) is not None:
+                    properties_entity[key] = entity[key]
+
+            properties_content[entity['text']] = properties_entity
+
+        return EntitiesProp(properties_content)
+
+    def get_properties(self, raw_source: RawInformationSource) -> List[EntitiesProp]:
+        logger.info("Performing Entity Linking with BabelFy")
 
-                        for entity in self.__babel_client.merged_entities:
-                            properties_entity = {'babelSynsetID': '', 'DBPediaURL': '', 'BabelNetURL': '', 'score': '',
-                                                 'coherenceScore': '', 'globalScore': '', 'source': ''}
+        all_texts = [check_not_tokenized(raw_content[self.__field_to_link]) for raw_content in raw_source]
 
-                            for key in properties_entity:
-                                if entity.get(key) is not None:
-                                    properties_entity[key] = entity[key]
+        # each distinct text is linked only once
+        unique_texts = list(dict.fromkeys(all_texts))
 
-                            properties_content[entity['text']] = properties_entity
+        try:
+            with get_iterator_thread(self.__max_workers, self.__client.link, unique_texts,
+                                     keep_order=True, progress_bar=True, total=len(unique_texts)) as pbar:
+                pbar.set_description("Linking contents")
 
-                    properties_list.append(EntitiesProp(properties_content))
-                except AttributeError:
-                    raise AttributeError("BabelFy limit reached! Insert an api key or change it if you inserted one!")
+                entities_text = dict(zip(unique_texts, pbar))
+        finally:
+            # entities linked so far are persisted even if linking fails
+            self.__client.save_cache()
 
-        return properties_list
+        return [self._entities_to_properties(entities_text[text]) for text in all_texts]
 
     def __str__(self):
         return "BabelPyEntityLinking"
 
     def __repr__(self):
         return f'BabelPyEntityLinking(field_to_link={self.__field_to_link}, api_key={self.__api_key}, ' \
-               f'lang={self.__lang})'
+               f'lang={self.__lang}, client={self.__client!r}, max_workers={self.__max_workers})'
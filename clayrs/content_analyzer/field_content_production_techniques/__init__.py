@@ -2,6 +2,6 @@ from . import embedding_technique
 
 from .embedding_technique import *
 from .visual_techniques import *
-from .tf_idf import WhooshTfIdf, SkLearnTfIdf
+from .tf_idf import WhooshTfIdf, SkLearnTfIdf, SkLearnStreamingTfIdf
 from .field_content_production_technique import OriginalData, FromNPY
 from .synset_document_frequency import PyWSDSynsetDocumentFrequency
@@ -13,7 +13,8 @@ if TYPE_CHECKING:
     from clayrs.content_analyzer.content_representation.content import FieldRepresentation
     from clayrs.content_analyzer.information_processor.postprocessors.postprocessor import PostProcessor
 
-from clayrs.content_analyzer.content_representation.content import FeaturesBagField, SimpleField, EmbeddingField
+from clayrs.content_analyzer.content_representation.content import FeaturesBagField, SimpleField, EmbeddingField, \
+    FeaturesVocabulary
 from clayrs.content_analyzer.information_processor.information_processor_abstract import InformationProcessor
 from clayrs.content_analyzer.raw_information_source import RawInformationSource
 from clayrs.content_analyzer.utils.check_tokenization import check_not_tokenized
@@ -361,18 +362,22 @@ class TfIdfTechnique(CollectionBasedTechnique):
     def __init__(self):
         self._tfidf_matrix: Optional[csr_matrix] = None
         self._feature_names: Optional[List[str]] = None
+        self._vocabulary: Optional[FeaturesVocabulary] = None
 
     def produce_single_repr(self, content_position: int) -> FeaturesBagField:
         """
         Retrieves the tf-idf values, for terms in document in the defined content_position,
         from the pre-computed word - document matrix.
+
+        All the representations produced share the same vocabulary of terms
         """
-        nonzero_feature_index = self._tfidf_matrix[content_position, :].nonzero()[1]
+        # the vocabulary is built only once for all contents after the dataset has been refactored
+        if self._vocabulary is None:
+            self._vocabulary = FeaturesVocabulary(self._feature_names)
 
         tfidf_sparse = self._tfidf_matrix.getrow(content_position).tocsc()
-        pos_word_tuple = [(pos, self._feature_names[pos]) for pos in nonzero_feature_index]
 
-        return FeaturesBagField(tfidf_sparse, pos_word_tuple)
+        return FeaturesBagField(tfidf_sparse, vocabulary=self._vocabulary)
 
     @abstractmethod
     def dataset_refactor(self, information_source: RawInformationSource, field_name: str,
@@ -382,6 +387,7 @@ class TfIdfTechnique(CollectionBasedTechnique):
     def delete_refactored(self):
         del self._tfidf_matrix
         del self._feature_names
+        self._vocabulary = None
 
 
 class SynsetDocumentFrequency(CollectionBasedTechnique):
@@ -392,18 +398,22 @@ class SynsetDocumentFrequency(CollectionBasedTechnique):
     def __init__(self):
         self._synset_matrix: Optional[csr_matrix] = None
         self._synset_names: Optional[List[str]] = None
+        self._vocabulary: Optional[FeaturesVocabulary] = None
 
     def produce_single_repr(self, content_position: int) -> FeaturesBagField:
         """
         Retrieves the tf-idf values, for terms in document in the defined content_position,
         from the pre-computed word - document matrix.
+
+        All the representations produced share the same vocabulary of synsets
         """
-        nonzero_feature_index = self._synset_matrix[content_position, :].nonzero()[1]
+        # the vocabulary is built only once for all contents after the dataset has been refactored
+        if self._vocabulary is None:
+            self._vocabulary = FeaturesVocabulary(self._synset_names)
 
         count_dense = self._synset_matrix.getrow(content_position).tocsc()
-        pos_word_tuple = [(pos, self._synset_names[pos]) for pos in nonzero_feature_index]
 
-        return FeaturesBagField(count_dense, pos_word_tuple)
+        return FeaturesBagField(count_dense, vocabulary=self._vocabulary)
 
     @abstractmethod
     def dataset_refactor(self, information_source: RawInformationSource, field_name: str,
@@ -413,6 +423,7 @@ class SynsetDocumentFrequency(CollectionBasedTechnique):
     def delete_refactored(self):
         del self._synset_matrix
         del self._synset_names
+        self._vocabulary = None
 
     def __repr__(self):
         return f'SynsetDocumentFrequency()'
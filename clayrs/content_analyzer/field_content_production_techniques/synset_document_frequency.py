@@ -1,7 +1,12 @@
 from __future__ import annotations
-import re
-from sklearn.feature_extraction.text import CountVectorizer
-from typing import List, TYPE_CHECKING
+import hashlib
+import os
+import time
+from collections import Counter
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+from scipy.sparse import csr_matrix
 
 if TYPE_CHECKING:
     from clayrs.content_analyzer.information_processor.information_processor_abstract import InformationProcessor
@@ -10,7 +15,9 @@ if TYPE_CHECKING:
 from clayrs.content_analyzer.field_content_production_techniques.field_content_production_technique import \
     SynsetDocumentFrequency
 from clayrs.content_analyzer.utils.check_tokenization import check_not_tokenized
-from clayrs.utils.context_managers import get_progbar
+from clayrs.content_analyzer.utils.memo_table import MemoTable
+from clayrs.utils.const import logger
+from clayrs.utils.context_managers import get_progbar, get_iterator_parallel
 
 
 class PyWSDSynsetDocumentFrequency(SynsetDocumentFrequency):
@@ -47,40 +54,167 @@ class PyWSDSynsetDocumentFrequency(SynsetDocumentFrequency):
         (0, 1)	1
     ```
 
+    The disambiguation of the documents can be distributed over multiple processes via the `num_cpus` parameter.
+    Synsets assigned to a lemma are memoized with key (lemma, pos, context), so that a lemma appearing again in the
+    same context is not disambiguated twice. By default the whole document is used as context, exactly as *PyWSD*
+    does: in this case the memo key contains a digest of the document instead of the document itself. Set the
+    `context_window` parameter to use as context only the lemmas before and after the lemma to disambiguate: the
+    smaller the window, the higher the chances of reusing memoized synsets (at the cost of using less context for the
+    disambiguation, so the synsets assigned may differ from the ones assigned using the whole document)
+
+    Args:
+        num_cpus: number of processors that must be reserved for the disambiguation. If set to `0`, all cpus
+            available will be used. Be careful though: multiprocessing in python has a substantial memory overhead!
+        context_window: number of lemmas before and after the lemma to disambiguate that are used as its context.
+            If None (default), the whole document is used as context
+        batch_size: number of documents disambiguated by a single process task
+        memo_maxsize: maximum number of synsets memoized. If None, the memoization table is unbounded
     """
-    def __init__(self):
+    def __init__(self, num_cpus: int = 1, context_window: Optional[int] = None, batch_size: int = 100,
+                 memo_maxsize: Optional[int] = 100000):
         # The import is here since pywsd has a long warm up phase that should affect the computation
         # only when effectively instantiated
         from pywsd import disambiguate
 
         self.disambiguate = disambiguate
+
+        if context_window is not None and context_window < 0:
+            raise ValueError("context_window must be a non negative integer or None!")
+
+        self.num_cpus = num_cpus
+        self.context_window = context_window
+        self.batch_size = batch_size
+        self.synset_memo = MemoTable(memo_maxsize)
+
         super().__init__()
 
+    def _disambiguate_document(self, document: str, computed_synsets: MemoTable = None) -> List[str]:
+        # same steps of the pywsd 'disambiguate' function with default parameters, but the simple lesk
+        # algorithm is called only for (lemma, pos, context) triples not memoized yet
+        from pywsd.allwords_wsd import lemmatize_sentence, simple_lesk, stopwords, wn
+
+        _, lemmas, morphy_poss = lemmatize_sentence(document, keepWordPOS=True)
+
+        # the whole document is the context of every lemma: it is built only once and a digest of it is used as key,
+        # which is stable across processes (unlike the built-in hash of strings)
+        document_context = None
+        if self.context_window is None:
+            document_context = " ".join(lemmas)
+            document_key = hashlib.blake2b(document_context.encode(), digest_size=16).digest()
+
+        synset_names = []
+        for i, (lemma, pos) in enumerate(zip(lemmas, morphy_poss)):
+            if lemma in stopwords or not wn.synsets(lemma):
+                continue
+
+            if document_context is not None:
+                context = document_context
+                memo_key = (lemma, pos, document_key)
+            else:
+                context = " ".join(lemmas[max(0, i - self.context_window): i + self.context_window + 1])
+                memo_key = (lemma, pos, context)
+
+            def compute_synset_name():
+                # as pywsd does, a lemma which can't be disambiguated is skipped instead of aborting the whole run
+                try:
+                    synset = simple_lesk(context, lemma, pos=pos, context_is_lemmatized=True)
+                except Exception as e:
+                    logger.warning(f"Lemma '{lemma}' could not be disambiguated and will be skipped: {e!r}")
+                    synset = None
+
+                synset_name = synset.name() if synset is not None else None
+
+                if computed_synsets is not None:
+                    computed_synsets[memo_key] = synset_name
+
+                return synset_name
+
+            synset_name = self.synset_memo.get_or_compute(memo_key, compute_synset_name)
+            if synset_name is not None:
+                synset_names.append(synset_name)
+
+        return synset_names
+
+    def _disambiguate_batch(self, documents: List[str]) -> Tuple[List[List[str]], MemoTable]:
+        # this is run by a different process on a copy of the technique: only synsets computed by the process
+        # (and its stats) are sent back, so that they can be merged in the memo table of the main process
+        computed_synsets = MemoTable(self.synset_memo.maxsize)
+        hits_before, misses_before = self.synset_memo.hits, self.synset_memo.misses
+
+        batch_synsets = [self._disambiguate_document(document, computed_synsets) for document in documents]
+
+        computed_synsets.hits = self.synset_memo.hits - hits_before
+        computed_synsets.misses = self.synset_memo.misses - misses_before
+
+        return batch_synsets, computed_synsets
+
     def dataset_refactor(self, information_source: RawInformationSource, field_name: str,
                          preprocessor_list: List[InformationProcessor]):
 
-        all_synsets = []
-        with get_progbar(information_source) as pbar:
-            pbar.set_description("Computing synset frequency with wordnet")
-            for raw_content in pbar:
-                processed_field_data = self.process_data(raw_content[field_name], preprocessor_list)
+        start = time.perf_counter()
 
-                processed_field_data = check_not_tokenized(processed_field_data)
+        documents = []
+        for raw_content in information_source:
+            processed_field_data = self.process_data(raw_content[field_name], preprocessor_list)
+            documents.append(check_not_tokenized(processed_field_data))
 
-                synset_list = ' '.join([synset.name()
-                                        for _, synset in self.disambiguate(processed_field_data)
-                                        if synset is not None])
-                all_synsets.append(synset_list)
+        preprocessing_time = time.perf_counter() - start
+        start = time.perf_counter()
 
-        # tokenizer based on whitespaces since one document is represented as 'mysynset.id.01 mysynset.id.02 ...'
-        def split_tok(text):
-            return re.split("\\s+", text)
+        batches = [documents[i:i + self.batch_size] for i in range(0, len(documents), self.batch_size)]
 
-        cv = CountVectorizer(tokenizer=split_tok)
-        res = cv.fit_transform(all_synsets)
-
-        self._synset_matrix = res
-        self._synset_names = cv.get_feature_names_out()
+        all_synsets = []
+        num_cpus = self.num_cpus or os.cpu_count() or 1
+        if num_cpus == 1:
+            with get_progbar(batches) as pbar:
+                pbar.set_description("Computing synset frequency with wordnet")
+                for batch in pbar:
+                    all_synsets.extend(self._disambiguate_document(document) for document in batch)
+        else:
+            with get_iterator_parallel(num_cpus, self._disambiguate_batch, batches,
+                                       progress_bar=True, total=len(batches)) as pbar:
+                pbar.set_description("Computing synset frequency with wordnet")
+
+                # results are returned in the same order of the batches
+                for batch_synsets, batch_memo in pbar:
+                    all_synsets.extend(batch_synsets)
+                    self.synset_memo.merge(batch_memo)
+
+        disambiguation_time = time.perf_counter() - start
+        start = time.perf_counter()
+
+        # synset-document matrix is built directly from the synset lists, with features sorted alphabetically
+        # as the CountVectorizer previously used did
+        vocabulary = {}
+        indptr = [0]
+        indices = []
+        counts = []
+        for document_synsets in all_synsets:
+            for synset_name, count in Counter(synset_name.lower() for synset_name in document_synsets).items():
+                indices.append(vocabulary.setdefault(synset_name, len(vocabulary)))
+                counts.append(count)
+            indptr.append(len(indices))
+
+        synset_names = np.array(list(vocabulary.keys()), dtype=object)
+        sorted_synsets = np.argsort(synset_names)
+        new_positions = np.empty(len(sorted_synsets), dtype=np.int64)
+        new_positions[sorted_synsets] = np.arange(len(sorted_synsets))
+
+        synset_matrix = csr_matrix((np.array(counts, dtype=np.int64),
+                                    new_positions[np.array(indices, dtype=np.int64)],
+                                    np.array(indptr, dtype=np.int64)),
+                                   shape=(len(all_synsets), len(vocabulary)))
+        synset_matrix.sort_indices()
+
+        self._synset_matrix = synset_matrix
+        self._synset_names = synset_names[sorted_synsets]
+
+        matrix_time = time.perf_counter() - start
+
+        memo_stats = self.synset_memo.stats()
+        logger.info(f"{str(self)} timings - preprocessing: {preprocessing_time:.2f}s, "
+                    f"disambiguation: {disambiguation_time:.2f}s, synset matrix: {matrix_time:.2f}s. "
+                    f"Memoized synsets hit rate: {memo_stats['hit_rate']:.2%}")
 
         return self._synset_matrix.shape[0]
 
@@ -88,4 +222,5 @@ class PyWSDSynsetDocumentFrequency(SynsetDocumentFrequency):
         return "PyWSDSynsetDocumentFrequency"
 
     def __repr__(self):
-        return "PyWSDSynsetDocumentFrequency()"
+        return f"PyWSDSynsetDocumentFrequency(num_cpus={self.num_cpus}, context_window={self.context_window}, " \
+               f"batch_size={self.batch_size}, memo_maxsize={self.synset_memo.maxsize})"
@@ -1,8 +1,11 @@
 from __future__ import annotations
+import itertools
+from collections import Counter
+
 import numpy as np
-from sklearn.feature_extraction import DictVectorizer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from typing import List, Union, Mapping, Iterable, Callable, TYPE_CHECKING
+from scipy.sparse import csr_matrix, vstack
+from sklearn.feature_extraction.text import TfidfVectorizer, TfidfTransformer
+from typing import List, Union, Mapping, Iterable, Callable, Dict, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from clayrs.content_analyzer.information_processor.information_processor_abstract import InformationProcessor
@@ -118,6 +121,193 @@ class SkLearnTfIdf(TfIdfTechnique):
                f"smooth_idf={self._sk_vectorizer.smooth_idf}, sublinear_tf={self._sk_vectorizer.sublinear_tf})"
 
 
+class SkLearnStreamingTfIdf(TfIdfTechnique):
+    """
+    Class that produces a sparse vector for each content representing the tf-idf scores of its terms using SkLearn,
+    without ever materializing the whole processed corpus in memory. Results are the same of the `SkLearnTfIdf`
+    technique instantiated with the same parameters, making this technique suitable for very large text catalogs
+
+    The raw source is streamed in chunks of `chunk_size` contents: each chunk is processed, tokenized with the same
+    analyzer used by the SkLearn TfidfVectorizer and turned into a sparse block of term counts, while the vocabulary
+    and the document frequencies are built incrementally. Once the source is exhausted, the CSR blocks are stacked,
+    vocabulary pruning is applied (`max_df`, `min_df`, `max_features`) and the tf-idf weighting is computed on the
+    sparse count matrix.
+
+    Please refer to [its documentation](https://scikit-learn.org/stable/modules/generated/sklearn.feature_extraction.text.TfidfVectorizer.html)
+    for more information about how tf-idf is computed
+
+    Args:
+        chunk_size: Number of contents processed and held in memory at once
+
+        max_df:
+            When building the vocabulary ignore terms that have a document
+            frequency strictly higher than the given threshold (corpus-specific
+            stop words).
+            If float in range [0.0, 1.0], the parameter represents a proportion of
+            documents, integer absolute counts.
+
+        min_df:
+            When building the vocabulary ignore terms that have a document
+            frequency strictly lower than the given threshold. This value is also
+            called cut-off in the literature.
+            If float in range of [0.0, 1.0], the parameter represents a proportion
+            of documents, integer absolute counts.
+
+        max_features:
+            If not None, build a vocabulary that only consider the top
+            max_features ordered by term frequency across the corpus.
+
+        binary:
+            If True, all non-zero term counts are set to 1. This does not mean
+            outputs will have only 0/1 values, only that the tf term in tf-idf
+            is binary. (Set idf and normalization to False to get 0/1 outputs).
+
+        dtype:
+            Precision of the tf-idf scores
+
+        norm:
+            Each output row will have unit norm, either:
+
+            - 'l2': Sum of squares of vector elements is 1. The cosine
+              similarity between two vectors is their dot product when l2 norm has
+              been applied.
+            - 'l1': Sum of absolute values of vector elements is 1.
+              See :func:`preprocessing.normalize`.
+
+        use_idf:
+            Enable inverse-document-frequency reweighting. If False, idf(t) = 1.
+
+        smooth_idf:
+            Smooth idf weights by adding one to document frequencies, as if an
+            extra document was seen containing every term in the collection
+            exactly once. Prevents zero divisions.
+
+        sublinear_tf:
+            Apply sublinear tf scaling, i.e. replace tf with 1 + log(tf).
+    """
+    def __init__(self, chunk_size: int = 10000, max_df: Union[float, int] = 1.0, min_df: Union[float, int] = 1,
+                 max_features: int = None, binary: bool = False, dtype: Callable = np.float64,
+                 norm: str = 'l2', use_idf: bool = True, smooth_idf: bool = True, sublinear_tf: bool = False):
+
+        super().__init__()
+
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be a positive integer!")
+
+        self.chunk_size = chunk_size
+        self.max_df = max_df
+        self.min_df = min_df
+        self.max_features = max_features
+        self.binary = binary
+        self.dtype = dtype
+
+        self._analyzer = TfidfVectorizer().build_analyzer()
+        self._sk_transformer = TfidfTransformer(norm=norm, use_idf=use_idf, smooth_idf=smooth_idf,
+                                                sublinear_tf=sublinear_tf)
+
+    def _count_chunk(self, chunk: List[str], vocabulary: Dict[str, int]) -> csr_matrix:
+        # vocabulary is updated in place with the new terms found in the chunk
+        indptr = [0]
+        indices = []
+        counts = []
+        for document in chunk:
+            term_counts = Counter(self._analyzer(document))
+            for term, count in term_counts.items():
+                indices.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+
+            indptr.append(len(indices))
+
+        return csr_matrix((np.array(counts, dtype=np.int64), np.array(indices, dtype=np.int64),
+                           np.array(indptr, dtype=np.int64)),
+                          shape=(len(chunk), len(vocabulary)))
+
+    def _limit_features(self, count_matrix: csr_matrix, doc_frequency: np.ndarray) -> np.ndarray:
+        # same pruning strategy of the SkLearn CountVectorizer
+        n_docs = count_matrix.shape[0]
+        max_doc_count = self.max_df if isinstance(self.max_df, int) else self.max_df * n_docs
+        min_doc_count = self.min_df if isinstance(self.min_df, int) else self.min_df * n_docs
+
+        if max_doc_count < min_doc_count:
+            raise ValueError("max_df corresponds to < documents than min_df")
+
+        mask = (doc_frequency <= max_doc_count) & (doc_frequency >= min_doc_count)
+        if self.max_features is not None and mask.sum() > self.max_features:
+            term_frequency = np.asarray(count_matrix.sum(axis=0)).ravel()
+            most_frequent = (-term_frequency[mask]).argsort()[:self.max_features]
+            new_mask = np.zeros(len(mask), dtype=bool)
+            new_mask[np.where(mask)[0][most_frequent]] = True
+            mask = new_mask
+
+        if mask.sum() == 0:
+            raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+
+        return np.where(mask)[0]
+
+    def dataset_refactor(self, information_source: RawInformationSource, field_name: str,
+                         preprocessor_list: List[InformationProcessor]) -> int:
+        # Only one chunk of processed documents is kept in memory at a time, the rest of the corpus is
+        # stored as sparse blocks of term counts
+
+        logger.info(f"Computing tf-idf with {str(self)}")
+
+        vocabulary = {}
+        doc_frequency = np.zeros(0, dtype=np.int64)
+        count_blocks = []
+
+        source_iterator = iter(information_source)
+        chunk = list(itertools.islice(source_iterator, self.chunk_size))
+        while len(chunk) != 0:
+            processed_chunk = [check_not_tokenized(self.process_data(raw_content[field_name], preprocessor_list))
+                               for raw_content in chunk]
+
+            count_block = self._count_chunk(processed_chunk, vocabulary)
+
+            doc_frequency = np.pad(doc_frequency, (0, len(vocabulary) - len(doc_frequency)))
+            doc_frequency += np.bincount(count_block.indices, minlength=len(vocabulary))
+
+            count_blocks.append(count_block)
+            chunk = list(itertools.islice(source_iterator, self.chunk_size))
+
+        # earlier blocks were created when the vocabulary was smaller
+        for count_block in count_blocks:
+            count_block.resize((count_block.shape[0], len(vocabulary)))
+
+        count_matrix = vstack(count_blocks, format='csr') if len(count_blocks) != 0 \
+            else csr_matrix((0, 0), dtype=np.int64)
+        del count_blocks
+
+        if count_matrix.shape[1] == 0:
+            raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+
+        if self.binary:
+            count_matrix.data.fill(1)
+
+        # features are sorted alphabetically, as they would be by the SkLearn TfidfVectorizer
+        feature_names = np.array(list(vocabulary.keys()), dtype=object)
+        sorted_features = np.argsort(feature_names)
+        feature_names = feature_names[sorted_features]
+        count_matrix = count_matrix[:, sorted_features]
+
+        kept_features = self._limit_features(count_matrix, doc_frequency[sorted_features])
+        feature_names = feature_names[kept_features]
+        count_matrix = count_matrix[:, kept_features]
+
+        self._tfidf_matrix = self._sk_transformer.fit_transform(count_matrix).astype(self.dtype)
+        self._feature_names = feature_names
+
+        return self._tfidf_matrix.shape[0]
+
+    def __str__(self):
+        return "SkLearnStreamingTfIdf"
+
+    def __repr__(self):
+        return f"SkLearnStreamingTfIdf(chunk_size={self.chunk_size}, max_df={self.max_df}, min_df={self.min_df}, " \
+               f"max_features={self.max_features}, binary={self.binary}, dtype={self.dtype}, " \
+               f"norm={self._sk_transformer.norm}, use_idf={self._sk_transformer.use_idf}, " \
+               f"smooth_idf={self._sk_transformer.smooth_idf}, sublinear_tf={self._sk_transformer.sublinear_tf})"
+
+
 class WhooshTfIdf(TfIdfTechnique):
     r"""
     Class that produces a sparse vector for each content representing the tf-idf scores of its terms using Whoosh
@@ -135,29 +325,48 @@ class WhooshTfIdf(TfIdfTechnique):
 
     def dataset_refactor(self, information_source: RawInformationSource, field_name: str,
                          preprocessor_list: List[InformationProcessor]):
-        # Saves the processed data in a index that will be used for frequency calculation
+        # Terms are extracted with the same field type used by the KeywordIndex, so that the data is tokenized
+        # exactly as if it was indexed. Instead of writing an index and re-opening it for every document,
+        # term frequencies are collected in a single pass and tf-idf weights are computed on the sparse matrix
 
         logger.info(f"Computing tf-idf with {str(self)}")
-        index = KeywordIndex(f'./tf_idf_{field_name}')
-        index.init_writing(True)
-        dataset_len = 0
+        field_type = KeywordIndex(f'./tf_idf_{field_name}').schema_type
+
+        vocabulary = {}
+        indptr = [0]
+        indices = []
+        frequencies = []
         for raw_content in information_source:
-            index.new_content()
             processed_field_data = self.process_data(raw_content[field_name], preprocessor_list)
 
             processed_field_data = check_tokenized(processed_field_data)
-            index.new_field(field_name, processed_field_data)
-            index.serialize_content()
-            dataset_len += 1
+            for term, freq, _, _ in field_type.index(processed_field_data):
+                indices.append(vocabulary.setdefault(term.decode('utf-8'), len(vocabulary)))
+                frequencies.append(freq)
+
+            indptr.append(len(indices))
+
+        dataset_len = len(indptr) - 1
+
+        # features are sorted alphabetically, as they would be by a DictVectorizer
+        feature_names = np.array(list(vocabulary.keys()), dtype=object)
+        sorted_features = np.argsort(feature_names)
+        new_positions = np.empty(len(sorted_features), dtype=np.int64)
+        new_positions[sorted_features] = np.arange(len(sorted_features))
 
-        index.stop_writing()
+        tfidf_matrix = csr_matrix((np.array(frequencies, dtype=np.float64),
+                                   new_positions[np.array(indices, dtype=np.int64)],
+                                   np.array(indptr, dtype=np.int64)),
+                                  shape=(dataset_len, len(vocabulary)))
+        tfidf_matrix.sort_indices()
 
-        tfidf_dicts = [index.get_tf_idf(field_name, i) for i in range(dataset_len)]
-        index.delete()
+        # each term appears at most once per document, so its document frequency is the count of its column indices
+        doc_frequency = np.bincount(tfidf_matrix.indices, minlength=tfidf_matrix.shape[1])
+        idf = np.log10(dataset_len / doc_frequency)
+        tfidf_matrix.data = (1 + np.log10(tfidf_matrix.data)) * idf[tfidf_matrix.indices]
 
-        vectorizer = DictVectorizer(sparse=True)
-        self._tfidf_matrix = vectorizer.fit_transform(tfidf_dicts)
-        self._feature_names = vectorizer.get_feature_names_out()
+        self._tfidf_matrix = tfidf_matrix
+        self._feature_names = feature_names[sorted_features]
 
         return dataset_len
 
@@ -31,8 +31,11 @@ class HighLevelVisual(VisualContentTechnique):
     """
 
     def __init__(self, imgs_dirs: str = "imgs_dirs", max_timeout: int = 2, max_retries: int = 5,
-                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227)):
-        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size)
+                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227),
+                 num_workers: int = 0, prefetch_factor: int = 2, persistent_workers: bool = False,
+                 draft_decoding: bool = False):
+        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size,
+                         num_workers, prefetch_factor, persistent_workers, draft_decoding)
 
     def produce_content(self, field_name: str, preprocessor_list: List[ImageProcessor],
                         postprocessor_list: List[EmbeddingInputPostProcessor],
@@ -79,14 +82,39 @@ class PytorchImageModels(HighLevelVisual):
         resize_size: since the Tensorflow dataset requires all images to be of the same size, they will all be resized
             to the specified size. Note that if you were to specify a resize transformer in the preprocessing pipeline,
             the size specified in the latter will be the final resize size
+        num_workers: number of worker processes used by the images dataloader (0 means images are loaded in the
+            main process)
+        prefetch_factor: number of batches loaded in advance by each worker of the dataloader
+        persistent_workers: whether worker processes of the dataloader should be kept alive once it is consumed
+        draft_decoding: if True, JPEG images are decoded directly at a reduced scale close to the resize size
+        jit: if True, the model is traced with TorchScript (using an input of `resize_size`) and frozen, so that
+            constant parameters are folded and operations are fused for faster inference
+        channels_last: if True, model and batches of images are converted to the channels last memory format,
+            which is usually faster for convolutional networks on cpu
+        precision: precision used for inference. It can be 'float32' (default), 'bfloat16' (faster on cpus with
+            native bfloat16 support, at the cost of a lower precision of the features) or 'qint8' (dynamic int8
+            quantization of the linear layers of the model, only supported on cpu)
     """
 
+    supported_precisions = ('float32', 'bfloat16', 'qint8')
+
     def __init__(self, model_name: str, feature_layer: int = -1, flatten: bool = True, device: str = 'cpu',
                  apply_on_output: Callable[[torch.Tensor], torch.Tensor] = None,
                  imgs_dirs: str = "imgs_dirs", max_timeout: int = 2, max_retries: int = 5,
-                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227)):
+                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227),
+                 num_workers: int = 0, prefetch_factor: int = 2, persistent_workers: bool = False,
+                 draft_decoding: bool = False, jit: bool = False, channels_last: bool = False,
+                 precision: str = 'float32'):
+
+        if precision not in self.supported_precisions:
+            raise ValueError(f"Precision {precision} is not supported! "
+                             f"Supported precisions are {self.supported_precisions}")
+
+        if precision == 'qint8' and torch.device(device).type != 'cpu':
+            raise ValueError("Dynamic int8 quantization is only supported on cpu!")
 
-        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size)
+        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size,
+                         num_workers, prefetch_factor, persistent_workers, draft_decoding)
         original_model = timm.create_model(model_name, pretrained=True)
 
         feature_layer = list(original_model._modules.keys())[feature_layer]
@@ -106,21 +134,62 @@ class PytorchImageModels(HighLevelVisual):
 
         self.model.to(device)
         self.device = device
+        # page-locked memory speeds up the host to gpu copy of each batch
+        self.pin_memory = torch.device(device).type == 'cuda'
         self.flatten = flatten
         self.model_name = model_name
 
+        self.jit = jit
+        self.channels_last = channels_last
+        self.precision = precision
+        self.model = self._optimize_model(self.model)
+
         self._repr_string = autorepr(self, inspect.currentframe())
 
+    def _optimize_model(self, model: torch.nn.Module) -> torch.nn.Module:
+        """
+        Apply to the truncated model the inference optimizations specified in the constructor
+        """
+        if self.precision == 'qint8':
+            # dynamic quantization only affects linear layers, convolutional ones are kept as they are
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        elif self.precision == 'bfloat16':
+            model = model.to(torch.bfloat16)
+
+        if self.channels_last:
+            model = model.to(memory_format=torch.channels_last)
+
+        if self.jit:
+            example_input = self._prepare_input(torch.zeros((1, 3, self.resize_size[0], self.resize_size[1])))
+            with torch.no_grad():
+                model = torch.jit.freeze(torch.jit.trace(model, example_input))
+
+        return model
+
+    def _prepare_input(self, field_data: torch.Tensor) -> torch.Tensor:
+        """
+        Move the batch to the device of the model and convert it to the precision and memory format of the model
+        """
+        field_data = field_data.to(self.device)
+
+        if self.precision == 'bfloat16':
+            field_data = field_data.to(torch.bfloat16)
+
+        if self.channels_last:
+            field_data = field_data.contiguous(memory_format=torch.channels_last)
+
+        return field_data
+
     def produce_batch_repr(self, field_data: torch.Tensor) -> List[EmbeddingField]:
 
+        with torch.inference_mode():
+            # numpy doesn't support bfloat16, so the output is always converted to float32
+            output = self.apply_on_output(self.model(self._prepare_input(field_data))).float().cpu()
+
         if self.flatten:
-            with torch.no_grad():
-                return list(map(lambda x: EmbeddingField(x.cpu().detach().numpy().flatten()),
-                                self.apply_on_output(self.model(field_data.to(self.device)))))
+            return list(map(lambda x: EmbeddingField(x.numpy().flatten()), output))
         else:
-            with torch.no_grad():
-                return list(map(lambda x: EmbeddingField(x.cpu().detach().numpy()),
-                                self.apply_on_output(self.model(field_data.to(self.device)))))
+            return list(map(lambda x: EmbeddingField(x.numpy()), output))
 
     def __str__(self):
         return f"Pytorch Image Models ({self.model_name})"
@@ -134,9 +203,12 @@ class CaffeImageModels(HighLevelVisual):
     def __init__(self, prototxt_path: str, model_path: str, feature_layer: str = None, mean_file_path: str = None,
                  swap_rb: bool = False, flatten: bool = True, imgs_dirs: str = "imgs_dirs", use_gpu: bool = False,
                  max_timeout: int = 2, max_retries: int = 5, max_workers: int = 0, batch_size: int = 64,
-                 resize_size: Tuple[int, int] = (227, 227)):
+                 resize_size: Tuple[int, int] = (227, 227),
+                 num_workers: int = 0, prefetch_factor: int = 2, persistent_workers: bool = False,
+                 draft_decoding: bool = False):
 
-        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size)
+        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size,
+                         num_workers, prefetch_factor, persistent_workers, draft_decoding)
         self.model = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
         self.model_name = Path(model_path).name
 
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import threading
+from typing import Optional, Dict
+
+import PIL.Image
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from clayrs.utils.const import logger
+
+
+class ImageCache:
+    """
+    Content addressed on-disk cache for images retrieved from urls
+
+    Each downloaded image is stored in the cache directory with a file name which is the hash of its url, so that the
+    same url is always mapped to the same file regardless of the name of the image in the url. A manifest (json file
+    mapping each url to the file containing its image) is kept in the cache directory: this means that if a
+    download session is interrupted, the next one will only retrieve the images which are still missing.
+
+    Images are fetched using pooled HTTP sessions (one per thread, so that connections to the same host are reused)
+    which automatically retry failed requests with an exponential backoff
+
+    Examples:
+
+        >>> cache = ImageCache('imgs_dirs/imageUrl')
+        >>> cache.fetch('https://example.com/image.jpg')
+        'imgs_dirs/imageUrl/<sha256 of the url>.jpeg'
+        >>> cache.save_manifest()
+
+    Args:
+        cache_dir: directory where images and manifest will be stored
+        max_timeout: maximum time to wait before considering a request failed
+        max_retries: maximum number of retries to retrieve an image from a url
+        backoff_factor: factor used to compute the time to wait between retries
+            (`backoff_factor * 2 ** (retry_number - 1)` seconds)
+        pool_maxsize: maximum number of connections to the same host kept open by each session
+        flush_every: number of new images downloaded after which the manifest is automatically saved to disk
+    """
+
+    manifest_filename = "manifest.json"
+
+    def __init__(self, cache_dir: str, max_timeout: int = 2, max_retries: int = 5, backoff_factor: float = 0.5,
+                 pool_maxsize: int = 10, flush_every: int = 100):
+
+        self.cache_dir = cache_dir
+        self.max_timeout = max_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.pool_maxsize = pool_maxsize
+        self.flush_every = flush_every
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._manifest = self._load_manifest()
+        self._n_unsaved = 0
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sessions = []
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.cache_dir, self.manifest_filename)
+
+    @property
+    def manifest(self) -> Dict[str, str]:
+        """
+        Mapping between each url which has been successfully retrieved and the name of the file (relative to the
+        cache directory) containing its image
+        """
+        return self._manifest
+
+    @staticmethod
+    def url_key(url: str) -> str:
+        """
+        Key which identifies the image of the url in the cache
+        """
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            logger.warning(f"Manifest of the image cache at {self.cache_dir} is corrupted, it will be rebuilt")
+            return {}
+
+    def save_manifest(self):
+        """
+        Persist the manifest to disk. The file is first written to a temporary file which then replaces the old
+        manifest, so that an interruption can't leave a truncated manifest
+        """
+        with self._lock:
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._manifest, f)
+            os.replace(tmp_path, self.manifest_path)
+            self._n_unsaved = 0
+
+    def _get_session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+
+        if session is None:
+            retry = Retry(total=self.max_retries, backoff_factor=self.backoff_factor,
+                          status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset(["GET"]))
+            adapter = HTTPAdapter(max_retries=retry, pool_maxsize=self.pool_maxsize)
+
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+
+        return session
+
+    def get(self, url: str) -> Optional[str]:
+        """
+        Return the path of the cached image for the url, or None if the image for the url is not in the cache
+        """
+        filename = self._manifest.get(url)
+        if filename is not None:
+            image_path = os.path.join(self.cache_dir, filename)
+            if os.path.isfile(image_path):
+                return image_path
+
+        return None
+
+    def fetch(self, url: str) -> Optional[str]:
+        """
+        Return the path of the image for the url, downloading it if it is not in the cache.
+        This method can be safely called by multiple threads at the same time
+
+        Args:
+            url: url of the image to retrieve
+
+        Returns:
+            The path of the image in the cache or None if the image couldn't be retrieved
+        """
+        image_path = self.get(url)
+        if image_path is not None:
+            return image_path
+
+        try:
+            response = self._get_session().get(url, timeout=self.max_timeout)
+            response.raise_for_status()
+            byte_img = response.content
+
+            # the image is only opened to check its format, the downloaded bytes are stored without re-encoding them
+            image_format = PIL.Image.open(io.BytesIO(byte_img)).format
+
+        except PIL.UnidentifiedImageError:
+            logger.warning(f"Found a Url which is not an image! URL: {url}")
+            return None
+
+        except requests.exceptions.HTTPError as e:
+            logger.warning(f"Couldn't retrieve URL: {url} ({e})\nThe image will be skipped")
+            return None
+
+        except requests.exceptions.RequestException:
+            logger.warning(f"Max number of retries reached ({self.max_retries}) for URL: {url}\n"
+                           f"The image will be skipped")
+            return None
+
+        filename = self.url_key(url) + "." + str(image_format).lower()
+        image_path = os.path.join(self.cache_dir, filename)
+
+        # a temporary file is used so that interrupted writes never leave a partial image in the cache
+        tmp_path = f"{image_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(byte_img)
+        os.replace(tmp_path, image_path)
+
+        with self._lock:
+            self._manifest[url] = filename
+            self._n_unsaved += 1
+            flush = self._n_unsaved >= self.flush_every
+
+        if flush:
+            self.save_manifest()
+
+        return image_path
+
+    def close(self):
+        """
+        Save the manifest and close all the HTTP sessions opened by the cache
+        """
+        self.save_manifest()
+
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._manifest)
+
+    def __str__(self):
+        return "ImageCache"
+
+    def __repr__(self):
+        return f"ImageCache(cache_dir={self.cache_dir}, max_timeout={self.max_timeout}, " \
+               f"max_retries={self.max_retries}, backoff_factor={self.backoff_factor}, " \
+               f"pool_maxsize={self.pool_maxsize}, flush_every={self.flush_every})"
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from abc import abstractmethod
 import inspect
+from functools import partial
 from typing import List, TYPE_CHECKING, Tuple, Any
 
 import numpy as np
@@ -15,7 +16,7 @@ from clayrs.content_analyzer.field_content_production_techniques.visual_techniqu
     VisualContentTechnique
 from clayrs.utils.automatic_methods import autorepr
 from clayrs.utils.const import logger
-from clayrs.utils.context_managers import get_progbar
+from clayrs.utils.context_managers import get_iterator_parallel
 
 if TYPE_CHECKING:
     from clayrs.content_analyzer.content_representation.content import FieldRepresentation
@@ -30,11 +31,20 @@ class LowLevelVisual(VisualContentTechnique):
     Technique which encapsulates the logic for all visual techniques that work at a low level, that is instead of
     working on batches of images in an efficient way, these techniques require to process each image separately
     (because, for example, they need to analyze the single pixels of the images).
+
+    Since each image is processed separately, batches of images can be distributed over multiple processes by setting
+    the `num_cpus` parameter. The order of the produced representations is always the same as the order of the
+    contents in the source
     """
 
     def __init__(self, imgs_dirs: str = "imgs_dirs", max_timeout: int = 2, max_retries: int = 5,
-                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227)):
-        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size)
+                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227),
+                 num_workers: int = 0, prefetch_factor: int = 2, persistent_workers: bool = False,
+                 draft_decoding: bool = False, num_cpus: int = 1):
+        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size,
+                         num_workers, prefetch_factor, persistent_workers, draft_decoding)
+
+        self.num_cpus = num_cpus
 
     def produce_content(self, field_name: str, preprocessor_list: List[ImageProcessor],
                         postprocessor_list: List[EmbeddingInputPostProcessor],
@@ -44,19 +54,30 @@ class LowLevelVisual(VisualContentTechnique):
 
         representation_list: [FieldRepresentation] = []
 
-        with get_progbar(dl) as pbar:
+        # preprocessors are bound to the function so that they are sent only once to each process
+        produce_batch_reprs = partial(self._produce_batch_reprs, preprocessor_list=preprocessor_list)
 
-            for data_batch in pbar:
-                pbar.set_description(f"Processing and producing contents with {self}")
+        with get_iterator_parallel(self.num_cpus, produce_batch_reprs, dl,
+                                   progress_bar=True, total=len(dl)) as pbar:
 
-                for content_data in data_batch:
-                    processed_data = self.process_data(content_data, preprocessor_list)
-                    representation_list.append(self.produce_single_repr(processed_data))
+            pbar.set_description(f"Processing and producing contents with {self}")
+
+            for batch_reprs in pbar:
+                representation_list.extend(batch_reprs)
 
         representation_list = self.postprocess_representations(representation_list, postprocessor_list)
 
         return representation_list
 
+    def _produce_batch_reprs(self, data_batch: torch.Tensor,
+                             preprocessor_list: List[ImageProcessor]) -> List[FieldRepresentation]:
+        """
+        Method which processes each image of the batch and produces its representation. It is the unit of work
+        which is performed by each process when `num_cpus` is greater than 1
+        """
+        return [self.produce_single_repr(self.process_data(content_data, preprocessor_list))
+                for content_data in data_batch]
+
     @abstractmethod
     def produce_single_repr(self, field_data: torch.Tensor) -> FieldRepresentation:
         raise NotImplementedError
@@ -81,14 +102,24 @@ class SkImageHogDescriptor(LowLevelVisual):
         resize_size: since the Tensorflow dataset requires all images to be of the same size, they will all be resized
             to the specified size. Note that if you were to specify a resize transformer in the preprocessing pipeline,
             the size specified in the latter will be the final resize size
+        num_workers: number of worker processes used by the images dataloader (0 means images are loaded in the
+            main process)
+        prefetch_factor: number of batches loaded in advance by each worker of the dataloader
+        persistent_workers: whether worker processes of the dataloader should be kept alive once it is consumed
+        draft_decoding: if True, JPEG images are decoded directly at a reduced scale close to the resize size
+        num_cpus: number of processes over which batches of images are distributed. If set to `0`, all cpus
+            available will be used
     """
 
     def __init__(self, orientations=9, pixels_per_cell=(8, 8), cells_per_block=(3, 3),
                  block_norm='L2-Hys', transform_sqrt=False, flatten: bool = False,
                  imgs_dirs: str = "imgs_dirs", max_timeout: int = 2, max_retries: int = 5,
-                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227)):
+                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227),
+                 num_workers: int = 0, prefetch_factor: int = 2, persistent_workers: bool = False,
+                 draft_decoding: bool = False, num_cpus: int = 1):
 
-        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size)
+        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size,
+                         num_workers, prefetch_factor, persistent_workers, draft_decoding, num_cpus)
         self.hog = lambda x, channel_axis: hog(x, orientations=orientations, pixels_per_cell=pixels_per_cell,
                                                cells_per_block=cells_per_block, block_norm=block_norm,
                                                transform_sqrt=transform_sqrt, feature_vector=flatten,
@@ -137,14 +168,24 @@ class SkImageCannyEdgeDetector(LowLevelVisual):
         resize_size: since the Tensorflow dataset requires all images to be of the same size, they will all be resized
             to the specified size. Note that if you were to specify a resize transformer in the preprocessing pipeline,
             the size specified in the latter will be the final resize size
+        num_workers: number of worker processes used by the images dataloader (0 means images are loaded in the
+            main process)
+        prefetch_factor: number of batches loaded in advance by each worker of the dataloader
+        persistent_workers: whether worker processes of the dataloader should be kept alive once it is consumed
+        draft_decoding: if True, JPEG images are decoded directly at a reduced scale close to the resize size
+        num_cpus: number of processes over which batches of images are distributed. If set to `0`, all cpus
+            available will be used
     """
 
     def __init__(self, sigma=1.0, low_threshold=None, high_threshold=None, mask=None, use_quantiles=False,
                  mode='constant', cval=0.0, flatten: bool = False,
                  imgs_dirs: str = "imgs_dirs", max_timeout: int = 2, max_retries: int = 5,
-                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227)):
+                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227),
+                 num_workers: int = 0, prefetch_factor: int = 2, persistent_workers: bool = False,
+                 draft_decoding: bool = False, num_cpus: int = 1):
 
-        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size)
+        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size,
+                         num_workers, prefetch_factor, persistent_workers, draft_decoding, num_cpus)
         self.canny = lambda x: canny(image=x, sigma=sigma, low_threshold=low_threshold,
                                      high_threshold=high_threshold, mask=mask,
                                      use_quantiles=use_quantiles, mode=mode, cval=cval)
@@ -193,13 +234,23 @@ class CustomFilterConvolution(LowLevelVisual):
         resize_size: since the Tensorflow dataset requires all images to be of the same size, they will all be resized
             to the specified size. Note that if you were to specify a resize transformer in the preprocessing pipeline,
             the size specified in the latter will be the final resize size
+        num_workers: number of worker processes used by the images dataloader (0 means images are loaded in the
+            main process)
+        prefetch_factor: number of batches loaded in advance by each worker of the dataloader
+        persistent_workers: whether worker processes of the dataloader should be kept alive once it is consumed
+        draft_decoding: if True, JPEG images are decoded directly at a reduced scale close to the resize size
+        num_cpus: number of processes over which batches of images are distributed. If set to `0`, all cpus
+            available will be used
     """
 
     def __init__(self, weights, mode='reflect', cval=0.0, origin=0, flatten: bool = False,
                  imgs_dirs: str = "imgs_dirs", max_timeout: int = 2, max_retries: int = 5,
-                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227)):
+                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227),
+                 num_workers: int = 0, prefetch_factor: int = 2, persistent_workers: bool = False,
+                 draft_decoding: bool = False, num_cpus: int = 1):
 
-        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size)
+        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size,
+                         num_workers, prefetch_factor, persistent_workers, draft_decoding, num_cpus)
         self.convolve = lambda x: convolve(x, weights=weights, mode=mode, cval=cval, origin=origin)
         self.flatten = flatten
         self._repr_string = autorepr(self, inspect.currentframe())
@@ -243,12 +294,22 @@ class ColorsHist(LowLevelVisual):
         resize_size: since the Tensorflow dataset requires all images to be of the same size, they will all be resized
             to the specified size. Note that if you were to specify a resize transformer in the preprocessing pipeline,
             the size specified in the latter will be the final resize size
+        num_workers: number of worker processes used by the images dataloader (0 means images are loaded in the
+            main process)
+        prefetch_factor: number of batches loaded in advance by each worker of the dataloader
+        persistent_workers: whether worker processes of the dataloader should be kept alive once it is consumed
+        draft_decoding: if True, JPEG images are decoded directly at a reduced scale close to the resize size
+        num_cpus: number of processes over which batches of images are distributed. If set to `0`, all cpus
+            available will be used
     """
 
     def __init__(self, imgs_dirs: str = "imgs_dirs", max_timeout: int = 2, max_retries: int = 5,
-                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227)):
+                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227),
+                 num_workers: int = 0, prefetch_factor: int = 2, persistent_workers: bool = False,
+                 draft_decoding: bool = False, num_cpus: int = 1):
 
-        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size)
+        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size,
+                         num_workers, prefetch_factor, persistent_workers, draft_decoding, num_cpus)
         self._repr_string = autorepr(self, inspect.currentframe())
 
     def produce_single_repr(self, field_data: torch.Tensor) -> EmbeddingField:
@@ -293,14 +354,24 @@ class ColorQuantization(LowLevelVisual):
         resize_size: since the Tensorflow dataset requires all images to be of the same size, they will all be resized
             to the specified size. Note that if you were to specify a resize transformer in the preprocessing pipeline,
             the size specified in the latter will be the final resize size
+        num_workers: number of worker processes used by the images dataloader (0 means images are loaded in the
+            main process)
+        prefetch_factor: number of batches loaded in advance by each worker of the dataloader
+        persistent_workers: whether worker processes of the dataloader should be kept alive once it is consumed
+        draft_decoding: if True, JPEG images are decoded directly at a reduced scale close to the resize size
+        num_cpus: number of processes over which batches of images are distributed. If set to `0`, all cpus
+            available will be used
     """
 
     def __init__(self, n_colors: Any = 3, init: Any = "k-means++", n_init: Any = 10, max_iter: Any = 300,
                  tol: Any = 1e-4, random_state: Any = None, copy_x: Any = True, algorithm: Any = "auto",
                  flatten: bool = False, imgs_dirs: str = "imgs_dirs", max_timeout: int = 2, max_retries: int = 5,
-                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227)):
+                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227),
+                 num_workers: int = 0, prefetch_factor: int = 2, persistent_workers: bool = False,
+                 draft_decoding: bool = False, num_cpus: int = 1):
 
-        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size)
+        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size,
+                         num_workers, prefetch_factor, persistent_workers, draft_decoding, num_cpus)
         self.k_means = KMeans(n_clusters=n_colors, init=init, n_init=n_init, max_iter=max_iter, tol=tol,
                               random_state=random_state, copy_x=copy_x, algorithm=algorithm)
         self.flatten = flatten
@@ -352,14 +423,24 @@ class SkImageSIFT(LowLevelVisual):
         resize_size: since the Tensorflow dataset requires all images to be of the same size, they will all be resized
             to the specified size. Note that if you were to specify a resize transformer in the preprocessing pipeline,
             the size specified in the latter will be the final resize size
+        num_workers: number of worker processes used by the images dataloader (0 means images are loaded in the
+            main process)
+        prefetch_factor: number of batches loaded in advance by each worker of the dataloader
+        persistent_workers: whether worker processes of the dataloader should be kept alive once it is consumed
+        draft_decoding: if True, JPEG images are decoded directly at a reduced scale close to the resize size
+        num_cpus: number of processes over which batches of images are distributed. If set to `0`, all cpus
+            available will be used
     """
 
     def __init__(self, upsampling=2, n_octaves=8, n_scales=3, sigma_min=1.6, sigma_in=0.5, c_dog=0.013333333333333334,
                  c_edge=10, n_bins=36, lambda_ori=1.5, c_max=0.8, lambda_descr=6, n_hist=4, n_ori=8,
                  flatten: bool = False, imgs_dirs: str = "imgs_dirs", max_timeout: int = 2, max_retries: int = 5,
-                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227)):
+                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227),
+                 num_workers: int = 0, prefetch_factor: int = 2, persistent_workers: bool = False,
+                 draft_decoding: bool = False, num_cpus: int = 1):
 
-        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size)
+        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size,
+                         num_workers, prefetch_factor, persistent_workers, draft_decoding, num_cpus)
         self.sift = SIFT(upsampling=upsampling, n_octaves=n_octaves, n_scales=n_scales, sigma_min=sigma_min,
                          sigma_in=sigma_in, c_dog=c_dog, c_edge=c_edge, n_bins=n_bins, lambda_ori=lambda_ori,
                          c_max=c_max, lambda_descr=lambda_descr, n_hist=n_hist, n_ori=n_ori)
@@ -411,13 +492,23 @@ class SkImageLBP(LowLevelVisual):
         resize_size: since the Tensorflow dataset requires all images to be of the same size, they will all be resized
             to the specified size. Note that if you were to specify a resize transformer in the preprocessing pipeline,
             the size specified in the latter will be the final resize size
+        num_workers: number of worker processes used by the images dataloader (0 means images are loaded in the
+            main process)
+        prefetch_factor: number of batches loaded in advance by each worker of the dataloader
+        persistent_workers: whether worker processes of the dataloader should be kept alive once it is consumed
+        draft_decoding: if True, JPEG images are decoded directly at a reduced scale close to the resize size
+        num_cpus: number of processes over which batches of images are distributed. If set to `0`, all cpus
+            available will be used
     """
 
     def __init__(self, p: int, r: float, method='default', flatten: bool = False, as_image: bool = False,
                  imgs_dirs: str = "imgs_dirs", max_timeout: int = 2, max_retries: int = 5,
-                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227)):
+                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227),
+                 num_workers: int = 0, prefetch_factor: int = 2, persistent_workers: bool = False,
+                 draft_decoding: bool = False, num_cpus: int = 1):
 
-        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size)
+        super().__init__(imgs_dirs, max_timeout, max_retries, max_workers, batch_size, resize_size,
+                         num_workers, prefetch_factor, persistent_workers, draft_decoding, num_cpus)
         self.lbp = lambda x: local_binary_pattern(x, P=p, R=r, method=method)
         self.flatten = flatten
         self.as_image = as_image
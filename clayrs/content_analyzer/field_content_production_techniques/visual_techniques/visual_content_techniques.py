@@ -1,12 +1,10 @@
 from __future__ import annotations
 
-import io
 import os
 from typing import Tuple, List, TYPE_CHECKING
 
 from abc import abstractmethod
 import PIL.Image
-import requests
 import validators
 from torch.utils.data import DataLoader, Dataset
 from pathlib import Path
@@ -23,6 +21,7 @@ if TYPE_CHECKING:
 
 from clayrs.content_analyzer.field_content_production_techniques.field_content_production_technique import \
     FieldContentProductionTechnique
+from clayrs.content_analyzer.field_content_production_techniques.visual_techniques.image_cache import ImageCache
 from clayrs.utils.const import logger
 from clayrs.utils.context_managers import get_iterator_thread
 
@@ -31,12 +30,21 @@ class ClasslessImageFolder(Dataset):
     """
     Dataset which is used by torch dataloaders to efficiently handle images.
     In this case, since labels are not of interest, only the image in the form of a Torch tensor will be returned.
+
+    If `draft_decoding` is set to True, JPEG images are decoded directly at the smallest scale (1/2, 1/4 or 1/8) which
+    is still larger than the resize size, which is much faster than decoding the full image and then resizing it.
+    The final image will be slightly different from the one obtained by decoding the full image, since the
+    downscaling is performed by the JPEG decoder
+
+    IMPORTANT NOTE: `error_count` is only updated when the dataset is iterated in the main process (that is, when the
+    data loader has no worker processes)
     """
-    def __init__(self, image_paths: List[str], resize_size: Tuple[int, int]):
+    def __init__(self, image_paths: List[str], resize_size: Tuple[int, int], draft_decoding: bool = False):
 
         self.image_paths = image_paths
 
         self.resize_size = list(resize_size)
+        self.draft_decoding = draft_decoding
         self.error_count = 0
 
     def __getitem__(self, index):
@@ -45,16 +53,21 @@ class ClasslessImageFolder(Dataset):
 
         if the image exists at the specified path, it is:
 
-            1. converted to RGB
-            2. converted to tensor
-            3. resized to a default size
+            1. decoded at reduced scale (only if draft decoding is enabled and the image is a JPEG)
+            2. converted to RGB
+            3. converted to tensor
+            4. resized to a default size
 
         if the image doesn't exist at the specified path, a blank image is created of the specified default size
         """
         image_path = self.image_paths[index]
 
         try:
-            x = PIL.Image.open(image_path).convert("RGB")
+            x = PIL.Image.open(image_path)
+            if self.draft_decoding and x.format == 'JPEG':
+                # PIL expects (width, height) while resize size is (height, width)
+                x.draft('RGB', (self.resize_size[1], self.resize_size[0]))
+            x = x.convert("RGB")
             x = TF.to_tensor(x)
             x = TF.resize(x, self.resize_size)
         except (FileNotFoundError, AttributeError):
@@ -99,10 +112,23 @@ class VisualContentTechnique(FieldContentProductionTechnique):
         resize_size: since the Tensorflow dataset requires all images to be of the same size, they will all be resized
         to the specified size. Note that if you were to specify a resize transformer in the preprocessing pipeline, the
         size specified in the latter will be the final resize size
+        num_workers: number of worker processes used by the images dataloader to decode and resize images while
+            the technique is processing the previous batches. If 0, images are loaded in the main process
+        prefetch_factor: number of batches loaded in advance by each worker of the dataloader. Only used if
+            `num_workers` is greater than 0
+        persistent_workers: if True, worker processes of the dataloader are not shut down after the dataloader has
+            been consumed. Only used if `num_workers` is greater than 0
+        draft_decoding: if True, JPEG images are decoded directly at a reduced scale close to the resize size, which
+            is much faster for large images (but gives slightly different pixel values than a full decoding)
     """
 
     def __init__(self, imgs_dirs: str = "imgs_dirs", max_timeout: int = 2, max_retries: int = 5,
-                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227)):
+                 max_workers: int = 0, batch_size: int = 64, resize_size: Tuple[int, int] = (227, 227),
+                 num_workers: int = 0, prefetch_factor: int = 2, persistent_workers: bool = False,
+                 draft_decoding: bool = False):
+
+        if num_workers < 0:
+            raise ValueError("num_workers must be a non-negative integer!")
 
         self.imgs_dirs = imgs_dirs
         self.max_timeout = max_timeout
@@ -110,6 +136,13 @@ class VisualContentTechnique(FieldContentProductionTechnique):
         self.max_workers = max_workers
         self.batch_size = batch_size
         self.resize_size = resize_size
+        self.num_workers = num_workers
+        self.prefetch_factor = prefetch_factor
+        self.persistent_workers = persistent_workers
+        self.draft_decoding = draft_decoding
+
+        # techniques which move batches on a cuda device will set this to True
+        self.pin_memory = False
 
     @staticmethod
     def process_data(data, preprocessor_list: List[ImageProcessor]):
@@ -134,9 +167,16 @@ class VisualContentTechnique(FieldContentProductionTechnique):
         """
         Method which retrieves all the images for the specified field name in the raw source in case images are not
         paths but links
+
+        Images retrieved from links are stored in a content addressed cache (see `ImageCache`) in the folder of the
+        field, so that if the images of the field were already (even partially) retrieved by a previous run, only the
+        missing ones will be downloaded
         """
         def dl_and_save_images(url_or_path):
 
+            if validators.url(url_or_path):
+                return image_cache.fetch(url_or_path)
+
             filename = Path(url_or_path).name
             filename_no_extension = Path(url_or_path).stem
 
@@ -148,47 +188,19 @@ class VisualContentTechnique(FieldContentProductionTechnique):
             elif os.path.isfile(image_path_lnk):
                 return image_path_lnk
 
-            if validators.url(url_or_path):
-
-                n_retry = 0
+            # if the path is not absolute, we go in this if
+            if not os.path.isfile(url_or_path):
+                # we build the absolute path and check again if the image exist
+                path_dir_imgs = str(Path(raw_source.file_path).parent.absolute())
+                url_or_path = str(os.path.join(path_dir_imgs, url_or_path))
 
-                # keep trying to download an image until the max_retries number is reached
-                while True:
-                    try:
-                        byte_img = requests.get(url_or_path, timeout=self.max_timeout).content
-                        img = PIL.Image.open(io.BytesIO(byte_img))
-                        img_path = os.path.join(self.imgs_dirs, field_name, Path(url_or_path).name)
-
-                        img.save(img_path)
-
-                        return img_path
-
-                    except PIL.UnidentifiedImageError:
-                        logger.warning(f"Found a Url which is not an image! URL: {url_or_path}")
-                        return None
-
-                    except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout):
-                        if n_retry < self.max_retries:
-                            n_retry += 1
-                        else:
-                            logger.warning(f"Max number of retries reached ({n_retry + 1}/{self.max_retries}) for URL: "
-                                           f"{url_or_path}\nThe image will be skipped")
-                            return None
-            else:
-
-                # if the path is not absolute, we go in this if
                 if not os.path.isfile(url_or_path):
-                    # we build the absolute path and check again if the image exist
-                    path_dir_imgs = str(Path(raw_source.file_path).parent.absolute())
-                    url_or_path = str(os.path.join(path_dir_imgs, url_or_path))
+                    return None
 
-                    if not os.path.isfile(url_or_path):
-                        return None
+            file_link = Path(url_or_path).stem + ".lnk"
+            os.link(url_or_path, os.path.join(self.imgs_dirs, field_name, file_link))
 
-                file_link = Path(url_or_path).stem + ".lnk"
-                os.link(url_or_path, os.path.join(self.imgs_dirs, field_name, file_link))
-
-                return os.path.join(self.imgs_dirs, field_name, file_link)
+            return os.path.join(self.imgs_dirs, field_name, file_link)
 
         field_imgs_dir = os.path.join(self.imgs_dirs, field_name)
 
@@ -196,10 +208,15 @@ class VisualContentTechnique(FieldContentProductionTechnique):
 
         url_images = (content[field_name] for content in raw_source)
 
+        # each thread keeps its own pool of connections
+        n_threads = self.max_workers or min(32, (os.cpu_count() or 1) + 4)
+
         img_paths = []
         error_count = 0
-        with get_iterator_thread(self.max_workers, dl_and_save_images, url_images,
-                                 keep_order=True, progress_bar=True, total=len(raw_source)) as pbar:
+        with ImageCache(field_imgs_dir, max_timeout=self.max_timeout, max_retries=self.max_retries,
+                        pool_maxsize=n_threads) as image_cache, \
+                get_iterator_thread(self.max_workers, dl_and_save_images, url_images,
+                                    keep_order=True, progress_bar=True, total=len(raw_source)) as pbar:
 
             pbar.set_description("Downloading/Locating images")
 
@@ -224,12 +241,20 @@ class VisualContentTechnique(FieldContentProductionTechnique):
         # IMPORTANT: we must give to the data loader the same ordering of contents
         # in the raw source, otherwise the content analyzer assigns to an item
         # a representation of another!
-        # TO DO: maybe save images with the id of the content rather than the filename of the image?
         image_paths = self._retrieve_images(field_name, raw_source)
 
         ds = ClasslessImageFolder(image_paths=image_paths,
-                                  resize_size=self.resize_size)
-        dl = DataLoader(ds, batch_size=self.batch_size, shuffle=False)
+                                  resize_size=self.resize_size,
+                                  draft_decoding=self.draft_decoding)
+
+        # worker specific arguments can't be passed to the dataloader if there are no workers
+        workers_kwargs = {}
+        if self.num_workers > 0:
+            workers_kwargs = {'prefetch_factor': self.prefetch_factor,
+                              'persistent_workers': self.persistent_workers}
+
+        dl = DataLoader(ds, batch_size=self.batch_size, shuffle=False, num_workers=self.num_workers,
+                        pin_memory=self.pin_memory, **workers_kwargs)
 
         return dl
 
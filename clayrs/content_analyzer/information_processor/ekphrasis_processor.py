@@ -1,6 +1,7 @@
 import inspect
 import itertools
-from typing import List, Dict, Callable
+import os
+from typing import List, Dict, Callable, Optional
 import warnings
 
 from ekphrasis.classes.tokenizer import SocialTokenizer
@@ -10,6 +11,7 @@ from ekphrasis.classes.preprocessor import TextPreProcessor
 from ekphrasis.classes.spellcorrect import SpellCorrector
 
 from clayrs.content_analyzer.information_processor.information_processor_abstract import NLP
+from clayrs.content_analyzer.utils.memo_table import MemoTable
 from clayrs.utils.automatic_methods import autorepr
 
 with warnings.catch_warnings():
@@ -135,6 +137,14 @@ class Ekphrasis(NLP):
         spell_correction: choose if you want to perform spell correction to the text.
 
             *significantly affects performance (speed)*
+
+        memo_maxsize: Maximum number of entries held by each memoization table. Spell correction and segmentation
+            results are memoized per token, so that tokens which appear many times in the corpus are corrected or
+            segmented only once. If `None`, tables are unbounded
+
+        memo_dir: Directory where memoization tables are persisted. If tables computed in a previous run with the
+            same `corrector`, `segmenter` and `spell_correct_elong` settings are present in the directory, they are
+            loaded on init. Use the `save_memo_tables()` method to persist them
     """
 
     def __init__(self, *,
@@ -150,12 +160,14 @@ class Ekphrasis(NLP):
                  spell_correction: bool = False,
                  segmentation: bool = False,
                  dicts: List[Dict] = None,
-                 spell_correct_elong: bool = False):
+                 spell_correct_elong: bool = False,
+                 memo_maxsize: Optional[int] = 100000,
+                 memo_dir: str = None):
 
         # ekphrasis has default values for arguments not passed. So if they are not evaluated in our class,
         # we simply don't pass them to ekphrasis
         kwargs_to_pass = {argument: arg_value for argument, arg_value in zip(locals().keys(), locals().values())
-                          if argument != 'self' and arg_value is not None}
+                          if argument not in {'self', 'memo_maxsize', 'memo_dir'} and arg_value is not None}
 
         self.text_processor = TextPreProcessor(**kwargs_to_pass)
 
@@ -176,8 +188,53 @@ class Ekphrasis(NLP):
             else:
                 self.ws = Segmenter()
 
+        # each table is bound to the settings which affect its results, so that tables persisted with different
+        # settings are never mixed up
+        self.memo_dir = memo_dir
+        self._spell_memo_name = f"ekphrasis_spell_{corrector or 'english'}_elong_{spell_correct_elong}.memo"
+        self._segment_memo_name = f"ekphrasis_segment_{segmenter or 'english'}.memo"
+
+        self.spell_memo = self.__init_memo_table(self._spell_memo_name, memo_maxsize)
+        self.segment_memo = self.__init_memo_table(self._segment_memo_name, memo_maxsize)
+
         self._repr_string = autorepr(self, inspect.currentframe())
 
+    def __init_memo_table(self, memo_name: str, memo_maxsize: Optional[int]) -> MemoTable:
+        if self.memo_dir is not None and os.path.isfile(os.path.join(self.memo_dir, memo_name)):
+            memo_table = MemoTable.load(os.path.join(self.memo_dir, memo_name))
+            # a table persisted with a bigger maxsize must be trimmed to the current bound
+            memo_table.resize(memo_maxsize)
+        else:
+            memo_table = MemoTable(memo_maxsize)
+
+        return memo_table
+
+    def save_memo_tables(self, memo_dir: str = None):
+        """
+        Persist the spell correction and segmentation memoization tables to disk, so that they can be reused by
+        other runs or shared with other processes
+
+        Args:
+            memo_dir: Directory where tables will be saved. If `None`, the `memo_dir` passed in the constructor is used
+        """
+        memo_dir = memo_dir if memo_dir is not None else self.memo_dir
+        if memo_dir is None:
+            raise ValueError("No directory where to save memoization tables was specified!")
+
+        if self.sc is not None:
+            self.spell_memo.save(os.path.join(memo_dir, self._spell_memo_name))
+        if self.ws is not None:
+            self.segment_memo.save(os.path.join(memo_dir, self._segment_memo_name))
+
+    def memo_stats(self) -> Dict[str, dict]:
+        """
+        Return statistics about the effectiveness of the spell correction and segmentation memoization tables
+
+        Returns:
+            Dictionary with `spell_correction` and `segmentation` keys, each mapped to the stats of the related table
+        """
+        return {'spell_correction': self.spell_memo.stats(), 'segmentation': self.segment_memo.stats()}
+
     def __spell_check(self, field_data):
         """
         Correct any spelling errors
@@ -198,7 +255,7 @@ class Ekphrasis(NLP):
 
             return self.sc.correct_word(word, fast=True)
 
-        return [correct_word(word) for word in field_data]
+        return [self.spell_memo.get_or_compute(word, lambda: correct_word(word)) for word in field_data]
 
     def __word_segmenter(self, field_data) -> List[str]:
         """
@@ -207,7 +264,8 @@ class Ekphrasis(NLP):
             field_data: Text to be processed
         Returns (List[str): Text with splitted words
         """
-        word_seg_list = [self.ws.segment(word) for word in field_data]
+        word_seg_list = [self.segment_memo.get_or_compute(word, lambda: self.ws.segment(word))
+                         for word in field_data]
 
         word_seg_list = itertools.chain.from_iterable([word.split() for word in word_seg_list])
 
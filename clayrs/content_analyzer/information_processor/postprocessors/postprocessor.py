@@ -2,20 +2,83 @@ import inspect
 from abc import ABC, abstractmethod
 
 import scipy.sparse
-from sklearn.decomposition import PCA
-from sklearn.cluster import KMeans, FeatureAgglomeration
-from sklearn.random_projection import GaussianRandomProjection
+from sklearn.decomposition import PCA, IncrementalPCA, TruncatedSVD
+from sklearn.cluster import KMeans, MiniBatchKMeans, FeatureAgglomeration
+from sklearn.random_projection import GaussianRandomProjection, SparseRandomProjection
 from sklearn.feature_extraction.text import TfidfTransformer
 from sklearn.preprocessing import StandardScaler
 from scipy.cluster.vq import vq
-from scipy.sparse import csc_matrix, vstack
-from typing import List, Any, Union, Optional
+from scipy.sparse import csc_matrix, csr_matrix, vstack
+from typing import List, Any, Union, Optional, Iterable, Iterator, Callable
 import numpy as np
-import pandas as pd
 
 from clayrs.utils.automatic_methods import autorepr
 
-from clayrs.content_analyzer.content_representation.content import FieldRepresentation, EmbeddingField, FeaturesBagField
+from clayrs.content_analyzer.content_representation.content import FieldRepresentation, EmbeddingField, \
+    FeaturesBagField, FeaturesVocabulary
+
+
+def _vstack_rows(blocks: List[Union[csr_matrix, np.ndarray]]) -> Union[csr_matrix, np.ndarray]:
+    """
+    Vertically stack blocks of rows, keeping sparse inputs sparse
+    """
+    if scipy.sparse.issparse(blocks[0]):
+        return vstack(blocks, format='csr')
+    else:
+        return np.vstack(blocks)
+
+
+def _iter_chunks(blocks: Iterable[Union[csr_matrix, np.ndarray]],
+                 chunk_size: int) -> Iterator[Union[csr_matrix, np.ndarray]]:
+    """
+    Stack consecutive blocks of rows (a one dimensional array is a single row) into chunks of at least `chunk_size`
+    rows, so that only the rows of a few chunks are kept in memory at the same time. Blocks are never split, and the
+    remaining rows which are not enough to form a chunk are merged into the last one
+    """
+    pending = None
+    current = []
+    n_current_rows = 0
+
+    for block in blocks:
+        current.append(block)
+        n_current_rows += block.shape[0] if block.ndim == 2 else 1
+
+        if n_current_rows >= chunk_size:
+            if pending is not None:
+                yield _vstack_rows(pending)
+            pending = current
+            current = []
+            n_current_rows = 0
+
+    if pending is None:
+        pending = current
+    else:
+        pending.extend(current)
+
+    if len(pending) > 0:
+        yield _vstack_rows(pending)
+
+
+def _fit_codebook_streaming(descriptors_fn: Callable[[], Iterable[np.ndarray]], k_means: MiniBatchKMeans,
+                            scaler: Optional[StandardScaler], batch_size: int) -> np.ndarray:
+    """
+    Fit the scaler (if any) and the codebook incrementally on chunks of at least `batch_size` descriptors (see
+    `_iter_chunks()`). `descriptors_fn` must return a new iterable over the descriptors each time it is called, since
+    descriptors are read twice when the scaler must be fit.
+
+    The codebook is fit with a single pass over the descriptors (one `partial_fit` call per chunk), so the `max_iter`
+    and `n_init` parameters of `k_means` have no effect, and the first chunk must contain at least `n_clusters` rows
+    """
+    if scaler is not None:
+        for chunk in _iter_chunks(descriptors_fn(), batch_size):
+            scaler.partial_fit(chunk)
+
+    for chunk in _iter_chunks(descriptors_fn(), batch_size):
+        if scaler is not None:
+            chunk = scaler.transform(chunk)
+        k_means.partial_fit(chunk)
+
+    return k_means.cluster_centers_
 
 
 class PostProcessor(ABC):
@@ -83,24 +146,38 @@ class VisualBagOfWords(EmbeddingInputPostProcessor):
     Arguments for [SkLearn StandardScaler](https://scikit-learn.org/stable/modules/generated/sklearn.preprocessing.StandardScaler.html)
 
     NOTE: for this technique it is mandatory for the parameter "with_std" to be set to True
+
+    If `batch_size` is specified, the codebook is built in a streaming fashion: the scaler and a SkLearn
+    MiniBatchKMeans are fit incrementally on chunks of at least `batch_size` descriptors (descriptors of an image are
+    never split between chunks), so that descriptors of all images are never stacked in a single matrix. Descriptors
+    are seen in a single pass, with one `partial_fit` call per chunk: centroids are initialized only once on the first
+    chunk, so `copy_x`, `algorithm`, `max_iter` and `n_init` are ignored. Since the initialization is performed on the
+    first chunk only, it must contain at least `n_clusters` descriptors: `batch_size` must not be smaller than
+    `n_clusters`, and all images together must have at least `n_clusters` descriptors
+
+    Arguments for [SkLearn MiniBatchKMeans](https://scikit-learn.org/stable/modules/generated/sklearn.cluster.MiniBatchKMeans.html)
     """
 
     def __init__(self, n_clusters: Any = 8, init: Any = "k-means++", n_init: Any = 10, max_iter: Any = 300,
                  tol: Any = 1e-4, random_state: Any = None, copy_x: Any = True, algorithm: Any = "auto",
-                 with_mean: bool = True, with_std: bool = True):
-        self.clustering_algorithm = KMeans(n_clusters=n_clusters, init=init, n_init=n_init, max_iter=max_iter, tol=tol,
-                                           random_state=random_state, copy_x=copy_x, algorithm=algorithm)
+                 with_mean: bool = True, with_std: bool = True, batch_size: Optional[int] = None):
+        if batch_size is None:
+            self.clustering_algorithm = KMeans(n_clusters=n_clusters, init=init, n_init=n_init, max_iter=max_iter,
+                                               tol=tol, random_state=random_state, copy_x=copy_x,
+                                               algorithm=algorithm)
+        else:
+            self.clustering_algorithm = MiniBatchKMeans(n_clusters=n_clusters, init=init, n_init=n_init,
+                                                        max_iter=max_iter, tol=tol, random_state=random_state,
+                                                        batch_size=batch_size)
         self.with_mean = with_mean
         self.with_std = with_std
+        self.batch_size = batch_size
         self._repr_string = autorepr(self, inspect.currentframe())
 
     def process(self, field_repr_list: List[EmbeddingField]) -> List[FeaturesBagField]:
         first_inst = field_repr_list[0].value
 
-        # extract features from the representations and apply clustering to them
-        if len(first_inst.shape) == 2:
-            descriptors = np.vstack([feature for field_repr in field_repr_list for feature in field_repr.value])
-        else:
+        if len(first_inst.shape) != 2:
             raise ValueError(f'Unsupported dimensionality for technique {self}, '
                              f'only two dimensional arrays are supported')
 
@@ -108,15 +185,23 @@ class VisualBagOfWords(EmbeddingInputPostProcessor):
 
         if self.with_mean or self.with_std:
             scaler = StandardScaler(with_mean=self.with_mean, with_std=self.with_std)
-            descriptors = scaler.fit_transform(descriptors)
 
-        self.clustering_algorithm.fit(descriptors)
-        codewords = self.clustering_algorithm.cluster_centers_
+        if self.batch_size is not None:
+            codewords = _fit_codebook_streaming(lambda: (field_repr.value for field_repr in field_repr_list),
+                                                self.clustering_algorithm, scaler, self.batch_size)
+        else:
+            # extract features from the representations and apply clustering to them
+            descriptors = np.vstack([feature for field_repr in field_repr_list for feature in field_repr.value])
+
+            if scaler is not None:
+                descriptors = scaler.fit_transform(descriptors)
+
+            self.clustering_algorithm.fit(descriptors)
+            codewords = self.clustering_algorithm.cluster_centers_
 
         new_field_repr_list = []
         indptr = [0]
         indices = []
-        data = []
 
         # apply vector quantization to each representation w.r.t. the codewords
         # dictionary created at the previous step
@@ -127,19 +212,18 @@ class VisualBagOfWords(EmbeddingInputPostProcessor):
             else:
                 code, _ = vq(field_repr.value, codewords)
 
-            for codeword in code:
-                index = codeword
-                indices.append(index)
-                data.append(1)
-            indptr.append(len(indices))
+            indices.append(code)
+            indptr.append(indptr[-1] + len(code))
+
+        indices = np.concatenate(indices)
+        data = np.ones(len(indices), dtype=int)
 
         # instantiate the visual bag of features as sparse matrix and apply a weighting schema to it
         sparse_repr = scipy.sparse.csr_matrix((data, indices, indptr))
         sparse_repr = self.apply_weights(sparse_repr)
+        vocabulary = FeaturesVocabulary([str(codeword) for codeword in codewords])
         for single_repr in sparse_repr:
-            new_field_repr_list.append(
-                FeaturesBagField(single_repr.tocsc(),
-                                 [(index, str(codewords[index])) for index in pd.unique(single_repr.nonzero()[1])]))
+            new_field_repr_list.append(FeaturesBagField(single_repr.tocsc(), vocabulary=vocabulary))
         return new_field_repr_list
 
     @abstractmethod
@@ -185,6 +269,9 @@ class CountVisualBagOfWords(VisualBagOfWords):
     ADDITIONAL NOTE: the technique requires 2D arrays of features for each image, such as edges in the case of the
     Canny Edge detector. In case any other dimensionality is provided, a ValueError will be raised.
 
+    If `batch_size` is specified, the codebook is fit incrementally with a SkLearn MiniBatchKMeans on chunks of
+    `batch_size` descriptors, which keeps memory bounded when images have many descriptors (see `VisualBagOfWords`)
+
     Arguments for [SkLearn KMeans](https://scikit-learn.org/stable/modules/generated/sklearn.neighbors.KNeighborsClassifier.html)
 
     Arguments for [SkLearn StandardScaler](https://scikit-learn.org/stable/modules/generated/sklearn.preprocessing.StandardScaler.html)
@@ -194,10 +281,10 @@ class CountVisualBagOfWords(VisualBagOfWords):
 
     def __init__(self, n_clusters: Any = 8, init: Any = "k-means++", n_init: Any = 10, max_iter: Any = 300,
                  tol: Any = 1e-4, random_state: Any = None, copy_x: Any = True, algorithm: Any = "auto",
-                 with_mean: bool = True, with_std: bool = True):
+                 with_mean: bool = True, with_std: bool = True, batch_size: Optional[int] = None):
         super().__init__(n_clusters=n_clusters, init=init, n_init=n_init, max_iter=max_iter, tol=tol,
                          random_state=random_state, copy_x=copy_x, algorithm=algorithm, with_mean=with_mean,
-                         with_std=with_std)
+                         with_std=with_std, batch_size=batch_size)
         self._repr_string = autorepr(self, inspect.currentframe())
 
     def apply_weights(self, sparse_matrix: scipy.sparse.csr_matrix) -> scipy.sparse.csr_matrix:
@@ -245,6 +332,9 @@ class TfIdfVisualBagOfWords(VisualBagOfWords):
     ADDITIONAL NOTE: the technique requires 2D arrays of features for each image, such as edges in the case of the
     Canny Edge detector. In case any other dimensionality is provided, a ValueError will be raised.
 
+    If `batch_size` is specified, the codebook is fit incrementally with a SkLearn MiniBatchKMeans on chunks of
+    `batch_size` descriptors, which keeps memory bounded when images have many descriptors (see `VisualBagOfWords`)
+
     Arguments for [SkLearn KMeans](https://scikit-learn.org/stable/modules/generated/sklearn.neighbors.KNeighborsClassifier.html)
 
     Arguments for [SkLearn StandardScaler](https://scikit-learn.org/stable/modules/generated/sklearn.preprocessing.StandardScaler.html)
@@ -258,10 +348,10 @@ class TfIdfVisualBagOfWords(VisualBagOfWords):
                  tol: Any = 1e-4, random_state: Any = None, copy_x: Any = True, algorithm: Any = "auto",
                  with_mean: bool = True, with_std: bool = True,
                  norm: Optional[str] = "l2", use_idf: bool = True,
-                 smooth_idf: bool = True, sublinear_tf: bool = False):
+                 smooth_idf: bool = True, sublinear_tf: bool = False, batch_size: Optional[int] = None):
         super().__init__(n_clusters=n_clusters, init=init, n_init=n_init, max_iter=max_iter, tol=tol,
                          random_state=random_state, copy_x=copy_x, algorithm=algorithm, with_mean=with_mean,
-                         with_std=with_std)
+                         with_std=with_std, batch_size=batch_size)
 
         self.tf_idf_params = {"norm": norm,
                               "use_idf": use_idf,
@@ -305,26 +395,37 @@ class ScipyVQ(EmbeddingInputPostProcessor):
     Arguments for [SkLearn StandardScaler](https://scikit-learn.org/stable/modules/generated/sklearn.preprocessing.StandardScaler.html)
 
     NOTE: for this technique it is mandatory for the parameter "with_std" to be set to True
+
+    If `batch_size` is specified, the scaler and a SkLearn MiniBatchKMeans are fit incrementally on chunks of
+    `batch_size` descriptors, so that the representations of all contents are never stacked in a single matrix. In
+    this case `copy_x` and `algorithm` are ignored
+
+    Arguments for [SkLearn MiniBatchKMeans](https://scikit-learn.org/stable/modules/generated/sklearn.cluster.MiniBatchKMeans.html)
     """
 
     def __init__(self, n_clusters: Any = 8, init: Any = "k-means++", n_init: Any = 10, max_iter: Any = 300,
                  tol: Any = 1e-4, random_state: Any = None, copy_x: Any = True, algorithm: Any = "auto",
-                 with_mean: bool = True, with_std: bool = True):
-        self.k_means = KMeans(n_clusters=n_clusters, init=init, n_init=n_init, max_iter=max_iter, tol=tol,
-                              random_state=random_state, copy_x=copy_x, algorithm=algorithm)
+                 with_mean: bool = True, with_std: bool = True, batch_size: Optional[int] = None):
+        if batch_size is None:
+            self.k_means = KMeans(n_clusters=n_clusters, init=init, n_init=n_init, max_iter=max_iter, tol=tol,
+                                  random_state=random_state, copy_x=copy_x, algorithm=algorithm)
+        else:
+            self.k_means = MiniBatchKMeans(n_clusters=n_clusters, init=init, n_init=n_init, max_iter=max_iter,
+                                           tol=tol, random_state=random_state, batch_size=batch_size)
         self.with_mean = with_mean
         self.with_std = with_std
+        self.batch_size = batch_size
         self._repr_string = autorepr(self, inspect.currentframe())
 
     def process(self, field_repr_list: List[EmbeddingField]) -> List[EmbeddingField]:
         first_inst = field_repr_list[0].value
 
-        # stack the representations from all fields
-
         if len(first_inst.shape) == 2:
-            descriptors = np.vstack([feature for field_repr in field_repr_list for feature in field_repr.value])
+            def descriptors_fn():
+                return (field_repr.value for field_repr in field_repr_list)
         elif len(first_inst.shape) == 1:
-            descriptors = np.vstack([field_repr.value for field_repr in field_repr_list])
+            def descriptors_fn():
+                return (np.expand_dims(field_repr.value, axis=0) for field_repr in field_repr_list)
         else:
             raise ValueError(f'Unsupported dimensionality for technique {self}, '
                              f'only one and two dimensional arrays are supported')
@@ -333,11 +434,19 @@ class ScipyVQ(EmbeddingInputPostProcessor):
 
         if self.with_mean or self.with_std:
             scaler = StandardScaler(with_mean=self.with_mean, with_std=self.with_std)
-            descriptors = scaler.fit_transform(descriptors)
 
-        # learn clusters using kmeans
-        self.k_means.fit(descriptors)
-        codewords = self.k_means.cluster_centers_
+        if self.batch_size is not None:
+            codewords = _fit_codebook_streaming(descriptors_fn, self.k_means, scaler, self.batch_size)
+        else:
+            # stack the representations from all fields
+            descriptors = np.vstack(list(descriptors_fn()))
+
+            if scaler is not None:
+                descriptors = scaler.fit_transform(descriptors)
+
+            # learn clusters using kmeans
+            self.k_means.fit(descriptors)
+            codewords = self.k_means.cluster_centers_
         new_field_repr_list = []
 
         # replace the old representations with the new ones (which will be the most similar codeword from the
@@ -521,3 +630,216 @@ class SkLearnFeatureAgglomeration(DimensionalityReduction):
     def __repr__(self):
         return self._repr_string
 
+
+class ChunkedDimensionalityReduction(DimensionalityReduction):
+    """
+    Abstract class that encapsulates the logic for dimensionality reduction techniques which never stack all
+    representations in a single matrix. The same two kinds of embedding representations of `DimensionalityReduction`
+    are supported, but representations are consumed in chunks of (at least) `batch_size` rows, both when fitting the
+    technique and when transforming the representations.
+
+    Sparse representations (such as tf-idf features bags) are stacked as sparse matrices, so they are never densified
+    unless the wrapped technique itself requires dense inputs
+
+    Extending this class and implementing the "fit_chunks" and "transform_chunk" methods allows to implement a new
+    out-of-core dimensionality reduction technique
+
+    Args:
+        batch_size: minimum number of rows of each chunk (only the chunk containing all rows can be smaller)
+    """
+
+    def __init__(self, batch_size: int = 1000):
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer!")
+
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _as_rows(field_value: Union[csc_matrix, np.ndarray]) -> Union[csr_matrix, np.ndarray]:
+        if isinstance(field_value, csc_matrix):
+            return field_value.tocsr()
+        elif len(field_value.shape) == 1:
+            return field_value.reshape(1, -1)
+        return field_value
+
+    def process(self, field_repr_list: Union[List[EmbeddingField], List[FeaturesBagField]]) -> List[EmbeddingField]:
+        first_inst = field_repr_list[0].value
+
+        if len(first_inst.shape) == 1 or (len(first_inst.shape) == 2 and first_inst.shape[0] == 1):
+            single_row = True
+        elif len(first_inst.shape) == 2:
+            single_row = False
+        else:
+            raise ValueError(f'Unsupported dimensionality for technique {self}, '
+                             f'only one dimensional and two dimensional arrays are supported')
+
+        blocks = [self._as_rows(field.value) for field in field_repr_list]
+
+        n_rows = sum(block.shape[0] for block in blocks)
+        self.fit_chunks(lambda: _iter_chunks(blocks, self.batch_size), n_rows, blocks[0].shape[1])
+
+        new_field_repr_list = []
+        next_block_index = 0
+        for chunk in _iter_chunks(blocks, self.batch_size):
+            processed_chunk = self.transform_chunk(chunk)
+
+            # split the processed chunk back into the representations it was built from
+            next_row_index = 0
+            while next_row_index < processed_chunk.shape[0]:
+                num_of_rows = blocks[next_block_index].shape[0]
+                processed_block = processed_chunk[next_row_index:next_row_index + num_of_rows]
+
+                if single_row:
+                    new_field_repr_list.append(EmbeddingField(processed_block[0]))
+                else:
+                    new_field_repr_list.append(EmbeddingField(processed_block))
+
+                next_row_index += num_of_rows
+                next_block_index += 1
+
+        return new_field_repr_list
+
+    def apply_processing(self, field_repr_array: Union[csr_matrix, np.ndarray]) -> np.ndarray:
+        self.fit_chunks(lambda: _iter_chunks([field_repr_array], self.batch_size), *field_repr_array.shape)
+        return self.transform_chunk(field_repr_array)
+
+    @abstractmethod
+    def fit_chunks(self, chunks_fn: Callable[[], Iterator[Union[csr_matrix, np.ndarray]]], n_rows: int,
+                   n_features: int):
+        """
+        Fit the technique on the chunks of rows
+
+        Args:
+            chunks_fn: function which returns a new iterator over the chunks of rows each time it is called
+            n_rows: total number of rows which will be processed
+            n_features: number of features of each row
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def transform_chunk(self, chunk: Union[csr_matrix, np.ndarray]) -> np.ndarray:
+        """
+        Reduce the dimensionality of a chunk of rows, returning a dense array
+        """
+        raise NotImplementedError
+
+
+class SkLearnIncrementalPCA(ChunkedDimensionalityReduction):
+    """
+    Out-of-core dimensionality reduction using the Incremental PCA implementation from SkLearn. The PCA is fit one
+    chunk at a time and representations are then transformed chunk by chunk
+
+    NOTE: Incremental PCA requires dense inputs, so sparse representations are densified one chunk at a time. For
+    sparse representations prefer `SkLearnTruncatedSVD` or `SkLearnSparseRandomProjections`
+
+    Usage example:
+
+    ```python
+    import clayrs.content_analyzer as ca
+    ca.FieldConfig(ca.SkImageCannyEdgeDetector(), postprocessing=[ca.SkLearnIncrementalPCA(n_components=50)])
+    ```
+
+    Arguments for [SkLearn Incremental PCA](https://scikit-learn.org/stable/modules/generated/sklearn.decomposition.IncrementalPCA.html)
+
+    Args:
+        batch_size: minimum number of rows of each chunk, it must be greater than or equal to n_components
+    """
+
+    def __init__(self, n_components=None, whiten=False, copy=True, batch_size: int = 1000):
+        super().__init__(batch_size)
+        self.pca = IncrementalPCA(n_components=n_components, whiten=whiten, copy=copy)
+        self._repr_string = autorepr(self, inspect.currentframe())
+
+    def fit_chunks(self, chunks_fn: Callable[[], Iterator[Union[csr_matrix, np.ndarray]]], n_rows: int,
+                   n_features: int):
+        for chunk in chunks_fn():
+            self.pca.partial_fit(chunk.toarray() if scipy.sparse.issparse(chunk) else chunk)
+
+    def transform_chunk(self, chunk: Union[csr_matrix, np.ndarray]) -> np.ndarray:
+        return self.pca.transform(chunk.toarray() if scipy.sparse.issparse(chunk) else chunk)
+
+    def __str__(self):
+        return 'SkLearn Incremental PCA'
+
+    def __repr__(self):
+        return self._repr_string
+
+
+class SkLearnSparseRandomProjections(ChunkedDimensionalityReduction):
+    """
+    Out-of-core dimensionality reduction using the Sparse Random Projections implementation from SkLearn. The
+    projection matrix only depends on the number of rows and features, so nothing is stacked to fit the technique,
+    and representations are then projected chunk by chunk. Sparse representations are never densified
+
+    Usage example:
+
+    ```python
+    import clayrs.content_analyzer as ca
+    ca.FieldConfig(ca.SkLearnTfIdf(), postprocessing=[ca.SkLearnSparseRandomProjections(n_components=100)])
+    ```
+
+    Arguments for [SkLearn Sparse Random Projection](https://scikit-learn.org/stable/modules/generated/sklearn.random_projection.SparseRandomProjection.html)
+
+    Args:
+        batch_size: minimum number of rows of each chunk
+    """
+
+    def __init__(self, n_components='auto', density='auto', eps=0.1, random_state=None, batch_size: int = 1000):
+        super().__init__(batch_size)
+        self.random_proj = SparseRandomProjection(n_components=n_components, density=density, eps=eps,
+                                                  dense_output=True, random_state=random_state)
+        self._repr_string = autorepr(self, inspect.currentframe())
+
+    def fit_chunks(self, chunks_fn: Callable[[], Iterator[Union[csr_matrix, np.ndarray]]], n_rows: int,
+                   n_features: int):
+        # only the shape of the input is used to build the projection matrix, so an empty sparse matrix is enough
+        self.random_proj.fit(csr_matrix((n_rows, n_features)))
+
+    def transform_chunk(self, chunk: Union[csr_matrix, np.ndarray]) -> np.ndarray:
+        return self.random_proj.transform(chunk)
+
+    def __str__(self):
+        return 'SkLearn Sparse Random Projections'
+
+    def __repr__(self):
+        return self._repr_string
+
+
+class SkLearnTruncatedSVD(ChunkedDimensionalityReduction):
+    """
+    Dimensionality reduction using the Truncated SVD implementation from SkLearn, which works directly on sparse
+    matrices. Sparse representations (such as tf-idf features bags) are stacked in a single sparse matrix to fit the
+    technique, but they are never densified, and they are then transformed chunk by chunk
+
+    Usage example:
+
+    ```python
+    import clayrs.content_analyzer as ca
+    ca.FieldConfig(ca.SkLearnTfIdf(), postprocessing=[ca.SkLearnTruncatedSVD(n_components=100)])
+    ```
+
+    Arguments for [SkLearn Truncated SVD](https://scikit-learn.org/stable/modules/generated/sklearn.decomposition.TruncatedSVD.html)
+
+    Args:
+        batch_size: minimum number of rows of each chunk
+    """
+
+    def __init__(self, n_components=2, algorithm='randomized', n_iter=5, random_state=None, tol=0.0,
+                 batch_size: int = 1000):
+        super().__init__(batch_size)
+        self.svd = TruncatedSVD(n_components=n_components, algorithm=algorithm, n_iter=n_iter,
+                                random_state=random_state, tol=tol)
+        self._repr_string = autorepr(self, inspect.currentframe())
+
+    def fit_chunks(self, chunks_fn: Callable[[], Iterator[Union[csr_matrix, np.ndarray]]], n_rows: int,
+                   n_features: int):
+        self.svd.fit(_vstack_rows(list(chunks_fn())))
+
+    def transform_chunk(self, chunk: Union[csr_matrix, np.ndarray]) -> np.ndarray:
+        return self.svd.transform(chunk)
+
+    def __str__(self):
+        return 'SkLearn Truncated SVD'
+
+    def __repr__(self):
+        return self._repr_string
@@ -1 +1,2 @@
 from .text_interface import KeywordIndex, SearchIndex
+from .sparse_index import SparseKeywordIndex, SparseSearchIndex
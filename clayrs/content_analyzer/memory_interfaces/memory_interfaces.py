@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Union
+from typing import Union, Dict, Tuple, Iterable, List
 import shutil
 
 
@@ -48,6 +48,29 @@ class InformationInterface(ABC):
         """
         raise NotImplementedError
 
+    def add_documents(self, documents: Iterable[Dict[str, object]]) -> List[int]:
+        """
+        Serializes a batch of contents, each one represented as a dict in the form `{field_name: field_data}`.
+        The interface must be in writing mode
+
+        By default each content is serialized with `new_content()`, `new_field()` and `serialize_content()`:
+        interfaces which are able to serialize many contents at once more efficiently override this method
+
+        Args:
+            documents: contents to serialize
+
+        Returns:
+            List containing the position of each content serialized
+        """
+        positions = []
+        for document in documents:
+            self.new_content()
+            for field_name, field_data in document.items():
+                self.new_field(field_name, field_data)
+            positions.append(self.serialize_content())
+
+        return positions
+
     @abstractmethod
     def init_writing(self, delete_old: bool = False):
         """
@@ -180,8 +203,13 @@ class TextInterface(InformationInterface):
         raise NotImplementedError
 
     @abstractmethod
-    def query(self, string_query: str, results_number: int, mask_list: list = None,
-              candidate_list: list = None, classic_similarity: bool = True) -> dict:
+    def query(self, string_query: Union[str, Dict[Tuple[str, str], float]], results_number: int,
+              mask_list: list = None, candidate_list: list = None, classic_similarity: bool = True) -> dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    def batch_query(self, queries: List[Dict[Tuple[str, str], float]], results_number: int,
+                    mask_lists: list = None, candidate_lists: list = None, classic_similarity: bool = True) -> list:
         raise NotImplementedError
 
     @abstractmethod
@@ -0,0 +1,805 @@
+from __future__ import annotations
+import abc
+import json
+import math
+import os
+import pickle
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Union, Dict, List, Tuple, Iterable, Optional
+
+import numpy as np
+from scipy import sparse
+from whoosh.analysis import SimpleAnalyzer
+from whoosh.fields import TEXT, KEYWORD
+from whoosh.formats import Frequency
+from whoosh.util.numeric import _length_byte_cache
+
+from clayrs.content_analyzer.memory_interfaces.memory_interfaces import TextInterface
+from clayrs.content_analyzer.memory_interfaces.text_interface import DocnumSet, _to_docnum_set
+from clayrs.utils.top_k import top_k_indices
+
+
+# lengths that whoosh can store in a single byte, the i-th value is the length encoded by the byte i
+_BYTE_LENGTHS = np.frombuffer(_length_byte_cache, dtype=np.int32)
+
+
+def _quantize_lengths(lengths: np.ndarray) -> np.ndarray:
+    """
+    Returns the lengths as whoosh stores them, that is `byte_to_length(length_to_byte(length))` for each length: whoosh
+    encodes the length of a field in a document with a single byte, so only lengths up to 10 are exact
+    """
+    length_bytes = np.minimum(np.searchsorted(_BYTE_LENGTHS, lengths, side='left'), 255)
+    return _BYTE_LENGTHS[length_bytes]
+
+
+class _FieldPostings:
+    """
+    Postings of a single field of the sparse index, kept as a (documents x terms) CSC matrix of term frequencies, so
+    that the postings of each term are a contiguous slice of the matrix. Arrays of the matrix can be memory mapped
+
+    Args:
+        tf: (documents x terms) CSC matrix containing the frequency of each term in each document
+        lengths: number of terms of the field in each document
+        terms: terms of the field, the i-th term is the one of the i-th column of the matrix
+        scorable: whether lengths of the field are used for the BM25F weight. Like whoosh, the weight of a term in a
+            field which is not scorable (e.g. a keyword field) is simply its frequency
+    """
+
+    # BM25F parameters, same defaults as whoosh
+    B = 0.75
+    K1 = 1.2
+
+    def __init__(self, tf: sparse.csc_matrix, lengths: np.ndarray, terms: List[str], scorable: bool = True):
+        self.tf = tf
+        self.scorable = scorable
+        self.lengths = lengths
+        self.terms = terms
+        self.vocabulary = {term: term_id for term_id, term in enumerate(terms)}
+        self.df = np.diff(tf.indptr)
+
+        doc_count = tf.shape[0]
+        self.avg_length = (lengths.sum() / doc_count) if doc_count != 0 else 0
+        self.__tf_rows = None
+
+    @property
+    def tf_rows(self) -> sparse.csr_matrix:
+        # row-wise copy of the matrix, built only when the terms of single documents are needed
+        if self.__tf_rows is None:
+            self.__tf_rows = self.tf.tocsr()
+        return self.__tf_rows
+
+    def weights(self, term_ids: np.ndarray, classic_similarity: bool) -> sparse.csc_matrix:
+        """
+        Returns the (documents x len(term_ids)) CSC matrix where each element is the weight of the term in the
+        document, computed only for the postings of the terms passed as argument
+
+        The weight is computed with the same formulas used by the TF_IDF and BM25F weighting models of whoosh. Like
+        whoosh, BM25F uses the length of the field in each document quantized to a byte (see `_quantize_lengths()`),
+        while the average length is computed on the exact lengths
+        """
+        tf = self.tf[:, term_ids]
+        doc_count = tf.shape[0]
+
+        idf = np.log(doc_count / (self.df[term_ids] + 1)) + 1
+        postings_idf = np.repeat(idf, np.diff(tf.indptr))
+
+        if classic_similarity:
+            data = tf.data * postings_idf
+        elif not self.scorable:
+            data = tf.data.astype(float)
+        else:
+            avg_length = self.avg_length or 1
+            postings_lengths = _quantize_lengths(self.lengths[tf.indices])
+            data = postings_idf * ((tf.data * (self.K1 + 1)) /
+                                   (tf.data + self.K1 * ((1 - self.B) + self.B * postings_lengths / avg_length)))
+
+        return sparse.csc_matrix((data, tf.indices, tf.indptr), shape=tf.shape)
+
+
+class _PostingsBuilder:
+    """
+    Accumulates the postings of a single field while contents are serialized, and builds the CSC matrix of term
+    frequencies once all contents have been added
+    """
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.docs = array('q')
+        self.term_ids = array('q')
+        self.frequencies = array('q')
+        self.length_docs = array('q')
+        self.lengths = array('q')
+
+    def add(self, doc: int, terms: Iterable[str]):
+        term_frequencies = Counter(terms)
+
+        vocabulary = self.vocabulary
+        for term, frequency in term_frequencies.items():
+            term_id = vocabulary.setdefault(term, len(vocabulary))
+            self.docs.append(doc)
+            self.term_ids.append(term_id)
+            self.frequencies.append(frequency)
+
+        self.length_docs.append(doc)
+        self.lengths.append(sum(term_frequencies.values()))
+
+    def add_postings(self, postings: _FieldPostings):
+        # postings of an already serialized index are added as they are, since documents keep their position
+        tf = postings.tf.tocoo()
+        term_ids = np.array([self.vocabulary.setdefault(term, len(self.vocabulary)) for term in postings.terms],
+                            dtype=np.int64)
+
+        self.docs.extend(tf.row.astype(np.int64))
+        self.term_ids.extend(term_ids[tf.col])
+        self.frequencies.extend(tf.data.astype(np.int64))
+
+        docs_with_field = np.flatnonzero(postings.lengths)
+        self.length_docs.extend(docs_with_field.astype(np.int64))
+        self.lengths.extend(np.asarray(postings.lengths)[docs_with_field].astype(np.int64))
+
+    def build(self, doc_count: int) -> Tuple[sparse.csc_matrix, np.ndarray, List[str]]:
+        tf = sparse.csc_matrix((np.frombuffer(self.frequencies, dtype=np.int64).astype(np.int32),
+                                (np.frombuffer(self.docs, dtype=np.int64),
+                                 np.frombuffer(self.term_ids, dtype=np.int64))),
+                               shape=(doc_count, len(self.vocabulary)))
+        tf.sum_duplicates()
+        tf.sort_indices()
+
+        lengths = np.zeros(doc_count, dtype=np.int32)
+        lengths[np.frombuffer(self.length_docs, dtype=np.int64)] = np.frombuffer(self.lengths, dtype=np.int64)
+
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+
+        return tf, lengths, terms
+
+
+class _SparseIndexSnapshot:
+    """
+    Read only view of a generation of the sparse index stored on disk: postings of each field are memory mapped,
+    stored fields are loaded in memory
+    """
+
+    def __init__(self, directory: str, manifest: dict):
+        self.generation = manifest["generation"]
+        self.doc_count = manifest["doc_count"]
+        self.schema = manifest["schema"]
+
+        self.fields = {}
+        for field_number, field_name in enumerate(manifest["fields"]):
+            prefix = os.path.join(directory, f"{self.generation}_{field_number}")
+
+            indptr = np.load(f"{prefix}_indptr.npy", mmap_mode='r')
+            indices = np.load(f"{prefix}_indices.npy", mmap_mode='r')
+            data = np.load(f"{prefix}_data.npy", mmap_mode='r')
+            lengths = np.load(f"{prefix}_lengths.npy", mmap_mode='r')
+            with open(f"{prefix}_terms.json", "r") as f:
+                terms = json.load(f)
+
+            tf = sparse.csc_matrix((data, indices, indptr), shape=(self.doc_count, len(terms)), copy=False)
+            self.fields[field_name] = _FieldPostings(tf, lengths, terms, scorable=self.schema != 'keyword')
+
+        with open(os.path.join(directory, f"{self.generation}_stored.pkl"), "rb") as f:
+            self.stored = pickle.load(f)
+
+        self.docnums = {stored_fields["content_id"]: docnum for docnum, stored_fields in enumerate(self.stored)
+                        if "content_id" in stored_fields}
+
+
+class SparseIndexInterface(TextInterface):
+    """
+    Abstract class that takes care of serializing and deserializing text in an in-process sparse inverted index,
+    which can be used in place of the whoosh based `IndexInterface`: it exposes the same `query()`, `get_field()`
+    and `get_tf_idf()` methods, but postings of each field are kept as a sparse (documents x terms) CSC matrix
+    built with numpy/scipy. This means that:
+
+    * TF-IDF and BM25 scores of a query are computed with a sparse matrix-vector product between the weights of the
+    postings of the query terms and the boosts of said terms
+    * The index is persisted as numpy arrays which are memory mapped when the index is read, so opening the index is
+    cheap and its postings are shared between processes
+
+    Text is split in terms with the same whoosh analyzers used by the `KeywordIndex` and `SearchIndex` counterparts,
+    and scores are computed with the same formulas of the whoosh TF_IDF and BM25F weighting models (BM25F also uses
+    field lengths quantized to a byte, as whoosh stores them).
+
+    String queries support a subset of the whoosh syntax: a query is a sequence of clauses in the form
+    `field:(some text)`, `field:term` or `term` (searched in the `content_id` field), optionally followed by a boost
+    (e.g. `Plot:(space travel)^2`). Any document matching at least one clause is returned.
+
+    The index is opened (lazily or explicitly with `open()`) once, and automatically reloaded if it changes on disk.
+    Read only data structures are shared by all threads
+
+    Args:
+        directory (str): Path of the directory where the content will be serialized
+    """
+
+    manifest_filename = "sparse_index.json"
+
+    # number of queries scored together by batch_query()
+    BATCH_BLOCK_SIZE = 256
+
+    # field_name:(text) or field_name:term or term, optionally followed by ^boost
+    _clause_regex = re.compile(r'(?:(?P<field>[\w-]+(?:#[\w-]+(?:#[\w-]+)?)?):)?'
+                               r'(?:\((?P<group>[^()]*)\)|(?P<term>[^\s()^]+))'
+                               r'(?:\^(?P<boost>\d+(?:\.\d+)?))?')
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        self.__doc = None  # document that is currently being created and will be added to the index
+        self.__stored = None  # stored fields of the documents serialized, None if not in writing mode
+        self.__builders = None  # postings builders of each field, None if not in writing mode
+        self.__schema_types = {}  # field types used to analyze text, one for each schema
+        self._init_reading_state()
+
+    def _init_reading_state(self):
+        self.__snapshot: Optional[_SparseIndexSnapshot] = None
+        self.__manifest_mtime = None
+        self.__lock = threading.Lock()
+
+    @property
+    @abc.abstractmethod
+    def schema_name(self) -> str:
+        """
+        Name of the schema used to split text in terms, it can be 'keyword' (same analysis of the `KeywordIndex`) or
+        'search' (same analysis of the `SearchIndex`)
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        """
+        Returns True if the directory contains a sparse index
+        """
+        return os.path.isfile(os.path.join(directory, SparseIndexInterface.manifest_filename))
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, self.manifest_filename)
+
+    def _schema_type(self, schema_name: str):
+        schema_type = self.__schema_types.get(schema_name)
+        if schema_type is None:
+            if schema_name == 'keyword':
+                schema_type = KEYWORD(stored=True, commas=True, vector=Frequency())
+            elif schema_name == 'search':
+                schema_type = TEXT(stored=True, analyzer=SimpleAnalyzer())
+            else:
+                raise ValueError(f"Schema {schema_name} not supported! Supported schemas are 'keyword' and 'search'")
+
+            self.__schema_types[schema_name] = schema_type
+
+        return schema_type
+
+    def _terms(self, schema_name: str, field_data: object, mode: str = "index") -> List[str]:
+        # like whoosh, lists of values are considered already split in terms
+        if isinstance(field_data, (list, tuple)):
+            return [str(term) for term in field_data]
+
+        return list(self._schema_type(schema_name).process_text(str(field_data), mode=mode))
+
+    def init_writing(self, delete_old: bool = False):
+        """
+        Creates the index directory (in the directory passed in the constructor) and sets the index in writing mode.
+        If an index already exists in the directory, what happens depend on the attribute delete_old passed as argument
+
+        Args:
+            delete_old (bool): if True, the index that was in the same directory is destroyed and replaced;
+                if False, the index is simply opened and new contents will be added to it
+        """
+        self.__stored = []
+        self.__builders = {}
+
+        if os.path.exists(self.directory):
+            if delete_old:
+                self.delete()
+                os.mkdir(self.directory)
+            elif self.exists(self.directory):
+                snapshot = self._get_snapshot()
+                self.__stored = list(snapshot.stored)
+                for field_name, postings in snapshot.fields.items():
+                    builder = _PostingsBuilder()
+                    builder.add_postings(postings)
+                    self.__builders[field_name] = builder
+        else:
+            os.mkdir(self.directory)
+
+    def new_content(self):
+        """
+        The new content is a document that will be indexed. In this case the document is a dictionary with
+        the name of the field as key and the data inside the field as value
+        """
+        self.__doc = {}
+
+    def new_field(self, field_name: str, field_data: object):
+        """
+        Adds a new field to the document that is being created
+
+        Args:
+            field_name (str): Name of the new field
+            field_data (object): Data to put into the field
+        """
+        self.__doc[field_name] = field_data
+
+    def serialize_content(self) -> int:
+        """
+        Adds the document to the index: its terms are added to the postings of each field and its data is stored.
+        Once the document is indexed, it can be deleted from the interface and the document position in the index is
+        returned
+        """
+        doc_index = len(self.__stored)
+
+        for field_name, field_data in self.__doc.items():
+            builder = self.__builders.get(field_name)
+            if builder is None:
+                builder = self.__builders[field_name] = _PostingsBuilder()
+
+            builder.add(doc_index, self._terms(self.schema_name, field_data))
+
+        self.__stored.append(self.__doc)
+        del self.__doc
+
+        return doc_index
+
+    def stop_writing(self):
+        """
+        Builds the postings of each field and persists the index on disk. A new generation of the index is written
+        and then the manifest is atomically replaced, so that readers never see a partially written index
+        """
+        doc_count = len(self.__stored)
+        old_generation = None
+        if self.exists(self.directory):
+            with open(self.manifest_path, "r") as f:
+                old_generation = json.load(f)["generation"]
+        generation = old_generation + 1 if old_generation is not None else 0
+
+        field_names = list(self.__builders.keys())
+        for field_number, field_name in enumerate(field_names):
+            tf, lengths, terms = self.__builders[field_name].build(doc_count)
+
+            # indptr and indices must share the same dtype, otherwise scipy copies them when they are loaded
+            index_dtype = np.int32 if tf.nnz < np.iinfo(np.int32).max else np.int64
+
+            prefix = os.path.join(self.directory, f"{generation}_{field_number}")
+            np.save(f"{prefix}_indptr.npy", tf.indptr.astype(index_dtype))
+            np.save(f"{prefix}_indices.npy", tf.indices.astype(index_dtype))
+            np.save(f"{prefix}_data.npy", tf.data.astype(np.int32))
+            np.save(f"{prefix}_lengths.npy", lengths)
+            with open(f"{prefix}_terms.json", "w") as f:
+                json.dump(terms, f)
+
+        with open(os.path.join(self.directory, f"{generation}_stored.pkl"), "wb") as f:
+            pickle.dump(self.__stored, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        manifest = {"generation": generation, "doc_count": doc_count, "schema": self.schema_name,
+                    "fields": field_names}
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+        # files of the old generation can be removed, readers which memory mapped them keep them alive
+        if old_generation is not None:
+            for filename in os.listdir(self.directory):
+                if filename.startswith(f"{old_generation}_"):
+                    try:
+                        os.remove(os.path.join(self.directory, filename))
+                    except OSError:
+                        pass
+
+        self.__stored = None
+        self.__builders = None
+
+    def open(self):
+        """
+        Opens the index for reading by memory mapping its postings. Calling this method on an index already opened
+        has no effect
+
+        Returns:
+            The index interface itself, so that it can be used as a context manager
+        """
+        self._get_snapshot()
+        return self
+
+    def close(self):
+        """
+        Releases the postings and the stored fields of the index. The index can be opened again by calling `open()`
+        (or by simply reading from it)
+        """
+        with self.__lock:
+            self.__snapshot = None
+            self.__manifest_mtime = None
+
+    def _get_snapshot(self) -> _SparseIndexSnapshot:
+        """
+        Returns the view of the last generation of the index, loading it if the index changed since the last time it
+        was read
+        """
+        try:
+            # the manifest is replaced each time the index is written, so its inode changes too
+            manifest_stat = os.stat(self.manifest_path)
+            manifest_mtime = (manifest_stat.st_ino, manifest_stat.st_mtime_ns)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No sparse index found in {self.directory}!") from None
+
+        with self.__lock:
+            if self.__snapshot is None or self.__manifest_mtime != manifest_mtime:
+                with open(self.manifest_path, "r") as f:
+                    manifest = json.load(f)
+
+                self.__snapshot = _SparseIndexSnapshot(self.directory, manifest)
+                self.__manifest_mtime = manifest_mtime
+
+            return self.__snapshot
+
+    def _get_docnum(self, snapshot: _SparseIndexSnapshot, content_id: Union[str, int]) -> int:
+        if isinstance(content_id, str):
+            docnum = snapshot.docnums.get(content_id)
+            if docnum is None:
+                raise IndexError(f"Content {content_id} not found in the index!")
+        else:
+            docnum = content_id
+            if not 0 <= docnum < snapshot.doc_count:
+                raise IndexError(f"Position {content_id} out of range of the index!")
+
+        return docnum
+
+    def analyze(self, field_name: str, text: str) -> List[str]:
+        """
+        Splits the text in the terms which would be indexed for the field. Terms returned can be used to build a
+        weighted term query (see the `query()` method)
+
+        Args:
+            field_name: name of the field whose analyzer will be used
+            text: text to analyze
+
+        Returns:
+            List of terms in which the text has been split
+        """
+        return self._terms(self._get_snapshot().schema, text, mode="query")
+
+    def docnum_set(self, content_ids: Iterable[str]) -> DocnumSet:
+        """
+        Maps the content ids passed as argument to the set of their docnums (their positions in the index), which can
+        be passed to the `query()` method as mask or candidate set. Content ids which are not in the index are ignored
+
+        The set is valid as long as the index is not modified
+
+        Args:
+            content_ids: content ids to map
+
+        Returns:
+            Set of the docnums of the content ids passed as argument
+        """
+        return _to_docnum_set(self._get_snapshot().docnums, content_ids)
+
+    def _parse(self, schema_name: str, string_query: str) -> Dict[Tuple[str, str], float]:
+        """
+        Converts a string query in the equivalent weighted term vector
+        """
+        weighted_terms = {}
+        for clause in self._clause_regex.finditer(string_query):
+            field_name = clause.group("field") or "content_id"
+            text = clause.group("group") if clause.group("group") is not None else clause.group("term")
+            boost = float(clause.group("boost")) if clause.group("boost") is not None else 1
+
+            # like the whoosh parser, the text is split on whitespaces before being analyzed
+            for term in (term for word in text.split() for term in self._terms(schema_name, word, mode="query")):
+                weighted_terms[(field_name, term)] = weighted_terms.get((field_name, term), 0) + boost
+
+        return weighted_terms
+
+    def _score(self, snapshot: _SparseIndexSnapshot, weighted_terms: Dict[Tuple[str, str], float],
+               classic_similarity: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Computes the score of each document for the weighted term vector. For each field, the weights of the postings
+        of the query terms are multiplied by the vector of the boosts of said terms
+
+        Returns:
+            The array of the scores of all documents and the boolean array of the documents matching at least a term
+        """
+        # like the whoosh index, terms with weight 0 are ignored
+        terms_by_field = {}
+        for (field_name, term), weight in weighted_terms.items():
+            if weight != 0:
+                terms_by_field.setdefault(field_name, {})[term] = weight
+
+        scores = np.zeros(snapshot.doc_count)
+        matched = np.zeros(snapshot.doc_count, dtype=bool)
+        for field_name, term_weights in terms_by_field.items():
+            postings = snapshot.fields.get(field_name)
+            if postings is None:
+                continue
+
+            query_terms = [(postings.vocabulary[term], weight) for term, weight in term_weights.items()
+                           if term in postings.vocabulary]
+            if len(query_terms) == 0:
+                continue
+
+            term_ids = np.array([term_id for term_id, _ in query_terms])
+            boosts = np.array([weight for _, weight in query_terms], dtype=float)
+
+            weights = postings.weights(term_ids, classic_similarity)
+            scores += weights @ boosts
+            matched[weights.indices] = True
+
+        return scores, matched
+
+    def query(self, string_query: Union[str, Dict[Tuple[str, str], float]], results_number: int,
+              mask_list: Union[Iterable[str], DocnumSet] = None,
+              candidate_list: Union[Iterable[str], DocnumSet] = None, classic_similarity: bool = True) -> dict:
+        """
+        Queries the index in order to retrieve specific contents using a query expressed in string form or as a
+        weighted term vector in the form `{(field_name, term): weight}`
+
+        Args:
+            string_query: query expressed as a string or as a weighted term vector
+            results_number: number of results the index will return for the query, if None all matching contents
+                are returned
+            mask_list: content_ids (or set of docnums) of items to ignore in the search process
+            candidate_list: content_ids (or set of docnums) of items to consider in the search process,
+                if it is not None only items in the list will be considered
+            classic_similarity: if True, classic tf idf is used for scoring, otherwise BM25F is used
+
+        Returns:
+            results: the final results dictionary containing the results found from the index for the
+                query. The dictionary will be in the following form:
+
+                    {content_id: {"item": item_dictionary, "score": item_score}, ...}
+
+                content_id is the content_id for the corresponding item
+                item_dictionary is the dictionary of the item containing the fields as keys and the contents as values.
+                The item_dictionary will not contain the content_id since it is already defined and used as key of the
+                external dictionary
+                items_score is the score given to the item for the query by the index
+        """
+        snapshot = self._get_snapshot()
+
+        if isinstance(string_query, str):
+            string_query = self._parse(snapshot.schema, string_query)
+
+        scores, allowed = self._score(snapshot, string_query, classic_similarity)
+
+        if candidate_list is not None:
+            candidates = np.zeros(snapshot.doc_count, dtype=bool)
+            candidates[list(_to_docnum_set(snapshot.docnums, candidate_list))] = True
+            allowed &= candidates
+
+        if mask_list is not None:
+            allowed[list(_to_docnum_set(snapshot.docnums, mask_list))] = False
+
+        docnums = np.flatnonzero(allowed)
+        return self._results(snapshot, docnums, scores[docnums], results_number)
+
+    @staticmethod
+    def _results(snapshot: _SparseIndexSnapshot, docnums: np.ndarray, scores: np.ndarray,
+                 results_number: Optional[int]) -> dict:
+        """
+        Builds the results dictionary of the top `results_number` documents among the ones passed as argument
+        """
+        results = {}
+        # ties are broken by position in the index (like whoosh)
+        for position in top_k_indices(scores, results_number, tie_breaker=docnums):
+            item = dict(snapshot.stored[docnums[position]])
+            content_id = item.pop("content_id")
+            results[content_id] = {"item": item, "score": float(scores[position])}
+
+        return results
+
+    def batch_query(self, queries: List[Dict[Tuple[str, str], float]], results_number: Optional[int],
+                    mask_lists: List[Optional[Union[Iterable[str], DocnumSet]]] = None,
+                    candidate_lists: List[Optional[Union[Iterable[str], DocnumSet]]] = None,
+                    classic_similarity: bool = True) -> List[dict]:
+        """
+        Executes many queries expressed as weighted term vectors (e.g. the queries of different users) at once.
+        The result of each query is the same that would be returned by the `query()` method
+
+        Queries are processed in blocks of `BATCH_BLOCK_SIZE`: for each field, the weights of the postings of all the
+        terms of the block are computed once and multiplied by the (terms x queries) sparse matrix of the weights of
+        the terms in each query, obtaining the scores of the documents for all the queries of the block
+
+        Args:
+            queries: list of weighted term vectors in the form `{(field_name, term): weight}`
+            results_number: number of results returned for each query, if None all matching contents are returned
+            mask_lists: for each query, content_ids (or set of docnums) of items to ignore, or None
+            candidate_lists: for each query, content_ids (or set of docnums) of items to consider, or None if all
+                items must be considered
+            classic_similarity: if True, classic tf idf is used for scoring, otherwise BM25F is used
+
+        Returns:
+            List containing, for each query, its results dictionary in the same form of the one returned by
+                `query()`
+        """
+        snapshot = self._get_snapshot()
+
+        results_list = []
+        for block_start in range(0, len(queries), self.BATCH_BLOCK_SIZE):
+            block = queries[block_start:block_start + self.BATCH_BLOCK_SIZE]
+            scores, matched = self._score_block(snapshot, block, classic_similarity)
+
+            for block_position in range(len(block)):
+                query_position = block_start + block_position
+
+                # documents matching the query and their scores (zero scores are not kept by the product)
+                docnums = matched.indices[matched.indptr[block_position]:matched.indptr[block_position + 1]]
+                score_docnums = scores.indices[scores.indptr[block_position]:scores.indptr[block_position + 1]]
+                docnums_scores = np.zeros(len(docnums))
+                docnums_scores[np.searchsorted(docnums, score_docnums)] = \
+                    scores.data[scores.indptr[block_position]:scores.indptr[block_position + 1]]
+
+                allowed = np.ones(len(docnums), dtype=bool)
+                candidate_list = candidate_lists[query_position] if candidate_lists is not None else None
+                if candidate_list is not None:
+                    candidates = _to_docnum_set(snapshot.docnums, candidate_list)
+                    allowed &= np.isin(docnums, np.fromiter(candidates, dtype=np.int64, count=len(candidates)))
+
+                mask_list = mask_lists[query_position] if mask_lists is not None else None
+                if mask_list is not None:
+                    masked = _to_docnum_set(snapshot.docnums, mask_list)
+                    allowed &= ~np.isin(docnums, np.fromiter(masked, dtype=np.int64, count=len(masked)))
+
+                results_list.append(self._results(snapshot, docnums[allowed], docnums_scores[allowed],
+                                                  results_number))
+
+        return results_list
+
+    def _score_block(self, snapshot: _SparseIndexSnapshot, queries: List[Dict[Tuple[str, str], float]],
+                     classic_similarity: bool) -> Tuple[sparse.csc_matrix, sparse.csc_matrix]:
+        """
+        Computes the scores of the documents for a block of queries
+
+        Returns:
+            The (documents x queries) CSC matrix of the scores and the (documents x queries) CSC matrix whose
+                non-zero elements are the documents matching at least a term of each query, both with sorted indices
+        """
+        # for each field, the term ids and the (query position, weight) of each term of the block
+        fields_terms = {}
+        for query_position, weighted_terms in enumerate(queries):
+            for (field_name, term), weight in weighted_terms.items():
+                postings = snapshot.fields.get(field_name)
+                if weight != 0 and postings is not None and term in postings.vocabulary:
+                    field_terms = fields_terms.setdefault(field_name, ([], [], []))
+                    field_terms[0].append(postings.vocabulary[term])
+                    field_terms[1].append(query_position)
+                    field_terms[2].append(weight)
+
+        shape = (snapshot.doc_count, len(queries))
+        scores = sparse.csc_matrix(shape)
+        matched = sparse.csc_matrix(shape, dtype=np.int64)
+        for field_name, (term_ids, query_positions, weights) in fields_terms.items():
+            # rows of the query matrix are the distinct terms of the field in the block
+            block_term_ids, rows = np.unique(term_ids, return_inverse=True)
+            query_matrix = sparse.csr_matrix((weights, (rows, query_positions)),
+                                             shape=(len(block_term_ids), len(queries)))
+            query_pattern = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, query_positions)),
+                                              shape=(len(block_term_ids), len(queries)))
+
+            postings_weights = snapshot.fields[field_name].weights(block_term_ids, classic_similarity)
+            postings_pattern = sparse.csc_matrix((np.ones(len(postings_weights.data), dtype=np.int64),
+                                                  postings_weights.indices, postings_weights.indptr),
+                                                 shape=postings_weights.shape)
+
+            scores = scores + (postings_weights @ query_matrix).tocsc()
+            matched = matched + (postings_pattern @ query_pattern).tocsc()
+
+        scores.sort_indices()
+        matched.sort_indices()
+        return scores, matched
+
+    def get_field(self, field_name: str, content_id: Union[str, int]) -> object:
+        """
+        Retrieves the content corresponding to the content_id (if it is a string) or in the corresponding position
+        (if it is an integer), and returns the data in the field corresponding to the field_name
+
+        Args:
+            field_name (str): name of the field from which the data will be retrieved
+            content_id (Union[str, int]): either the position or Id of the content that contains the specified field
+
+        Returns:
+            Data contained in the field of the content
+        """
+        snapshot = self._get_snapshot()
+        return snapshot.stored[self._get_docnum(snapshot, content_id)][field_name]
+
+    def get_tf_idf(self, field_name: str, content_id: Union[str, int]) -> Dict[str, float]:
+        r"""
+        Calculates the tf-idf for the words contained in the field of the content whose id
+        is content_id (if it is a string) or in the given position (if it is an integer).
+
+        The tf-idf computation formula is:
+
+        $$
+        tf \mbox{-} idf = (1 + log10(tf)) * log10(idf)
+        $$
+
+        Args:
+            field_name: Name of the field containing the words for which calculate the tf-idf
+            content_id: either the position or Id of the content that contains the specified field
+
+        Returns:
+            words_bag: Dictionary whose keys are the words contained in the field, and the
+                corresponding values are the tf-idf values
+        """
+        snapshot = self._get_snapshot()
+        docnum = self._get_docnum(snapshot, content_id)
+
+        postings = snapshot.fields[field_name]
+        doc_terms = postings.tf_rows[docnum]
+
+        words_bag = {}
+        for term_id, freq in zip(doc_terms.indices, doc_terms.data):
+            tf = 1 + math.log10(freq)
+            idf = math.log10(snapshot.doc_count / postings.df[term_id])
+            words_bag[postings.terms[term_id]] = tf * idf
+
+        return words_bag
+
+    def delete(self):
+        self.close()
+        super().delete()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getstate__(self):
+        # loaded postings are not pickled, the index will be opened again by the process which unpickles it
+        state = self.__dict__.copy()
+        for attribute in ('snapshot', 'manifest_mtime', 'lock'):
+            del state[f'_SparseIndexInterface__{attribute}']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_reading_state()
+
+    @abc.abstractmethod
+    def __str__(self):
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def __repr__(self):
+        raise NotImplementedError
+
+
+class SparseKeywordIndex(SparseIndexInterface):
+    """
+    Sparse index which splits the indexed text in the same way as the `KeywordIndex` (on commas), so it can be used
+    in its place
+    """
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+
+    @property
+    def schema_name(self) -> str:
+        return 'keyword'
+
+    def __str__(self):
+        return "SparseKeywordIndex"
+
+    def __repr__(self):
+        return f'SparseKeywordIndex(directory={self.directory})'
+
+
+class SparseSearchIndex(SparseIndexInterface):
+    """
+    Sparse index which splits the indexed text in the same way as the `SearchIndex` (words are lower cased and
+    punctuation is removed), so it can be used in its place
+    """
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+
+    @property
+    def schema_name(self) -> str:
+        return 'search'
+
+    def __str__(self):
+        return "SparseSearchIndex"
+
+    def __repr__(self):
+        return f'SparseSearchIndex(directory={self.directory})'
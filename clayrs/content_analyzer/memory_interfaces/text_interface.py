@@ -1,4 +1,5 @@
 import os
+import threading
 
 from whoosh.analysis import SimpleAnalyzer
 from whoosh.fields import Schema, TEXT, KEYWORD
@@ -7,11 +8,35 @@ from whoosh.formats import Frequency
 from whoosh.qparser import QueryParser, OrGroup, FieldsPlugin
 from whoosh.query import Term, Or
 from whoosh.scoring import TF_IDF, BM25F
-from typing import Union, Dict
+from whoosh.searching import Searcher
+from typing import Union, Dict, List, Tuple, Iterable, Optional
 import math
 import abc
 
+import numpy as np
+
 from clayrs.content_analyzer.memory_interfaces.memory_interfaces import TextInterface
+from clayrs.utils.top_k import top_k_indices
+
+
+class DocnumSet(set):
+    """
+    Set of docnums (positions of the contents in an index) returned by `IndexInterface.docnum_set()`, which can be
+    passed to `IndexInterface.query()` in place of the content ids of the items to mask or to consider
+    """
+    pass
+
+
+def _to_docnum_set(docnums: Dict[str, int], items: Union[Iterable[str], DocnumSet]) -> DocnumSet:
+    """
+    Returns the set of docnums of the items passed as argument, using the `docnums` mapping between content ids and
+    docnums of an index. Sets of docnums are returned as they are, everything else is considered an iterable of content
+    ids: content ids which are not in the mapping are ignored
+    """
+    if isinstance(items, DocnumSet):
+        return items
+
+    return DocnumSet(docnums[content_id] for content_id in items if content_id in docnums)
 
 
 class IndexInterface(TextInterface):
@@ -19,16 +44,51 @@ class IndexInterface(TextInterface):
     Abstract class that takes care of serializing and deserializing text in an indexed structure
     using the Whoosh library
 
+    The index is opened for reading only once and kept open until `close()` is called: each thread (and each
+    process) which reads from the index gets its own reader, which is re-used by all the subsequent calls to
+    `get_field()`, `query()` and `get_tf_idf()` and which is automatically refreshed if the index changes.
+    The index can be explicitly opened and closed with `open()` and `close()`, or used as a context manager:
+
+    Examples:
+
+        >>> with SearchIndex('index_dir') as index:
+        >>>     index.query('Plot:(space)', results_number=10)
+
+    If `open()` is not called explicitly, the index is opened the first time it is read
+
+    Many contents can be serialized at once with `add_documents()`: in this case, the documents are indexed by `procs`
+    processes, each one building its own segment of the index. Since processes index the documents in the order in
+    which they are scheduled, the positions of the documents are read back from the index by their content id once
+    the segments are committed
+
     Args:
         directory (str): Path of the directory where the content will be serialized
+        procs (int): number of processes used to index the documents passed to `add_documents()`
+        limitmb (int): maximum memory (in megabytes) used by each process to buffer postings before flushing them to
+            disk
+        multisegment (bool): if True, the segments built by the processes are kept as they are instead of being
+            merged into a single one. This makes writing faster, but reading slightly slower
     """
 
-    def __init__(self, directory: str):
+    def __init__(self, directory: str, procs: int = 1, limitmb: int = 128, multisegment: bool = False):
         super().__init__(directory)
+        self.__procs = procs
+        self.__limitmb = limitmb
+        self.__multisegment = multisegment
         self.__doc = None  # document that is currently being created and will be added to the index
         self.__writer = None  # index writer
+        self.__writer_procs = 1  # number of processes used by the index writer
+        self.__writer_has_docs = False  # true if documents have been added to the writer, false otherwise
         self.__doc_index = 0  # current position the document will have in the index once it is serialized
         self.__schema_changed = False  # true if the schema has been changed, false otherwise
+        self._init_reading_state()
+
+    def _init_reading_state(self):
+        self.__ix = None  # index opened for reading
+        self.__pid = None  # process which opened the index
+        self.__local = threading.local()  # reader and searchers of each thread
+        self.__readers = []  # readers opened by all threads, so that they can be closed
+        self.__lock = threading.Lock()
 
     @property
     @abc.abstractmethod
@@ -40,6 +100,18 @@ class IndexInterface(TextInterface):
         """
         raise NotImplementedError
 
+    @property
+    def procs(self) -> int:
+        return self.__procs
+
+    @property
+    def limitmb(self) -> int:
+        return self.__limitmb
+
+    @property
+    def multisegment(self) -> bool:
+        return self.__multisegment
+
     def init_writing(self, delete_old: bool = False):
         """
         Creates the index locally (in the directory passed in the constructor) and initializes the index writer.
@@ -49,20 +121,24 @@ class IndexInterface(TextInterface):
             delete_old (bool): if True, the index that was in the same directory is destroyed and replaced;
                 if False, the index is simply opened
         """
+        self.__doc_index = 0
         if os.path.exists(self.directory):
             if delete_old:
                 self.delete()
                 os.mkdir(self.directory)
                 ix = create_in(self.directory, Schema())
-                self.__writer = ix.writer()
+                self.__writer = ix.writer(limitmb=self.__limitmb)
             else:
                 ix = open_dir(self.directory)
-                self.__writer = ix.writer()
+                self.__writer = ix.writer(limitmb=self.__limitmb)
                 self.__doc_index = self.__writer.reader().doc_count()
         else:
             os.mkdir(self.directory)
             ix = create_in(self.directory, Schema())
-            self.__writer = ix.writer()
+            self.__writer = ix.writer(limitmb=self.__limitmb)
+        self.__writer_procs = 1
+        self.__writer_has_docs = False
+        self.__schema_changed = False
 
     def new_content(self):
         """
@@ -80,7 +156,11 @@ class IndexInterface(TextInterface):
             field_name (str): Name of the new field
             field_data (object): Data to put into the field
         """
-        if field_name not in open_dir(self.directory).schema.names():
+        # the schema of the writer already contains the fields added but not yet committed
+        if field_name not in self.__writer.schema:
+            # the schema can't be changed once documents have been added to the writer
+            if self.__writer_has_docs:
+                self._replace_writer()
             self.__writer.add_field(field_name, self.schema_type)
             self.__schema_changed = True
         self.__doc[field_name] = field_data
@@ -91,21 +171,216 @@ class IndexInterface(TextInterface):
         before adding the document to the index. Once the document is indexed, it can be deleted from the IndexInterface
         and the document position in the index is returned
         """
-        if self.__schema_changed:
-            self.__writer.commit()
-            self.__writer = open_dir(self.directory).writer()
-            self.__schema_changed = False
+        if self.__schema_changed or self.__writer_procs != 1:
+            self._replace_writer()
         self.__writer.add_document(**self.__doc)
+        self.__writer_has_docs = True
         del self.__doc
         self.__doc_index += 1
         return self.__doc_index - 1
 
+    def add_documents(self, documents: Iterable[Dict[str, object]]) -> List[int]:
+        """
+        Serializes a batch of contents, each one represented as a dict in the form `{field_name: field_data}`.
+        The interface must be in writing mode
+
+        Fields of all the documents are added to the Schema at once, then the documents are indexed by a writer which
+        uses `procs` processes (if `procs` is greater than 1). In this case, positions in the index do not follow the
+        order of the documents: the documents are committed as soon as they are indexed, and their positions are read
+        back from the index. This requires each document to have a distinct "content_id" field, otherwise documents
+        are indexed by a single process, in the order in which they are passed, and the index is actually built when
+        `stop_writing()` is called
+
+        Args:
+            documents: contents to serialize
+
+        Returns:
+            List containing the position of each content serialized
+        """
+        documents = list(documents)
+
+        content_ids = [document.get("content_id") for document in documents]
+        if self.__procs == 1 or None in content_ids or len(set(content_ids)) != len(content_ids):
+            return self._add_documents(documents, procs=1)
+
+        first_docnum = self.__doc_index
+        self._add_documents(documents, procs=self.__procs)
+
+        # the writer is committed and replaced so that the positions assigned by the processes can be read
+        self._replace_writer()
+        with open_dir(self.directory).reader() as reader:
+            docnums = {reader.stored_fields(docnum)["content_id"]: docnum
+                       for docnum in range(first_docnum, reader.doc_count_all())}
+
+        return [docnums[content_id] for content_id in content_ids]
+
+    def _add_documents(self, documents: List[Dict[str, object]], procs: int) -> List[int]:
+        """
+        Adds the documents to a writer which uses the number of processes passed as argument, after having added their
+        fields to the Schema. Returns the positions the documents will have in the index if they are indexed by a single
+        process
+        """
+        new_fields = {field_name for document in documents for field_name in document
+                      if field_name not in self.__writer.schema}
+        if len(new_fields) != 0:
+            if self.__writer_has_docs:
+                self._replace_writer()
+            for field_name in sorted(new_fields):
+                self.__writer.add_field(field_name, self.schema_type)
+            self.__schema_changed = True
+
+        # the schema is committed once for the whole batch, the documents are then added by a writer which uses
+        # the processes passed as argument
+        if self.__schema_changed or self.__writer_procs != procs:
+            self._replace_writer(procs)
+
+        for document in documents:
+            self.__writer.add_document(**document)
+        self.__writer_has_docs = self.__writer_has_docs or len(documents) != 0
+
+        positions = list(range(self.__doc_index, self.__doc_index + len(documents)))
+        self.__doc_index += len(documents)
+        return positions
+
+    def _replace_writer(self, procs: int = 1):
+        """
+        Commits the operations of the current writer (including changes to the schema) and replaces it with a new
+        writer which uses the number of processes passed as argument
+        """
+        self.__writer.commit()
+        self.__writer = open_dir(self.directory).writer(procs=procs, limitmb=self.__limitmb,
+                                                        multisegment=self.__multisegment)
+        self.__writer_procs = procs
+        self.__writer_has_docs = False
+        self.__schema_changed = False
+
     def stop_writing(self):
         """
         Stops the index writer and commits the operations
         """
         self.__writer.commit()
         del self.__writer
+        self.__writer_procs = 1
+        self.__writer_has_docs = False
+
+    def open(self):
+        """
+        Opens the index for reading. Readers and searchers are then created lazily by each thread and kept open until
+        `close()` is called. Calling this method on an index already opened has no effect
+
+        Returns:
+            The index interface itself, so that it can be used as a context manager
+        """
+        with self.__lock:
+            # readers can't be shared with forked processes, so the index is opened again in each process
+            if self.__ix is None or self.__pid != os.getpid():
+                self.__ix = open_dir(self.directory)
+                self.__pid = os.getpid()
+                self.__local = threading.local()
+                self.__readers = []
+
+        return self
+
+    def close(self):
+        """
+        Closes all the readers and searchers opened by any thread. The index can be opened again by calling `open()`
+        (or by simply reading from it)
+        """
+        with self.__lock:
+            if self.__pid == os.getpid():
+                for reader in self.__readers:
+                    reader.close()
+
+            self.__ix = None
+            self.__pid = None
+            self.__local = threading.local()
+            self.__readers = []
+
+    def _get_searcher(self, weighting=BM25F) -> Searcher:
+        """
+        Returns the searcher of the calling thread which scores documents with the weighting passed as argument.
+        All searchers of a thread share the same reader, which is opened again if the index changed since the last
+        time it was read (e.g. new contents have been serialized)
+
+        Args:
+            weighting: whoosh weighting model used by the searcher to score documents
+
+        Returns:
+            A searcher which must NOT be closed by the caller
+        """
+        if self.__ix is None or self.__pid != os.getpid():
+            self.open()
+
+        local = self.__local
+        reader = getattr(local, 'reader', None)
+        if reader is None or reader.generation() != self.__ix.latest_generation():
+            # a brand new reader is opened instead of recycling the old one, since the schema may have changed
+            new_reader = self.__ix.reader()
+            with self.__lock:
+                if reader is not None:
+                    self.__readers.remove(reader)
+                    reader.close()
+                self.__readers.append(new_reader)
+
+            local.reader = new_reader
+            local.searchers = {}
+            local.docnums = None
+
+        searcher = local.searchers.get(weighting)
+        if searcher is None:
+            searcher = Searcher(local.reader, weighting=weighting, closereader=False, fromindex=self.__ix)
+            local.searchers[weighting] = searcher
+
+        return searcher
+
+    def _get_docnums(self) -> Dict[str, int]:
+        """
+        Returns the mapping between the content_id of each content and its docnum (its position in the index).
+        The mapping is built once for each reader and then re-used
+        """
+        searcher = self._get_searcher()
+        local = self.__local
+        if local.docnums is None:
+            local.docnums = {stored_fields["content_id"]: docnum
+                             for docnum, stored_fields in searcher.reader().iter_docs()}
+
+        return local.docnums
+
+    def docnum_set(self, content_ids: Iterable[str]) -> DocnumSet:
+        """
+        Maps the content ids passed as argument to the set of their docnums (their positions in the index), which can
+        be passed to the `query()` method as mask or candidate set. Content ids which are not in the index are ignored
+
+        The set is valid as long as the index is not modified
+
+        Args:
+            content_ids: content ids to map
+
+        Returns:
+            Set of the docnums of the content ids passed as argument
+        """
+        return _to_docnum_set(self._get_docnums(), content_ids)
+
+    def delete(self):
+        self.close()
+        super().delete()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getstate__(self):
+        # opened readers can't be pickled, the index will be opened again by the process which unpickles it
+        state = self.__dict__.copy()
+        for attribute in ('ix', 'pid', 'local', 'readers', 'lock'):
+            del state[f'_IndexInterface__{attribute}']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_reading_state()
 
     def get_field(self, field_name: str, content_id: Union[str, int]) -> str:
         """
@@ -119,27 +394,59 @@ class IndexInterface(TextInterface):
         Returns:
             Data contained in the field of the content
         """
-        ix = open_dir(self.directory)
-        with ix.searcher() as searcher:
-            if isinstance(content_id, str):
-                query = Term("content_id", content_id)
-                result = searcher.search(query)
-                result = result[0][field_name]
-            elif isinstance(content_id, int):
-                result = searcher.reader().stored_fields(content_id)[field_name]
-            return result
+        searcher = self._get_searcher()
+        if isinstance(content_id, str):
+            query = Term("content_id", content_id)
+            result = searcher.search(query)
+            result = result[0][field_name]
+        elif isinstance(content_id, int):
+            result = searcher.reader().stored_fields(content_id)[field_name]
+        return result
+
+    def analyze(self, field_name: str, text: str) -> List[str]:
+        """
+        Splits the text in the terms which would be indexed for the field, by using the analyzer of the field in the
+        index schema. Terms returned can be used to build a weighted term query (see the `query()` method)
+
+        Args:
+            field_name: name of the field whose analyzer will be used
+            text: text to analyze
+
+        Returns:
+            List of terms in which the text has been split
+        """
+        return list(self._get_searcher().schema[field_name].process_text(text, mode="query"))
 
-    def query(self, string_query: str, results_number: int, mask_list: list = None,
-              candidate_list: list = None, classic_similarity: bool = True) -> dict:
+    @staticmethod
+    def _weighted_terms_query(weighted_terms: Dict[Tuple[str, str], float]) -> Or:
+        """
+        Builds the query which matches any of the terms, each one boosted by its weight.
+        No parsing is involved: terms are expected to be already analyzed. Terms with weight 0 are ignored, since they
+        would not contribute to the score of any document
+        """
+        return Or([Term(field_name, term, boost=weight) for (field_name, term), weight in weighted_terms.items()
+                   if weight != 0])
+
+    def query(self, string_query: Union[str, Dict[Tuple[str, str], float]], results_number: int,
+              mask_list: Union[Iterable[str], DocnumSet] = None,
+              candidate_list: Union[Iterable[str], DocnumSet] = None, classic_similarity: bool = True) -> dict:
         """
         Uses a search index to query the index in order to retrieve specific contents using a query expressed in string
-        form
+        form or as a weighted term vector
+
+        The weighted term vector is a dict in the form `{(field_name, term): weight}`: the query built from it matches
+        any of its terms and the score of each term is boosted by its weight (terms with weight 0 are ignored).
+        No parsing is performed on the terms, so they should be obtained with the `analyze()` method
+
+        Mask and candidate items can be passed as content ids or as the set of their docnums returned by the
+        `docnum_set()` method: in both cases, filtering is done by checking each matched document against the set,
+        so its cost doesn't depend on the number of items to mask or to consider
 
         Args:
-            string_query: query expressed as a string
+            string_query: query expressed as a string or as a weighted term vector
             results_number: number of results the searcher will return for the query
-            mask_list: list of content_ids of items to ignore in the search process
-            candidate_list: list of content_ids of items to consider in the search process,
+            mask_list: content_ids (or set of docnums) of items to ignore in the search process
+            candidate_list: content_ids (or set of docnums) of items to consider in the search process,
                 if it is not None only items in the list will be considered
             classic_similarity: if True, classic tf idf is used for scoring, otherwise BM25F is used
 
@@ -159,48 +466,131 @@ class IndexInterface(TextInterface):
                 external dictionary
                 items_score is the score given to the item for the query by the index searcher
         """
-        ix = open_dir(self.directory)
-        with ix.searcher(weighting=TF_IDF if classic_similarity else BM25F) as searcher:
-            candidate_query_list = None
-            mask_query_list = None
-
-            # the mask list contains the content_id for the items to ignore in the searching process
-            # from the mask list a mask query is created and it will be used by the searcher
-            if mask_list is not None:
-                mask_query_list = []
-                for document in mask_list:
-                    mask_query_list.append(Term("content_id", document))
-                mask_query_list = Or(mask_query_list)
-
-            # the candidate list contains the content_id for the items to consider in the searching process
-            # from the candidate list a candidate query is created and it will be used by the searcher
-            if candidate_list is not None:
-                candidate_query_list = []
-                for candidate in candidate_list:
-                    candidate_query_list.append(Term("content_id", candidate))
-                candidate_query_list = Or(candidate_query_list)
-
-            schema = ix.schema
+        searcher = self._get_searcher(TF_IDF if classic_similarity else BM25F)
+        # the mask and candidate lists contain the content_id for the items to respectively ignore and consider in
+        # the searching process: they are mapped to sets of docnums which will be used by the searcher
+        mask_docnums = None
+        if mask_list is not None:
+            mask_docnums = _to_docnum_set(self._get_docnums(), mask_list)
+
+        candidate_docnums = None
+        if candidate_list is not None:
+            candidate_docnums = _to_docnum_set(self._get_docnums(), candidate_list)
+
+            # whoosh ignores empty filters, but no item can match if none of the candidates is in the index
+            if len(candidate_docnums) == 0:
+                return {}
+
+        if isinstance(string_query, dict):
+            query = self._weighted_terms_query(string_query)
+        else:
+            schema = searcher.schema
             parser = QueryParser("content_id", schema=schema, group=OrGroup)
             # regular expression to match the possible field styles
             # examples: "content_id" or "Genre#2" or "Genre#2#custom_id"
             parser.add_plugin(FieldsPlugin(r'(?P<text>[\w-]+(\#[\w-]+(\#[\w-]+)?)?|[*]):'))
             query = parser.parse(string_query)
-            score_docs = \
-                searcher.search(query, limit=results_number, filter=candidate_query_list, mask=mask_query_list)
+        score_docs = \
+            searcher.search(query, limit=results_number, filter=candidate_docnums, mask=mask_docnums)
+
+        # creation of the results dictionary, This phase is necessary because the Hit objects returned by the
+        # searcher as results need the reader inside the search index in order to return information
+        # so it would be impossible to access a field or the score of the item from outside this method
+        # because of that this dictionary containing the most important infos is created
+        results = {}
+        for hit in score_docs:
+            hit_dict = dict(hit)
+            content_id = hit_dict.pop("content_id")
+            results[content_id] = {}
+            results[content_id]["item"] = hit_dict
+            results[content_id]["score"] = hit.score
+        return results
+
+    def _term_postings(self, searcher: Searcher, field_name: str, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the docnums of the documents containing the term and the score of the term in each of them, computed
+        with the weighting of the searcher. Both arrays are empty if the term is not in the index
+        """
+        docnums, scores = [], []
+        if field_name in searcher.schema:
+            text = searcher.schema[field_name].to_bytes(term)
+            if (field_name, text) in searcher.reader():
+                matcher = searcher.postings(field_name, text)
+                while matcher.is_active():
+                    docnums.append(matcher.id())
+                    scores.append(matcher.score())
+                    matcher.next()
+
+        return np.array(docnums, dtype=np.int64), np.array(scores, dtype=float)
+
+    def batch_query(self, queries: List[Dict[Tuple[str, str], float]], results_number: Optional[int],
+                    mask_lists: List[Optional[Union[Iterable[str], DocnumSet]]] = None,
+                    candidate_lists: List[Optional[Union[Iterable[str], DocnumSet]]] = None,
+                    classic_similarity: bool = True) -> List[dict]:
+        """
+        Executes many queries expressed as weighted term vectors (e.g. the queries of different users) at once.
+        The result of each query is the same that would be returned by the `query()` method, but the postings of each
+        term are read and scored only once, regardless of the number of queries containing it: the score of a document
+        for a query is then the sum of the scores of its terms, each one multiplied by the weight of the term
+
+        Args:
+            queries: list of weighted term vectors in the form `{(field_name, term): weight}`
+            results_number: number of results returned for each query, if None all matching contents are returned
+            mask_lists: for each query, content_ids (or set of docnums) of items to ignore, or None
+            candidate_lists: for each query, content_ids (or set of docnums) of items to consider, or None if all
+                items must be considered
+            classic_similarity: if True, classic tf idf is used for scoring, otherwise BM25F is used
+
+        Returns:
+            List containing, for each query, its results dictionary in the same form of the one returned by
+                `query()`
+        """
+        searcher = self._get_searcher(TF_IDF if classic_similarity else BM25F)
+        reader = searcher.reader()
+
+        postings_cache = {}
+        results_list = []
+        for query_position, weighted_terms in enumerate(queries):
+            docnums_list, scores_list = [], []
+            for (field_name, term), weight in weighted_terms.items():
+                if weight == 0:
+                    continue
+
+                term_postings = postings_cache.get((field_name, term))
+                if term_postings is None:
+                    term_postings = self._term_postings(searcher, field_name, term)
+                    postings_cache[(field_name, term)] = term_postings
+
+                docnums_list.append(term_postings[0])
+                scores_list.append(term_postings[1] * weight)
+
+            all_docnums = np.concatenate(docnums_list) if len(docnums_list) != 0 else np.array([], dtype=np.int64)
+            docnums, positions = np.unique(all_docnums, return_inverse=True)
+            scores = np.bincount(positions, weights=np.concatenate(scores_list) if len(scores_list) != 0 else None,
+                                 minlength=len(docnums))
+
+            candidate_list = candidate_lists[query_position] if candidate_lists is not None else None
+            if candidate_list is not None:
+                candidate_docnums = _to_docnum_set(self._get_docnums(), candidate_list)
+                allowed = np.isin(docnums, np.fromiter(candidate_docnums, dtype=np.int64))
+                docnums, scores = docnums[allowed], scores[allowed]
+
+            mask_list = mask_lists[query_position] if mask_lists is not None else None
+            if mask_list is not None:
+                mask_docnums = _to_docnum_set(self._get_docnums(), mask_list)
+                allowed = ~np.isin(docnums, np.fromiter(mask_docnums, dtype=np.int64))
+                docnums, scores = docnums[allowed], scores[allowed]
 
-            # creation of the results dictionary, This phase is necessary because the Hit objects returned by the
-            # searcher as results need the reader inside the search index in order to return information
-            # so it would be impossible to access a field or the score of the item from outside this method
-            # because of that this dictionary containing the most important infos is created
             results = {}
-            for hit in score_docs:
-                hit_dict = dict(hit)
-                content_id = hit_dict.pop("content_id")
-                results[content_id] = {}
-                results[content_id]["item"] = hit_dict
-                results[content_id]["score"] = hit.score
-            return results
+            # ties are broken by position in the index (like whoosh)
+            for position in top_k_indices(scores, results_number, tie_breaker=docnums):
+                item = dict(reader.stored_fields(int(docnums[position])))
+                content_id = item.pop("content_id")
+                results[content_id] = {"item": item, "score": float(scores[position])}
+
+            results_list.append(results)
+
+        return results_list
 
     def get_tf_idf(self, field_name: str, content_id: Union[str, int]) -> Dict[str, float]:
         r"""
@@ -221,24 +611,23 @@ class IndexInterface(TextInterface):
             words_bag: Dictionary whose keys are the words contained in the field, and the
                 corresponding values are the tf-idf values
         """
-        ix = open_dir(self.directory)
+        searcher = self._get_searcher()
         words_bag = {}
-        with ix.searcher() as searcher:
-            if isinstance(content_id, str):
-                query = Term("content_id", content_id)
-                doc_num = searcher.search(query).docnum(0)
-            elif isinstance(content_id, int):
-                doc_num = content_id
-
-            # if the document has the field == "" (length == 0) then the bag of word is empty
-            if len(searcher.ixreader.stored_fields(doc_num)[field_name]) > 0:
-                # retrieves the frequency vector (used for tf)
-                list_with_freq = [term_with_freq for term_with_freq
-                                  in searcher.vector(doc_num, field_name).items_as("frequency")]
-                for term, freq in list_with_freq:
-                    tf = 1 + math.log10(freq)
-                    idf = math.log10(searcher.doc_count()/searcher.doc_frequency(field_name, term))
-                    words_bag[term] = tf*idf
+        if isinstance(content_id, str):
+            query = Term("content_id", content_id)
+            doc_num = searcher.search(query).docnum(0)
+        elif isinstance(content_id, int):
+            doc_num = content_id
+
+        # if the document has the field == "" (length == 0) then the bag of word is empty
+        if len(searcher.ixreader.stored_fields(doc_num)[field_name]) > 0:
+            # retrieves the frequency vector (used for tf)
+            list_with_freq = [term_with_freq for term_with_freq
+                              in searcher.vector(doc_num, field_name).items_as("frequency")]
+            for term, freq in list_with_freq:
+                tf = 1 + math.log10(freq)
+                idf = math.log10(searcher.doc_count()/searcher.doc_frequency(field_name, term))
+                words_bag[term] = tf*idf
         return words_bag
 
     @abc.abstractmethod
@@ -257,8 +646,8 @@ class KeywordIndex(IndexInterface):
     "content_id" field data containing white spaces
     """
 
-    def __init__(self, directory: str):
-        super().__init__(directory)
+    def __init__(self, directory: str, procs: int = 1, limitmb: int = 128, multisegment: bool = False):
+        super().__init__(directory, procs, limitmb, multisegment)
 
     @property
     def schema_type(self):
@@ -268,7 +657,8 @@ class KeywordIndex(IndexInterface):
         return "KeywordIndex"
 
     def __repr__(self):
-        return f'KeywordIndex(directory={self.directory})'
+        return f'KeywordIndex(directory={self.directory}, procs={self.procs}, limitmb={self.limitmb}, ' \
+               f'multisegment={self.multisegment})'
 
 
 class SearchIndex(IndexInterface):
@@ -277,8 +667,8 @@ class SearchIndex(IndexInterface):
     much as the original as possible
     """
 
-    def __init__(self, directory: str):
-        super().__init__(directory)
+    def __init__(self, directory: str, procs: int = 1, limitmb: int = 128, multisegment: bool = False):
+        super().__init__(directory, procs, limitmb, multisegment)
 
     @property
     def schema_type(self):
@@ -288,4 +678,5 @@ class SearchIndex(IndexInterface):
         return "SearchIndex"
 
     def __repr__(self):
-        return f'SearchIndex(directory={self.directory})'
+        return f'SearchIndex(directory={self.directory}, procs={self.procs}, limitmb={self.limitmb}, ' \
+               f'multisegment={self.multisegment})'
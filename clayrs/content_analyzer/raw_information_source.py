@@ -1,9 +1,36 @@
+import codecs
 import csv
+import io
 import os
+import tempfile
 from abc import ABC, abstractmethod
+from array import array
 
 import json
-from typing import Dict, Iterator
+from typing import Dict, Iterator, Tuple, Union, List, Optional, BinaryIO
+
+
+class _OffsetLineReader:
+    """
+    Iterator over the decoded lines of a file opened in binary mode, which keeps track of the byte offset reached in
+    the file (that is, the offset of the beginning of the next line)
+    """
+
+    def __init__(self, binary_file: BinaryIO, encoding: str):
+        self.__file = binary_file
+        self.__encoding = encoding
+        self.offset = binary_file.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        line = self.__file.readline()
+        if not line:
+            raise StopIteration
+
+        self.offset += len(line)
+        return line.decode(self.__encoding)
 
 
 class RawInformationSource(ABC):
@@ -43,6 +70,105 @@ class RawInformationSource(ABC):
     def __len__(self):
         raise NotImplementedError
 
+    @abstractmethod
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, str], List[Dict[str, str]]]:
+        """
+        Random access to the contents of the source, a slice returns the list of the contents in it
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def __str__(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def __repr__(self):
+        raise NotImplementedError
+
+
+class IndexedFileSource(RawInformationSource):
+    """
+    Abstract Class for raw sources stored in a file where each content is a contiguous sequence of bytes.
+
+    The first time the source is iterated completely (or its length is requested, or one of its contents is accessed
+    by position) the byte offsets where each content starts and ends in the file are stored in an index. The index is
+    then used to compute the length of the source in O(1) and to access any content in the source with `source[i]`
+    without reading the rest of the file. If the file changes (its size or its modification time), the index is
+    automatically rebuilt
+
+    Args:
+        encoding: define the type of encoding of data stored in the source (example: "utf-8")
+    """
+
+    def __init__(self, file_path: str, encoding: str):
+        super().__init__(file_path, encoding)
+        self.__index: Optional[Tuple[Tuple[int, int], array, array]] = None
+
+    @abstractmethod
+    def _iter_records(self) -> Iterator[Tuple[int, int, Dict[str, str]]]:
+        """
+        Iter on contents in the source, each iteration returns the byte offset where the content starts in the file,
+        the byte offset where it ends and the dict representing the "row" in the raw content
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def _read_record(self, record_bytes: bytes) -> Dict[str, str]:
+        """
+        Parse a single content of the source given the bytes between its start and end offsets
+        """
+        raise NotImplementedError
+
+    def _file_signature(self) -> Tuple[int, int]:
+        file_stat = os.stat(self.file_path)
+        return file_stat.st_mtime_ns, file_stat.st_size
+
+    def _iter_and_index(self) -> Iterator[Dict[str, str]]:
+        signature = self._file_signature()
+        starts = array('q')
+        ends = array('q')
+
+        for start, end, row in self._iter_records():
+            starts.append(start)
+            ends.append(end)
+            yield row
+
+        # this point is reached only if the source has been iterated completely
+        self.__index = (signature, starts, ends)
+
+    def _get_index(self) -> Tuple[array, array]:
+        if self.__index is None or self.__index[0] != self._file_signature():
+            for _ in self._iter_and_index():
+                pass
+
+        _, starts, ends = self.__index
+        return starts, ends
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        """
+        Iter on contents in the source, each iteration returns a dict representing a "row" in the raw content.
+        Contents are read from the file one at a time
+        """
+        return self._iter_and_index()
+
+    def __len__(self):
+        starts, _ = self._get_index()
+        return len(starts)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, str], List[Dict[str, str]]]:
+        """
+        Random access to the contents of the source: only the bytes of the requested content are read from the file
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        starts, ends = self._get_index()
+
+        start, end = starts[index], ends[index]
+        with open(self.file_path, 'rb') as f:
+            f.seek(start)
+            return self._read_record(f.read(end - start))
+
     @abstractmethod
     def __str__(self):
         raise NotImplementedError
@@ -52,7 +178,7 @@ class RawInformationSource(ABC):
         raise NotImplementedError
 
 
-class DATFile(RawInformationSource):
+class DATFile(IndexedFileSource):
     """
     Wrapper for a DAT file. This class is able to read from a DAT file where each entry is separated by the `::` string.
     Since a DAT file has no header, each entry can be referenced with a string representing its positional index
@@ -96,34 +222,40 @@ class DATFile(RawInformationSource):
 
         return file_name
 
-    def __iter__(self) -> Iterator[Dict[str, str]]:
-        with open(self.file_path, encoding=self.encoding) as f:
-            for line in f:
-                line_dict = {}
-                fields = line.split('::')
-                for i, field in enumerate(fields):
-                    field = field.strip("\n\t\r")
-                    line_dict[str(i)] = field
+    @staticmethod
+    def _parse_line(line: str) -> Dict[str, str]:
+        line_dict = {}
+        fields = line.split('::')
+        for i, field in enumerate(fields):
+            field = field.strip("\n\t\r")
+            line_dict[str(i)] = field
 
-                yield line_dict
+        return line_dict
 
-    def __len__(self):
-        with open(self.file_path, newline='', encoding=self.encoding) as dat_file:
-            total_length = sum(1 for _ in dat_file)
+    def _iter_records(self) -> Iterator[Tuple[int, int, Dict[str, str]]]:
+        with open(self.file_path, 'rb') as f:
+            lines = _OffsetLineReader(f, self.encoding)
 
-            return total_length
+            start = lines.offset
+            for line in lines:
+                yield start, lines.offset, self._parse_line(line)
+                start = lines.offset
+
+    def _read_record(self, record_bytes: bytes) -> Dict[str, str]:
+        return self._parse_line(record_bytes.decode(self.encoding))
 
     def __str__(self):
         return "DATFile"
 
     def __repr__(self):
-        return f'DATFile(encoding={self.__encoding}, file_path={self.file_path})'
+        return f'DATFile(encoding={self.encoding}, file_path={self.file_path})'
 
 
-class JSONFile(RawInformationSource):
+class JSONFile(IndexedFileSource):
     """
     Wrapper for a JSON file. This class is able to read from a JSON file where each "row" is a dictionary-like object
-    inside a list
+    inside a list, or from a JSON lines file where each line of the file is a dictionary-like object.
+    JSON lines files are read one line at a time, so they should be preferred for big sources
 
     You can iterate over the whole content of the raw source with a simple for loop: each row will be returned as a
     dictionary
@@ -140,13 +272,28 @@ class JSONFile(RawInformationSource):
         [{'Title': 'Jumanji', 'Year': '1995'},
          {'Title': 'Toy Story', 'Year': '1995'}]
 
+        Consider the following JSON lines file
+        ```
+        {"Title":"Jumanji","Year":"1995"}
+        {"Title":"Toy Story","Year":"1995"}
+        ```
+
+        >>> file = JSONFile(jsonl_path)
+        >>> print(list(file))
+        [{'Title': 'Jumanji', 'Year': '1995'},
+         {'Title': 'Toy Story', 'Year': '1995'}]
+
     Args:
-        file_path: path of the dat file
+        file_path: path of the json file
         encoding: define the type of encoding of data stored in the source (example: "utf-8")
+        json_lines: whether the file is a JSON lines file or not. If None, the format is detected automatically:
+            a file whose first character is `[` is considered a JSON list, otherwise a JSON lines file
     """
 
-    def __init__(self, file_path: str, encoding: str = "utf-8"):
+    def __init__(self, file_path: str, encoding: str = "utf-8", json_lines: Optional[bool] = None):
         super().__init__(file_path, encoding)
+        self.__json_lines = json_lines
+        self.__decoder = json.JSONDecoder(parse_int=str, parse_float=str)
 
     @property
     def representative_name(self) -> str:
@@ -163,24 +310,92 @@ class JSONFile(RawInformationSource):
 
         return file_name
 
-    def __iter__(self) -> Iterator[Dict[str, str]]:
-        with open(self.file_path, encoding=self.encoding) as j:
-            all_lines = json.load(j, parse_int=str, parse_float=str)
-            for line in all_lines:
-                yield line
+    @property
+    def json_lines(self) -> bool:
+        if self.__json_lines is None:
+            with open(self.file_path, encoding=self.encoding) as f:
+                first_char = ''
+                while first_char == '' or first_char.isspace():
+                    first_char = f.read(1)
+                    # empty file
+                    if first_char == '':
+                        break
 
-    def __len__(self):
-        with open(self.file_path, encoding=self.encoding) as j:
-            return len(json.load(j))
+            self.__json_lines = first_char != '['
+
+        return self.__json_lines
+
+    def _iter_records(self) -> Iterator[Tuple[int, int, Dict[str, str]]]:
+        if self.json_lines:
+            yield from self._iter_json_lines_records()
+        else:
+            yield from self._iter_json_list_records()
+
+    def _iter_json_lines_records(self) -> Iterator[Tuple[int, int, Dict[str, str]]]:
+        with open(self.file_path, 'rb') as f:
+            lines = _OffsetLineReader(f, self.encoding)
+
+            start = lines.offset
+            for line in lines:
+                # empty lines are skipped
+                if not line.isspace():
+                    yield start, lines.offset, self.__decoder.decode(line)
+                start = lines.offset
+
+    def _iter_json_list_records(self) -> Iterator[Tuple[int, int, Dict[str, str]]]:
+        with open(self.file_path, 'rb') as f:
+            raw = f.read()
+
+        # encoding used to compute the length in bytes of portions of the text (the "-sig" variant
+        # would add the BOM to each one of them)
+        slice_encoding = 'utf-8' if codecs.lookup(self.encoding).name == 'utf-8-sig' else self.encoding
+
+        def n_bytes(text_slice: str) -> int:
+            return len(text_slice.encode(slice_encoding))
+
+        text = raw.decode(self.encoding)
+        whitespace = json.decoder.WHITESPACE
+
+        # offset of the first character of the text (there may be a BOM before it)
+        byte_offset = len(raw) - n_bytes(text)
+        char_offset = 0
+
+        idx = whitespace.match(text, 0).end()
+        if text[idx:idx + 1] != '[':
+            raise json.JSONDecodeError("Expecting '['", text, idx)
+
+        idx = whitespace.match(text, idx + 1).end()
+        if text[idx:idx + 1] == ']':
+            return
+
+        while True:
+            row, end = self.__decoder.raw_decode(text, idx)
+
+            start_byte = byte_offset + n_bytes(text[char_offset:idx])
+            end_byte = start_byte + n_bytes(text[idx:end])
+            byte_offset, char_offset = end_byte, end
+
+            yield start_byte, end_byte, row
+
+            idx = whitespace.match(text, end).end()
+            if text[idx:idx + 1] == ']':
+                break
+            elif text[idx:idx + 1] != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, idx)
+
+            idx = whitespace.match(text, idx + 1).end()
+
+    def _read_record(self, record_bytes: bytes) -> Dict[str, str]:
+        return self.__decoder.decode(record_bytes.decode(self.encoding))
 
     def __str__(self):
         return "JSONFile"
 
     def __repr__(self):
-        return f'JSONFile(encoding={self.__encoding}, file_path={self.file_path})'
+        return f'JSONFile(encoding={self.encoding}, file_path={self.file_path}, json_lines={self.__json_lines})'
 
 
-class CSVFile(RawInformationSource):
+class CSVFile(IndexedFileSource):
     r"""
     Wrapper for a CSV file. This class is able to read from a CSV file where each entry is separated by the a certain
     separator (`,` by default). So by using this class you can also read TSV file for examples, by specifying
@@ -231,6 +446,7 @@ class CSVFile(RawInformationSource):
         super().__init__(file_path, encoding)
         self.__has_header = has_header
         self.__separator = separator
+        self.__fieldnames: List[str] = []
 
     @property
     def representative_name(self) -> str:
@@ -247,24 +463,47 @@ class CSVFile(RawInformationSource):
 
         return file_name
 
-    def __iter__(self) -> Iterator[Dict[str, str]]:
-        with open(self.file_path, newline='', encoding=self.encoding) as csv_file:
-            if self.__has_header:
-                reader = csv.DictReader(csv_file, quoting=csv.QUOTE_MINIMAL, delimiter=self.__separator)
-            else:
-                reader = csv.DictReader(csv_file, quoting=csv.QUOTE_MINIMAL, delimiter=self.__separator)
-                reader.fieldnames = [str(i) for i in range(len(reader.fieldnames))]
-                csv_file.seek(0)
+    def _to_dict(self, row: List[str]) -> Dict[str, str]:
+        # same behaviour of the csv.DictReader with default restkey and restval
+        row_dict = dict(zip(self.__fieldnames, row))
 
-            yield from reader
+        n_fields = len(self.__fieldnames)
+        n_values = len(row)
+        if n_fields < n_values:
+            row_dict[None] = row[n_fields:]
+        elif n_fields > n_values:
+            for key in self.__fieldnames[n_values:]:
+                row_dict[key] = None
+
+        return row_dict
+
+    def _iter_records(self) -> Iterator[Tuple[int, int, Dict[str, str]]]:
+        with open(self.file_path, 'rb') as f:
+            lines = _OffsetLineReader(f, self.encoding)
+            reader = csv.reader(lines, quoting=csv.QUOTE_MINIMAL, delimiter=self.__separator)
+
+            try:
+                first_row = next(reader)
+            except StopIteration:
+                return
 
-    def __len__(self):
-        with open(self.file_path, newline='', encoding=self.encoding) as csv_file:
-            total_length = sum(1 for _ in csv_file)
             if self.__has_header:
-                total_length -= 1
+                self.__fieldnames = first_row
+            else:
+                self.__fieldnames = [str(i) for i in range(len(first_row))]
+                yield 0, lines.offset, self._to_dict(first_row)
+
+            start = lines.offset
+            for row in reader:
+                # empty rows are skipped as the csv.DictReader does
+                if row != []:
+                    yield start, lines.offset, self._to_dict(row)
+                start = lines.offset
 
-            return total_length
+    def _read_record(self, record_bytes: bytes) -> Dict[str, str]:
+        text = io.StringIO(record_bytes.decode(self.encoding), newline='')
+        reader = csv.reader(text, quoting=csv.QUOTE_MINIMAL, delimiter=self.__separator)
+        return self._to_dict(next(reader))
 
     def __str__(self):
         return "CSVFile"
@@ -273,3 +512,143 @@ class CSVFile(RawInformationSource):
         return f'CSVFile(file_path={self.file_path}, separator={self.__separator}, has_header={self.__has_header}, ' \
                f'encoding={self.encoding})'
 
+
+class SpooledSource(RawInformationSource):
+    """
+    On-disk columnar copy of a raw source, built by reading the original source only once. Only the values of the
+    specified fields are kept: each field is stored in its own file in a temporary directory (one JSON encoded value
+    for each line) together with the byte offsets of its values, so that the memory used doesn't depend on the size
+    of the source.
+
+    The spooled source can be iterated, measured and accessed by position as many times as needed without parsing
+    the original source again, and it behaves exactly as the original source would (it has the same file path and
+    representative name, and rows which don't have one of the spooled fields won't have that key). The temporary
+    directory is deleted when `close()` is called or when the spooled source is garbage collected
+
+    Examples:
+
+        >>> file = JSONFile(json_path)
+        >>> spool = SpooledSource(file, fields=['Title'])
+        >>> print(list(spool))
+        [{'Title': 'Jumanji'},
+         {'Title': 'Toy Story'}]
+
+    Args:
+        source: raw source which will be read
+        fields: fields of the source to keep. If None, all the fields of the source will be kept
+    """
+
+    # line which marks a field missing from a row of the original source (json.dumps never returns an empty string)
+    _MISSING = b"\n"
+
+    def __init__(self, source: RawInformationSource, fields: Optional[List[str]] = None):
+        super().__init__(source.file_path, source.encoding)
+        self.__source = source
+        self.__fields = list(dict.fromkeys(fields)) if fields is not None else None
+        self.__spool_dir = tempfile.TemporaryDirectory(prefix="clayrs_spool_")
+        # for each spooled field, the path of the file storing its column and the offsets of its values
+        self.__columns: Dict[str, Tuple[str, array]] = {}
+        self.__len = 0
+
+        self._spool()
+
+    @property
+    def source(self) -> RawInformationSource:
+        return self.__source
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self.__columns.keys())
+
+    @property
+    def representative_name(self):
+        return self.__source.representative_name
+
+    def _spool(self):
+        column_files: Dict[str, BinaryIO] = {}
+
+        def new_column(field: str, n_missing: int):
+            column_path = os.path.join(self.__spool_dir.name, f"{len(column_files)}.col")
+            column_file = open(column_path, 'wb')
+            # the field is missing from all the rows read before it was first seen
+            column_file.write(self._MISSING * n_missing)
+            column_files[field] = column_file
+            self.__columns[field] = (column_path, array('q', range(n_missing)))
+
+        try:
+            if self.__fields is not None:
+                for field in self.__fields:
+                    new_column(field, 0)
+
+            n_rows = 0
+            for row in self.__source:
+                if self.__fields is None:
+                    for field in row.keys():
+                        if field not in column_files:
+                            new_column(field, n_rows)
+
+                for field, column_file in column_files.items():
+                    self.__columns[field][1].append(column_file.tell())
+                    if field in row:
+                        column_file.write(json.dumps(row[field]).encode() + b"\n")
+                    else:
+                        column_file.write(self._MISSING)
+
+                n_rows += 1
+        finally:
+            for column_file in column_files.values():
+                column_file.close()
+
+        self.__len = n_rows
+
+    @classmethod
+    def _to_row(cls, fields: List[str], lines: List[bytes]) -> Dict[str, str]:
+        return {field: json.loads(line) for field, line in zip(fields, lines) if line != cls._MISSING}
+
+    def close(self):
+        """
+        Deletes the temporary directory where the columns of the source are stored. The spooled source can't be used
+        anymore after calling this method
+        """
+        self.__spool_dir.cleanup()
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        """
+        Iter on contents in the source, each iteration returns a dict representing a "row" in the raw content.
+        Rows are rebuilt reading the value of each field from its column file, one at a time
+        """
+        fields = self.fields
+        column_files = [open(column_path, 'rb') for column_path, _ in self.__columns.values()]
+        try:
+            for _ in range(self.__len):
+                yield self._to_row(fields, [column_file.readline() for column_file in column_files])
+        finally:
+            for column_file in column_files:
+                column_file.close()
+
+    def __len__(self):
+        return self.__len
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, str], List[Dict[str, str]]]:
+        """
+        Random access to the contents of the source: only the values of the requested content are read from the
+        column files
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.__len))]
+
+        index = range(self.__len)[index]
+
+        lines = []
+        for column_path, offsets in self.__columns.values():
+            with open(column_path, 'rb') as column_file:
+                column_file.seek(offsets[index])
+                lines.append(column_file.readline())
+
+        return self._to_row(self.fields, lines)
+
+    def __str__(self):
+        return "SpooledSource"
+
+    def __repr__(self):
+        return f'SpooledSource(source={self.__source}, fields={self.__fields})'
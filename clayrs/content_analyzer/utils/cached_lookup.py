@@ -0,0 +1,84 @@
+from __future__ import annotations
+import hashlib
+import threading
+from typing import Any, Callable, Optional
+
+from clayrs.content_analyzer.utils.memo_table import MemoTable
+
+
+class CachedLookup:
+    """
+    Cache of the results of the requests performed to an external service (e.g. the entities linked in a text by an
+    entity linking service or the results of a query executed by a SPARQL endpoint), so that the same request is never
+    performed twice. Results are keyed by a digest of the name of the service and of the request, so that the same
+    cache file can be shared between different services
+
+    If a `cache_path` is specified, the cache can be persisted on disk with `save()`, so that following runs won't
+    perform the same requests again
+
+    All methods can be safely called by multiple threads at the same time: the request itself is performed outside
+    the lock of the cache, so that different requests can be performed concurrently
+
+    Args:
+        cache_path: path of the file where the results of the requests are persisted. If None, results are only cached
+            in memory for the lifetime of the object
+    """
+
+    def __init__(self, cache_path: Optional[str] = None):
+        self.__cache_path = cache_path
+
+        try:
+            self.__cache = MemoTable.load(cache_path) if cache_path is not None else MemoTable(maxsize=None)
+        except FileNotFoundError:
+            self.__cache = MemoTable(maxsize=None)
+
+        self.__lock = threading.Lock()
+
+    @property
+    def cache_path(self) -> Optional[str]:
+        return self.__cache_path
+
+    @property
+    def cache(self) -> MemoTable:
+        return self.__cache
+
+    def get_or_compute(self, service_name: str, request: str, compute_fn: Callable[[], Any]) -> Any:
+        """
+        Return the result of the request to the service passed as argument, calling `compute_fn` to perform the
+        request only if its result is not already in the cache
+
+        Args:
+            service_name: name which identifies the service and its configuration
+            request: request performed to the service (e.g. the text to link or the query to execute)
+            compute_fn: function with no arguments which performs the request in case of a miss
+
+        Returns:
+            Result of the request
+        """
+        key = hashlib.sha256(f"{service_name}\n{request}".encode("utf-8")).hexdigest()
+
+        with self.__lock:
+            if key in self.__cache:
+                # get_or_compute is used to keep hits statistics
+                return self.__cache.get_or_compute(key, lambda: None)
+
+        result = compute_fn()
+
+        with self.__lock:
+            self.__cache.get_or_compute(key, lambda: result)
+
+        return result
+
+    def save(self):
+        """
+        Persist the cache to disk (if a `cache_path` has been specified)
+        """
+        if self.__cache_path is not None:
+            with self.__lock:
+                self.__cache.save(self.__cache_path)
+
+    def __str__(self):
+        return "CachedLookup"
+
+    def __repr__(self):
+        return f"CachedLookup(cache_path={self.__cache_path})"
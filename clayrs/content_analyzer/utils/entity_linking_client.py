@@ -0,0 +1,193 @@
+from __future__ import annotations
+import threading
+import time
+import urllib.error
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional
+
+from babelpy.babelfy import BabelfyClient
+
+from clayrs.content_analyzer.utils.cached_lookup import CachedLookup
+from clayrs.content_analyzer.utils.memo_table import MemoTable
+from clayrs.utils.const import logger
+
+
+class EntityLinkingClient(ABC):
+    """
+    Abstract class which represents a client of an entity linking service. Given a text, the client returns the list of
+    entities found in it, each one represented as a dict which contains at least the `text` key (the portion of the
+    text which has been linked)
+
+    The client takes care of:
+
+    * Caching: entities found for each text are kept in a cache keyed by the hash of the text. If a `cache_path` is
+    specified, the cache can be persisted on disk with `save_cache()`, so that following runs won't link the same
+    texts again
+    * Rate limiting: if `requests_per_second` is specified, requests to the service are spaced so that no more than
+    `requests_per_second` requests are performed each second (regardless of the number of threads using the client)
+    * Retries: failed requests are re-tried up to `max_retries` times with an exponential backoff
+
+    All methods can be safely called by multiple threads at the same time
+
+    Args:
+        cache_path: path of the file where entities linked for each text are persisted. If None, entities are only
+            cached in memory for the lifetime of the client
+        requests_per_second: maximum number of requests performed each second. If None, requests are not limited
+        max_retries: maximum number of retries for a failed request
+        backoff_factor: factor used to compute the time to wait between retries
+            (`backoff_factor * 2 ** (retry_number - 1)` seconds)
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, requests_per_second: Optional[float] = None,
+                 max_retries: int = 3, backoff_factor: float = 0.5):
+        if requests_per_second is not None and requests_per_second <= 0:
+            raise ValueError("requests_per_second must be a positive number or None!")
+
+        self.__lookup = CachedLookup(cache_path)
+        self.__requests_per_second = requests_per_second
+        self.__max_retries = max_retries
+        self.__backoff_factor = backoff_factor
+
+        self.__rate_lock = threading.Lock()
+        self.__next_request_time = 0.0
+
+    @property
+    def cache_path(self) -> Optional[str]:
+        return self.__lookup.cache_path
+
+    @property
+    def cache(self) -> MemoTable:
+        return self.__lookup.cache
+
+    @property
+    def requests_per_second(self) -> Optional[float]:
+        return self.__requests_per_second
+
+    @property
+    def max_retries(self) -> int:
+        return self.__max_retries
+
+    @property
+    def backoff_factor(self) -> float:
+        return self.__backoff_factor
+
+    @property
+    @abstractmethod
+    def service_name(self) -> str:
+        """
+        Name which identifies the service and its configuration (e.g. the language), used to key the cache
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def _link(self, text: str) -> List[Dict]:
+        """
+        Perform the request to the service and return the entities found in the text
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _is_retryable(exception: Exception) -> bool:
+        """
+        Whether a request which failed with the exception passed as argument should be re-tried: client errors
+        (except for the 429 'Too Many Requests') are not re-tried
+        """
+        if isinstance(exception, urllib.error.HTTPError):
+            return exception.code == 429 or exception.code >= 500
+
+        return isinstance(exception, (OSError, TimeoutError))
+
+    def _wait_rate_limit(self):
+        if self.__requests_per_second is None:
+            return
+
+        with self.__rate_lock:
+            now = time.monotonic()
+            wait = self.__next_request_time - now
+            self.__next_request_time = max(now, self.__next_request_time) + 1 / self.__requests_per_second
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def _link_with_retries(self, text: str) -> List[Dict]:
+        retry = 0
+        while True:
+            self._wait_rate_limit()
+            try:
+                return self._link(text)
+            except Exception as e:
+                if not self._is_retryable(e) or retry >= self.__max_retries:
+                    raise
+
+                retry += 1
+                wait = self.__backoff_factor * 2 ** (retry - 1)
+                logger.warning(f"Entity linking request failed ({e}), retry {retry} out of {self.__max_retries} "
+                               f"in {wait:.2f} seconds")
+                time.sleep(wait)
+
+    def link(self, text: str) -> List[Dict]:
+        """
+        Return the entities found in the text, performing the request to the service only if the text is not
+        already in the cache
+
+        Args:
+            text: text to link
+
+        Returns:
+            List of entities found in the text
+        """
+        return self.__lookup.get_or_compute(self.service_name, text, lambda: self._link_with_retries(text))
+
+    def save_cache(self):
+        """
+        Persist the cache of the client to disk (if a `cache_path` has been specified)
+        """
+        self.__lookup.save()
+
+
+class BabelfyLinkingClient(EntityLinkingClient):
+    """
+    Client of the [Babelfy](http://babelfy.org) entity linking service, based on the babelpy library. The entities
+    returned for each text are the babelpy merged entities (entities merged to the longest possible ones)
+
+    Args:
+        api_key: String obtained by registering to babelfy website. If None only few queries can be executed
+        lang: Language of the texts to link
+        cache_path: path of the file where entities linked for each text are persisted. If None, entities are only
+            cached in memory for the lifetime of the client
+        requests_per_second: maximum number of requests performed each second. If None, requests are not limited
+        max_retries: maximum number of retries for a failed request
+        backoff_factor: factor used to compute the time to wait between retries
+            (`backoff_factor * 2 ** (retry_number - 1)` seconds)
+    """
+
+    def __init__(self, api_key: str = None, lang: str = "EN", cache_path: Optional[str] = None,
+                 requests_per_second: Optional[float] = None, max_retries: int = 3, backoff_factor: float = 0.5):
+        super().__init__(cache_path, requests_per_second, max_retries, backoff_factor)
+
+        self.__api_key = api_key
+        self.__lang = lang
+
+    @property
+    def service_name(self) -> str:
+        return f"babelfy:{self.__lang}"
+
+    def _link(self, text: str) -> List[Dict]:
+        # babelpy clients keep the state of the last request, so a new client is used for each request
+        babel_client = BabelfyClient(self.__api_key, {"lang": self.__lang})
+        babel_client.babelfy(text)
+
+        try:
+            merged_entities = babel_client.merged_entities
+        except AttributeError:
+            raise AttributeError("BabelFy limit reached! Insert an api key or change it if you inserted one!")
+
+        return merged_entities if merged_entities is not None else []
+
+    def __str__(self):
+        return "BabelfyLinkingClient"
+
+    def __repr__(self):
+        return f"BabelfyLinkingClient(api_key={self.__api_key}, lang={self.__lang}, cache_path={self.cache_path}, " \
+               f"requests_per_second={self.requests_per_second}, max_retries={self.max_retries}, " \
+               f"backoff_factor={self.backoff_factor})"
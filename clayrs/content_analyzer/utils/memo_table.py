@@ -0,0 +1,186 @@
+from __future__ import annotations
+import os
+import pickle
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Dict
+
+
+class MemoTable:
+    """
+    Bounded memoization table which maps a hashable key to the result of an expensive computation.
+
+    When `maxsize` is reached, the least recently used entry is evicted. The table keeps track of hits, misses and
+    evictions so that the effectiveness of the cache can be inspected via the `stats()` method.
+
+    A MemoTable can be pickled: this means that it travels along with the object that owns it when that object is
+    sent to worker processes, and that tables filled by different workers can be combined back with the `merge()`
+    method. It can also be persisted to disk with `save()` and restored with `load()`, so that a run can reuse
+    everything computed in previous runs
+
+    Examples:
+
+        >>> table = MemoTable(maxsize=2)
+        >>> table.get_or_compute('korrect', lambda: 'correct')
+        'correct'
+        >>> table.get_or_compute('korrect', lambda: 'correct')
+        'correct'
+        >>> table.stats()
+        {'size': 1, 'maxsize': 2, 'hits': 1, 'misses': 1, 'evictions': 0, 'hit_rate': 0.5}
+
+    Args:
+        maxsize: Maximum number of entries that the table can hold. If `None`, the table is unbounded
+    """
+
+    def __init__(self, maxsize: Optional[int] = 100000):
+        self._check_maxsize(maxsize)
+
+        self.maxsize = maxsize
+        self._table = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute_fn: Callable[[], Any]) -> Any:
+        """
+        Return the value memoized for `key`. If the key is not present, `compute_fn` is called, and its result is
+        stored and returned
+
+        Args:
+            key: key for which the value must be retrieved
+            compute_fn: function with no arguments which computes the value for the key in case of a miss
+
+        Returns:
+            Value associated to the key
+        """
+        try:
+            value = self._table[key]
+            self._table.move_to_end(key)
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            value = compute_fn()
+            self[key] = value
+
+        return value
+
+    def merge(self, other: MemoTable):
+        """
+        Add to this table all entries of the `other` table which are not already present. Statistics of the
+        `other` table are summed to the ones of this table
+
+        Args:
+            other: MemoTable whose entries will be added to this one
+        """
+        for key, value in other._table.items():
+            if key not in self._table:
+                self[key] = value
+
+        self.hits += other.hits
+        self.misses += other.misses
+        self.evictions += other.evictions
+
+    def resize(self, maxsize: Optional[int]):
+        """
+        Change the maximum number of entries that the table can hold. If the table currently holds more entries than
+        the new `maxsize`, the least recently used ones are evicted
+
+        Args:
+            maxsize: New maximum number of entries that the table can hold. If `None`, the table becomes unbounded
+        """
+        self._check_maxsize(maxsize)
+
+        self.maxsize = maxsize
+        self._evict()
+
+    def clear(self):
+        """
+        Remove all entries from the table and reset its statistics
+        """
+        self._table.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return statistics about the effectiveness of the table
+
+        Returns:
+            Dictionary containing the current size of the table, its maximum size, number of hits, misses,
+            evictions and the hit rate
+        """
+        lookups = self.hits + self.misses
+        return {'size': len(self), 'maxsize': self.maxsize,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups != 0 else 0.0}
+
+    def save(self, file_path: str):
+        """
+        Persist the table to disk
+
+        Args:
+            file_path: path of the file where the table will be saved
+        """
+        directory = os.path.dirname(file_path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+
+        with open(file_path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file_path: str) -> MemoTable:
+        """
+        Load a table previously persisted with the `save()` method
+
+        Args:
+            file_path: path of the file where the table was saved
+
+        Returns:
+            The loaded MemoTable
+        """
+        with open(file_path, 'rb') as f:
+            table = pickle.load(f)
+
+        if not isinstance(table, cls):
+            raise TypeError(f"{file_path} does not contain a {cls.__name__}!")
+
+        return table
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self._table[key] = value
+        self._table.move_to_end(key)
+
+        self._evict()
+
+    def _evict(self):
+        if self.maxsize is not None:
+            while len(self._table) > self.maxsize:
+                self._table.popitem(last=False)
+                self.evictions += 1
+
+    @staticmethod
+    def _check_maxsize(maxsize: Optional[int]):
+        if maxsize is not None and maxsize <= 0:
+            raise ValueError("maxsize must be a positive integer or None!")
+
+    def __getitem__(self, key: Hashable) -> Any:
+        return self._table[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._table
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __eq__(self, other):
+        if isinstance(other, MemoTable):
+            return self.maxsize == other.maxsize and self._table == other._table
+        return False
+
+    def __str__(self):
+        return "MemoTable"
+
+    def __repr__(self):
+        return f"MemoTable(maxsize={self.maxsize})"
@@ -0,0 +1,197 @@
+from __future__ import annotations
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional
+
+from SPARQLWrapper import SPARQLWrapper, JSON, POST, GET
+from SPARQLWrapper.SPARQLExceptions import URITooLong
+
+from clayrs.content_analyzer.utils.cached_lookup import CachedLookup
+from clayrs.content_analyzer.utils.memo_table import MemoTable
+from clayrs.utils.const import logger
+
+
+class SPARQLEndpoint(ABC):
+    """
+    Abstract class which represents a SPARQL endpoint which can be queried. Results of each query are returned as the
+    list of bindings of the SPARQL 1.1 Query Results JSON format, that is a list of dicts in the form
+    `{variable: {'type': ..., 'value': ...}}`
+
+    If a `cache_path` is specified, the results of each query are kept in a cache persisted on disk (keyed by the
+    query itself), so that the same query is never executed twice against the endpoint, even across different runs.
+    The cache is saved to disk when `save_cache()` is called
+
+    Args:
+        cache_path: path of the file where results of the queries are persisted. If None, results are only cached in
+            memory for the lifetime of the endpoint
+    """
+
+    def __init__(self, cache_path: Optional[str] = None):
+        self.__lookup = CachedLookup(cache_path)
+
+    @property
+    def cache_path(self) -> Optional[str]:
+        return self.__lookup.cache_path
+
+    @property
+    def cache(self) -> MemoTable:
+        return self.__lookup.cache
+
+    @abstractmethod
+    def _execute(self, query: str) -> List[Dict[str, Dict[str, str]]]:
+        """
+        Execute the query against the endpoint and return the bindings of its results
+        """
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def endpoint_name(self) -> str:
+        """
+        Name which identifies the endpoint, used to key the cache so that the same cache file can be shared between
+        different endpoints
+        """
+        raise NotImplementedError
+
+    def query(self, query: str) -> List[Dict[str, Dict[str, str]]]:
+        """
+        Return the bindings of the results of the query, executing it only if it's not already in the cache.
+        This method can be safely called by multiple threads at the same time
+
+        Args:
+            query: SPARQL query to execute
+
+        Returns:
+            List of bindings of the results
+        """
+        return self.__lookup.get_or_compute(self.endpoint_name, query, lambda: self._execute(query))
+
+    def save_cache(self):
+        """
+        Persist the cache of the endpoint to disk (if a `cache_path` has been specified)
+        """
+        self.__lookup.save()
+
+
+class RemoteSPARQLEndpoint(SPARQLEndpoint):
+    """
+    SPARQL endpoint reachable via HTTP (e.g. 'https://dbpedia.org/sparql'), queried with the SPARQLWrapper library
+
+    Args:
+        url: url of the endpoint
+        max_timeout: Sometimes a query may take longer than the max time allowed by the server due to internet
+            issues: the query will be re-tried `max_timeout` times before raising a `TimeoutError`
+        cache_path: path of the file where results of the queries are persisted. If None, results are only cached in
+            memory for the lifetime of the endpoint
+    """
+
+    def __init__(self, url: str = "https://dbpedia.org/sparql", max_timeout: int = 5, cache_path: Optional[str] = None):
+        super().__init__(cache_path)
+
+        self.__url = url
+        self.__max_timeout = max_timeout
+
+    @property
+    def url(self) -> str:
+        return self.__url
+
+    @property
+    def endpoint_name(self) -> str:
+        return self.__url
+
+    def _execute(self, query: str) -> List[Dict[str, Dict[str, str]]]:
+        # a wrapper for each query since SPARQLWrapper objects are not thread safe
+        sparql = SPARQLWrapper(self.__url)
+        sparql.setReturnFormat(JSON)
+        sparql.setQuery(query)
+        sparql.setMethod(GET)
+
+        timeout_counter = 0
+        while True:
+            try:
+                result = sparql.query()
+                if result.response.status == 200:
+                    break
+                elif result.response.status == 206:
+                    if timeout_counter >= self.__max_timeout:
+                        raise TimeoutError("Maximum number of trials reached!")
+
+                    logger.warning(f"Timeout occurred! - {timeout_counter + 1} out of {self.__max_timeout} possible")
+                    timeout_counter += 1
+                    query += '\n'  # add space to avoid query plan cache so that we perform a new request
+                    sparql.setQuery(query)
+            except URITooLong:
+                sparql.setMethod(POST)
+
+        return result.convert()["results"]["bindings"]
+
+    def __str__(self):
+        return "RemoteSPARQLEndpoint"
+
+    def __repr__(self):
+        return f"RemoteSPARQLEndpoint(url={self.__url}, max_timeout={self.__max_timeout}, " \
+               f"cache_path={self.cache_path})"
+
+
+class LocalSPARQLEndpoint(SPARQLEndpoint):
+    """
+    SPARQL endpoint backed by an in-process rdflib graph. It can be used as a local stand-in of a remote endpoint
+    (e.g. a dump of the portion of DBPedia of interest), so that no request is performed over the network
+
+    Examples:
+
+        >>> graph = rdflib.Graph().parse('dbpedia_films.ttl')
+        >>> endpoint = LocalSPARQLEndpoint(graph)
+
+    Args:
+        graph: rdflib graph which will be queried
+        cache_path: path of the file where results of the queries are persisted. If None, results are only cached in
+            memory for the lifetime of the endpoint
+    """
+
+    def __init__(self, graph, cache_path: Optional[str] = None):
+        super().__init__(cache_path)
+
+        self.__graph = graph
+        # the rdflib query parser is not thread safe, so queries are executed one at a time
+        self.__query_lock = threading.Lock()
+
+    @property
+    def graph(self):
+        return self.__graph
+
+    @property
+    def endpoint_name(self) -> str:
+        return f"local:{self.__graph.identifier}"
+
+    def _execute(self, query: str) -> List[Dict[str, Dict[str, str]]]:
+        from rdflib import URIRef, BNode, Literal
+
+        with self.__query_lock:
+            query_results = list(self.__graph.query(query))
+
+        bindings = []
+        for row in query_results:
+            row_bindings = {}
+            for var, term in row.asdict().items():
+                if isinstance(term, URIRef):
+                    row_bindings[var] = {'type': 'uri', 'value': str(term)}
+                elif isinstance(term, BNode):
+                    row_bindings[var] = {'type': 'bnode', 'value': str(term)}
+                elif isinstance(term, Literal):
+                    row_bindings[var] = {'type': 'literal', 'value': str(term)}
+                    if term.language is not None:
+                        row_bindings[var]['xml:lang'] = term.language
+                    elif term.datatype is not None:
+                        row_bindings[var]['type'] = 'typed-literal'
+                        row_bindings[var]['datatype'] = str(term.datatype)
+
+            bindings.append(row_bindings)
+
+        return bindings
+
+    def __str__(self):
+        return "LocalSPARQLEndpoint"
+
+    def __repr__(self):
+        return f"LocalSPARQLEndpoint(graph={self.__graph.identifier}, cache_path={self.cache_path})"
@@ -1,8 +1,11 @@
 from __future__ import annotations
+import gc
 from collections import defaultdict
-from typing import List, Union, Optional, TYPE_CHECKING
+from copy import copy
+from typing import List, Union, Optional, TYPE_CHECKING, Dict, Tuple, Callable, Set, Sequence, Iterable
 import numpy as np
 from scipy import sparse
+from sklearn.feature_extraction import DictVectorizer
 
 if TYPE_CHECKING:
     from clayrs.content_analyzer.content_representation.content import Content
@@ -11,12 +14,16 @@ if TYPE_CHECKING:
     from clayrs.recsys.content_based_algorithm.contents_loader import LoadedContentsDict
     from clayrs.recsys.content_based_algorithm.centroid_vector.similarities import Similarity
     from clayrs.content_analyzer import Ratings
+    from clayrs.recsys.methodology import Methodology
 
 from clayrs.content_analyzer.field_content_production_techniques.embedding_technique.combining_technique import \
     Centroid
 from clayrs.recsys.content_based_algorithm.content_based_algorithm import PerUserCBAlgorithm
 from clayrs.recsys.content_based_algorithm.exceptions import NoRatedItems, OnlyNegativeItems, \
     NotPredictionAlg, EmptyUserRatings
+from clayrs.utils.const import logger
+from clayrs.utils.context_managers import get_iterator_parallel
+from clayrs.utils.top_k import top_k_uir
 
 
 class CentroidVector(PerUserCBAlgorithm):
@@ -72,17 +79,28 @@ class CentroidVector(PerUserCBAlgorithm):
         embedding_combiner: `CombiningTechnique` used when embeddings representation must be used, but they are in a
             matrix form instead of a single vector (e.g. WordEmbedding representations have one
             vector for each word). By default, the `Centroid` of the rows of the matrix is computed
+        rank_batch_size: When the algorithm is fit or the ranking is computed for many users (with the `fit()`,
+            `rank()` or `fit_rank()` methods), features of all the items involved are extracted only once and the
+            similarities between the centroids and the items are computed in batches of `rank_batch_size` users, each
+            one with a single call to the `similarity`. The memory needed by each batch is proportional to
+            `rank_batch_size` times the number of candidate items of the users in the batch. If any representation
+            is a dict, users are fit and ranked one by one instead, since dicts are vectorized by a `DictVectorizer`
+            fit on the positive items of each user
     """
-    __slots__ = ('_similarity', '_emb_combiner', '_centroid', '_positive_rated_list')
+    __slots__ = ('_similarity', '_emb_combiner', '_centroid', '_positive_rated_features', '_rank_batch_size')
 
     def __init__(self, item_field: dict, similarity: Similarity, threshold: float = None,
-                 embedding_combiner: CombiningTechnique = Centroid()):
+                 embedding_combiner: CombiningTechnique = Centroid(), rank_batch_size: int = 128):
+        if rank_batch_size <= 0:
+            raise ValueError("rank_batch_size must be a positive number!")
+
         super().__init__(item_field, threshold)
 
         self._similarity = similarity
         self._emb_combiner = embedding_combiner
         self._centroid: Optional[np.ndarray] = None
-        self._positive_rated_list: Optional[List] = None
+        self._positive_rated_features: Optional[Union[np.ndarray, sparse.csr_matrix]] = None
+        self._rank_batch_size: int = rank_batch_size
 
     def process_rated(self, user_idx: int, train_ratings: Ratings, available_loaded_items: LoadedContentsDict):
         """
@@ -106,7 +124,9 @@ class CentroidVector(PerUserCBAlgorithm):
             OnlyNegativeitems: Exception raised when there are only negative items available locally
                 for the user (Items that the user disliked)
         """
-        # a list since there could be duplicate interaction (eg bootstrap partitioning)
+        # the vectorizer of dict representations is fit on the positive items of the user only
+        self._transformer = DictVectorizer(sparse=False, sort=False)
+
         uir_user = train_ratings.get_user_interactions(user_idx)
         rated_items_id = train_ratings.item_map.convert_seq_int2str(uir_user[:, 1].astype(int))
 
@@ -119,9 +139,7 @@ class CentroidVector(PerUserCBAlgorithm):
         items_scores_dict = dict(sorted(items_scores_dict.items()))  # sort dictionary based on key for reproducibility
 
         # Create list of all the available items that are useful for the user
-        loaded_rated_items: List[Union[Content, None]] = available_loaded_items.get_list([item_id
-                                                                                          for item_id
-                                                                                          in rated_items_id])
+        loaded_rated_items: List[Union[Content, None]] = available_loaded_items.get_list(list(items_scores_dict))
 
         # If threshold wasn't passed in the constructor, then we take the mean rating
         # given by the user as its threshold
@@ -129,9 +147,10 @@ class CentroidVector(PerUserCBAlgorithm):
         if threshold is None:
             threshold = np.nanmean(uir_user[:, 2])
 
-        # we extract feature of each POSITIVE item sorted based on its key: IMPORTANT for reproducibility!!
+        # we take each POSITIVE item sorted based on its key: IMPORTANT for reproducibility!!
         # otherwise the matrix we feed to sklearn will have input item in different rows each run!
-        positive_rated_list = []
+        # Items are repeated once for each positive score, so that duplicate interactions weight more in the centroid
+        positive_rated_items_id = []
         for item in loaded_rated_items:
             if item is not None:
 
@@ -139,17 +158,18 @@ class CentroidVector(PerUserCBAlgorithm):
 
                 for score in score_assigned:
                     if score >= threshold:
-                        positive_rated_list.append(self.extract_features_item(item))
+                        positive_rated_items_id.append(item.content_id)
 
         if len(uir_user) == 0:
             raise EmptyUserRatings("The user selected doesn't have any ratings!")
 
         if len(loaded_rated_items) == 0 or (loaded_rated_items.count(None) == len(loaded_rated_items)):
             raise NoRatedItems("User {} - No rated items available locally!".format(user_idx))
-        if len(positive_rated_list) == 0:
+        if len(positive_rated_items_id) == 0:
             raise OnlyNegativeItems("User {} - There are only negative items available locally!")
 
-        self._positive_rated_list = positive_rated_list
+        _, self._positive_rated_features = self._fused_items_features(positive_rated_items_id,
+                                                                      available_loaded_items, self._emb_combiner)
 
     def fit_single_user(self):
         """
@@ -161,17 +181,15 @@ class CentroidVector(PerUserCBAlgorithm):
 
         The built centroid will also be stored in a private attribute.
         """
-        positive_rated_features_fused = self.fuse_representations(self._positive_rated_list, self._emb_combiner)
         # reshape make the centroid bidimensional of shape (1, h) needed to compute faster similarities
-
-        self._centroid = positive_rated_features_fused.mean(axis=0).reshape(1, -1)
+        self._centroid = self._positive_rated_features.mean(axis=0).reshape(1, -1)
 
         # we maintain original representation
-        if isinstance(positive_rated_features_fused, sparse.csr_matrix):
+        if isinstance(self._positive_rated_features, sparse.csr_matrix):
             self._centroid = sparse.csr_matrix(self._centroid)
 
         # we delete variable used to fit since will no longer be used
-        self._positive_rated_list = None
+        self._positive_rated_features = None
 
     def predict_single_user(self, user_idx: int, train_ratings: Ratings, available_loaded_items: LoadedContentsDict,
                             filter_list: List[str]) -> np.ndarray:
@@ -213,16 +231,9 @@ class CentroidVector(PerUserCBAlgorithm):
         if len(uir_user) == 0:
             raise EmptyUserRatings("The user selected doesn't have any ratings!")
 
-        # Load items to predict
-        items_to_predict = available_loaded_items.get_list(filter_list)
-
-        # Extract features of the items to predict
-        idx_items_to_predict = []
-        features_items_to_predict = []
-        for item in items_to_predict:
-            if item is not None:
-                idx_items_to_predict.append(item.content_id)
-                features_items_to_predict.append(self.extract_features_item(item))
+        # Fused features of the items to predict available locally
+        idx_items_to_predict, features_fused = self._fused_items_features(filter_list, available_loaded_items,
+                                                                          self._emb_combiner)
 
         if len(idx_items_to_predict) == 0:
             return np.array([])  # if no item to predict, empty rank is returned
@@ -230,19 +241,413 @@ class CentroidVector(PerUserCBAlgorithm):
         idx_items_to_predict = train_ratings.item_map.convert_seq_str2int(idx_items_to_predict)
 
         # Calculate predictions, they are the similarity of the new items with the centroid vector
-        features_fused = self.fuse_representations(features_items_to_predict, self._emb_combiner)
         similarities = self._similarity.perform(self._centroid, features_fused).reshape(-1)  # 2d to 1d
 
-        sorted_scores_idxs = np.argsort(similarities)[::-1][:recs_number]
-        sorted_items = np.array(idx_items_to_predict)[sorted_scores_idxs]
-        sorted_scores = similarities[sorted_scores_idxs]
-
         # we construct the output data
-        uir_rank = np.array([[user_idx, item_idx, score]
-                             for item_idx, score in zip(sorted_items, sorted_scores)])
+        uir_rank = top_k_uir(user_idx, idx_items_to_predict, similarities, recs_number)
 
         return uir_rank
 
+    def _fit_fns(self) -> Tuple[Callable, Callable]:
+        # the functions of each user are bound to a copy of the algorithm which keeps only the centroid of the user,
+        # so that centroids of all the users are available when the rank is computed in batches
+        user_alg = copy(self)
+        user_alg._positive_rated_features = None
+        user_alg._clear_items_features()
+
+        return user_alg.rank_single_user, user_alg.predict_single_user
+
+    def _positive_interactions(self, user_idx_list: Sequence[int], train_set: Ratings) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Private method which returns the users and the items (represented with their string ids) of all positive
+        interactions of the users in `user_idx_list`, that is interactions with a score greater or equal than the
+        threshold of the user. The threshold of each user is computed in the same way of the `process_rated()` method
+
+        Duplicate interactions are kept (e.g. bootstrap partitioning), so that they count more in the centroid
+        """
+        users_col = train_set.user_idx_column
+        scores_col = train_set.score_column
+
+        threshold = self.threshold
+        if threshold is None:
+            # mean score of each user computed for all users at once, nan scores are ignored as np.nanmean does
+            rated = ~np.isnan(scores_col)
+            n_users = users_col.max() + 1 if len(users_col) != 0 else 0
+            scores_sum = np.bincount(users_col[rated], weights=scores_col[rated], minlength=n_users)
+            scores_count = np.bincount(users_col[rated], minlength=n_users)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                threshold = (scores_sum / scores_count)[users_col]
+
+        positive = (scores_col >= threshold) & np.isin(users_col, user_idx_list)
+
+        positive_items = train_set.item_map.convert_seq_int2str(train_set.item_idx_column[positive])
+
+        return users_col[positive], positive_items
+
+    def _init_items_features(self, item_ids: Iterable[str], available_loaded_items: LoadedContentsDict):
+        # features of all the items of the session are extracted and fused once, users only index their rows.
+        # Features of dict representations depend on the positive items of each user, so they can't be shared
+        if not self._vectorized_representations(item_ids, available_loaded_items):
+            self._build_items_features(item_ids, available_loaded_items, self._emb_combiner)
+
+    def _vectorized_representations(self, item_ids: Iterable[str], available_loaded_items: LoadedContentsDict) -> bool:
+        """
+        Private method which checks if any representation used by the algorithm is a dict, which is vectorized by a
+        `DictVectorizer` fit on the positive items of each user (see the `process_rated()` method). All items have the
+        same representations, so only the first item in `item_ids` available locally is checked
+
+        Args:
+            item_ids: ids of the items involved by the session
+            available_loaded_items: The LoadedContents interface which contains loaded contents
+
+        Returns:
+            True if any representation is a dict, False otherwise
+        """
+        for item_id in item_ids:
+            item = available_loaded_items.get_list([item_id])[0]
+            if item is not None:
+                return any(isinstance(representation, dict) for representation in self.extract_features_item(item))
+
+        return False
+
+    def _batched(self, items_directory: str, item_ids: Iterable[str]) -> bool:
+        """
+        Private method which checks if users can be fit and ranked in batches, that is if none of the representations
+        used by the algorithm is a dict (see the `_vectorized_representations()` method)
+        """
+        with self._load_available_contents(items_directory, set()) as loaded_items_interface:
+            return not self._vectorized_representations(item_ids, loaded_items_interface)
+
+    @staticmethod
+    def _centroids(positive_users: np.ndarray, positive_items: np.ndarray, items_matrix,
+                   items_row: Dict[str, Optional[int]]):
+        """
+        Private method which computes the centroids of all users with at least a positive item available locally,
+        as the product between the sparse users x items matrix of the weights of the positive items of each user
+        (normalized so that rows sum to 1) and the matrix of the features of the items (see the
+        `_build_items_features()` method)
+
+        Returns:
+            Tuple containing the array of the users fit and the matrix of their centroids (one row for each user)
+        """
+        positive_rows = np.array([-1 if items_row.get(item_id) is None else items_row[item_id]
+                                  for item_id in positive_items], dtype=int)
+        available = positive_rows != -1
+
+        fit_users, users_rows = np.unique(positive_users[available], return_inverse=True)
+        if len(fit_users) == 0:
+            return fit_users, None
+
+        # duplicate (user, item) entries are summed, so an item rated many times weights more in the centroid
+        weights = sparse.csr_matrix((np.ones(len(users_rows)), (users_rows, positive_rows[available])),
+                                    shape=(len(fit_users), items_matrix.shape[0]))
+        weights = sparse.diags(1 / np.asarray(weights.sum(axis=1)).reshape(-1)) @ weights
+
+        centroids = weights @ items_matrix
+        if sparse.issparse(centroids):
+            centroids = sparse.csr_matrix(centroids)
+
+        return fit_users, centroids
+
+    @staticmethod
+    def _users_candidates(user_idx_list: Sequence[int], train_set: Ratings, test_set: Ratings,
+                          methodology: Methodology) -> Tuple[Dict[int, bytes], Dict[bytes, np.ndarray]]:
+        """
+        Private method which computes the candidate items of each user with the `methodology`. Users with the same
+        candidate items (e.g. with the `AllItemsMethodology`) share the same group, so that the candidate items of the
+        group are processed only once
+
+        Returns:
+            Tuple containing the dictionary which maps each user to its group and the dictionary which maps each group
+                to its candidate items (represented with their int idx)
+        """
+        users_group = {}
+        groups_candidates = {}
+        for user_idx in user_idx_list:
+            filter_list = methodology.filter_single(user_idx, train_set, test_set).astype(int)
+
+            group = filter_list.tobytes()
+            groups_candidates.setdefault(group, filter_list)
+            users_group[user_idx] = group
+
+        return users_group, groups_candidates
+
+    def _rank_users(self, users: Sequence[int], centroids, items_matrix, items_row: Dict[str, Optional[int]],
+                    users_group: Dict[int, bytes], groups_candidates: Dict[bytes, np.ndarray], test_set: Ratings,
+                    n_recs: Optional[int], num_cpus: int) -> Dict[int, np.ndarray]:
+        """
+        Private method which computes the rank of all the users passed as argument, where the i-th row of `centroids`
+        is the centroid of the i-th user. Users are ranked in batches of `rank_batch_size` users: the similarities
+        between the centroids of a batch and the union of the candidate items of its users are computed with a single
+        call to the `similarity`. Each batch is computed by a different process if `num_cpus` is greater than 1
+
+        Returns:
+            Dictionary containing the uir rank matrix of each user
+        """
+        # rows in the items matrix and int idxs of the candidate items available locally of each group
+        groups_rows = {}
+        for group, candidates in groups_candidates.items():
+            candidates_rows = np.array([-1 if items_row.get(item_id) is None else items_row[item_id]
+                                        for item_id in test_set.item_map.convert_seq_int2str(candidates)], dtype=int)
+            available = candidates_rows != -1
+            groups_rows[group] = (candidates_rows[available], candidates[available])
+
+        def compute_batch_rank(batch: Tuple[int, int]):
+            batch_users = users[batch[0]:batch[1]]
+            for user_idx in batch_users:
+                if len(test_set.get_user_interactions(user_idx)) == 0:
+                    raise EmptyUserRatings("The user selected doesn't have any ratings!")
+
+            batch_groups = {users_group[user_idx] for user_idx in batch_users}
+            batch_rows = np.unique(np.concatenate([groups_rows[group][0] for group in batch_groups]))
+
+            if len(batch_rows) == 0:
+                return [(user_idx, np.array([])) for user_idx in batch_users]
+
+            similarities = self._similarity.perform(centroids[batch[0]:batch[1]], items_matrix[batch_rows])
+
+            # position in the similarities matrix of the candidate items of each group of the batch
+            groups_positions = {group: np.searchsorted(batch_rows, groups_rows[group][0]) for group in batch_groups}
+
+            batch_rank = []
+            for user_similarities, user_idx in zip(similarities, batch_users):
+                group = users_group[user_idx]
+                candidates_idx = groups_rows[group][1]
+
+                if len(candidates_idx) == 0:
+                    batch_rank.append((user_idx, np.array([])))  # if no item to predict, empty rank is returned
+                    continue
+
+                user_scores = user_similarities[groups_positions[group]]
+                batch_rank.append((user_idx, top_k_uir(user_idx, candidates_idx, user_scores, n_recs)))
+
+            return batch_rank
+
+        batches = [(i, min(i + self._rank_batch_size, len(users))) for i in range(0, len(users), self._rank_batch_size)]
+
+        users_rank = {}
+        with get_iterator_parallel(num_cpus,
+                                   compute_batch_rank, batches,
+                                   progress_bar=True, total=len(batches)) as pbar:
+
+            pbar.set_description(f"Computing rank for batches of {self._rank_batch_size} users")
+            for batch_rank in pbar:
+                users_rank.update(batch_rank)
+
+        return users_rank
+
+    def fit(self, train_set: Ratings, items_directory: str,
+            num_cpus: int = 1) -> Dict[int, Tuple[Callable, Callable]]:
+        """
+        Method which will fit the algorithm for each user in the `train_set` parameter.
+
+        Unlike other per-user algorithms, features of all the positive items are extracted only once and the centroids
+        of all the users are computed at once, as the product between the sparse matrix of the weights of the
+        positive items of each user and the matrix of the features of the items. Centroids are the same of the ones
+        computed by calling `process_rated()` and `fit_single_user()` for each user. If any representation is a dict,
+        users are fit one by one instead (see the `rank_batch_size` parameter)
+
+        If the algorithm can't be fit for some users, a warning message is printed showing the number of users
+        for which the alg couldn't be fit
+
+        Args:
+            train_set: `Ratings` object which contains the train set of each user
+            items_directory: Path where complexly represented items are serialized by the Content Analyzer
+            num_cpus: number of processors that must be reserved for the method if users are fit one by one. If set
+                to `0`, all cpus available will be used. Not used when centroids are computed with matrix operations
+
+        Returns:
+            A dictionary with users idxs (int representation) are keys and tuples containing (`rank_fn`,
+                `predict_fn`) are values. In this dictionary only users for which the *fit* process could be performed
+                appear!
+        """
+        if not self._batched(items_directory, train_set.unique_item_id_column):
+            return super().fit(train_set, items_directory, num_cpus)
+
+        all_users = train_set.unique_user_idx_column
+        loaded_items_interface = self._load_available_contents(items_directory, train_set.unique_item_id_column)
+
+        positive_users, positive_items = self._positive_interactions(all_users, train_set)
+        self._init_items_features(positive_items, loaded_items_interface)
+        fit_users, centroids = self._centroids(positive_users, positive_items, self._cached_items_matrix,
+                                               self._cached_items_row)
+
+        users_fit_dict = {}
+        for i, user_idx in enumerate(fit_users):
+            self._centroid = centroids[i:i + 1]
+            users_fit_dict[user_idx] = self._fit_fns()
+
+        count_skipped_user = len(all_users) - len(fit_users)
+        if count_skipped_user > 0:
+            logger.warning(f"{count_skipped_user} users will be skipped because the algorithm chosen "
+                           f"could not be fit for them")
+
+        # we force the garbage collector after freeing loaded items and their features
+        self._clear_items_features()
+        del loaded_items_interface
+        gc.collect()
+
+        return users_fit_dict
+
+    def rank(self, users_fit_dict: dict, train_set: Ratings, test_set: Ratings, items_directory: str,
+             user_idx_list: Set[int], n_recs: Optional[int], methodology: Methodology,
+             num_cpus: int) -> List[np.ndarray]:
+        """
+        Method used to calculate ranking for all users in `user_idx_list` parameter.
+        You must first call the `fit()` method ***before*** you can compute the ranking.
+
+        Unlike other per-user algorithms, features of all the candidate items are extracted only once and users are
+        ranked in batches of `rank_batch_size` users (see the `rank_batch_size` parameter). Results are the same of the
+        ones computed by calling `rank_single_user()` for each user. If any representation is a dict, users are ranked
+        one by one instead
+
+        If the algorithm was not fit for some users, they will be skipped and a warning message is printed showing the
+        number of users for which the alg couldn't produce a ranking
+
+        Args:
+            users_fit_dict: dictionary with users idxs (int representation) are keys and tuples containing (`rank_fn`,
+                `predict_fn`) are values. In this dictionary only users for which the *fit* process could be performed
+                appear!
+            train_set: `Ratings` object which contains the train set of each user
+            test_set: Ratings object which represents the ground truth of the split considered
+            items_directory: Path where complexly represented items are serialized by the Content Analyzer
+            user_idx_list: Set of user idx (int representation) for which a recommendation list must be generated.
+                Users should be represented with their mapped integer!
+            n_recs: Number of the top items that will be present in the ranking of each user.
+                If `None` all candidate items will be returned for the user
+            methodology: `Methodology` object which governs the candidate item selection
+            num_cpus: number of processors that must be reserved for the method. If set to `0`, all cpus available will
+                be used. Each process computes the ranking of a batch of users
+
+        Returns:
+            List of uir matrices for each user, where each uir contains predicted interactions between users and unseen
+                items sorted in a descending way w.r.t. the third dimension which is the ranked score
+        """
+        if not self._batched(items_directory, train_set.unique_item_id_column):
+            return super().rank(users_fit_dict, train_set, test_set, items_directory, user_idx_list, n_recs,
+                                methodology, num_cpus)
+
+        # the centroid of each user is kept by the algorithm to which its rank_fn is bound
+        users_alg = {user_idx: users_fit_dict[user_idx][0].__self__
+                     for user_idx in user_idx_list if user_idx in users_fit_dict}
+        users = list(users_alg.keys())
+
+        count_skipped_user = len(user_idx_list) - len(users)
+        if count_skipped_user > 0:
+            logger.warning(f"{count_skipped_user} users will be skipped because the algorithm chosen "
+                           f"was not fit for them")
+
+        users_rank = {}
+        if len(users) != 0:
+            loaded_items_interface = self._load_available_contents(items_directory, set())
+
+            users_group, groups_candidates = self._users_candidates(users, train_set, test_set, methodology)
+            candidate_items = train_set.item_map.convert_seq_int2str(np.unique(np.concatenate(
+                list(groups_candidates.values()))).astype(int))
+
+            # candidate items are vectorized by the fit algorithm, so that they have the same features of the centroids
+            fit_alg = users_alg[users[0]]
+            fit_alg._build_items_features(candidate_items, loaded_items_interface, fit_alg._emb_combiner)
+
+            centroids = [users_alg[user_idx]._centroid for user_idx in users]
+            if sparse.issparse(centroids[0]):
+                centroids = sparse.vstack(centroids, format='csr')
+            else:
+                centroids = np.vstack(centroids)
+
+            users_rank = self._rank_users(users, centroids, fit_alg._cached_items_matrix, fit_alg._cached_items_row,
+                                          users_group, groups_candidates, test_set, n_recs, num_cpus)
+
+            # we force the garbage collector after freeing loaded items and their features
+            fit_alg._clear_items_features()
+            del loaded_items_interface
+            gc.collect()
+
+        return [users_rank.get(user_idx, np.array([])) for user_idx in user_idx_list]
+
+    def fit_rank(self, train_set: Ratings, test_set: Ratings, items_directory: str, user_idx_list: Set[int],
+                 n_recs: Optional[int], methodology: Methodology, num_cpus: int,
+                 save_fit: bool) -> Tuple[Optional[dict], List[np.ndarray]]:
+        """
+        Method used to both fit and calculate ranking for all users in `user_idx_list` parameter.
+
+        Features of all the positive and candidate items of the users are extracted only once in a single matrix,
+        then the centroids of all the users are computed at once (see the `fit()` method) and users are ranked in
+        batches of `rank_batch_size` users (see the `rank()` method). If any representation is a dict, users are fit
+        and ranked one by one instead
+
+        With the `save_fit` parameter you can specify if you need the function to return the algorithm fit (in case
+        you want to perform multiple calls to the `predict()` or `rank()` function). If set to True, the first value
+        returned by this function will be the fit algorithm and the second will be the list of uir matrices with
+        predictions for each user.
+        Otherwise, if `save_fit` is False, the first value returned by this function will be `None`
+
+        Args:
+            train_set: `Ratings` object which contains the train set of each user
+            test_set: Ratings object which represents the ground truth of the split considered
+            items_directory: Path where complexly represented items are serialized by the Content Analyzer
+            user_idx_list: Set of user idx (int representation) for which a recommendation list must be generated.
+                Users should be represented with their mapped integer!
+            n_recs: Number of the top items that will be present in the ranking of each user.
+                If `None` all candidate items will be returned for the user
+            methodology: `Methodology` object which governs the candidate item selection
+            num_cpus: number of processors that must be reserved for the method. If set to `0`, all cpus available will
+                be used. Each process computes the ranking of a batch of users
+            save_fit: Boolean value which let you choose if the fit algorithm should be saved and returned by this
+                function. If True, the first value returned by this function is the fit algorithm. Otherwise, the first
+                value will be None. The second value is always the list of predicted uir matrices
+
+        Returns:
+            A tuple where the first value is the fit algorithm (could be None if `save_fit == False`), the second
+            one is a list of predicted uir matrices all sorted in a decreasing order w.r.t. the ranking scores
+        """
+        if not self._batched(items_directory, train_set.unique_item_id_column):
+            return super().fit_rank(train_set, test_set, items_directory, user_idx_list, n_recs, methodology,
+                                    num_cpus, save_fit)
+
+        user_idx_list = list(user_idx_list)
+        loaded_items_interface = self._load_available_contents(items_directory, set())
+
+        positive_users, positive_items = self._positive_interactions(user_idx_list, train_set)
+
+        # only users with at least a positive item available locally can be fit
+        available_positive_items = {item.content_id
+                                    for item in loaded_items_interface.get_list(np.unique(positive_items))
+                                    if item is not None}
+        users = np.unique(positive_users[np.isin(positive_items, list(available_positive_items))])
+
+        count_skipped_user = len(user_idx_list) - len(users)
+        if count_skipped_user > 0:
+            logger.warning(f"{count_skipped_user} users will be skipped because the algorithm chosen "
+                           f"could not be fit for them")
+
+        users_fit_dict = {} if save_fit else None
+        users_rank = {}
+        if len(users) != 0:
+            users_group, groups_candidates = self._users_candidates(users, train_set, test_set, methodology)
+            candidate_items = train_set.item_map.convert_seq_int2str(np.unique(np.concatenate(
+                list(groups_candidates.values()))).astype(int))
+
+            self._build_items_features(np.concatenate([positive_items, candidate_items]), loaded_items_interface,
+                                       self._emb_combiner)
+            items_matrix, items_row = self._cached_items_matrix, self._cached_items_row
+            users, centroids = self._centroids(positive_users, positive_items, items_matrix, items_row)
+
+            if save_fit:
+                for i, user_idx in enumerate(users):
+                    self._centroid = centroids[i:i + 1]
+                    users_fit_dict[user_idx] = self._fit_fns()
+
+            users_rank = self._rank_users(users, centroids, items_matrix, items_row, users_group, groups_candidates,
+                                          test_set, n_recs, num_cpus)
+
+        # we force the garbage collector after freeing loaded items and their features
+        self._clear_items_features()
+        del loaded_items_interface
+        gc.collect()
+
+        return users_fit_dict, [users_rank.get(user_idx, np.array([])) for user_idx in user_idx_list]
+
     def __str__(self):
         return "CentroidVector"
 
@@ -250,4 +655,5 @@ class CentroidVector(PerUserCBAlgorithm):
         return f'CentroidVector(item_field={self.item_field}, ' \
                f'similarity={self._similarity}, ' \
                f'threshold={self.threshold}, ' \
-               f'embedding_combiner={self._emb_combiner})'
+               f'embedding_combiner={self._emb_combiner}, ' \
+               f'rank_batch_size={self._rank_batch_size})'
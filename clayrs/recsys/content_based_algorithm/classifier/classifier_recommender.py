@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from typing import List, Union, Optional, TYPE_CHECKING
+from typing import List, Union, Optional, TYPE_CHECKING, Iterable
 
 import numpy as np
 
 if TYPE_CHECKING:
+    from scipy import sparse
     from clayrs.content_analyzer import Content
     from clayrs.content_analyzer.field_content_production_techniques.embedding_technique.combining_technique import \
         CombiningTechnique
@@ -18,6 +19,7 @@ from clayrs.content_analyzer.field_content_production_techniques.embedding_techn
 from clayrs.recsys.content_based_algorithm.content_based_algorithm import PerUserCBAlgorithm
 from clayrs.recsys.content_based_algorithm.exceptions import NoRatedItems, OnlyPositiveItems, \
     OnlyNegativeItems, NotPredictionAlg, EmptyUserRatings
+from clayrs.utils.top_k import top_k_uir
 
 
 class ClassifierRecommender(PerUserCBAlgorithm):
@@ -80,7 +82,11 @@ class ClassifierRecommender(PerUserCBAlgorithm):
         self._classifier = classifier
         self._embedding_combiner = embedding_combiner
         self._labels: Optional[list] = None
-        self._items_features: Optional[list] = None
+        self._items_features: Optional[Union[np.ndarray, sparse.csr_matrix]] = None
+
+    def _init_items_features(self, item_ids: Iterable[str], available_loaded_items: LoadedContentsDict):
+        # features of all the items of the session are extracted and fused once, users only index their rows
+        self._build_items_features(item_ids, available_loaded_items, self._embedding_combiner)
 
     def process_rated(self, user_idx: int, train_ratings: Ratings, available_loaded_items: LoadedContentsDict):
         """
@@ -119,9 +125,7 @@ class ClassifierRecommender(PerUserCBAlgorithm):
         items_scores_dict = dict(sorted(items_scores_dict.items()))  # sort dictionary based on key for reproducibility
 
         # Create list of all the available items that are useful for the user
-        loaded_rated_items: List[Union[Content, None]] = available_loaded_items.get_list([item_id
-                                                                                          for item_id
-                                                                                          in rated_items_id])
+        loaded_rated_items: List[Union[Content, None]] = available_loaded_items.get_list(list(items_scores_dict))
 
         threshold = self.threshold
         if threshold is None:
@@ -129,7 +133,7 @@ class ClassifierRecommender(PerUserCBAlgorithm):
 
         # Assign label and extract features from the rated items
         labels = []
-        items_features = []
+        items_id = []
 
         # we extract feature of each item sorted based on its key: IMPORTANT for reproducibility!!
         # otherwise the matrix we feed to sklearn will have input item in different rows each run!
@@ -139,7 +143,7 @@ class ClassifierRecommender(PerUserCBAlgorithm):
                 score_assigned = map(float, items_scores_dict[item.content_id])
 
                 for score in score_assigned:
-                    items_features.append(self.extract_features_item(item))
+                    items_id.append(item.content_id)
 
                     if score >= threshold:
                         labels.append(1)
@@ -149,7 +153,7 @@ class ClassifierRecommender(PerUserCBAlgorithm):
         if len(uir_user[:, 1]) == 0:
             raise EmptyUserRatings("The user selected doesn't have any ratings!")
 
-        if len(items_features) == 0:
+        if len(items_id) == 0:
             raise NoRatedItems("User {} - No rated item available locally!".format(user_idx))
         if 0 not in labels:
             raise OnlyPositiveItems("User {} - There are only positive items available locally!".format(user_idx))
@@ -157,7 +161,8 @@ class ClassifierRecommender(PerUserCBAlgorithm):
             raise OnlyNegativeItems("User {} - There are only negative items available locally!".format(user_idx))
 
         self._labels = labels
-        self._items_features = items_features
+        _, self._items_features = self._fused_items_features(items_id, available_loaded_items,
+                                                             self._embedding_combiner)
 
     def fit_single_user(self):
         """
@@ -167,10 +172,7 @@ class ClassifierRecommender(PerUserCBAlgorithm):
         It uses private attributes to fit the classifier, so `process_rated()` must be called
         before this method.
         """
-        # Fuse the input if there are dicts, multiple representation, etc.
-        fused_features = self.fuse_representations(self._items_features, self._embedding_combiner)
-
-        self._classifier.fit(fused_features, self._labels)
+        self._classifier.fit(self._items_features, self._labels)
 
         # we delete variables used to fit since will no longer be used
         self._items_features = None
@@ -218,35 +220,20 @@ class ClassifierRecommender(PerUserCBAlgorithm):
         if len(uir_user) == 0:
             raise EmptyUserRatings("The user selected doesn't have any ratings!")
 
-        # Load items to predict
-        items_to_predict = available_loaded_items.get_list(filter_list)
-
-        # Extract features of the items to predict
-        idx_items_to_predict = []
-        features_items_to_predict = []
-        for item in items_to_predict:
-            if item is not None:
-                idx_items_to_predict.append(item.content_id)
-                features_items_to_predict.append(self.extract_features_item(item))
+        # Fused features of the items to predict available locally
+        idx_items_to_predict, fused_features_items_to_pred = self._fused_items_features(filter_list,
+                                                                                         available_loaded_items,
+                                                                                         self._embedding_combiner)
 
         if len(idx_items_to_predict) == 0:
             return np.array([])  # if no item to predict, empty rank is returned
 
         idx_items_to_predict = train_ratings.item_map.convert_seq_str2int(idx_items_to_predict)
 
-        # Fuse the input if there are dicts, multiple representation, etc.
-        fused_features_items_to_pred = self.fuse_representations(features_items_to_predict,
-                                                                 self._embedding_combiner)
-
         class_prob = self._classifier.predict_proba(fused_features_items_to_pred)
 
         # for each item we extract the probability that the item is liked (class 1)
-        sorted_scores_idxs = np.argsort(class_prob[:, 1])[::-1][:recs_number]
-        sorted_items = np.array(idx_items_to_predict)[sorted_scores_idxs]
-        sorted_scores = class_prob[:, 1][sorted_scores_idxs]
-
-        uir_rank = np.array([[user_idx, item_idx, score]
-                             for item_idx, score in zip(sorted_items, sorted_scores)])
+        uir_rank = top_k_uir(user_idx, idx_items_to_predict, class_prob[:, 1], recs_number)
 
         return uir_rank
 
@@ -3,7 +3,7 @@ import abc
 import gc
 from copy import deepcopy
 from itertools import chain
-from typing import List, TYPE_CHECKING, Optional, Any, Set, Tuple, Dict, Callable
+from typing import List, TYPE_CHECKING, Optional, Any, Set, Tuple, Dict, Callable, Iterable, Union
 
 from scipy import sparse
 from sklearn.exceptions import NotFittedError
@@ -24,7 +24,7 @@ if TYPE_CHECKING:
     from clayrs.content_analyzer.content_representation.content import Content
 
 from clayrs.recsys.algorithm import Algorithm
-from clayrs.recsys.content_based_algorithm.contents_loader import LoadedContentsDict
+from clayrs.recsys.content_based_algorithm.contents_loader import LoadedContentsDict, LoadedContentsInterface
 
 
 class ContentBasedAlgorithm(Algorithm):
@@ -179,7 +179,7 @@ class ContentBasedAlgorithm(Algorithm):
         # of the first item
         first_arr = next(single_item_fused_gen())
         if any(isinstance(x, sparse.csc_matrix) for x in first_arr):
-            X_vectorized = (sparse.hstack(single_arr) for single_arr in single_item_fused_gen())
+            X_vectorized = [sparse.hstack(single_arr) for single_arr in single_item_fused_gen()]
 
             X_vectorized = sparse.vstack(X_vectorized, format='csr')
 
@@ -395,8 +395,131 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
 
     This class has several concrete methods so that you can easily extend and add several per-user cb algorithm without
     implementing many abstract methods!
+
+    During each fit/rank/predict session, algorithms can keep a cache of the fused features of the items involved
+    (see the `_init_items_features()` method), so that features of each item are extracted and fused only once
+    instead of once for each user
     """
-    __slots__ = ()
+    __slots__ = ('_cached_items_matrix', '_cached_items_row')
+
+    def __init__(self, item_field: dict, threshold: float):
+        super().__init__(item_field, threshold)
+
+        self._cached_items_matrix: Optional[Union[np.ndarray, sparse.csr_matrix]] = None
+        self._cached_items_row: Optional[Dict[str, Optional[int]]] = None
+
+    def _init_items_features(self, item_ids: Iterable[str], available_loaded_items: LoadedContentsInterface):
+        """
+        Hook called at the start of each fit/rank/predict session with the ids of the items which the session will
+        (most likely) involve. By default nothing is done: algorithms which get features of the items with the
+        `_fused_items_features()` method override it by calling `_build_items_features()`, so that features of all
+        these items are extracted and fused at once
+
+        Args:
+            item_ids: ids of the items involved by the session
+            available_loaded_items: The LoadedContents interface which contains loaded contents
+        """
+        pass
+
+    def _build_items_features(self, item_ids: Iterable[str], available_loaded_items: LoadedContentsDict,
+                              embedding_combiner: CombiningTechnique):
+        """
+        Method which extracts and fuses at once the features of the items in `item_ids` which are not in the item
+        features cache yet, adding them to the cache. The cache is made by the matrix of the fused features of the
+        items and by the dictionary which maps each item id to its row in the matrix (or to None if the item is not
+        available locally)
+
+        Args:
+            item_ids: ids of the items to add to the cache
+            available_loaded_items: The LoadedContents interface which contains loaded contents
+            embedding_combiner: combining technique in case there are multiple vectors with different row size
+        """
+        if self._cached_items_row is None:
+            self._cached_items_row = {}
+
+        # items are sorted for reproducibility, so that each item is always in the same row of the matrix
+        new_items_id = sorted({item_id for item_id in item_ids if item_id not in self._cached_items_row})
+        if len(new_items_id) == 0:
+            return
+
+        first_row = 0 if self._cached_items_matrix is None else self._cached_items_matrix.shape[0]
+
+        features_items = []
+        for item_id, item in zip(new_items_id, available_loaded_items.get_list(new_items_id)):
+            if item is not None:
+                self._cached_items_row[item_id] = first_row + len(features_items)
+                features_items.append(self.extract_features_item(item))
+            else:
+                self._cached_items_row[item_id] = None
+
+        if len(features_items) != 0:
+            fused_features = self.fuse_representations(features_items, embedding_combiner)
+
+            if self._cached_items_matrix is None:
+                self._cached_items_matrix = fused_features
+            elif sparse.issparse(fused_features):
+                self._cached_items_matrix = sparse.vstack([self._cached_items_matrix, fused_features], format='csr')
+            else:
+                self._cached_items_matrix = np.vstack([self._cached_items_matrix, fused_features])
+
+    def _clear_items_features(self):
+        """
+        Method which frees the item features cache, called at the end of each fit/rank/predict session
+        """
+        self._cached_items_matrix = None
+        self._cached_items_row = None
+
+    def _clear_fit_fns_items_features(self, user_fit_fns: Tuple[Callable, Callable]):
+        """
+        Method which frees the item features cache of the algorithms to which the fit functions of a user are bound,
+        if they are not this algorithm. This happens when users are fit by other processes: each fit function is sent
+        back bound to the copy of the algorithm of its process, together with the item features cache of that copy
+
+        Args:
+            user_fit_fns: (`rank_fn`, `predict_fn`) tuple of a user
+        """
+        for fit_fn in user_fit_fns:
+            fit_alg = getattr(fit_fn, '__self__', None)
+            if isinstance(fit_alg, PerUserCBAlgorithm) and fit_alg is not self:
+                fit_alg._clear_items_features()
+
+    def _fused_items_features(self, item_ids: List[str], available_loaded_items: LoadedContentsDict,
+                              embedding_combiner: CombiningTechnique) -> Tuple[List[str], Optional[Union[np.ndarray,
+                                                                                                       sparse.csr_matrix]]]:
+        """
+        Method which returns the fused features of the items in `item_ids` available locally.
+
+        If the item features cache has been built for the current session, features are rows of the cached matrix
+        (items not in the cache are added to it). Otherwise, features are extracted and fused on the fly
+
+        Args:
+            item_ids: ids of the items of which features must be returned, could contain duplicates
+            available_loaded_items: The LoadedContents interface which contains loaded contents
+            embedding_combiner: combining technique in case there are multiple vectors with different row size
+
+        Returns:
+            Tuple containing the ids of the items available locally (in the same order of `item_ids`) and the matrix of
+                their fused features, one row for each item (None if there isn't any item available locally)
+        """
+        if self._cached_items_row is None:
+            loaded_items = [item for item in available_loaded_items.get_list(item_ids) if item is not None]
+            if len(loaded_items) == 0:
+                return [], None
+
+            features_items = [self.extract_features_item(item) for item in loaded_items]
+
+            return [item.content_id for item in loaded_items], self.fuse_representations(features_items,
+                                                                                         embedding_combiner)
+
+        self._build_items_features(item_ids, available_loaded_items, embedding_combiner)
+
+        available_items_id = [item_id for item_id in item_ids if self._cached_items_row[item_id] is not None]
+        if len(available_items_id) == 0:
+            return [], None
+
+        rows = [self._cached_items_row[item_id] for item_id in available_items_id]
+
+        return available_items_id, self._cached_items_matrix[rows]
 
     @abc.abstractmethod
     def process_rated(self, user_idx: int, train_ratings: Ratings, available_loaded_items: LoadedContentsDict):
@@ -479,6 +602,14 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
         """
         raise NotImplementedError
 
+    def _fit_fns(self) -> Tuple[Callable, Callable]:
+        """
+        Returns the (`rank_fn`, `predict_fn`) tuple for the user for which the algorithm has just been fit, which is
+        stored in the dictionary returned by `fit()`. By default they are the `rank_single_user()` and
+        `predict_single_user()` methods of the algorithm itself
+        """
+        return self.rank_single_user, self.predict_single_user
+
     def fit(self, train_set: Ratings, items_directory: str, num_cpus: int = 1) -> Dict[int, Tuple[Callable, Callable]]:
         """
         Method which will fit the algorithm chosen for each user in the `train_set` parameter
@@ -504,7 +635,7 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
             try:
                 self.process_rated(user_idx, train_set, loaded_items_interface)
                 self.fit_single_user()
-                user_fit_fns = (self.rank_single_user, self.predict_single_user)
+                user_fit_fns = self._fit_fns()
             except UserSkipAlgFit as e:
                 # warning_message = str(e) + f"\nNo algorithm will be fit for the user {user_id}"
                 # logger.warning(warning_message)
@@ -516,24 +647,29 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
         count_skipped_user = 0
         items_to_load = train_set.unique_item_id_column
         all_users = train_set.unique_user_idx_column
-        loaded_items_interface = self._load_available_contents(items_directory, items_to_load)
+        # resources held by the loaded contents (e.g. the readers of an index) are released even if the fit fails
+        with self._load_available_contents(items_directory, items_to_load) as loaded_items_interface:
+            self._init_items_features(items_to_load, loaded_items_interface)
 
-        users_fit_dict = {}
-        with get_iterator_parallel(num_cpus,
-                                   compute_single_fit, all_users,
-                                   progress_bar=True, total=len(all_users)) as pbar:
+            users_fit_dict = {}
+            with get_iterator_parallel(num_cpus,
+                                       compute_single_fit, all_users,
+                                       progress_bar=True, total=len(all_users)) as pbar:
 
-            pbar.set_description("Fitting algorithm")
+                pbar.set_description("Fitting algorithm")
 
-            for user_idx, fitted_user_alg in pbar:
-                if fitted_user_alg is not None:
-                    users_fit_dict[user_idx] = fitted_user_alg
+                for user_idx, fitted_user_alg in pbar:
+                    if fitted_user_alg is not None:
+                        # the cache is freed as soon as possible, so that at most one copy of it is kept at a time
+                        self._clear_fit_fns_items_features(fitted_user_alg)
+                        users_fit_dict[user_idx] = fitted_user_alg
 
         if count_skipped_user > 0:
             logger.warning(f"{count_skipped_user} users will be skipped because the algorithm chosen "
                            f"could not be fit for them")
 
-        # we force the garbage collector after freeing loaded items
+        # we force the garbage collector after freeing loaded items and their features
+        self._clear_items_features()
         del loaded_items_interface
         gc.collect()
 
@@ -605,6 +741,9 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
         count_skipped_user = 0
 
         loaded_items_interface = self._load_available_contents(items_directory, set())
+        # candidate items are among the items of the train and test set (except for user defined candidates)
+        self._init_items_features(np.union1d(train_set.unique_item_id_column, test_set.unique_item_id_column),
+                                  loaded_items_interface)
 
         uir_rank_list = []
 
@@ -621,7 +760,8 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
             logger.warning(f"{count_skipped_user} users will be skipped because the algorithm chosen "
                            f"was not fit for them")
 
-        # we force the garbage collector after freeing loaded items
+        # we force the garbage collector after freeing loaded items and their features
+        self._clear_items_features()
         del loaded_items_interface
         gc.collect()
 
@@ -685,6 +825,9 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
         count_skipped_user = 0
 
         loaded_items_interface = self._load_available_contents(items_directory, set())
+        # candidate items are among the items of the train and test set (except for user defined candidates)
+        self._init_items_features(np.union1d(train_set.unique_item_id_column, test_set.unique_item_id_column),
+                                  loaded_items_interface)
 
         uir_pred_list = []
 
@@ -701,7 +844,8 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
             logger.warning(f"{count_skipped_user} users will be skipped because the algorithm chosen "
                            f"was not fit for them")
 
-        # we force the garbage collector after freeing loaded items
+        # we force the garbage collector after freeing loaded items and their features
+        self._clear_items_features()
         del loaded_items_interface
         gc.collect()
 
@@ -755,7 +899,7 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
                 self.fit_single_user()
 
                 if save_fit:
-                    users_fit_dict[user_idx] = (self.rank_single_user, self.predict_single_user)
+                    users_fit_dict[user_idx] = self._fit_fns()
 
             except UserSkipAlgFit as e:
                 # warning_message = str(e) + f"\nThe algorithm can't be fitted for the user {user_id}"
@@ -776,6 +920,9 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
         users_fit_dict = {} if save_fit else None
 
         loaded_items_interface = self._load_available_contents(items_directory, set())
+        # candidate items are among the items of the train and test set (except for user defined candidates)
+        self._init_items_features(np.union1d(train_set.unique_item_id_column, test_set.unique_item_id_column),
+                                  loaded_items_interface)
 
         uir_rank_list = []
 
@@ -792,7 +939,8 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
             logger.warning(f"{count_skipped_user} users will be skipped because the algorithm chosen "
                            f"could not be fit for them")
 
-        # we force the garbage collector after freeing loaded items
+        # we force the garbage collector after freeing loaded items and their features
+        self._clear_items_features()
         del loaded_items_interface
         gc.collect()
 
@@ -853,7 +1001,7 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
                 self.fit_single_user()
 
                 if save_fit:
-                    users_fit_dict[user_idx] = (self.rank_single_user, self.predict_single_user)
+                    users_fit_dict[user_idx] = self._fit_fns()
 
             except UserSkipAlgFit as e:
                 # warning_message = str(e) + f"\nThe algorithm can't be fitted for the user {user_id}"
@@ -870,6 +1018,9 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
             return user_idx, user_pred
 
         loaded_items_interface = self._load_available_contents(items_directory, set())
+        # candidate items are among the items of the train and test set (except for user defined candidates)
+        self._init_items_features(np.union1d(train_set.unique_item_id_column, test_set.unique_item_id_column),
+                                  loaded_items_interface)
 
         uir_pred_list = []
 
@@ -886,7 +1037,8 @@ class PerUserCBAlgorithm(ContentBasedAlgorithm):
             logger.warning(f"{count_skipped_user} users will be skipped because the algorithm chosen "
                            f"could not be fit for them")
 
-        # we force the garbage collector after freeing loaded items
+        # we force the garbage collector after freeing loaded items and their features
+        self._clear_items_features()
         del loaded_items_interface
         gc.collect()
 
@@ -3,6 +3,7 @@ from os import listdir
 from abc import abstractmethod, ABC
 from typing import Set, Iterable
 
+from clayrs.content_analyzer.memory_interfaces.sparse_index import SparseIndexInterface, SparseSearchIndex
 from clayrs.content_analyzer.memory_interfaces.text_interface import SearchIndex
 from clayrs.utils import load_content_instance
 from clayrs.utils.const import logger
@@ -13,6 +14,16 @@ class LoadedContentsInterface(ABC):
     def get_contents_interface(self):
         raise NotImplementedError
 
+    def close(self):
+        # by default there are no resources to release other than memory
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
 
 class LoadedContentsDict(LoadedContentsInterface):
 
@@ -82,7 +93,15 @@ class LoadedContentsDict(LoadedContentsInterface):
 
 class LoadedContentsIndex(LoadedContentsInterface):
     def __init__(self, index_path: str):
-        self._contents_index = SearchIndex(index_path)
+        # the index is opened the first time it is queried, then its readers are shared by all the users.
+        # Indexes serialized by a sparse interface are read with it, any other index is read with whoosh
+        if SparseIndexInterface.exists(index_path):
+            self._contents_index = SparseSearchIndex(index_path)
+        else:
+            self._contents_index = SearchIndex(index_path)
 
     def get_contents_interface(self):
         return self._contents_index
+
+    def close(self):
+        self._contents_index.close()
@@ -1,15 +1,21 @@
 from __future__ import annotations
+import gc
 from collections import defaultdict
-from typing import List, Optional, Set, TYPE_CHECKING
+from copy import copy
+from typing import List, Optional, Set, TYPE_CHECKING, Dict, Tuple, Iterable, Callable
 import re
 import numpy as np
 
 if TYPE_CHECKING:
     from clayrs.content_analyzer.ratings_manager.ratings import Ratings
+    from clayrs.recsys.methodology import Methodology
 
 from clayrs.recsys.content_based_algorithm.content_based_algorithm import PerUserCBAlgorithm
 from clayrs.recsys.content_based_algorithm.contents_loader import LoadedContentsIndex
-from clayrs.recsys.content_based_algorithm.exceptions import NotPredictionAlg, OnlyNegativeItems, EmptyUserRatings
+from clayrs.recsys.content_based_algorithm.exceptions import NotPredictionAlg, OnlyNegativeItems, EmptyUserRatings, \
+    UserSkipAlgFit
+from clayrs.utils.const import logger
+from clayrs.utils.context_managers import get_iterator_parallel
 
 
 class IndexQuery(PerUserCBAlgorithm):
@@ -60,15 +66,31 @@ class IndexQuery(PerUserCBAlgorithm):
             False if you want BM25F
         threshold: Threshold for the ratings. If the rating is greater than the threshold, it will be considered
             as positive. If the threshold is not specified, the average score of all items rated by the user is used.
+        top_n_terms: If specified, only the `top_n_terms` terms with the highest weight are kept in the query of each
+            user, so that the time needed to build and execute the query is bounded even for users with many positive
+            items. If None, all terms of the positive items are used
+        rank_batch_size: When the ranking is computed for many users (with the `rank()` or `fit_rank()` methods),
+            the queries of the users are executed in batches of `rank_batch_size` users with the `batch_query()`
+            method of the index, so that the postings of the terms shared by many users are read only once for each
+            batch
     """
-    __slots__ = ('_string_query', '_scores', '_positive_user_docs', '_classic_similarity')
+    __slots__ = ('_weighted_terms', '_scores', '_positive_user_docs', '_classic_similarity', '_top_n_terms',
+                 '_rank_batch_size')
+
+    def __init__(self, item_field: dict, classic_similarity: bool = True, threshold: float = None,
+                 top_n_terms: Optional[int] = None, rank_batch_size: int = 512):
+        if top_n_terms is not None and top_n_terms <= 0:
+            raise ValueError("top_n_terms must be a positive number or None!")
+        if rank_batch_size <= 0:
+            raise ValueError("rank_batch_size must be a positive number!")
 
-    def __init__(self, item_field: dict, classic_similarity: bool = True, threshold: float = None):
         super().__init__(item_field, threshold)
-        self._string_query: Optional[str] = None
+        self._weighted_terms: Optional[Dict[Tuple[str, str], float]] = None
         self._scores: Optional[list] = None
-        self._positive_user_docs: Optional[dict] = None
+        self._positive_user_docs: Optional[list] = None
         self._classic_similarity: bool = classic_similarity
+        self._top_n_terms: Optional[int] = top_n_terms
+        self._rank_batch_size: int = rank_batch_size
 
     def _get_representations(self, index_representations: dict):
         """
@@ -113,7 +135,8 @@ class IndexQuery(PerUserCBAlgorithm):
     def process_rated(self, user_idx: int, train_ratings: Ratings, available_loaded_items: LoadedContentsIndex):
         """
         Function that extracts features from positive rated items ONLY of a user
-        The extracted features will be used to fit the algorithm (build the query).
+        The extracted features (the terms of the representations chosen, analyzed in the same way as the index does)
+        will be used to fit the algorithm (build the query).
 
         Features extracted will be stored in private attributes of the class.
 
@@ -167,8 +190,10 @@ class IndexQuery(PerUserCBAlgorithm):
                     item_query = ix.query(item_id, results_number=1, classic_similarity=self._classic_similarity)
                     if len(item_query) != 0:
                         item = item_query.pop(item_id).get('item')
+                        item_terms = {field_name: ix.analyze(field_name, field_data)
+                                      for field_name, field_data in self._get_representations(item).items()}
                         scores.append(score)
-                        positive_user_docs.append((item_idx, self._get_representations(item)))
+                        positive_user_docs.append((item_idx, item_terms))
 
         if len(uir_user[:, 1]) == 0:
             raise EmptyUserRatings("The user selected doesn't have any ratings!")
@@ -186,48 +211,48 @@ class IndexQuery(PerUserCBAlgorithm):
         (items that the user liked). The terms relative to these 'positive' items are boosted by the
         rating he/she/it gave.
 
+        The query is a weighted term vector in the form `{(field_name, term): weight}`, where the weight of each term
+        is the sum of the ratings given to the positive items containing it. If `top_n_terms` was specified, only the
+        terms with the highest weight are kept
+
         This method uses extracted features of the positive items stored in a private attribute, so
         `process_rated()` must be called before this method.
 
         The built query will also be stored in a private attribute.
         """
-        # For each field of each document one string (containing the name of the field and the data in it)
-        # is created and added to the query.
-        # Also each part of the query that refers to a document
-        # is boosted by the score given by the user to said document
-        string_query = "("
-        for (doc_id, doc_data), score in zip(self._positive_user_docs, self._scores):
-            string_query += "("
-            for field_name in doc_data:
-                if field_name == 'content_id':
-                    continue
-                word_list = doc_data[field_name].split()
-                string_query += field_name + ":("
-                for term in word_list:
-                    string_query += term + " "
-                string_query += ") "
-            string_query += ")^" + str(score) + " "
-        string_query += ") "
-
-        self._string_query = string_query
-
-    def _build_mask_list(self, user_seen_items: Set[str], filter_list: List[str]):
+        weighted_terms = defaultdict(float)
+        for (doc_id, doc_terms), score in zip(self._positive_user_docs, self._scores):
+            for field_name, terms in doc_terms.items():
+                # each term contributes once for each document, regardless of how many times it appears in it
+                for term in set(terms):
+                    weighted_terms[(field_name, term)] += score
+
+        # terms sorted by decreasing weight, ties are broken with the term itself for reproducibility
+        sorted_terms = sorted(weighted_terms.items(), key=lambda term_weight: (-term_weight[1], term_weight[0]))
+        if self._top_n_terms is not None:
+            sorted_terms = sorted_terms[:self._top_n_terms]
+
+        self._weighted_terms = dict(sorted_terms)
+
+    def _build_mask_list(self, user_seen_items: Iterable[str], filter_list: Optional[Iterable[str]]) -> Set[str]:
         """
-        Private function that calculate the mask query and the filter query for whoosh to use:
+        Private function that calculate the mask set for the index to use:
 
-        - The mask query is needed to ignore items already rated by the user
-        - The filter query is needed to predict only items present in the filter_list
+        - The mask set is needed to ignore items already rated by the user
+        - The filter list is needed to predict only items present in the filter_list
 
-        If in the filter list there are items already rated by the user, those are excluded in the
-        mask query so that the prediction for those items can be calculated
+        If in the filter list there are items already rated by the user, those are excluded from the
+        mask set so that the prediction for those items can be calculated
 
         Args:
-            user_seen_items: set of items present in the user profile
+            user_seen_items: items present in the user profile
             filter_list: list of the items to predict, if None all unrated items will be predicted
         """
-        masked_list = [item for item in user_seen_items if item not in filter_list]
+        masked_set = set(user_seen_items)
+        if filter_list is not None:
+            masked_set.difference_update(filter_list)
 
-        return masked_list
+        return masked_set
 
     def predict_single_user(self, user_idx: int, train_ratings: Ratings, available_loaded_items: LoadedContentsIndex,
                             filter_list: List[str]) -> np.ndarray:
@@ -273,10 +298,23 @@ class IndexQuery(PerUserCBAlgorithm):
         mask_list = self._build_mask_list(user_seen_items, filter_list)
 
         ix = available_loaded_items.get_contents_interface()
-        score_docs = ix.query(self._string_query, recs_number, mask_list, filter_list, self._classic_similarity)
 
+        # items to mask and to consider are mapped to docnums so that the index filters them without building a query
+        mask_docnums = ix.docnum_set(mask_list)
+        candidate_docnums = ix.docnum_set(filter_list) if filter_list is not None else None
+
+        score_docs = ix.query(self._weighted_terms, recs_number, mask_docnums, candidate_docnums,
+                              self._classic_similarity)
+
+        return self._build_uir_rank(user_idx, train_ratings, score_docs)
+
+    @staticmethod
+    def _build_uir_rank(user_idx: int, ratings: Ratings, score_docs: dict) -> np.ndarray:
+        """
+        Private method which converts the results of the query of the user in its uir rank matrix
+        """
         # we must convert keys (which are strings) to the respective int idx to build the uir
-        score_list_idxs = train_ratings.item_map.convert_seq_str2int(list(score_docs.keys()))
+        score_list_idxs = ratings.item_map.convert_seq_str2int(list(score_docs.keys()))
 
         # we construct the output data
         uir_rank = np.array([[user_idx, item_idx, score_docs[item_id]['score']]
@@ -284,9 +322,202 @@ class IndexQuery(PerUserCBAlgorithm):
 
         return uir_rank
 
+    def _fit_fns(self) -> Tuple[Callable, Callable, Dict[Tuple[str, str], float]]:
+        # the functions of each user are bound to a copy of the algorithm which keeps only the query of the user.
+        # The query is also stored in the fit entry itself, so that queries of all the users are available when the
+        # rank is computed in batches
+        user_alg = copy(self)
+        user_alg._positive_user_docs = None
+        user_alg._scores = None
+
+        return user_alg.rank_single_user, user_alg.predict_single_user, user_alg._weighted_terms
+
+    def _rank_users(self, users_weighted_terms: Dict[int, Dict[Tuple[str, str], float]], train_set: Ratings,
+                    test_set: Ratings, loaded_items_interface: LoadedContentsIndex, n_recs: Optional[int],
+                    methodology: Methodology, num_cpus: int) -> Dict[int, np.ndarray]:
+        """
+        Private method which computes the rank of all the users passed as argument, by executing their queries
+        in batches of `rank_batch_size` users. Each batch is computed by a different process if `num_cpus` is
+        greater than 1
+
+        Items to mask and to consider for each user are computed in the same way of the `rank_single_user()` method
+
+        Returns:
+            Dictionary containing the uir rank matrix of each user
+        """
+        def compute_batch_rank(batch_users: List[int]):
+            queries, mask_lists, filter_lists = [], [], []
+            for user_idx in batch_users:
+                filter_list = methodology.filter_single(user_idx, train_set, test_set).astype(int)
+                # need to convert back int to str to load serialized items
+                filter_list = train_set.item_map.convert_seq_int2str(filter_list)
+
+                uir_user = test_set.get_user_interactions(user_idx)
+                if len(uir_user) == 0:
+                    raise EmptyUserRatings("The user selected doesn't have any ratings!")
+
+                user_seen_items = test_set.item_map.convert_seq_int2str(uir_user[:, 1].astype(int))
+
+                queries.append(users_weighted_terms[user_idx])
+                mask_lists.append(self._build_mask_list(user_seen_items, filter_list))
+                filter_lists.append(filter_list)
+
+            ix = loaded_items_interface.get_contents_interface()
+            batch_score_docs = ix.batch_query(queries, n_recs, mask_lists, filter_lists, self._classic_similarity)
+
+            return [(user_idx, self._build_uir_rank(user_idx, test_set, score_docs))
+                    for user_idx, score_docs in zip(batch_users, batch_score_docs)]
+
+        users = list(users_weighted_terms.keys())
+        batches = [users[i:i + self._rank_batch_size] for i in range(0, len(users), self._rank_batch_size)]
+
+        users_rank = {}
+        with get_iterator_parallel(num_cpus,
+                                   compute_batch_rank, batches,
+                                   progress_bar=True, total=len(batches)) as pbar:
+
+            pbar.set_description(f"Computing rank for batches of {self._rank_batch_size} users")
+            for batch_rank in pbar:
+                users_rank.update(batch_rank)
+
+        return users_rank
+
+    def rank(self, users_fit_dict: dict, train_set: Ratings, test_set: Ratings, items_directory: str,
+             user_idx_list: Set[int], n_recs: Optional[int], methodology: Methodology,
+             num_cpus: int) -> List[np.ndarray]:
+        """
+        Method used to calculate ranking for all users in `user_idx_list` parameter.
+        You must first call the `fit()` method ***before*** you can compute the ranking.
+
+        Unlike other per-user algorithms, queries of the users are executed in batches (see the `batch_query()`
+        method of the index) instead of one at a time. Results are the same of the ones computed by calling
+        `rank_single_user()` for each user
+
+        If the algorithm was not fit for some users, they will be skipped and a warning message is printed showing the
+        number of users for which the alg couldn't produce a ranking
+
+        Args:
+            users_fit_dict: dictionary with users idxs (int representation) are keys and tuples containing (`rank_fn`,
+                `predict_fn`, `weighted_terms`) are values, where `weighted_terms` is the query of the user. In this
+                dictionary only users for which the *fit* process could be performed appear!
+            train_set: `Ratings` object which contains the train set of each user
+            test_set: Ratings object which represents the ground truth of the split considered
+            items_directory: Path where complexly represented items are serialized by the Content Analyzer
+            user_idx_list: Set of user idx (int representation) for which a recommendation list must be generated.
+                Users should be represented with their mapped integer!
+            n_recs: Number of the top items that will be present in the ranking of each user.
+                If `None` all candidate items will be returned for the user
+            methodology: `Methodology` object which governs the candidate item selection
+            num_cpus: number of processors that must be reserved for the method. If set to `0`, all cpus available will
+                be used. Each process computes the ranking of a batch of users
+
+        Returns:
+            List of uir matrices for each user, where each uir contains predicted interactions between users and unseen
+                items sorted in a descending way w.r.t. the third dimension which is the ranked score
+        """
+        # the query of each user is the third element of its fit entry
+        users_weighted_terms = {user_idx: users_fit_dict[user_idx][2]
+                                for user_idx in user_idx_list if user_idx in users_fit_dict}
+
+        count_skipped_user = len(user_idx_list) - len(users_weighted_terms)
+
+        # the readers of the index are closed even if the ranking fails
+        with self._load_available_contents(items_directory, set()) as loaded_items_interface:
+            users_rank = self._rank_users(users_weighted_terms, train_set, test_set, loaded_items_interface, n_recs,
+                                          methodology, num_cpus)
+
+        if count_skipped_user > 0:
+            logger.warning(f"{count_skipped_user} users will be skipped because the algorithm chosen "
+                           f"was not fit for them")
+
+        # we force the garbage collector after freeing loaded items
+        del loaded_items_interface
+        gc.collect()
+
+        return [users_rank.get(user_idx, np.array([])) for user_idx in user_idx_list]
+
+    def fit_rank(self, train_set: Ratings, test_set: Ratings, items_directory: str, user_idx_list: Set[int],
+                 n_recs: Optional[int], methodology: Methodology, num_cpus: int,
+                 save_fit: bool) -> Tuple[Optional[dict], List[np.ndarray]]:
+        """
+        Method used to both fit and calculate ranking for all users in `user_idx_list` parameter.
+        The query of each user in `user_idx_list` is built first, then the ranking of all users is computed by
+        executing their queries in batches (see the `rank()` method)
+
+        With the `save_fit` parameter you can specify if you need the function to return the algorithm fit (in case
+        you want to perform multiple calls to the `predict()` or `rank()` function). If set to True, the first value
+        returned by this function will be the fit algorithm and the second will be the list of uir matrices with
+        predictions for each user.
+        Otherwise, if `save_fit` is False, the first value returned by this function will be `None`
+
+        Args:
+            train_set: `Ratings` object which contains the train set of each user
+            test_set: Ratings object which represents the ground truth of the split considered
+            items_directory: Path where complexly represented items are serialized by the Content Analyzer
+            user_idx_list: Set of user idx (int representation) for which a recommendation list must be generated.
+                Users should be represented with their mapped integer!
+            n_recs: Number of the top items that will be present in the ranking of each user.
+                If `None` all candidate items will be returned for the user
+            methodology: `Methodology` object which governs the candidate item selection
+            num_cpus: number of processors that must be reserved for the method. If set to `0`, all cpus available will
+                be used. Be careful though: multiprocessing in python has a substantial memory overhead!
+            save_fit: Boolean value which let you choose if the fit algorithm should be saved and returned by this
+                function. If True, the first value returned by this function is the fit algorithm. Otherwise, the first
+                value will be None. The second value is always the list of predicted uir matrices
+
+        Returns:
+            A tuple where the first value is the fit algorithm (could be None if `save_fit == False`), the second
+            one is a list of predicted uir matrices all sorted in a decreasing order w.r.t. the ranking scores
+        """
+
+        def compute_single_fit(user_idx):
+            try:
+                self.process_rated(user_idx, train_set, loaded_items_interface)
+                self.fit_single_user()
+                weighted_terms = self._weighted_terms
+            except UserSkipAlgFit:
+                weighted_terms = None
+
+            return user_idx, weighted_terms
+
+        # the readers of the index are closed even if the fit or the ranking fail
+        with self._load_available_contents(items_directory, set()) as loaded_items_interface:
+
+            users_weighted_terms = {}
+            with get_iterator_parallel(num_cpus,
+                                       compute_single_fit, user_idx_list,
+                                       progress_bar=True, total=len(user_idx_list)) as pbar:
+
+                pbar.set_description("Fitting algorithm")
+                for user_idx, weighted_terms in pbar:
+                    if weighted_terms is not None:
+                        users_weighted_terms[user_idx] = weighted_terms
+
+            count_skipped_user = len(user_idx_list) - len(users_weighted_terms)
+            if count_skipped_user > 0:
+                logger.warning(f"{count_skipped_user} users will be skipped because the algorithm chosen "
+                               f"could not be fit for them")
+
+            users_fit_dict = None
+            if save_fit:
+                users_fit_dict = {}
+                for user_idx, weighted_terms in users_weighted_terms.items():
+                    self._weighted_terms = weighted_terms
+                    users_fit_dict[user_idx] = self._fit_fns()
+
+            users_rank = self._rank_users(users_weighted_terms, train_set, test_set, loaded_items_interface, n_recs,
+                                          methodology, num_cpus)
+
+        # we force the garbage collector after freeing loaded items
+        del loaded_items_interface
+        gc.collect()
+
+        return users_fit_dict, [users_rank.get(user_idx, np.array([])) for user_idx in user_idx_list]
+
     def __str__(self):
         return "IndexQuery"
 
     def __repr__(self):
         return f'IndexQuery(item_field={self.item_field}, classic_similarity={self._classic_similarity}, ' \
-               f'threshold={self.threshold})'
+               f'threshold={self.threshold}, top_n_terms={self._top_n_terms}, ' \
+               f'rank_batch_size={self._rank_batch_size})'
@@ -1,10 +1,11 @@
 from __future__ import annotations
 from collections import defaultdict
-from typing import List, Union, Optional, TYPE_CHECKING
+from typing import List, Union, Optional, TYPE_CHECKING, Iterable
 
 import numpy as np
 
 if TYPE_CHECKING:
+    from scipy import sparse
     from clayrs.content_analyzer import Content
     from clayrs.content_analyzer.field_content_production_techniques.embedding_technique.combining_technique import \
         CombiningTechnique
@@ -16,6 +17,7 @@ from clayrs.content_analyzer.field_content_production_techniques.embedding_techn
     Centroid
 from clayrs.recsys.content_based_algorithm.exceptions import NoRatedItems, EmptyUserRatings
 from clayrs.recsys.content_based_algorithm.content_based_algorithm import PerUserCBAlgorithm
+from clayrs.utils.top_k import top_k_uir
 
 
 class LinearPredictor(PerUserCBAlgorithm):
@@ -77,9 +79,13 @@ class LinearPredictor(PerUserCBAlgorithm):
         super().__init__(item_field, only_greater_eq)
         self._regressor = regressor
         self._labels: Optional[list] = None
-        self._items_features: Optional[list] = None
+        self._items_features: Optional[Union[np.ndarray, sparse.csr_matrix]] = None
         self._embedding_combiner = embedding_combiner
 
+    def _init_items_features(self, item_ids: Iterable[str], available_loaded_items: LoadedContentsDict):
+        # features of all the items of the session are extracted and fused once, users only index their rows
+        self._build_items_features(item_ids, available_loaded_items, self._embedding_combiner)
+
     def process_rated(self, user_idx: int, train_ratings: Ratings, available_loaded_items: LoadedContentsDict):
         """
         Function that extracts features from rated item and labels them.
@@ -111,13 +117,11 @@ class LinearPredictor(PerUserCBAlgorithm):
         items_scores_dict = dict(sorted(items_scores_dict.items()))  # sort dictionary based on key for reproducibility
 
         # Create list of all the available items that are useful for the user
-        loaded_rated_items: List[Union[Content, None]] = available_loaded_items.get_list([item_id
-                                                                                          for item_id
-                                                                                          in rated_items_id])
+        loaded_rated_items: List[Union[Content, None]] = available_loaded_items.get_list(list(items_scores_dict))
 
         # Assign label and extract features from the rated items
         labels = []
-        items_features = []
+        items_id = []
 
         for item in loaded_rated_items:
             if item is not None:
@@ -126,17 +130,18 @@ class LinearPredictor(PerUserCBAlgorithm):
 
                 for score in score_assigned:
                     if self.threshold is None or score >= self.threshold:
-                        items_features.append(self.extract_features_item(item))
+                        items_id.append(item.content_id)
                         labels.append(score)
 
         if len(uir_user[:, 1]) == 0:
             raise EmptyUserRatings("The user selected doesn't have any ratings!")
 
-        if len(items_features) == 0:
+        if len(items_id) == 0:
             raise NoRatedItems("User {} - No rated item available locally!".format(user_idx))
 
         self._labels = labels
-        self._items_features = items_features
+        _, self._items_features = self._fused_items_features(items_id, available_loaded_items,
+                                                             self._embedding_combiner)
 
     def fit_single_user(self):
         """
@@ -146,10 +151,7 @@ class LinearPredictor(PerUserCBAlgorithm):
         It uses private attributes to fit the regressor, so `process_rated()` must be called
         before this method.
         """
-        # Fuse the input if there are dicts, multiple representation, etc.
-        fused_features = self.fuse_representations(self._items_features, self._embedding_combiner)
-
-        self._regressor.fit(fused_features, self._labels)
+        self._regressor.fit(self._items_features, self._labels)
 
         # we delete variables used to fit since will no longer be used
         self._labels = None
@@ -165,25 +167,14 @@ class LinearPredictor(PerUserCBAlgorithm):
         if len(uir_user) == 0:
             raise EmptyUserRatings("The user selected doesn't have any ratings!")
 
-        # Load items to predict
-        items_to_predict = available_loaded_items.get_list(filter_list)
-
-        # Extract features of the items to predict
-        idx_items_to_predict = []
-        features_items_to_predict = []
-        for item in items_to_predict:
-            if item is not None:
-                # raises AttributeError if items are not present locally
-                idx_items_to_predict.append(item.content_id)
-                features_items_to_predict.append(self.extract_features_item(item))
+        # Fused features of the items to predict available locally
+        idx_items_to_predict, fused_features_items_to_pred = self._fused_items_features(filter_list,
+                                                                                         available_loaded_items,
+                                                                                         self._embedding_combiner)
 
         idx_items_to_predict = train_ratings.item_map.convert_seq_str2int(idx_items_to_predict)
 
         if len(idx_items_to_predict) > 0:
-            # Fuse the input if there are dicts, multiple representation, etc.
-            fused_features_items_to_pred = self.fuse_representations(features_items_to_predict,
-                                                                     self._embedding_combiner)
-
             score_labels = self._regressor.predict(fused_features_items_to_pred)
         else:
             score_labels = []
@@ -254,12 +245,8 @@ class LinearPredictor(PerUserCBAlgorithm):
                                                                              filter_list)
 
         if len(score_labels) != 0:
-            sorted_scores_idxs = np.argsort(score_labels)[::-1][:recs_number]
-            sorted_items = np.array(idx_items_to_predict)[sorted_scores_idxs]
-            sorted_scores = score_labels[sorted_scores_idxs]
-
             # we construct the output data
-            uir_rank = np.array([[user_idx, item_idx, score] for item_idx, score in zip(sorted_items, sorted_scores)])
+            uir_rank = top_k_uir(user_idx, idx_items_to_predict, score_labels, recs_number)
         else:
             uir_rank = np.array([])
 
@@ -12,6 +12,7 @@ if TYPE_CHECKING:
 from clayrs.recsys.graph_based_algorithm.page_rank.page_rank import PageRank
 from clayrs.recsys.graphs.graph import UserNode, ItemNode, PropertyNode
 from clayrs.utils.context_managers import get_iterator_parallel
+from clayrs.utils.top_k import top_k_uir
 
 
 class NXPageRank(PageRank):
@@ -201,13 +202,13 @@ class NXPageRank(PageRank):
             if len(user_scores) == 0:
                 return user_id, np.array([])  # if no item to predict, empty rank is returned
 
-            user_scores_arr = np.array(list(user_scores.items()))
+            item_nodes = np.empty(len(user_scores), dtype=object)
+            item_nodes[:] = list(user_scores.keys())
 
-            sorted_scores_idxs = np.argsort(user_scores_arr[:, 1])[::-1][:recs_number]
-            user_scores_arr = user_scores_arr[sorted_scores_idxs]
-
-            user_col = np.full((user_scores_arr.shape[0], 1), user_id)
-            uir_rank = np.append(user_col, user_scores_arr, axis=1)
+            # the order of the scores depends on the order of the nodes in the graph, so ties are broken with the
+            # string id of the items to make the rank reproducible
+            uir_rank = top_k_uir(user_id, item_nodes, np.fromiter(user_scores.values(), dtype=float), recs_number,
+                                 tie_breaker=np.array([item_node.value for item_node in item_nodes]), dtype=object)
 
             return user_id, uir_rank
 
@@ -24,6 +24,7 @@ import torch.utils.data as data
 from clayrs.recsys.visual_based_algorithm.vbpr.vbpr_network import VBPRNetwork, TriplesDataset
 from clayrs.utils.const import logger
 from clayrs.utils.context_managers import get_iterator_parallel, get_progbar
+from clayrs.utils.top_k import top_k_uir
 
 __all__ = ["VBPR"]
 
@@ -396,15 +397,9 @@ class VBPR(ContentBasedAlgorithm):
         def compute_single_rank(user_idx):
             filter_list = methodology.filter_single(user_idx, train_set, test_set)
             user_rank = fit_alg.return_scores(user_idx, filter_list)
-            user_uir = np.array((
-                np.full(len(user_rank), user_idx),
-                filter_list,
-                user_rank
-            )).T
-            # items are not sorted so we sort them (to have descending order, we invert the values of the user uir
-            # score column
-            sorted_user_uir = user_uir[(-user_uir[:, 2]).argsort()]
-            sorted_user_uir = sorted_user_uir[:n_recs]
+
+            # items are not sorted so we select the top n_recs ones in descending order of score
+            sorted_user_uir = top_k_uir(user_idx, filter_list, user_rank, n_recs)
 
             return user_idx, sorted_user_uir
 
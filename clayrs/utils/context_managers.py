@@ -6,6 +6,7 @@ from typing import Union, Iterator
 
 import distex
 import contextlib
+import numpy as np
 
 from tqdm import tqdm
 from tqdm.contrib.logging import logging_redirect_tqdm
@@ -37,6 +38,10 @@ def get_iterator_parallel(num_cpus, f_to_parallelize, *args_to_f,
     num_cpus = num_cpus or os.cpu_count() or 1
 
     if num_cpus > 1:
+        # distex doesn't serialize numpy scalars correctly (each one is sent as an empty tuple to the workers),
+        # so numpy arrays are converted to lists of python scalars first
+        args_to_f = [arg.tolist() if isinstance(arg, np.ndarray) else arg for arg in args_to_f]
+
         pool = distex.Pool(num_workers=num_cpus, func_pickle=distex.PickleType.cloudpickle)
         pool._loop.set_exception_handler(handle_exception)
         iterator_res = pool.map(f_to_parallelize, *args_to_f)
@@ -2,9 +2,37 @@ from __future__ import annotations
 import lzma
 import os
 import pickle
+import weakref
 
 from clayrs.content_analyzer.content_representation.representation_container import RepresentationContainer
-from clayrs.content_analyzer.content_representation.content import Content
+from clayrs.content_analyzer.content_representation.content import Content, FeaturesVocabulary
+
+# vocabularies already loaded are shared by all contents referencing them, as long as at least one of them is alive
+_loaded_vocabularies = weakref.WeakValueDictionary()
+
+
+class _VocabularyReferenceUnpickler(pickle.Unpickler):
+    """
+    Unpickler which resolves the id of FeaturesVocabulary instances stored by the Content Analyzer by loading them from
+    the directory where contents are serialized
+    """
+
+    def __init__(self, file, directory: str):
+        super().__init__(file)
+        self.directory = directory
+
+    def persistent_load(self, pid):
+        type_tag, vocabulary_id = pid
+        if type_tag != 'FeaturesVocabulary':
+            raise pickle.UnpicklingError(f"Unsupported persistent object {type_tag}")
+
+        key = (os.path.abspath(self.directory), vocabulary_id)
+        vocabulary = _loaded_vocabularies.get(key)
+        if vocabulary is None:
+            vocabulary = FeaturesVocabulary.load(self.directory, vocabulary_id)
+            _loaded_vocabularies[key] = vocabulary
+
+        return vocabulary
 
 
 def load_content_instance(directory: str, content_id: str, only_field_representations: dict = None) -> Content:
@@ -22,7 +50,7 @@ def load_content_instance(directory: str, content_id: str, only_field_representa
     try:
         content_filename = os.path.join(directory, '{}.xz'.format(content_id))
         with lzma.open(content_filename, "rb") as content_file:
-            content = pickle.load(content_file)
+            content = _VocabularyReferenceUnpickler(content_file, directory).load()
 
         if only_field_representations is not None:
             smaller_content = Content(content_id)
@@ -0,0 +1,70 @@
+from typing import Optional, Any
+
+import numpy as np
+
+
+def top_k_indices(scores: np.ndarray, k: Optional[int], tie_breaker: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Method that retrieves the positions of the `k` highest scores, sorted in a decreasing order w.r.t. the score
+
+    The k-th highest score is found in linear time with `np.partition` (the selection algorithm behind
+    `np.argpartition`), so that only the `k` winners (and the scores equal to the k-th highest one) are sorted instead
+    of the whole array. Ties are broken in an ascending order w.r.t. the `tie_breaker`, so that the result doesn't
+    depend on the order of the scores nor on the selection algorithm. NaN scores are always ranked last
+
+    Args:
+        scores: one dimensional array of scores
+        k: number of the highest scores to retrieve. If None, positions of all scores are returned
+        tie_breaker: one dimensional array of sortable values, one for each score, used to sort positions with the same
+            score (e.g. the int idx of the items). If None, positions with the same score are sorted in ascending order
+
+    Returns:
+        Array containing the positions of the `k` highest scores
+    """
+    neg_scores = -np.asarray(scores, dtype=float)
+    if tie_breaker is None:
+        tie_breaker = np.arange(len(neg_scores))
+
+    candidates = np.arange(len(neg_scores))
+    if k is not None and k < len(neg_scores):
+        kth_neg_score = np.partition(neg_scores, k - 1)[k - 1]
+
+        # all scores equal to the k-th one are kept, so that ties on the boundary are broken by the tie breaker
+        if not np.isnan(kth_neg_score):
+            candidates = np.flatnonzero(neg_scores <= kth_neg_score)
+
+    sorted_candidates = candidates[np.lexsort((tie_breaker[candidates], neg_scores[candidates]))]
+
+    return sorted_candidates[:k]
+
+
+def top_k_uir(user: Any, items: np.ndarray, scores: np.ndarray, k: Optional[int],
+              tie_breaker: Optional[np.ndarray] = None, dtype: type = float) -> np.ndarray:
+    """
+    Method that builds the uir rank matrix of a user containing the `k` items with the highest scores, sorted in a
+    decreasing order w.r.t. the score (see `top_k_indices()`)
+
+    Args:
+        user: user (e.g. its int idx) which will fill the first column of the uir
+        items: one dimensional array of the items ranked
+        scores: one dimensional array of the scores of the items
+        k: number of items of the rank. If None, all items are ranked
+        tie_breaker: one dimensional array of sortable values used to sort items with the same score.
+            If None, `items` themselves are used
+        dtype: type of the uir matrix. Use `object` if users or items are not numbers
+
+    Returns:
+        uir matrix of shape `(k, 3)` (or `(len(items), 3)` if there are less than `k` items) with user, item and score
+            as columns
+    """
+    items = np.asarray(items)
+    scores = np.asarray(scores)
+
+    top_positions = top_k_indices(scores, k, items if tie_breaker is None else np.asarray(tie_breaker))
+
+    uir_rank = np.empty((len(top_positions), 3), dtype=dtype)
+    uir_rank[:, 0] = user
+    uir_rank[:, 1] = items[top_positions]
+    uir_rank[:, 2] = scores[top_positions]
+
+    return uir_rank
@@ -2,10 +2,49 @@ from unittest import TestCase
 
 import numpy as np
 
-from clayrs.content_analyzer.content_representation.content import Content, PropertiesDict, FeaturesBagField
+from scipy import sparse
+
+from clayrs.content_analyzer.content_representation.content import Content, PropertiesDict, FeaturesBagField, \
+    FeaturesVocabulary
 from clayrs.content_analyzer.content_representation.representation_container import RepresentationContainer
 
 
+class TestFeaturesBagField(TestCase):
+    def test_vocabulary(self):
+        vocabulary = FeaturesVocabulary(['first', 'second', 'third'])
+
+        first_repr = FeaturesBagField(sparse.csc_matrix(np.array([[0.5, 0, 0.2]])), vocabulary=vocabulary)
+        second_repr = FeaturesBagField(sparse.csc_matrix(np.array([[0, 0.1, 0]])), vocabulary=vocabulary)
+
+        # tuples are built only for non-zero features
+        self.assertEqual([(0, 'first'), (2, 'third')], first_repr.pos_feature_tuples)
+        self.assertEqual([(1, 'second')], second_repr.pos_feature_tuples)
+        self.assertIs(first_repr.vocabulary, second_repr.vocabulary)
+
+        # same tuples given explicitly
+        tuples_repr = FeaturesBagField(sparse.csc_matrix(np.array([[0.5, 0, 0.2]])), [(0, 'first'), (2, 'third')])
+        self.assertIsNone(tuples_repr.vocabulary)
+        self.assertEqual(first_repr.pos_feature_tuples, tuples_repr.pos_feature_tuples)
+
+        with self.assertRaises(ValueError):
+            FeaturesBagField(sparse.csc_matrix(np.array([[0.5, 0, 0.2]])))
+
+        with self.assertRaises(ValueError):
+            FeaturesBagField(sparse.csc_matrix(np.array([[0.5, 0, 0.2]])), [(0, 'first'), (2, 'third')],
+                             vocabulary=vocabulary)
+
+    def test_vocabulary_eq_hash(self):
+        vocabulary = FeaturesVocabulary(['first', 'second'], vocabulary_id='voc')
+
+        # vocabularies are identified by their id, so equal vocabularies have the same hash
+        same_id = FeaturesVocabulary(['first', 'second'], vocabulary_id='voc')
+        self.assertEqual(vocabulary, same_id)
+        self.assertEqual(hash(vocabulary), hash(same_id))
+        self.assertEqual(1, len({vocabulary, same_id}))
+
+        self.assertNotEqual(vocabulary, FeaturesVocabulary(['first', 'second'], vocabulary_id='other'))
+
+
 class TestContent(TestCase):
     def test_append_remove_field(self):
         """
@@ -1,6 +1,9 @@
 from unittest import TestCase
 import os
 import pathlib as pl
+import tempfile
+
+import numpy as np
 
 from clayrs.content_analyzer.embeddings.embedding_learner.doc2vec import GensimDoc2Vec
 from clayrs.content_analyzer.information_processor.nltk_processor import NLTK
@@ -19,3 +22,33 @@ class TestGensimDoc2Vec(TestCase):
 
         self.assertEqual(learner.get_embedding("ace").any(), True)
         self.assertEqual(pl.Path(model_path).resolve().is_file(), True)
+
+    def test_fit_update(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = os.path.join(tmp_dir, "model_test_Doc2Vec")
+            new_items_path = os.path.join(tmp_dir, "new_items.json")
+            with open(new_items_path, "w") as f:
+                f.write('[{"Plot": "brandnewword appears only in the update"},'
+                        ' {"Plot": "anotherword appears only in the update too"}]')
+
+            learner = GensimDoc2Vec(model_path, True, min_count=1, sample=0)
+            learner.fit(source=JSONFile(file_path), field_list=["Plot", "Genre"])
+            n_docs = len(learner._trainable_model.dv)
+            old_vectors = learner._trainable_model.dv.vectors.copy()
+
+            learner.fit(source=JSONFile(new_items_path), field_list=["Plot"], update=True)
+
+            # new documents are tagged after the ones of the first training and have their own vectors
+            dv = learner._trainable_model.dv
+            self.assertEqual(n_docs + 2, len(dv))
+            self.assertEqual((n_docs + 2, dv.vector_size), dv.vectors.shape)
+            for new_tag in [n_docs, n_docs + 1]:
+                self.assertEqual((dv.vector_size,), dv[new_tag].shape)
+                self.assertTrue(np.isfinite(dv[new_tag]).all())
+                self.assertTrue(dv[new_tag].any())
+            self.assertFalse(np.array_equal(dv[n_docs], dv[n_docs + 1]))
+            self.assertEqual(n_docs + 2, len(dv.get_normed_vectors()))
+
+            # vectors of the documents of the first training are not trained again
+            np.testing.assert_array_equal(old_vectors, dv.vectors[:n_docs])
+            self.assertTrue(learner.get_embedding("brandnewword").any())
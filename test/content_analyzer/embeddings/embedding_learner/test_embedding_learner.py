@@ -53,6 +53,50 @@ class TestEmbeddingLearner(TestCase):
         self.assertEqual(generated, expected)
 
 
+class TestStreamingCorpus(TestCase):
+    def test_iter(self):
+        class CountingJSONFile(JSONFile):
+            n_reads = 0
+
+            def __iter__(self):
+                CountingJSONFile.n_reads += 1
+                return super().__iter__()
+
+        src = CountingJSONFile(file_path)
+        learner = GensimLatentSemanticAnalysis()
+        corpus = learner.corpus_iterator(src, ["Title", "Released"], [])
+
+        # nothing is read until the corpus is iterated
+        self.assertEqual(0, CountingJSONFile.n_reads)
+        self.assertFalse(corpus.processed)
+
+        expected = [raw_content["Title"].lower().split() + raw_content["Released"].lower().split()
+                    for raw_content in JSONFile(file_path)]
+
+        # the corpus can be iterated multiple times but the source is read only once
+        self.assertEqual(expected, list(corpus))
+        self.assertEqual(expected, list(corpus))
+        self.assertEqual(1, CountingJSONFile.n_reads)
+        self.assertTrue(corpus.processed)
+        self.assertEqual(len(expected), len(corpus))
+
+        # once closed, documents spooled on disk are deleted
+        corpus.close()
+        with self.assertRaises(FileNotFoundError):
+            list(corpus)
+
+    def test_interrupted_iter(self):
+        src = JSONFile(file_path)
+        corpus = GensimLatentSemanticAnalysis().corpus_iterator(src, ["Title"], [])
+
+        # if the first iteration is interrupted, the next one starts from scratch
+        next(iter(corpus))
+        self.assertFalse(corpus.processed)
+
+        self.assertEqual(len(src), len(list(corpus)))
+        self.assertTrue(corpus.processed)
+
+
 class TestWordEmbeddingSourceGensimLearner(TestEmbeddingSource):
     def test_doc2vec(self):
         # model created using d2c_test_data.json
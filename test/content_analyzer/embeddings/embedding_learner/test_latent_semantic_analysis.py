@@ -65,3 +65,14 @@ class TestLda(TestCase):
 
         self.assertTrue(np.any(result_vector))
 
+
+    def test_update(self):
+        my_learner = GensimLatentSemanticAnalysis(None, num_topics=num_topics)
+        my_learner.fit_model(common_texts)
+
+        docs_before = my_learner.model.docs_processed
+
+        my_learner.update_model([['human', 'computer', 'interface', 'word_not_in_vocabulary']])
+
+        self.assertEqual(docs_before + 1, my_learner.model.docs_processed)
+        self.assertEqual(num_topics, my_learner.get_vector_size())
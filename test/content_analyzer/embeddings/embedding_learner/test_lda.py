@@ -4,7 +4,7 @@ import os
 
 import numpy as np
 from gensim.corpora import Dictionary
-from gensim.models import LdaModel
+from gensim.models import LdaModel, LdaMulticore
 from gensim.test.utils import common_texts
 import gensim
 
@@ -64,3 +64,22 @@ class TestLda(TestCase):
         result_vector = my_learner.get_embedding(unseen_doc_text)
 
         self.assertTrue(np.any(result_vector))
+
+    def test_update(self):
+        my_learner = GensimLDA(None, num_topics=num_topics, random_state=random_state)
+        my_learner.fit_model(common_texts)
+
+        topics_before = my_learner.model.get_topics()
+
+        my_learner.update_model([['human', 'computer', 'interface', 'word_not_in_vocabulary']])
+
+        # vocabulary doesn't change but the topics are updated
+        self.assertEqual(topics_before.shape, my_learner.model.get_topics().shape)
+        self.assertFalse(np.array_equal(topics_before, my_learner.model.get_topics()))
+
+    def test_multicore(self):
+        my_learner = GensimLDA(None, num_topics=num_topics, random_state=random_state, workers=2)
+        my_learner.fit_model(common_texts)
+
+        self.assertIsInstance(my_learner.model, LdaMulticore)
+        self.assertTrue(np.any(my_learner.get_embedding(['human', 'time', 'trees'])))
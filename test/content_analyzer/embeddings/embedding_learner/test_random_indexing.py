@@ -8,6 +8,8 @@ from gensim.corpora import Dictionary
 from gensim.models import RpModel
 from gensim.test.utils import common_texts
 from clayrs.content_analyzer.embeddings.embedding_learner.random_indexing import GensimRandomIndexing
+from clayrs.content_analyzer.raw_information_source import JSONFile
+from test import dir_test_files
 
 num_topics = 10
 model_path = 'test_model_ri'
@@ -62,3 +64,11 @@ class TestRandomIndexing(TestCase):
         result_vector = my_learner.get_embedding(unseen_doc_text)
 
         self.assertTrue(np.any(result_vector))
+
+    def test_update_not_supported(self):
+        my_learner = GensimRandomIndexing(num_topics=num_topics)
+
+        # incremental training is not exposed by random indexing
+        self.assertFalse(hasattr(my_learner, 'update_model'))
+        with self.assertRaises(ValueError):
+            my_learner.fit(JSONFile(os.path.join(dir_test_files, 'movies_info_reduced.json')), ["Plot"], update=True)
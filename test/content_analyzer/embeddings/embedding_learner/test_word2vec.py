@@ -1,6 +1,7 @@
 from unittest import TestCase
 import os
 import pathlib as pl
+import tempfile
 
 from clayrs.content_analyzer.embeddings.embedding_learner import GensimWord2Vec
 from clayrs.content_analyzer.information_processor.nltk_processor import NLTK
@@ -20,3 +21,34 @@ class TestGensimWord2Vec(TestCase):
         self.assertEqual(learner.get_embedding("ace").any(), True)
         self.assertEqual(pl.Path(model_path).resolve().is_file(), True)
 
+
+    def test_fit_update(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = os.path.join(tmp_dir, "model_test_Word2Vec")
+            new_items_path = os.path.join(tmp_dir, "new_items.json")
+            with open(new_items_path, "w") as f:
+                f.write('[{"Plot": "brandnewword appears only in the update"}]')
+
+            learner = GensimWord2Vec(model_path, True, min_count=1, workers=2)
+            learner.fit(source=JSONFile(file_path), field_list=["Plot", "Genre"])
+
+            self.assertTrue(os.path.isfile(model_path + ".kv"))
+            self.assertTrue(os.path.isfile(model_path + ".model"))
+            with self.assertRaises(KeyError):
+                learner.get_embedding("brandnewword")
+
+            # a new learner continues the training of the model stored in the reference
+            learner = GensimWord2Vec(model_path, True, min_count=1, workers=2)
+            learner.fit(source=JSONFile(new_items_path), field_list=["Plot"], update=True)
+
+            self.assertTrue(learner.get_embedding("brandnewword").any())
+            self.assertTrue(learner.get_embedding("ace").any())
+
+            # the updated model is saved
+            self.assertTrue(GensimWord2Vec(model_path).get_embedding("brandnewword").any())
+
+    def test_update_not_fitted(self):
+        learner = GensimWord2Vec()
+
+        with self.assertRaises(FileNotFoundError):
+            learner.fit(source=JSONFile(file_path), field_list=["Plot"], update=True)
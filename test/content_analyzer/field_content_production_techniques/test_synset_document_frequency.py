@@ -1,4 +1,4 @@
-from unittest import TestCase
+from unittest import TestCase, mock
 import os
 
 from clayrs.content_analyzer.content_representation.content import FeaturesBagField
@@ -17,3 +17,56 @@ class TestSynsetDocumentFrequency(TestCase):
 
         self.assertEqual(len(features_bag_list), 20)
         self.assertIsInstance(features_bag_list[0], FeaturesBagField)
+
+    def test_produce_content_parallel(self):
+        technique_serial = PyWSDSynsetDocumentFrequency(batch_size=5)
+        technique_parallel = PyWSDSynsetDocumentFrequency(num_cpus=2, batch_size=5)
+
+        serial_list = technique_serial.produce_content("Plot", [], [], JSONFile(file_path))
+        parallel_list = technique_parallel.produce_content("Plot", [], [], JSONFile(file_path))
+
+        self.assertEqual(len(serial_list), len(parallel_list))
+        for serial_repr, parallel_repr in zip(serial_list, parallel_list):
+            self.assertEqual(serial_repr.pos_feature_tuples, parallel_repr.pos_feature_tuples)
+
+        # same lemma in same context is disambiguated only once
+        self.assertGreater(technique_serial.synset_memo.stats()['hits'], 0)
+
+    def test_context_window(self):
+        with self.assertRaises(ValueError):
+            PyWSDSynsetDocumentFrequency(context_window=-1)
+
+        technique = PyWSDSynsetDocumentFrequency(context_window=3)
+        features_bag_list = technique.produce_content("Plot", [], [], JSONFile(file_path))
+
+        self.assertEqual(len(features_bag_list), 20)
+        self.assertIsInstance(features_bag_list[0], FeaturesBagField)
+
+        # memo keys contain the window of the lemma
+        self.assertTrue(all(len(key[2].split()) <= 7 for key in technique.synset_memo._table))
+
+        # by default the whole document is used as context, as pywsd does, and memo keys contain a digest of the
+        # document instead of the document
+        self.assertIsNone(PyWSDSynsetDocumentFrequency().context_window)
+
+        technique = PyWSDSynsetDocumentFrequency(context_window=None)
+        features_bag_list = technique.produce_content("Plot", [], [], JSONFile(file_path))
+
+        self.assertEqual(len(features_bag_list), 20)
+        self.assertTrue(all(isinstance(key[2], bytes) and len(key[2]) == 16 for key in technique.synset_memo._table))
+
+    def test_disambiguation_error(self):
+        from pywsd.allwords_wsd import simple_lesk
+
+        def failing_simple_lesk(context, lemma, *args, **kwargs):
+            if lemma == 'jungle':
+                raise ValueError("can't disambiguate")
+            return simple_lesk(context, lemma, *args, **kwargs)
+
+        technique = PyWSDSynsetDocumentFrequency()
+        with mock.patch('pywsd.allwords_wsd.simple_lesk', failing_simple_lesk):
+            synsets = technique._disambiguate_document("After being trapped in a jungle board game for 26 years")
+
+        # the lemma which can't be disambiguated is skipped, the others are disambiguated anyway
+        self.assertNotEqual(0, len(synsets))
+        self.assertFalse(any(synset.startswith('jungle') for synset in synsets))
@@ -1,9 +1,14 @@
 from unittest import TestCase
 import os
 
+import numpy as np
+
 from clayrs.content_analyzer.content_representation.content import FeaturesBagField
-from clayrs.content_analyzer.field_content_production_techniques.tf_idf import WhooshTfIdf, SkLearnTfIdf
+from clayrs.content_analyzer.field_content_production_techniques.tf_idf import WhooshTfIdf, SkLearnTfIdf, \
+    SkLearnStreamingTfIdf
+from clayrs.content_analyzer.memory_interfaces.text_interface import KeywordIndex
 from clayrs.content_analyzer.raw_information_source import JSONFile
+from clayrs.content_analyzer.utils.check_tokenization import check_tokenized
 from test import dir_test_files
 
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -19,6 +24,35 @@ class TestWhooshTfIdf(TestCase):
         self.assertEqual(len(features_bag_list), 20)
         self.assertIsInstance(features_bag_list[0], FeaturesBagField)
 
+    def test_same_result_of_index(self):
+        technique = WhooshTfIdf()
+        source = JSONFile(file_path)
+
+        technique.dataset_refactor(source, "Plot", [])
+        feature_names = technique._feature_names
+        tfidf_matrix = technique._tfidf_matrix
+
+        # the tf-idf computed in a single pass must be the same computed with the KeywordIndex
+        index = KeywordIndex('./test_whoosh_tfidf')
+        try:
+            index.init_writing(True)
+            for raw_content in source:
+                index.new_content()
+                index.new_field("Plot", check_tokenized(raw_content["Plot"]))
+                index.serialize_content()
+            index.stop_writing()
+
+            for i in range(len(source)):
+                expected = index.get_tf_idf("Plot", i)
+                row = tfidf_matrix.getrow(i)
+                result = {feature_names[pos]: score for pos, score in zip(row.indices, row.data)}
+
+                self.assertEqual(expected.keys(), result.keys())
+                for term in expected:
+                    self.assertAlmostEqual(expected[term], result[term])
+        finally:
+            index.delete()
+
 
 class TestSkLearnTfIdf(TestCase):
 
@@ -29,3 +63,48 @@ class TestSkLearnTfIdf(TestCase):
 
         self.assertEqual(len(features_bag_list), 20)
         self.assertIsInstance(features_bag_list[0], FeaturesBagField)
+
+
+class TestSkLearnStreamingTfIdf(TestCase):
+
+    def assertSameTfIdf(self, expected_technique, result_technique, field_name):
+        source = JSONFile(file_path)
+
+        expected_technique.dataset_refactor(source, field_name, [])
+        result_technique.dataset_refactor(source, field_name, [])
+
+        self.assertEqual(list(expected_technique._feature_names), list(result_technique._feature_names))
+        self.assertEqual(expected_technique._tfidf_matrix.shape, result_technique._tfidf_matrix.shape)
+        self.assertTrue(np.allclose(expected_technique._tfidf_matrix.toarray(),
+                                    result_technique._tfidf_matrix.toarray()))
+
+    def test_produce_content(self):
+        technique = SkLearnStreamingTfIdf(chunk_size=3)
+
+        features_bag_list = technique.produce_content("Plot", [], [], JSONFile(file_path))
+
+        self.assertEqual(len(features_bag_list), 20)
+        self.assertIsInstance(features_bag_list[0], FeaturesBagField)
+
+    def test_same_result_of_sklearn(self):
+        # chunk size which doesn't divide the number of contents
+        self.assertSameTfIdf(SkLearnTfIdf(), SkLearnStreamingTfIdf(chunk_size=7), "Plot")
+
+        # whole source in a single chunk
+        self.assertSameTfIdf(SkLearnTfIdf(), SkLearnStreamingTfIdf(chunk_size=100), "Plot")
+
+        self.assertSameTfIdf(SkLearnTfIdf(min_df=2, max_df=0.5, sublinear_tf=True),
+                             SkLearnStreamingTfIdf(chunk_size=4, min_df=2, max_df=0.5, sublinear_tf=True),
+                             "Plot")
+
+        self.assertSameTfIdf(SkLearnTfIdf(max_features=30, binary=True, norm='l1', smooth_idf=False),
+                             SkLearnStreamingTfIdf(chunk_size=4, max_features=30, binary=True, norm='l1',
+                                                   smooth_idf=False),
+                             "Plot")
+
+    def test_wrong_parameters(self):
+        with self.assertRaises(ValueError):
+            SkLearnStreamingTfIdf(chunk_size=0)
+
+        with self.assertRaises(ValueError):
+            SkLearnStreamingTfIdf(min_df=10, max_df=2).dataset_refactor(JSONFile(file_path), "Plot", [])
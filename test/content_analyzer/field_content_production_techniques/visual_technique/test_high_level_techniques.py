@@ -98,6 +98,45 @@ class TestPytorchImageModels(TestHighLevelTechnique):
 
         self.assertTrue(all(len(out.value.shape) == 1 for out in framework_output))
 
+    def test_pytorch_image_models_optimized_inference(self):
+
+        technique = PytorchImageModels('resnet18', feature_layer=-3, imgs_dirs=ds_path_without_field_name,
+                                       flatten=False)
+        expected_output = technique.produce_batch_repr(self.images_list)
+
+        # traced and frozen model, with and without channels last memory format, must give the same output of the
+        # eager one
+        for optimization_kwargs in [{'jit': True}, {'channels_last': True}, {'jit': True, 'channels_last': True}]:
+            optimized_technique = PytorchImageModels('resnet18', feature_layer=-3,
+                                                     imgs_dirs=ds_path_without_field_name,
+                                                     flatten=False, **optimization_kwargs)
+            optimized_output = optimized_technique.produce_batch_repr(self.images_list)
+
+            for single_expected_out, single_optimized_out in zip(expected_output, optimized_output):
+                np.testing.assert_allclose(single_expected_out.value, single_optimized_out.value,
+                                           rtol=1e-4, atol=1e-5)
+
+        # bfloat16 features are less precise but they are always returned as float32 arrays
+        bfloat16_technique = PytorchImageModels('resnet18', feature_layer=-3, imgs_dirs=ds_path_without_field_name,
+                                                flatten=False, precision='bfloat16')
+        bfloat16_output = bfloat16_technique.produce_batch_repr(self.images_list)
+
+        for single_expected_out, single_bfloat16_out in zip(expected_output, bfloat16_output):
+            self.assertEqual(np.float32, single_bfloat16_out.value.dtype)
+            np.testing.assert_allclose(single_expected_out.value, single_bfloat16_out.value, rtol=0.1, atol=0.1)
+
+        # dynamic quantization on the full model (which has a final linear layer)
+        qint8_technique = PytorchImageModels('resnet18', imgs_dirs=ds_path_without_field_name,
+                                             flatten=True, precision='qint8', jit=True)
+        qint8_output = qint8_technique.produce_batch_repr(self.images_list)
+        self.assertTrue(all(out.value.shape == (1000,) for out in qint8_output))
+
+        with self.assertRaises(ValueError):
+            PytorchImageModels('resnet18', precision='float16')
+
+        with self.assertRaises(ValueError):
+            PytorchImageModels('resnet18', precision='qint8', device='cuda:0')
+
 
 class TestCaffeImageModels(TestHighLevelTechnique):
 
@@ -0,0 +1,146 @@
+import json
+import os
+import shutil
+import threading
+import unittest
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from clayrs.content_analyzer.field_content_production_techniques.visual_techniques.image_cache import ImageCache
+from test.content_analyzer.field_content_production_techniques.visual_technique.test_visual_content_technique import \
+    images_path
+
+this_file_path = os.path.dirname(os.path.abspath(__file__))
+cache_dir = os.path.join(this_file_path, 'image_cache')
+
+
+class LocalImagesHandler(SimpleHTTPRequestHandler):
+    """
+    Serves the test images. The path '/flaky/<image>' fails with a 503 error on the first request and
+    then serves the image, the path '/not_an_image' returns plain text
+    """
+
+    requests_count = 0
+    flaky_served = set()
+
+    def do_GET(self):
+        LocalImagesHandler.requests_count += 1
+
+        if self.path == '/not_an_image':
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b'not an image')
+            return
+
+        if self.path.startswith('/flaky/'):
+            if self.path not in LocalImagesHandler.flaky_served:
+                LocalImagesHandler.flaky_served.add(self.path)
+                self.send_response(503)
+                self.end_headers()
+                return
+            self.path = self.path[len('/flaky'):]
+
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestImageCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        handler = partial(LocalImagesHandler, directory=images_path)
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.image_name = 'anthropologie-skirt-light-pink-434-1.jpg'
+
+    def setUp(self) -> None:
+        LocalImagesHandler.requests_count = 0
+
+    def test_fetch(self):
+        url = f"{self.base_url}/{self.image_name}"
+
+        with ImageCache(cache_dir, backoff_factor=0) as cache:
+            image_path = cache.fetch(url)
+
+            # image is stored with the hash of its url as name and its bytes are not re-encoded
+            self.assertEqual(os.path.join(cache_dir, ImageCache.url_key(url) + '.jpeg'), image_path)
+            with open(image_path, 'rb') as cached, open(os.path.join(images_path, self.image_name), 'rb') as original:
+                self.assertEqual(original.read(), cached.read())
+
+            # the same url is not downloaded again
+            self.assertEqual(image_path, cache.fetch(url))
+            self.assertEqual(1, LocalImagesHandler.requests_count)
+
+        # manifest is saved when the cache is closed
+        with open(os.path.join(cache_dir, ImageCache.manifest_filename)) as f:
+            self.assertEqual({url: os.path.basename(image_path)}, json.load(f))
+
+    def test_resume(self):
+        first_urls = [f"{self.base_url}/{image_name}" for image_name in sorted(os.listdir(images_path))[:2]]
+        all_urls = [f"{self.base_url}/{image_name}" for image_name in sorted(os.listdir(images_path))]
+
+        with ImageCache(cache_dir, backoff_factor=0) as cache:
+            for url in first_urls:
+                cache.fetch(url)
+
+        self.assertEqual(2, LocalImagesHandler.requests_count)
+
+        # a new session on the same directory only downloads images missing from the manifest
+        with ImageCache(cache_dir, backoff_factor=0) as cache:
+            self.assertEqual(2, len(cache))
+            image_paths = [cache.fetch(url) for url in all_urls]
+
+        self.assertEqual(len(all_urls), LocalImagesHandler.requests_count)
+        self.assertTrue(all(os.path.isfile(image_path) for image_path in image_paths))
+
+        # if a file of the cache is deleted, it is downloaded again
+        os.remove(image_paths[0])
+        with ImageCache(cache_dir, backoff_factor=0) as cache:
+            self.assertEqual(image_paths[0], cache.fetch(all_urls[0]))
+
+        self.assertEqual(len(all_urls) + 1, LocalImagesHandler.requests_count)
+
+    def test_retry(self):
+        url = f"{self.base_url}/flaky/{self.image_name}"
+
+        with ImageCache(cache_dir, max_retries=2, backoff_factor=0) as cache:
+            self.assertIsNotNone(cache.fetch(url))
+
+        # first request failed with 503, the second one succeeded
+        self.assertEqual(2, LocalImagesHandler.requests_count)
+
+    def test_fetch_errors(self):
+        with ImageCache(cache_dir, max_retries=1, backoff_factor=0) as cache:
+            self.assertIsNone(cache.fetch(f"{self.base_url}/not_existing_image.jpg"))
+            self.assertIsNone(cache.fetch(f"{self.base_url}/not_an_image"))
+
+            self.assertEqual(0, len(cache))
+
+        # nothing listening on the port
+        with ImageCache(cache_dir, max_retries=0, backoff_factor=0) as cache:
+            self.assertIsNone(cache.fetch("http://127.0.0.1:1/image.jpg"))
+
+    def test_corrupted_manifest(self):
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, ImageCache.manifest_filename), 'w') as f:
+            f.write('{"truncated')
+
+        cache = ImageCache(cache_dir)
+        self.assertEqual(0, len(cache))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+        cls.server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
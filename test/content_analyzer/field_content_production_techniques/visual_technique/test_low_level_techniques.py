@@ -81,6 +81,25 @@ class TestHogDescriptor(TestLowLevelTechnique):
 
         self.assertTrue(all(len(out.value.shape) == 5 for out in framework_output))
 
+    def test_hog_descriptor_multiprocessing(self):
+
+        source = JSONFile(self.full_path_source)
+
+        # images are distributed over multiple processes in batches of 2, the order of the outputs must be the same
+        # of the contents in the source
+        technique = SkImageHogDescriptor(flatten=True, imgs_dirs=ds_path_without_field_name,
+                                         batch_size=2, num_cpus=2)
+        framework_output = technique.produce_content('imagePath', [TorchGrayscale()], [], source)
+
+        self.assertEqual(5, len(framework_output))
+
+        hog_output = []
+        for image in self.images_list:
+            hog_output.append(hog(TF.rgb_to_grayscale(image).squeeze().numpy()))
+
+        for single_f_out, single_h_out in zip(framework_output, hog_output):
+            np.testing.assert_array_equal(single_f_out.value, single_h_out)
+
 
 class TestCannyEdgeDetector(TestLowLevelTechnique):
 
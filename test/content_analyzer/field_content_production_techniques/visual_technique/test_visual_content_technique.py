@@ -35,12 +35,18 @@ class MockedGoodResponse:
         img.save(img_byte_arr, format='JPEG')
         self.content = img_byte_arr.getvalue()
 
+    def raise_for_status(self):
+        pass
+
 
 class MockedUnidentifiedImage:
 
     def __init__(self):
         self.content = str.encode('not an image')
 
+    def raise_for_status(self):
+        pass
+
 
 def create_full_path_source() -> str:
     source = JSONFile(raw_source_path_local_rel)
@@ -90,6 +96,24 @@ class TestClasslessImageFolder(TestCase):
         # (the one associated to the non-existing path)
         self.assertTrue(torch.all(images_list[5] == 0))
 
+    def test_dataset_draft_decoding(self):
+        images_paths_list = [os.path.join(images_path, file_name) for file_name in os.listdir(images_path)]
+
+        # images are decoded at a reduced scale by the jpeg decoder, but they are still resized to the specified size
+        ds = ClasslessImageFolder(images_paths_list, (50, 50), draft_decoding=True)
+        images_list = [ds[image_idx] for image_idx in range(0, len(ds))]
+
+        self.assertTrue(all(image.shape == (3, 50, 50) for image in images_list))
+        self.assertTrue(not any(torch.all(image == 0) for image in images_list))
+        self.assertEqual(0, ds.error_count)
+
+        # resize size bigger than the images, so nothing can be gained from a reduced decoding
+        ds_draft = ClasslessImageFolder(images_paths_list, (300, 300), draft_decoding=True)
+        ds_full = ClasslessImageFolder(images_paths_list, (300, 300))
+
+        for image_idx in range(0, len(ds_full)):
+            self.assertTrue(torch.equal(ds_full[image_idx], ds_draft[image_idx]))
+
 
 class TestVisualContentTechnique(TestCase):
 
@@ -97,7 +121,7 @@ class TestVisualContentTechnique(TestCase):
     def setUpClass(cls) -> None:
         cls.full_source_path = create_full_path_source()
 
-    @patch.object(requests, "get", return_value=MockedGoodResponse())
+    @patch.object(requests.Session, "get", return_value=MockedGoodResponse())
     def test_downloading_images_good_response(self, mocked_response):
 
         # use the json file containing online links to locally download the images
@@ -117,7 +141,7 @@ class TestVisualContentTechnique(TestCase):
         self.assertTrue(mocked_response.called)
         shutil.rmtree(os.path.join(this_file_path, 'imgs_dirs'))
 
-    @patch.object(requests, "get", return_value=MockedUnidentifiedImage())
+    @patch.object(requests.Session, "get", return_value=MockedUnidentifiedImage())
     def test_downloading_images_not_image_response(self, mocked_response):
 
         # use the json file containing online links to locally download the images
@@ -138,7 +162,7 @@ class TestVisualContentTechnique(TestCase):
         self.assertTrue(mocked_response.called)
         shutil.rmtree(os.path.join(this_file_path, 'imgs_dirs'))
 
-    @patch.object(requests, "get", side_effect=requests.exceptions.ConnectionError())
+    @patch.object(requests.Session, "get", side_effect=requests.exceptions.ConnectionError())
     def test_downloading_images_connection_error(self, mocked_response):
 
         # use the json file containing online links to locally download the images
@@ -220,6 +244,32 @@ class TestVisualContentTechnique(TestCase):
         # reset the previous workdir
         os.chdir(current_workdir)
 
+    def test_loading_images_multiple_workers(self):
+
+        source_with_new_paths = JSONFile(self.full_source_path)
+
+        dl_single_process = SkImageHogDescriptor(imgs_dirs=ds_path_without_field_name,
+                                                 resize_size=(100, 100),
+                                                 batch_size=2).get_data_loader('imagePath', source_with_new_paths)
+        images_single_process = [image for image in dl_single_process]
+        shutil.rmtree(ds_path_without_field_name)
+
+        dl_multiple_workers = SkImageHogDescriptor(imgs_dirs=ds_path_without_field_name,
+                                                   resize_size=(100, 100), batch_size=2,
+                                                   num_workers=2, prefetch_factor=1,
+                                                   persistent_workers=True).get_data_loader('imagePath',
+                                                                                            source_with_new_paths)
+        images_multiple_workers = [image for image in dl_multiple_workers]
+        shutil.rmtree(ds_path_without_field_name)
+
+        # ordering of the contents must be preserved even if images are loaded by different workers
+        self.assertEqual(len(images_single_process), len(images_multiple_workers))
+        for single_process_batch, multiple_workers_batch in zip(images_single_process, images_multiple_workers):
+            self.assertTrue(torch.equal(single_process_batch, multiple_workers_batch))
+
+        with self.assertRaises(ValueError):
+            SkImageHogDescriptor(num_workers=-1)
+
     @classmethod
     def tearDownClass(cls) -> None:
         os.remove(cls.full_source_path)
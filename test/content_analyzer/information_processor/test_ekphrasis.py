@@ -1,3 +1,4 @@
+import shutil
 import unittest
 
 import ekphrasis.dicts.emoticons
@@ -147,3 +148,45 @@ class TestEkphrasis(unittest.TestCase):
                             "be korrected, even elongaaaated words. CAPS")
 
         self.assertEqual(expected, result)
+
+    def test_memoization(self):
+        dir_memo = 'ekphrasis_memo_test'
+
+        try:
+            ek = Ekphrasis(spell_correction=True, segmentation=True, memo_dir=dir_memo)
+
+            text = "korrect korrect korrect thewatercooler thewatercooler"
+            expected = ek.process(text)
+
+            stats = ek.memo_stats()
+            # 'korrect' and 'thewatercooler' are corrected only once
+            self.assertEqual(2, stats['spell_correction']['misses'])
+            self.assertEqual(3, stats['spell_correction']['hits'])
+
+            # results are the same obtained without memoization
+            ek_no_memo = Ekphrasis(spell_correction=True, segmentation=True, memo_maxsize=1)
+            self.assertEqual(expected, ek_no_memo.process(text))
+
+            # tables are persisted and reloaded by a new processor with the same settings
+            ek.save_memo_tables()
+            ek_loaded = Ekphrasis(spell_correction=True, segmentation=True, memo_dir=dir_memo)
+
+            self.assertEqual(ek.spell_memo, ek_loaded.spell_memo)
+            self.assertEqual(ek.segment_memo, ek_loaded.segment_memo)
+            self.assertEqual(expected, ek_loaded.process(text))
+            self.assertEqual(0, ek_loaded.memo_stats()['segmentation']['misses'] -
+                             ek.memo_stats()['segmentation']['misses'])
+
+            # tables loaded with a smaller maxsize are trimmed to it
+            ek_small = Ekphrasis(spell_correction=True, segmentation=True, memo_dir=dir_memo, memo_maxsize=1)
+            self.assertEqual(1, len(ek_small.spell_memo))
+            self.assertEqual(1, ek_small.spell_memo.maxsize)
+
+            # tables of a processor with different settings are not loaded
+            ek_twitter = Ekphrasis(spell_correction=True, corrector='twitter', memo_dir=dir_memo)
+            self.assertEqual(0, len(ek_twitter.spell_memo))
+
+            with self.assertRaises(ValueError):
+                Ekphrasis(spell_correction=True).save_memo_tables()
+        finally:
+            shutil.rmtree(dir_memo, ignore_errors=True)
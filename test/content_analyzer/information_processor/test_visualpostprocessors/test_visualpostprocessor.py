@@ -1,7 +1,8 @@
 from unittest import TestCase
 
 from clayrs.content_analyzer.information_processor.postprocessors import CountVisualBagOfWords, \
-    TfIdfVisualBagOfWords, ScipyVQ, SkLearnPCA, SkLearnGaussianRandomProjections, SkLearnFeatureAgglomeration
+    TfIdfVisualBagOfWords, ScipyVQ, SkLearnPCA, SkLearnGaussianRandomProjections, SkLearnFeatureAgglomeration, \
+    SkLearnIncrementalPCA, SkLearnSparseRandomProjections, SkLearnTruncatedSVD
 from clayrs.content_analyzer.content_representation.content import EmbeddingField, FeaturesBagField
 
 import numpy as np
@@ -89,6 +90,72 @@ class TestVisualPostProcessing(TestCase):
         np.testing.assert_array_equal(output[1].value.toarray().squeeze(), np.array([2, 0]))
         np.testing.assert_almost_equal(output[2].value.toarray().squeeze(), np.array([1, expected_tf_idf]))
 
+    def test_visual_bag_of_words_streaming(self):
+        input = [
+            EmbeddingField(np.array([[10, 10, 10], [10, 10, 10]])),
+            EmbeddingField(np.array([[9.8, 9.8, 9.8], [9.8, 9.8, 9.8]])),
+            EmbeddingField(np.array([[1, 1, 1], [10, 10, 10]]))
+        ]
+
+        # the codebook is fit on chunks of 2 descriptors, the order of the codewords may be different from the one
+        # of KMeans, but the same features bags must be produced
+        output = CountVisualBagOfWords(n_clusters=2, random_state=42, batch_size=2).process(input)
+
+        self.assertIsInstance(output[0], FeaturesBagField)
+        self.assertEqual(2, len(output[0].vocabulary))
+        np.testing.assert_array_equal(output[0].value.toarray(), output[1].value.toarray())
+        np.testing.assert_array_equal(sorted(output[0].value.toarray().squeeze()), np.array([0, 2]))
+        np.testing.assert_array_equal(output[2].value.toarray().squeeze(), np.array([1, 1]))
+
+        output = TfIdfVisualBagOfWords(n_clusters=2, norm=None, smooth_idf=False, random_state=42,
+                                       batch_size=2).process(input)
+
+        expected_tf_idf = 1 * ((np.log(3 / 1)) + 1)
+
+        self.assertIsInstance(output[0], FeaturesBagField)
+        np.testing.assert_array_equal(sorted(output[0].value.toarray().squeeze()), np.array([0, 2]))
+        np.testing.assert_almost_equal(sorted(output[2].value.toarray().squeeze()), np.array([1, expected_tf_idf]))
+
+        # many images with a different number of descriptors, split in chunks which don't align with the images
+        rng = np.random.default_rng(42)
+        input = [EmbeddingField(rng.normal(size=(rng.integers(1, 20), 8))) for _ in range(30)]
+
+        output = CountVisualBagOfWords(n_clusters=5, random_state=42, batch_size=7).process(input)
+
+        self.assertEqual(30, len(output))
+        for single_input, single_output in zip(input, output):
+            self.assertEqual(len(single_input.value), single_output.value.sum())
+
+    def test_vq_streaming(self):
+
+        # 1 Dim test
+        input = [
+            EmbeddingField(np.array([10, 10, 10])),
+            EmbeddingField(np.array([9.8, 9.8, 9.8])),
+            EmbeddingField(np.array([1, 1, 1]))
+        ]
+
+        output = ScipyVQ(n_clusters=2, random_state=42, batch_size=2).process(input)
+
+        self.assertIsInstance(output[0], EmbeddingField)
+        np.testing.assert_array_equal(output[0].value, output[1].value)
+        self.assertFalse(np.array_equal(output[0].value, output[2].value))
+
+        # 2 dim test
+        input = [
+            EmbeddingField(np.array([[10, 10, 10], [10, 10, 10]])),
+            EmbeddingField(np.array([[9.8, 9.8, 9.8], [9.8, 9.8, 9.8]])),
+            EmbeddingField(np.array([[1, 1, 1], [10, 10, 10]]))
+        ]
+
+        output = ScipyVQ(n_clusters=2, random_state=42, batch_size=4).process(input)
+
+        self.assertIsInstance(output[0], EmbeddingField)
+        self.assertEqual((2, 3), output[0].value.shape)
+        np.testing.assert_array_equal(output[0].value, output[1].value)
+        self.assertFalse(np.array_equal(output[0].value, output[2].value))
+        np.testing.assert_array_equal(output[0].value[0], output[2].value[1])
+
     def test_vq(self):
 
         # 1 Dim test
@@ -213,4 +280,58 @@ class TestVisualPostProcessing(TestCase):
         self.assertEqual(len(output[1].value), 2)
         self.assertEqual(len(output[2].value), 2)
 
+    def test_chunked_dimensionality_reduction(self):
+
+        # 1 dimensional case, chunks of 2 rows, the last one is merged with the previous one
+
+        rng = np.random.default_rng(42)
+        input = [EmbeddingField(rng.normal(size=5)) for _ in range(7)]
+
+        techniques = [SkLearnIncrementalPCA(n_components=2, batch_size=2),
+                      SkLearnSparseRandomProjections(n_components=2, random_state=42, batch_size=2),
+                      SkLearnTruncatedSVD(n_components=2, random_state=42, batch_size=2)]
+
+        for technique in techniques:
+            output = technique.process(input)
+
+            self.assertEqual(7, len(output))
+            self.assertIsInstance(output[0], EmbeddingField)
+            self.assertTrue(all(out.value.shape == (2,) for out in output))
+
+        # chunked processing gives the same result of processing all representations at once
+        output = SkLearnSparseRandomProjections(n_components=2, random_state=42, batch_size=2).process(input)
+        expected = SkLearnSparseRandomProjections(n_components=2, random_state=42,
+                                                  batch_size=2).apply_processing(np.vstack([x.value for x in input]))
+        np.testing.assert_array_almost_equal(np.vstack([out.value for out in output]), expected)
+
+        # 2 dimensional case, representations with a different number of rows
 
+        input = [EmbeddingField(rng.normal(size=(n_rows, 5))) for n_rows in [3, 1, 2, 4]]
+
+        for technique in techniques:
+            output = technique.process(input)
+
+            self.assertEqual(4, len(output))
+            self.assertEqual([(3, 2), (1, 2), (2, 2), (4, 2)], [out.value.shape for out in output])
+
+        # 1 dimensional sparse csc case
+
+        input = [
+            FeaturesBagField(sp.csr_matrix(np.array([10, 10, 9, 9, 10])).tocsc(), pos_feature_tuples=[]),
+            FeaturesBagField(sp.csr_matrix(np.array([10, 9, 10, 6, 8])).tocsc(), pos_feature_tuples=[]),
+            FeaturesBagField(sp.csr_matrix(np.array([12, 7, 10, 5, 2])).tocsc(), pos_feature_tuples=[])
+        ]
+
+        output = SkLearnTruncatedSVD(n_components=2, random_state=42, batch_size=2).process(input)
+        expected = SkLearnTruncatedSVD(n_components=2, random_state=42).apply_processing(
+            sp.vstack([x.value for x in input], format='csr'))
+
+        self.assertIsInstance(output[0], EmbeddingField)
+        self.assertTrue(all(out.value.shape == (2,) for out in output))
+        np.testing.assert_array_almost_equal(np.vstack([out.value for out in output]), expected)
+
+        output = SkLearnSparseRandomProjections(n_components=2, random_state=42, batch_size=2).process(input)
+        self.assertTrue(all(isinstance(out.value, np.ndarray) and out.value.shape == (2,) for out in output))
+
+        with self.assertRaises(ValueError):
+            SkLearnIncrementalPCA(batch_size=0)
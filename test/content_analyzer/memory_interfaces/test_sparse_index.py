@@ -0,0 +1,232 @@
+import os
+import pickle
+from unittest import TestCase
+
+import numpy as np
+
+from clayrs.content_analyzer.memory_interfaces import KeywordIndex, SearchIndex, SparseKeywordIndex, \
+    SparseSearchIndex
+from clayrs.content_analyzer.memory_interfaces.sparse_index import SparseIndexInterface
+from clayrs.content_analyzer.memory_interfaces.text_interface import DocnumSet
+
+
+def fill_index(index, contents: list):
+    index.init_writing(True)
+    for content in contents:
+        index.new_content()
+        for field_name, field_data in content.items():
+            index.new_field(field_name, field_data)
+        index.serialize_content()
+    index.stop_writing()
+
+
+class TestSparseIndex(TestCase):
+
+    contents = [
+        {"content_id": "0", "test1": "this is a test for the query on the index", "test2": "this is the second field"},
+        {"content_id": "1", "test1": "field"},
+        {"content_id": "2", "test1": "query on the index"},
+        {"content_id": "A3", "test1": "Space travel, the index of SPACE", "test2": "query"},
+    ]
+
+    def test_keyword_serialize(self):
+        index = SparseKeywordIndex("./sparse_keyword")
+        try:
+            index.init_writing()
+            index.new_content()
+            index.new_field("content_id", "0")
+            index.new_field("test1", ["this", "is", "a", "test"])
+            index.new_field("test2", ["this", "is", "a", "test", "for", "the", "Text", "Interface"])
+            self.assertEqual(0, index.serialize_content())
+            index.stop_writing()
+
+            self.assertTrue(SparseIndexInterface.exists("./sparse_keyword"))
+            self.assertEqual(index.get_field("test1", "0"), ["this", "is", "a", "test"])
+            self.assertEqual(index.get_field("test1", 0), ["this", "is", "a", "test"])
+            self.assertEqual(index.get_tf_idf("test1", "0")["this"], 0.0)
+            self.assertEqual(index.get_tf_idf("test1", 0)["this"], 0.0)
+        finally:
+            index.delete()
+
+    def test_init_writing(self):
+        index1 = SparseSearchIndex("./sparse_init_writing")
+        index2 = SparseSearchIndex("./sparse_init_writing")
+        index3 = SparseSearchIndex("./sparse_init_writing")
+
+        try:
+            fill_index(index1, [{"content_id": "0", "init_writing": "test1"}])
+
+            # init_writing with False argument doesn't replace the old index but adds contents to it
+            index2.init_writing(False)
+            index2.new_content()
+            index2.new_field("content_id", "1")
+            index2.new_field("init_writing", "test2")
+            self.assertEqual(1, index2.serialize_content())
+            index2.stop_writing()
+            self.assertEqual(index2.get_field("init_writing", "0"), "test1")
+            self.assertEqual(index2.get_field("init_writing", "1"), "test2")
+            self.assertEqual(2, len(index2.query("init_writing:(test1 test2)", None)))
+
+            # files of the old generation are removed
+            self.assertFalse(any(filename.startswith("0_") for filename in os.listdir("./sparse_init_writing")))
+
+            # init_writing with True argument replaces the old index
+            fill_index(index3, [{"content_id": "0", "init_writing": "test3"}])
+            self.assertEqual(index3.get_field("init_writing", "0"), "test3")
+            with self.assertRaises(IndexError):
+                index3.get_field("init_writing", 1)
+            with self.assertRaises(IndexError):
+                index3.get_field("init_writing", "1")
+
+            # an index which was already opened is reloaded when it changes on disk
+            self.assertEqual(index1.get_field("init_writing", "0"), "test3")
+        finally:
+            index1.delete()
+            index2.delete()
+            index3.delete()
+
+    def test_query(self):
+        index = SparseSearchIndex("sparse_query")
+        try:
+            fill_index(index, self.contents)
+
+            result = index.query("test1:(query on the index)", 2, ["2"], ["0", "1"], True)
+            self.assertEqual(len(result), 1)
+            self.assertEqual(result["0"]["item"]["test1"], "this is a test for the query on the index")
+            self.assertEqual(result["0"]["item"]["test2"], "this is the second field")
+
+            # bare terms are searched in the content_id field
+            result = index.query("a3", 1)
+            self.assertEqual(["A3"], list(result.keys()))
+
+            # weighted term vectors and docnum sets
+            self.assertEqual(index.analyze("test1", "Space, TRAVEL"), ["space", "travel"])
+            candidates = index.docnum_set(["A3", "0", "not in index"])
+            self.assertIsInstance(candidates, DocnumSet)
+            self.assertEqual({0, 3}, candidates)
+            result = index.query({("test1", "space"): 1, ("test1", "index"): 1}, None, candidate_list=candidates)
+            self.assertEqual(["A3", "0"], list(result.keys()))
+
+            # boosts are applied to the scores of terms
+            result = index.query({("test1", "field"): 1}, None)
+            boosted_result = index.query({("test1", "field"): 2}, None)
+            self.assertAlmostEqual(2 * result["1"]["score"], boosted_result["1"]["score"])
+            self.assertEqual(index.query("test1:field^2", None), boosted_result)
+
+            # no item matches if none of the candidates is in the index
+            self.assertEqual({}, index.query("test1:(query on the index)", 2, candidate_list=["not in index"]))
+
+            # terms and fields not in the index match nothing
+            self.assertEqual({}, index.query({("test1", "missing"): 1, ("missing", "field"): 1}, None))
+        finally:
+            index.delete()
+
+    def test_same_results_of_whoosh(self):
+        for sparse_cls, whoosh_cls in [(SparseSearchIndex, SearchIndex), (SparseKeywordIndex, KeywordIndex)]:
+            sparse_index = sparse_cls("sparse_same_results")
+            whoosh_index = whoosh_cls("whoosh_same_results")
+            try:
+                fill_index(sparse_index, self.contents)
+                fill_index(whoosh_index, self.contents)
+
+                for classic_similarity in [True, False]:
+                    for query in ["test1:(query on the index) test2:(query)", "test1:(index)^2 test1:(field)"]:
+                        sparse_result = sparse_index.query(query, None, classic_similarity=classic_similarity)
+                        whoosh_result = whoosh_index.query(query, None, classic_similarity=classic_similarity)
+
+                        self.assertEqual(list(whoosh_result.keys()), list(sparse_result.keys()))
+                        for content_id in whoosh_result:
+                            self.assertEqual(whoosh_result[content_id]["item"], sparse_result[content_id]["item"])
+                            self.assertAlmostEqual(whoosh_result[content_id]["score"],
+                                                   sparse_result[content_id]["score"], places=4)
+
+                        # top results are the same
+                        sparse_top = sparse_index.query(query, 2, classic_similarity=classic_similarity)
+                        self.assertEqual(list(whoosh_result.keys())[:2], list(sparse_top.keys()))
+
+                # batched queries have the same results of the ones of whoosh
+                queries = [{("test1", "index"): 2, ("test1", "field"): 1}, {("test2", "query"): 1},
+                           {("test1", "space"): 1, ("test2", "missing"): 1}]
+                mask_lists = [["0"], None, None]
+                candidate_lists = [None, None, ["A3", "2"]]
+                for classic_similarity in [True, False]:
+                    sparse_results = sparse_index.batch_query(queries, None, mask_lists, candidate_lists,
+                                                              classic_similarity)
+                    whoosh_results = whoosh_index.batch_query(queries, None, mask_lists, candidate_lists,
+                                                              classic_similarity)
+                    for sparse_result, whoosh_result in zip(sparse_results, whoosh_results):
+                        self.assertEqual(list(whoosh_result.keys()), list(sparse_result.keys()))
+                        for content_id in whoosh_result:
+                            self.assertAlmostEqual(whoosh_result[content_id]["score"],
+                                                   sparse_result[content_id]["score"], places=4)
+
+                # whoosh stores term vectors (needed for the tf-idf) only for the keyword index
+                if whoosh_cls is KeywordIndex:
+                    self.assertEqual(whoosh_index.get_tf_idf("test1", 0), sparse_index.get_tf_idf("test1", 0))
+            finally:
+                sparse_index.delete()
+                whoosh_index.delete()
+
+    def test_same_results_of_whoosh_long_fields(self):
+        # whoosh stores field lengths quantized to a byte, which changes the BM25F scores of fields longer than 10
+        # terms: the sparse index must quantize lengths in the same way
+        rng = np.random.default_rng(42)
+        words = ["space", "travel", "index", "query", "field", "plot", "movie", "jungle", "game", "board"]
+        contents = [{"content_id": f"tt{i}", "Plot": " ".join(rng.choice(words, size=rng.integers(0, 60)))}
+                    for i in range(50)]
+
+        sparse_index = SparseSearchIndex("sparse_long_fields")
+        whoosh_index = SearchIndex("whoosh_long_fields")
+        try:
+            fill_index(sparse_index, contents)
+            fill_index(whoosh_index, contents)
+
+            for query in ["Plot:(space travel)", "Plot:(jungle)^2 Plot:(board game)"]:
+                sparse_result = sparse_index.query(query, None, classic_similarity=False)
+                whoosh_result = whoosh_index.query(query, None, classic_similarity=False)
+
+                self.assertEqual(list(whoosh_result.keys()), list(sparse_result.keys()))
+                for content_id in whoosh_result:
+                    self.assertAlmostEqual(whoosh_result[content_id]["score"], sparse_result[content_id]["score"],
+                                           places=4)
+        finally:
+            sparse_index.delete()
+            whoosh_index.delete()
+
+    def test_batch_query(self):
+        index = SparseSearchIndex("sparse_batch_query")
+        try:
+            fill_index(index, self.contents)
+
+            queries = [{("test1", "index"): 1, ("test1", "query"): 0.5}, {("test1", "missing"): 1},
+                       {("test2", "query"): 1, ("test1", "field"): 2}, {("test1", "index"): 1}]
+
+            # queries are scored in more than one block
+            for block_size in [1, 3, 256]:
+                index.BATCH_BLOCK_SIZE = block_size
+                for results_number in [None, 2]:
+                    results = index.batch_query(queries, results_number, [["0"], None, None, None],
+                                                [None, None, None, index.docnum_set(["2", "A3"])])
+
+                    self.assertEqual(len(queries), len(results))
+                    self.assertEqual(index.query(queries[0], results_number, mask_list=["0"]), results[0])
+                    self.assertEqual({}, results[1])
+                    self.assertEqual(index.query(queries[2], results_number), results[2])
+                    self.assertEqual(index.query(queries[3], results_number, candidate_list=["2", "A3"]), results[3])
+        finally:
+            index.delete()
+
+    def test_pickle(self):
+        index = SparseSearchIndex("sparse_pickle")
+        try:
+            fill_index(index, self.contents)
+
+            with index:
+                index.get_field("test1", "0")
+
+                unpickled_index = pickle.loads(pickle.dumps(index))
+                self.assertEqual(unpickled_index, index)
+                self.assertEqual(unpickled_index.get_field("test1", "0"), index.get_field("test1", "0"))
+                unpickled_index.close()
+        finally:
+            index.delete()
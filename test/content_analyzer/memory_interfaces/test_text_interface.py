@@ -1,6 +1,11 @@
+import pickle
+import threading
 from unittest import TestCase
 
+from whoosh.scoring import TF_IDF
+
 from clayrs.content_analyzer.memory_interfaces import KeywordIndex, SearchIndex
+from clayrs.content_analyzer.memory_interfaces.text_interface import DocnumSet
 
 
 class TestIndexInterface(TestCase):
@@ -33,6 +38,50 @@ class TestIndexInterface(TestCase):
         finally:
             index.delete()
 
+    def test_add_documents(self):
+        # documents are more than the ones sent to each process at once, so that processes index many batches
+        documents = [{"content_id": str(i), "test1": f"document number {i}", "test2": f"text {i}"}
+                     for i in range(350)]
+
+        for procs, multisegment in [(1, False), (2, False), (4, False), (2, True)]:
+            index = SearchIndex("./add_documents", procs=procs, multisegment=multisegment)
+            try:
+                index.init_writing(True)
+                self.assertEqual([0], index.add_documents([{"content_id": "first", "test1": "first document"}]))
+                positions = index.add_documents(documents)
+                self.assertCountEqual(list(range(1, 351)), positions)
+
+                # fields not in any of the documents already serialized are added to the schema
+                index.new_content()
+                index.new_field("content_id", "last")
+                index.new_field("test3", "last document")
+                self.assertEqual(351, index.serialize_content())
+                index.stop_writing()
+
+                # each position refers to the document it was returned for
+                for document, position in zip(documents, positions):
+                    self.assertEqual(document["test1"], index.get_field("test1", position))
+                    self.assertEqual(document["test2"], index.get_field("test2", position))
+
+                self.assertEqual(index.get_field("test1", "first"), "first document")
+                self.assertEqual(index.get_field("test1", "7"), "document number 7")
+                self.assertEqual(index.get_field("test3", "last"), "last document")
+                self.assertEqual(351, len(index.query("test1:(document)", None)))
+            finally:
+                index.delete()
+
+        # documents without a distinct content id are indexed in the order in which they are passed
+        index = SearchIndex("./add_documents", procs=2)
+        try:
+            index.init_writing(True)
+            documents = [{"test1": f"document number {i}"} for i in range(150)]
+            self.assertEqual(list(range(150)), index.add_documents(documents))
+            index.stop_writing()
+
+            self.assertEqual("document number 120", index.get_field("test1", 120))
+        finally:
+            index.delete()
+
     def test_init_writing(self):
         index1 = SearchIndex("./init_writing")
         index2 = SearchIndex("./init_writing")
@@ -141,6 +190,158 @@ class TestIndexInterface(TestCase):
             result = index.query("test1:(query on the index)", 2, ["2"], ["0", "1"], True)
             self.assertEqual(len(result), 1)
             self.assertEqual(result["0"]["item"]["test1"], "this is a test for the query on the index")
+
+            # test for querying the index with a weighted term vector
+            self.assertEqual(index.analyze("test1", "Query, on the INDEX"), ["query", "on", "the", "index"])
+            weighted_terms = {("test1", term): 1 for term in index.analyze("test1", "query on the index")}
+            result = index.query(weighted_terms, 2, ["2"], ["0", "1"], True)
+            self.assertEqual(len(result), 1)
+            self.assertEqual(result["0"]["item"]["test1"], "this is a test for the query on the index")
+
+            # test for querying the index with docnum sets as mask and candidates
+            mask = index.docnum_set(["2"])
+            candidates = index.docnum_set(["0", "1", "not in index"])
+            self.assertIsInstance(candidates, DocnumSet)
+            self.assertEqual({0, 1}, candidates)
+            result = index.query(weighted_terms, 2, mask, candidates, True)
+            self.assertEqual(["0"], list(result.keys()))
+
+            # no item matches if none of the candidates is in the index
+            self.assertEqual({}, index.query(weighted_terms, 2, candidate_list=["not in index"]))
+            self.assertEqual({}, index.query("test1:(query on the index)", 2, candidate_list=["not in index"]))
+            self.assertEqual({}, index.query(weighted_terms, 2, candidate_list=DocnumSet()))
+
+            # the weight of each term boosts its score
+            result = index.query({("test1", "field"): 1}, None)
+            boosted_result = index.query({("test1", "field"): 2}, None)
+            self.assertAlmostEqual(2 * result["1"]["score"], boosted_result["1"]["score"])
+        finally:
+            index.delete()
+
+
+    def test_batch_query(self):
+        index = SearchIndex("./batch_query")
+        try:
+            index.init_writing(True)
+            index.add_documents([
+                {"content_id": "0", "test1": "this is a test for the query on the index"},
+                {"content_id": "1", "test1": "field"},
+                {"content_id": "2", "test1": "query on the index"},
+                {"content_id": "3", "test1": "space travel, the index of space"}])
+            index.stop_writing()
+
+            queries = [{("test1", "query"): 1, ("test1", "index"): 0.5},
+                       {("test1", "space"): 2, ("test1", "field"): 1, ("missing", "field"): 1},
+                       {("test1", "missing"): 1},
+                       {("test1", "index"): 1}]
+            mask_lists = [None, ["1"], None, index.docnum_set(["0"])]
+            candidate_lists = [["0", "1", "2"], None, None, None]
+
+            for classic_similarity in [True, False]:
+                for results_number in [None, 1]:
+                    results = index.batch_query(queries, results_number, mask_lists, candidate_lists,
+                                                classic_similarity)
+
+                    # results of each query are the same of the ones of the single query
+                    self.assertEqual(len(queries), len(results))
+                    for query, mask_list, candidate_list, query_results in zip(queries, mask_lists, candidate_lists,
+                                                                               results):
+                        expected = index.query(query, results_number, mask_list, candidate_list, classic_similarity)
+                        self.assertEqual(list(expected.keys()), list(query_results.keys()))
+                        for content_id in expected:
+                            self.assertEqual(expected[content_id]["item"], query_results[content_id]["item"])
+                            self.assertAlmostEqual(expected[content_id]["score"], query_results[content_id]["score"])
+
+            results = index.batch_query(queries, None, mask_lists, candidate_lists)
+            self.assertEqual(["0", "2"], list(results[0].keys()))
+            self.assertEqual(["3"], list(results[1].keys()))
+            self.assertEqual({}, results[2])
+            self.assertEqual(["2", "3"], list(results[3].keys()))
+        finally:
+            index.delete()
+
+    def test_persistent_reader(self):
+        index = SearchIndex("persistent_reader")
+        try:
+            index.init_writing()
+            index.new_content()
+            index.new_field("content_id", "0")
+            index.new_field("test1", "first content")
+            index.serialize_content()
+            index.stop_writing()
+
+            with index:
+                # the same searcher is re-used by all calls of the same thread
+                searcher = index._get_searcher()
+                self.assertEqual(index.get_field("test1", "0"), "first content")
+                self.assertIs(searcher, index._get_searcher())
+
+                # each weighting has its own searcher, but the reader is shared
+                tfidf_searcher = index._get_searcher(TF_IDF)
+                self.assertIsNot(searcher, tfidf_searcher)
+                self.assertIs(searcher.reader(), tfidf_searcher.reader())
+
+                # each thread has its own searcher
+                other_thread_searcher = []
+                thread = threading.Thread(target=lambda: other_thread_searcher.append(index._get_searcher()))
+                thread.start()
+                thread.join()
+                self.assertIsNot(searcher, other_thread_searcher[0])
+
+                # the reader is refreshed when the index changes
+                index.init_writing()
+                index.new_content()
+                index.new_field("content_id", "1")
+                index.new_field("test1", "second content")
+                index.serialize_content()
+                index.stop_writing()
+
+                self.assertEqual(index.get_field("test1", "1"), "second content")
+                self.assertIsNot(searcher, index._get_searcher())
+                self.assertEqual(len(index.query("test1:(content)", None)), 2)
+
+            # the index is opened again if it is read after being closed
+            self.assertEqual(index.get_field("test1", "0"), "first content")
         finally:
             index.delete()
 
+    def test_query_case_sensitive_ids(self):
+        index = SearchIndex("case_sensitive_ids")
+        try:
+            index.init_writing()
+            for content_id in ["A000", "a000"]:
+                index.new_content()
+                index.new_field("content_id", content_id)
+                index.new_field("test1", "same text")
+                index.serialize_content()
+            index.stop_writing()
+
+            # content ids are masked and filtered exactly as they are stored
+            result = index.query({("test1", "text"): 1}, None, mask_list=["A000"])
+            self.assertEqual(["a000"], list(result.keys()))
+
+            result = index.query({("test1", "text"): 1}, None, candidate_list=["A000"])
+            self.assertEqual(["A000"], list(result.keys()))
+        finally:
+            index.delete()
+
+    def test_pickle_opened_index(self):
+        index = SearchIndex("pickle_index")
+        try:
+            index.init_writing()
+            index.new_content()
+            index.new_field("content_id", "0")
+            index.new_field("test1", "first content")
+            index.serialize_content()
+            index.stop_writing()
+
+            index.open()
+            index.get_field("test1", "0")
+
+            unpickled_index = pickle.loads(pickle.dumps(index))
+            self.assertEqual(unpickled_index, index)
+            self.assertEqual(unpickled_index.get_field("test1", "0"), "first content")
+
+            unpickled_index.close()
+        finally:
+            index.delete()
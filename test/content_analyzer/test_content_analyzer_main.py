@@ -1,7 +1,7 @@
 import os
 import shutil
 import unittest
-from unittest import TestCase
+from unittest import TestCase, mock
 import lzma
 import pickle
 import numpy as np
@@ -9,6 +9,7 @@ import scipy.sparse
 
 from clayrs.content_analyzer.exogenous_properties_retrieval import PropertiesFromDataset
 from clayrs.content_analyzer import ContentAnalyzer, FieldConfig, ExogenousConfig, ItemAnalyzerConfig
+from clayrs.content_analyzer.content_analyzer_main import ContentsProducer
 from clayrs.content_analyzer.content_representation.content import FeaturesBagField, \
     EmbeddingField, IndexField, PropertiesDict
 from clayrs.content_analyzer.field_content_production_techniques import OriginalData
@@ -18,7 +19,8 @@ from clayrs.content_analyzer.field_content_production_techniques.embedding_techn
 from clayrs.content_analyzer.field_content_production_techniques.tf_idf import SkLearnTfIdf
 from clayrs.content_analyzer.information_processor import NLTK
 from clayrs.content_analyzer.memory_interfaces import SearchIndex, KeywordIndex
-from clayrs.content_analyzer.raw_information_source import JSONFile
+from clayrs.content_analyzer.raw_information_source import JSONFile, SpooledSource
+from clayrs.utils.load_content import load_content_instance
 from test import dir_test_files
 
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -99,6 +101,69 @@ class TestContentsProducer(TestCase):
             config.add_single_exogenous(config_2)
             ContentAnalyzer(config).fit()
 
+    def test_create_content_single_read(self):
+        # the raw source must be read only once regardless of the number of field configs and exogenous techniques
+        class CountingJSONFile(JSONFile):
+            n_reads = 0
+
+            def __iter__(self):
+                CountingJSONFile.n_reads += 1
+                return super().__iter__()
+
+        movies_ca_config = ItemAnalyzerConfig(
+            source=CountingJSONFile(movies_info_reduced),
+            id='imdbID',
+            output_directory="movielens_test_single_read",
+        )
+
+        movies_ca_config.add_multiple_config(
+            field_name='Title',
+            config_list=[FieldConfig(OriginalData()), FieldConfig(SkLearnTfIdf())])
+        movies_ca_config.add_single_config(
+            field_name='Year',
+            field_config=FieldConfig(OriginalData()))
+        movies_ca_config.add_single_exogenous(ExogenousConfig(PropertiesFromDataset(field_name_list=['Title'])))
+
+        contents_producer = ContentsProducer.get_instance()
+        contents_producer.set_config(movies_ca_config)
+
+        # only the fields used by the id, the field configs and the exogenous techniques are spooled
+        spool = contents_producer._spool_source()
+        self.assertCountEqual(['imdbID', 'Title', 'Year'], spool.fields)
+        spool.close()
+        CountingJSONFile.n_reads = 0
+
+        contents = contents_producer.create_contents()
+
+        self.assertEqual(1, CountingJSONFile.n_reads)
+
+        expected_titles = [raw_content['Title'] for raw_content in JSONFile(movies_info_reduced)]
+        self.assertEqual(expected_titles, [content.get_field('Title')[0].value for content in contents])
+        self.assertEqual(expected_titles,
+                         [content.get_exogenous_representation(0).value['Title'] for content in contents])
+
+    def test_create_contents_spool_removed_on_error(self):
+        movies_ca_config = ItemAnalyzerConfig(
+            source=JSONFile(movies_info_reduced),
+            id='imdbID',
+            output_directory="movielens_test_spool_error",
+        )
+
+        movies_ca_config.add_single_config(
+            field_name='Title',
+            field_config=FieldConfig(OriginalData()))
+
+        contents_producer = ContentsProducer.get_instance()
+        contents_producer.set_config(movies_ca_config)
+
+        # the spool is closed (and its directory removed) even if a technique fails
+        with mock.patch.object(SpooledSource, 'close', autospec=True, side_effect=SpooledSource.close) as mocked_close:
+            with mock.patch.object(OriginalData, 'produce_content', side_effect=ValueError("technique failed")):
+                with self.assertRaises(ValueError):
+                    contents_producer.create_contents()
+
+        self.assertEqual(1, mocked_close.call_count)
+
     def test_create_content_tfidf(self):
         movies_ca_config = ItemAnalyzerConfig(
             source=JSONFile(movies_info_reduced),
@@ -113,16 +178,21 @@ class TestContentsProducer(TestCase):
         content_analyzer = ContentAnalyzer(movies_ca_config)
         content_analyzer.fit()
 
-        for name in os.listdir(THIS_DIR):
-            if os.path.isdir(os.path.join(THIS_DIR, name)) \
-                    and 'movielens_test_tfidf' in str(name):
+        # contents are loaded with load_content_instance since the vocabulary is serialized separately
+        content = load_content_instance("movielens_test_tfidf", 'tt0113497')
+        other_content = load_content_instance("movielens_test_tfidf", 'tt0112281')
 
-                with lzma.open(os.path.join(THIS_DIR, name, 'tt0113497.xz'), 'r') as file:
-                    content = pickle.load(file)
+        self.assertIsInstance(content.get_field("Title")[0], FeaturesBagField)
+        self.assertIsInstance(content.get_field("Title")[0].value, scipy.sparse.csc_matrix)
 
-                    self.assertIsInstance(content.get_field("Title")[0], FeaturesBagField)
-                    self.assertIsInstance(content.get_field("Title")[0].value, scipy.sparse.csc_matrix)
-                    break
+        # the vocabulary is serialized only once and it is shared by all loaded contents
+        self.assertEqual(1, len(os.listdir(os.path.join("movielens_test_tfidf", "vocabularies"))))
+        self.assertIs(content.get_field("Title")[0].vocabulary, other_content.get_field("Title")[0].vocabulary)
+
+        # content stores only the id of the vocabulary
+        with lzma.open(os.path.join("movielens_test_tfidf", 'tt0113497.xz'), 'r') as file:
+            with self.assertRaises(pickle.UnpicklingError):
+                pickle.load(file)
 
     def test_create_content_embedding(self):
         movies_ca_config = ItemAnalyzerConfig(
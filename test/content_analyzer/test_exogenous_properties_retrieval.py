@@ -1,9 +1,14 @@
 import os
+import tempfile
 from unittest import TestCase
 
+import rdflib
+
 from clayrs.content_analyzer import JSONFile
 from clayrs.content_analyzer.exogenous_properties_retrieval import DBPediaMappingTechnique, PropertiesFromDataset, \
     BabelPyEntityLinking
+from clayrs.content_analyzer.utils.sparql_endpoint import LocalSPARQLEndpoint
+from test.content_analyzer.utils.test_entity_linking_client import StubLinkingClient
 from test import dir_test_files
 
 source_path = os.path.join(dir_test_files, 'test_dbpedia', 'movies_info_reduced.json')
@@ -170,6 +175,85 @@ class TestDBPediaMappingTechnique(TestCase):
             DBPediaMappingTechnique("dbo:not_exists", "Title")
 
 
+local_dbpedia_ttl = """
+@prefix dbo: <http://dbpedia.org/ontology/> .
+@prefix dbr: <http://dbpedia.org/resource/> .
+@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+
+dbo:director rdfs:domain dbo:Film ; rdfs:label "film director"@en .
+dbo:starring rdfs:domain dbo:Work ; rdfs:label "starring"@en .
+dbo:cinematography rdfs:domain dbo:Film ; rdfs:label "cinematography"@en .
+dbo:Film rdfs:subClassOf dbo:Work .
+
+dbr:Jumanji rdf:type dbo:Film ; rdfs:label "Jumanji"@en ;
+    dbo:director dbr:Joe_Johnston ;
+    dbo:starring dbr:Robin_Williams, dbr:Kirsten_Dunst ;
+    dbo:cinematography dbr:Thomas_E._Ackerman .
+
+dbr:Inception rdf:type dbo:Film ; rdfs:label "Inception"@en ;
+    dbo:director dbr:Christopher_Nolan .
+
+dbr:Demon_Island rdf:type dbo:Film ; rdfs:label "Demon Island"@en .
+"""
+
+
+class TestDBPediaMappingTechniqueLocalEndpoint(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.raw_source = JSONFile(source_path)
+        cls.graph = rdflib.Graph().parse(data=local_dbpedia_ttl, format='turtle')
+
+    def test_get_properties(self):
+        endpoint = LocalSPARQLEndpoint(self.graph)
+        mapp = DBPediaMappingTechnique('dbo:Film', 'Title', endpoint=endpoint, batch_size=2, max_workers=2)
+
+        results = mapp.get_properties(self.raw_source)
+
+        self.assertEqual(5, len(results))
+
+        prop1 = results[0]
+        self.assertEqual(prop1.value["film director"], "http://dbpedia.org/resource/Joe_Johnston")
+        self.assertEqual(prop1.value["cinematography"], "http://dbpedia.org/resource/Thomas_E._Ackerman")
+        self.assertCountEqual(prop1.value["starring"], ["http://dbpedia.org/resource/Robin_Williams",
+                                                        "http://dbpedia.org/resource/Kirsten_Dunst"])
+
+        prop2 = results[1]
+        self.assertEqual({"film director": "http://dbpedia.org/resource/Christopher_Nolan"}, prop2.value)
+
+        # mapped content with no property
+        self.assertEqual({}, results[2].value)
+
+        # not mapped contents
+        self.assertEqual({}, results[3].value)
+        self.assertEqual({}, results[4].value)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, 'sparql_cache.pkl')
+
+            mapp = DBPediaMappingTechnique('dbo:Film', 'Title', endpoint=LocalSPARQLEndpoint(self.graph, cache_path),
+                                           batch_size=2)
+            expected = mapp.get_properties(self.raw_source)
+
+            self.assertTrue(os.path.isfile(cache_path))
+
+            # a new run with an empty graph retrieves the same results from the persisted cache
+            endpoint = LocalSPARQLEndpoint(rdflib.Graph(identifier=self.graph.identifier), cache_path)
+            misses_before = endpoint.cache.stats()['misses']
+
+            mapp = DBPediaMappingTechnique('dbo:Film', 'Title', endpoint=endpoint, batch_size=2)
+            result = mapp.get_properties(self.raw_source)
+
+            self.assertEqual([prop.value for prop in expected], [prop.value for prop in result])
+            self.assertEqual(misses_before, endpoint.cache.stats()['misses'])
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            DBPediaMappingTechnique('dbo:Film', 'Title', endpoint=LocalSPARQLEndpoint(self.graph), batch_size=0)
+
+
 class TestPropertiesFromDataset(TestCase):
     def test_get_properties(self):
         raw_source = JSONFile(source_path)
@@ -269,3 +353,31 @@ class TestBabelPyEntityLinking(TestCase):
 
         entities_content_5 = result[4].value
         self.assertEqual(len(entities_content_5), 0)
+
+    def test_get_properties_injected_client(self):
+        client = StubLinkingClient()
+        result = BabelPyEntityLinking('Title', client=client, max_workers=2).get_properties(self.raw_source)
+
+        self.assertEqual(5, len(result))
+        self.assertEqual(['Jumanji'], list(result[0].value.keys()))
+        self.assertEqual({'babelSynsetID': '', 'DBPediaURL': '', 'BabelNetURL': '', 'score': '',
+                          'coherenceScore': '', 'globalScore': '', 'source': ''}, result[0].value['Jumanji'])
+        self.assertEqual(['Léon:', 'The', 'Professional'], list(result[3].value.keys()))
+        self.assertEqual({}, result[4].value)
+
+        # contents are linked only once across runs
+        BabelPyEntityLinking('Title', client=client).get_properties(self.raw_source)
+        self.assertEqual(5, client.n_requests)
+
+    def test_get_properties_duplicate_texts(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source_file = os.path.join(tmp_dir, 'source.json')
+            with open(source_file, 'w') as f:
+                f.write('[{"Title": "Jumanji"}, {"Title": "Inception"}, {"Title": "Jumanji"}]')
+
+            client = StubLinkingClient()
+            result = BabelPyEntityLinking('Title', client=client).get_properties(JSONFile(source_file))
+
+            self.assertEqual(2, client.n_requests)
+            self.assertEqual(result[0].value, result[2].value)
+            self.assertIn('Inception', result[1].value)
@@ -1,7 +1,9 @@
+import json
 import os
+import tempfile
 from unittest import TestCase
 
-from clayrs.content_analyzer.raw_information_source import SQLDatabase, CSVFile, JSONFile, DATFile
+from clayrs.content_analyzer.raw_information_source import CSVFile, JSONFile, DATFile, SpooledSource
 from test import dir_test_files
 
 json_file = os.path.join(dir_test_files, "movies_info_reduced.json")
@@ -221,3 +223,106 @@ class TestDATFile(TestCase):
 
         dat = DATFile(dat_file)
         self.assertEqual(70, len(dat))
+
+
+class TestIndexedSource(TestCase):
+
+    def test_random_access(self):
+        for source in [CSVFile(csv_w_header), CSVFile(csv_no_header, has_header=False),
+                       CSVFile(tsv_file, separator='\t'), JSONFile(json_file), DATFile(dat_file)]:
+            all_contents = list(source)
+
+            self.assertEqual(len(all_contents), len(source))
+            self.assertEqual(all_contents[0], source[0])
+            self.assertEqual(all_contents[-1], source[-1])
+            self.assertEqual(all_contents[1:3], source[1:3])
+
+            with self.assertRaises(IndexError):
+                source[len(all_contents)]
+
+    def test_json_lines(self):
+        with open(json_file) as f:
+            expected = json.load(f, parse_int=str, parse_float=str)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jsonl_file = os.path.join(tmp_dir, 'movies_info_reduced.jsonl')
+            with open(jsonl_file, 'w') as f:
+                for content in expected:
+                    f.write(json.dumps(content) + '\n')
+                # empty lines are ignored
+                f.write('\n')
+
+            source = JSONFile(jsonl_file)
+
+            self.assertTrue(source.json_lines)
+            self.assertEqual(expected, list(source))
+            self.assertEqual(20, len(source))
+            self.assertEqual(expected[7], source[7])
+
+        self.assertFalse(JSONFile(json_file).json_lines)
+
+    def test_index_rebuilt_on_change(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_file = os.path.join(tmp_dir, 'source.csv')
+            with open(csv_file, 'w') as f:
+                f.write('id,description\n1,"multi\nline"\n2,second\n')
+
+            source = CSVFile(csv_file)
+
+            # quoted new lines don't create new contents
+            self.assertEqual(2, len(source))
+            self.assertEqual({'id': '1', 'description': 'multi\nline'}, source[0])
+
+            with open(csv_file, 'a') as f:
+                f.write('3,third\n')
+
+            self.assertEqual(3, len(source))
+            self.assertEqual({'id': '3', 'description': 'third'}, source[2])
+
+
+class TestSpooledSource(TestCase):
+
+    def test_spool(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_file = os.path.join(tmp_dir, 'source.jsonl')
+            with open(json_file, 'w') as f:
+                f.write('{"id": "1", "title": "first", "plot": "plot 1"}\n')
+                f.write('{"id": "2", "plot": "plot 2"}\n')
+                f.write('{"id": "3", "title": "third", "plot": "plot 3", "year": "1995"}\n')
+
+            source = JSONFile(json_file)
+
+            spool = SpooledSource(source, fields=['id', 'title'])
+
+            # only the specified fields are kept, missing fields stay missing
+            expected = [{'id': '1', 'title': 'first'}, {'id': '2'}, {'id': '3', 'title': 'third'}]
+            self.assertEqual(expected, list(spool))
+            self.assertEqual(3, len(spool))
+            self.assertEqual(expected[2], spool[-1])
+            self.assertEqual(expected[1:], spool[1:])
+            self.assertEqual(source.file_path, spool.file_path)
+            self.assertEqual(source.representative_name, spool.representative_name)
+
+            # the spool doesn't read the file anymore
+            os.remove(json_file)
+            self.assertEqual(expected, list(spool))
+            self.assertEqual(expected[0], spool[0])
+
+            # columns are stored on disk and deleted when the spool is closed
+            spool_dir = os.path.dirname(spool._SpooledSource__columns['id'][0])
+            self.assertEqual(2, len(os.listdir(spool_dir)))
+            spool.close()
+            self.assertFalse(os.path.isdir(spool_dir))
+
+    def test_spool_all_fields(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_file = os.path.join(tmp_dir, 'source.jsonl')
+            with open(json_file, 'w') as f:
+                f.write('{"id": "1", "title": "first"}\n')
+                f.write('{"id": "2", "year": "1995"}\n')
+
+            spool = SpooledSource(JSONFile(json_file))
+
+            self.assertEqual(list(JSONFile(json_file)), list(spool))
+            self.assertEqual(['id', 'title', 'year'], spool.fields)
+            self.assertEqual({'id': '2', 'year': '1995'}, spool[1])
@@ -0,0 +1,57 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from clayrs.content_analyzer.utils.cached_lookup import CachedLookup
+
+
+class TestCachedLookup(TestCase):
+
+    def test_get_or_compute(self):
+        lookup = CachedLookup()
+        requests = []
+
+        def compute_fn():
+            requests.append("the Jumanji movie")
+            return ['Jumanji']
+
+        self.assertEqual(['Jumanji'], lookup.get_or_compute("service", "the Jumanji movie", compute_fn))
+        self.assertEqual(['Jumanji'], lookup.get_or_compute("service", "the Jumanji movie", compute_fn))
+
+        # second request is served by the cache
+        self.assertEqual(1, len(requests))
+        self.assertEqual(1, lookup.cache.stats()['hits'])
+
+        # the same request to a different service is not served by the cache
+        self.assertEqual(['Jumanji'], lookup.get_or_compute("other service", "the Jumanji movie", compute_fn))
+        self.assertEqual(2, len(requests))
+
+    def test_failed_request(self):
+        lookup = CachedLookup()
+
+        def failing_compute_fn():
+            raise ConnectionError("unreachable")
+
+        with self.assertRaises(ConnectionError):
+            lookup.get_or_compute("service", "the Jumanji movie", failing_compute_fn)
+
+        # failed requests are not cached
+        self.assertEqual(0, len(lookup.cache))
+
+    def test_persisted_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, 'cache', 'lookup_cache.pkl')
+
+            lookup = CachedLookup(cache_path)
+            lookup.get_or_compute("service", "the Jumanji movie", lambda: ['Jumanji'])
+            lookup.save()
+            self.assertTrue(os.path.isfile(cache_path))
+
+            lookup = CachedLookup(cache_path)
+            self.assertEqual(cache_path, lookup.cache_path)
+            self.assertEqual(['Jumanji'], lookup.get_or_compute("service", "the Jumanji movie", lambda: None))
+
+        # without a cache path nothing is persisted
+        lookup = CachedLookup()
+        self.assertIsNone(lookup.cache_path)
+        lookup.save()
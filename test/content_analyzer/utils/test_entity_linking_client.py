@@ -0,0 +1,110 @@
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+from unittest import TestCase
+
+from clayrs.content_analyzer.utils.entity_linking_client import EntityLinkingClient, BabelfyLinkingClient
+
+
+class StubLinkingClient(EntityLinkingClient):
+    """
+    Client which links each word starting with an uppercase letter. The first `n_failures` requests fail with the
+    exception passed as argument
+    """
+
+    def __init__(self, n_failures: int = 0, failure: Exception = ConnectionError("unreachable"), **kwargs):
+        super().__init__(**kwargs)
+        self.n_failures = n_failures
+        self.failure = failure
+        self.n_requests = 0
+        self.requests_time = []
+
+        self._requests_lock = threading.Lock()
+
+    @property
+    def service_name(self) -> str:
+        return "stub"
+
+    def _link(self, text):
+        with self._requests_lock:
+            self.n_requests += 1
+            self.requests_time.append(time.monotonic())
+            if self.n_requests <= self.n_failures:
+                raise self.failure
+
+        return [{'text': word} for word in text.split() if word[0].isupper()]
+
+
+class TestEntityLinkingClient(TestCase):
+
+    def test_link(self):
+        client = StubLinkingClient()
+
+        self.assertEqual([{'text': 'Jumanji'}], client.link("the Jumanji movie"))
+        self.assertEqual([{'text': 'Jumanji'}], client.link("the Jumanji movie"))
+
+        # second request is served by the cache
+        self.assertEqual(1, client.n_requests)
+        self.assertEqual(1, client.cache.stats()['hits'])
+
+    def test_persisted_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, 'linking_cache.pkl')
+
+            client = StubLinkingClient(cache_path=cache_path)
+            client.link("the Jumanji movie")
+            client.save_cache()
+
+            client = StubLinkingClient(cache_path=cache_path)
+            self.assertEqual([{'text': 'Jumanji'}], client.link("the Jumanji movie"))
+            self.assertEqual(0, client.n_requests)
+
+    def test_retry(self):
+        client = StubLinkingClient(n_failures=2, max_retries=2, backoff_factor=0)
+        self.assertEqual([{'text': 'Inception'}], client.link("Inception"))
+        self.assertEqual(3, client.n_requests)
+
+        client = StubLinkingClient(n_failures=3, max_retries=2, backoff_factor=0)
+        with self.assertRaises(ConnectionError):
+            client.link("Inception")
+
+        # too many requests is retried, other client errors are not
+        too_many_requests = urllib.error.HTTPError("url", 429, "Too Many Requests", None, None)
+        client = StubLinkingClient(n_failures=1, failure=too_many_requests, max_retries=1, backoff_factor=0)
+        self.assertEqual([{'text': 'Inception'}], client.link("Inception"))
+
+        forbidden = urllib.error.HTTPError("url", 403, "Forbidden", None, None)
+        client = StubLinkingClient(n_failures=1, failure=forbidden, max_retries=1, backoff_factor=0)
+        with self.assertRaises(urllib.error.HTTPError):
+            client.link("Inception")
+        self.assertEqual(1, client.n_requests)
+
+    def test_rate_limit(self):
+        client = StubLinkingClient(requests_per_second=20)
+
+        threads = [threading.Thread(target=client.link, args=(f"Text {i}",)) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        requests_time = sorted(client.requests_time)
+        gaps = [t2 - t1 for t1, t2 in zip(requests_time, requests_time[1:])]
+
+        # requests are spaced by at least 1/20 seconds (with some tolerance for the timer resolution)
+        self.assertEqual(5, client.n_requests)
+        self.assertTrue(all(gap >= 0.04 for gap in gaps))
+
+    def test_invalid_rate_limit(self):
+        with self.assertRaises(ValueError):
+            StubLinkingClient(requests_per_second=0)
+
+
+class TestBabelfyLinkingClient(TestCase):
+
+    def test_service_name(self):
+        # cache of clients for different languages must not be shared
+        self.assertNotEqual(BabelfyLinkingClient(lang="EN").service_name,
+                            BabelfyLinkingClient(lang="IT").service_name)
@@ -0,0 +1,105 @@
+import os
+import shutil
+import unittest
+
+from clayrs.content_analyzer.utils.memo_table import MemoTable
+
+
+class TestMemoTable(unittest.TestCase):
+
+    def test_get_or_compute(self):
+        table = MemoTable()
+
+        n_calls = []
+
+        def compute():
+            n_calls.append(1)
+            return 'correct'
+
+        self.assertEqual('correct', table.get_or_compute('korrect', compute))
+        self.assertEqual('correct', table.get_or_compute('korrect', compute))
+
+        # compute function must be called only on the first miss
+        self.assertEqual(1, len(n_calls))
+
+        stats = table.stats()
+        self.assertEqual(1, stats['size'])
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(0.5, stats['hit_rate'])
+
+    def test_bounded(self):
+        table = MemoTable(maxsize=2)
+
+        table.get_or_compute('a', lambda: 1)
+        table.get_or_compute('b', lambda: 2)
+
+        # 'a' becomes the most recently used, so 'b' will be evicted
+        table.get_or_compute('a', lambda: 1)
+        table.get_or_compute('c', lambda: 3)
+
+        self.assertEqual(2, len(table))
+        self.assertIn('a', table)
+        self.assertIn('c', table)
+        self.assertNotIn('b', table)
+        self.assertEqual(1, table.stats()['evictions'])
+
+        with self.assertRaises(ValueError):
+            MemoTable(maxsize=0)
+
+    def test_resize(self):
+        table = MemoTable(maxsize=3)
+
+        table.get_or_compute('a', lambda: 1)
+        table.get_or_compute('b', lambda: 2)
+        table.get_or_compute('c', lambda: 3)
+
+        # 'a' becomes the most recently used, so 'b' and 'c' will be evicted
+        table.get_or_compute('a', lambda: 1)
+        table.resize(1)
+
+        self.assertEqual(1, len(table))
+        self.assertIn('a', table)
+        self.assertEqual(1, table.maxsize)
+        self.assertEqual(2, table.stats()['evictions'])
+
+        table.resize(None)
+        table.get_or_compute('b', lambda: 2)
+        table.get_or_compute('c', lambda: 3)
+        self.assertEqual(3, len(table))
+
+        with self.assertRaises(ValueError):
+            table.resize(0)
+
+    def test_merge(self):
+        table1 = MemoTable()
+        table1.get_or_compute('a', lambda: 1)
+
+        table2 = MemoTable()
+        table2.get_or_compute('a', lambda: 100)
+        table2.get_or_compute('b', lambda: 2)
+
+        table1.merge(table2)
+
+        # already present entries are not overwritten
+        self.assertEqual(1, table1['a'])
+        self.assertEqual(2, table1['b'])
+        self.assertEqual(3, table1.stats()['misses'])
+
+    def test_save_load(self):
+        dir_memo = 'memo_test_dir'
+        try:
+            table = MemoTable(maxsize=10)
+            table.get_or_compute('a', lambda: 1)
+
+            table.save(os.path.join(dir_memo, 'table.memo'))
+            loaded = MemoTable.load(os.path.join(dir_memo, 'table.memo'))
+
+            self.assertEqual(table, loaded)
+            self.assertEqual(1, loaded.stats()['misses'])
+        finally:
+            shutil.rmtree(dir_memo, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
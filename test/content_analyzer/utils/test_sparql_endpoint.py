@@ -0,0 +1,101 @@
+import os
+import tempfile
+import threading
+from unittest import TestCase
+
+import rdflib
+
+from clayrs.content_analyzer.utils.sparql_endpoint import LocalSPARQLEndpoint, RemoteSPARQLEndpoint
+
+graph_ttl = """
+@prefix ex: <http://example.org/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+
+ex:a rdfs:label "a"@en .
+ex:b rdfs:label "b" .
+ex:c ex:value 3 .
+"""
+
+
+class CountingLocalSPARQLEndpoint(LocalSPARQLEndpoint):
+
+    def __init__(self, graph, cache_path=None):
+        super().__init__(graph, cache_path)
+        self.n_executed = 0
+
+    def _execute(self, query):
+        self.n_executed += 1
+        return super()._execute(query)
+
+
+class TestLocalSPARQLEndpoint(TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.graph = rdflib.Graph().parse(data=graph_ttl, format='turtle')
+
+    def test_query(self):
+        endpoint = LocalSPARQLEndpoint(self.graph)
+
+        result = endpoint.query("SELECT ?s ?label WHERE { ?s rdfs:label ?label } ORDER BY ?s")
+        expected = [{'s': {'type': 'uri', 'value': 'http://example.org/a'},
+                     'label': {'type': 'literal', 'value': 'a', 'xml:lang': 'en'}},
+                    {'s': {'type': 'uri', 'value': 'http://example.org/b'},
+                     'label': {'type': 'literal', 'value': 'b'}}]
+        self.assertEqual(expected, result)
+
+        result = endpoint.query("SELECT ?v WHERE { ?s <http://example.org/value> ?v }")
+        expected = [{'v': {'type': 'typed-literal', 'value': '3',
+                           'datatype': 'http://www.w3.org/2001/XMLSchema#integer'}}]
+        self.assertEqual(expected, result)
+
+    def test_cache(self):
+        query = "SELECT ?s WHERE { ?s rdfs:label ?label }"
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, 'cache', 'sparql_cache.pkl')
+
+            endpoint = CountingLocalSPARQLEndpoint(self.graph, cache_path)
+            expected = endpoint.query(query)
+            endpoint.query(query)
+
+            # same query is executed only once
+            self.assertEqual(1, endpoint.n_executed)
+
+            endpoint.save_cache()
+
+            # results are retrieved from the persisted cache
+            endpoint = CountingLocalSPARQLEndpoint(self.graph, cache_path)
+            self.assertEqual(expected, endpoint.query(query))
+            self.assertEqual(0, endpoint.n_executed)
+
+            # cache is keyed also by the endpoint
+            other_endpoint = CountingLocalSPARQLEndpoint(rdflib.Graph(), cache_path)
+            self.assertEqual([], other_endpoint.query(query))
+            self.assertEqual(1, other_endpoint.n_executed)
+
+    def test_concurrent_queries(self):
+        endpoint = LocalSPARQLEndpoint(self.graph)
+        queries = [f"SELECT ?s WHERE {{ ?s rdfs:label \"{label}\" }}" for label in ['a', 'b'] * 10]
+
+        results = [None] * len(queries)
+
+        def run(i):
+            results[i] = endpoint.query(queries[i])
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(queries))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([[{'s': {'type': 'uri', 'value': 'http://example.org/b'}}]] * 10, results[1::2])
+
+
+class TestRemoteSPARQLEndpoint(TestCase):
+
+    def test_endpoint_name(self):
+        endpoint = RemoteSPARQLEndpoint("http://localhost:8890/sparql")
+
+        self.assertEqual("http://localhost:8890/sparql", endpoint.endpoint_name)
+        self.assertIsNone(endpoint.cache_path)
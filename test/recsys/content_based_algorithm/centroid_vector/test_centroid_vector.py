@@ -1,15 +1,21 @@
+import lzma
 import os
+import pickle
+import tempfile
 import unittest
 from unittest import TestCase
 
+import numpy as np
 import pandas as pd
 
 from clayrs.content_analyzer import Ratings
+from clayrs.content_analyzer.content_representation.content import Content, SimpleField
 from clayrs.recsys.content_based_algorithm.centroid_vector.centroid_vector import CentroidVector
 from clayrs.recsys.content_based_algorithm.contents_loader import LoadedContentsDict
 from clayrs.recsys.content_based_algorithm.exceptions import OnlyNegativeItems, NoRatedItems, \
     NotPredictionAlg, EmptyUserRatings
 from clayrs.recsys.content_based_algorithm.centroid_vector.similarities import CosineSimilarity
+from clayrs.recsys.methodology import AllItemsMethodology, TestRatingsMethodology
 from test import dir_test_files
 
 
@@ -95,6 +101,121 @@ class TestCentroidVector(TestCase):
                                           filter_list=self.filter_list)
         self.assertEqual(len(res_n_recs), n_recs)
 
+    def test_rank_batch(self):
+        movies_dir = os.path.join(dir_test_files, 'complex_contents', 'movies_codified/')
+        users = [self.ratings.user_map[user_id] for user_id in ['A000', 'A001', 'A002', 'A003']]
+
+        for methodology in [AllItemsMethodology(), TestRatingsMethodology()]:
+            methodology.setup(self.ratings, self.ratings)
+
+            for item_field in [{'Genre': ['embedding'], 'imdbRating': [0]},
+                               {'Plot': ['tfidf'], 'Genre': ['tfidf']}]:
+
+                # small batches so that users are ranked in more than one batch
+                alg = CentroidVector(item_field, CosineSimilarity(), threshold=0, rank_batch_size=2)
+
+                users_fit_dict, fit_rank_result = alg.fit_rank(self.ratings, self.ratings, movies_dir, users,
+                                                               n_recs=None, methodology=methodology, num_cpus=1,
+                                                               save_fit=True)
+                rank_result = alg.rank(users_fit_dict, self.ratings, self.ratings, movies_dir, users, n_recs=None,
+                                       methodology=methodology, num_cpus=1)
+                rank_top_result = alg.rank(users_fit_dict, self.ratings, self.ratings, movies_dir, users, n_recs=2,
+                                           methodology=methodology, num_cpus=1)
+
+                # the user with only negative items is skipped
+                self.assertNotIn(self.ratings.user_map['A003'], users_fit_dict)
+                self.assertEqual(0, len(fit_rank_result[3]))
+                self.assertEqual(0, len(rank_result[3]))
+
+                # batched rank is the same of the rank computed for each user
+                for user_idx, user_fit_rank, user_rank, user_top_rank in zip(users[:3], fit_rank_result,
+                                                                             rank_result, rank_top_result):
+                    rank_fn = users_fit_dict[user_idx][0]
+                    filter_list = self.ratings.item_map.convert_seq_int2str(
+                        methodology.filter_single(user_idx, self.ratings, self.ratings).astype(int))
+                    expected = rank_fn(user_idx, self.ratings, self.available_loaded_items, None, filter_list)
+
+                    self.assertTrue(len(expected) > 0)
+                    expected_scores = dict(zip(expected[:, 1], expected[:, 2]))
+                    for result in [user_fit_rank, user_rank]:
+                        self.assertCountEqual(expected_scores.keys(), result[:, 1])
+                        for item_idx, score in zip(result[:, 1], result[:, 2]):
+                            self.assertAlmostEqual(expected_scores[item_idx], score)
+
+                        np.testing.assert_array_equal(np.full(len(result), user_idx), result[:, 0])
+                        self.assertTrue(np.all(np.diff(result[:, 2]) <= 0))
+
+                    np.testing.assert_array_almost_equal(user_rank[:2], user_top_rank)
+
+    def test_fit_batch(self):
+        movies_dir = os.path.join(dir_test_files, 'complex_contents', 'movies_codified/')
+
+        alg = CentroidVector({'Plot': ['tfidf'], 'Genre': ['tfidf']}, CosineSimilarity(), threshold=0)
+        users_fit_dict = alg.fit(self.ratings, movies_dir, num_cpus=1)
+
+        # the user with only negative items is skipped
+        self.assertCountEqual([self.ratings.user_map[user_id] for user_id in ['A000', 'A001', 'A002']],
+                              users_fit_dict.keys())
+
+        # centroids are the same of the ones computed for each user
+        for user_idx, (rank_fn, _) in users_fit_dict.items():
+            user_alg = rank_fn.__self__
+            user_alg.process_rated(user_idx, self.ratings, self.available_loaded_items)
+            expected_centroid = user_alg._positive_rated_features.mean(axis=0)
+
+            np.testing.assert_array_almost_equal(np.asarray(expected_centroid).reshape(-1),
+                                                 user_alg._centroid.toarray().reshape(-1))
+
+        with self.assertRaises(ValueError):
+            CentroidVector({'Plot': 'embedding'}, CosineSimilarity(), rank_batch_size=0)
+
+    def test_fit_batch_dict_representations(self):
+        keywords = {'tt0114576': {'jungle': 2, 'game': 1},
+                    'tt0112453': {'war': 1},
+                    'tt0112896': {'jungle': 1, 'war': 3},
+                    'tt0113041': {'board': 1, 'game': 2},
+                    'tt0113497': {'fire': 1, 'board': 2},
+                    'tt0112641': {'game': 1, 'war': 1},
+                    'tt0112760': {'fire': 2, 'jungle': 1}}
+
+        with tempfile.TemporaryDirectory() as items_dir:
+            for item_id, item_keywords in keywords.items():
+                item = Content(item_id)
+                item.append_field_representation('Keywords', SimpleField(item_keywords), 'bag')
+                with lzma.open(os.path.join(items_dir, item_id + '.xz'), 'wb') as f:
+                    pickle.dump(item, f)
+
+            available_loaded_items = LoadedContentsDict(items_dir)
+            users = [self.ratings.user_map[user_id] for user_id in ['A000', 'A001', 'A002']]
+            methodology = AllItemsMethodology()
+            methodology.setup(self.ratings, self.ratings)
+
+            alg = CentroidVector({'Keywords': 'bag'}, CosineSimilarity(), threshold=0, rank_batch_size=2)
+            users_fit_dict = alg.fit(self.ratings, items_dir, num_cpus=1)
+            rank_result = alg.rank(users_fit_dict, self.ratings, self.ratings, items_dir, users, n_recs=None,
+                                   methodology=methodology, num_cpus=1)
+            _, fit_rank_result = alg.fit_rank(self.ratings, self.ratings, items_dir, users, n_recs=None,
+                                              methodology=methodology, num_cpus=1, save_fit=False)
+
+            self.assertCountEqual(users, users_fit_dict.keys())
+
+            # dicts are vectorized with the positive items of each user only, as if each user was fit on its own
+            for user_idx, user_rank, user_fit_rank in zip(users, rank_result, fit_rank_result):
+                expected_alg = CentroidVector({'Keywords': 'bag'}, CosineSimilarity(), threshold=0)
+                expected_alg.process_rated(user_idx, self.ratings, available_loaded_items)
+                expected_alg.fit_single_user()
+
+                np.testing.assert_array_almost_equal(expected_alg._centroid,
+                                                     users_fit_dict[user_idx][0].__self__._centroid)
+
+                filter_list = self.ratings.item_map.convert_seq_int2str(
+                    methodology.filter_single(user_idx, self.ratings, self.ratings).astype(int))
+                expected = expected_alg.rank_single_user(user_idx, self.ratings, available_loaded_items, None,
+                                                         filter_list)
+
+                np.testing.assert_array_almost_equal(expected, user_rank)
+                np.testing.assert_array_almost_equal(expected, user_fit_rank)
+
     def test_raise_errors(self):
         # Only negative available
         ratings = pd.DataFrame.from_records([
@@ -1,12 +1,14 @@
 import os
 import unittest
-from unittest import TestCase
+from unittest import TestCase, mock
+import numpy as np
 import pandas as pd
 
 from clayrs.content_analyzer import Ratings
 from clayrs.recsys.content_based_algorithm.contents_loader import LoadedContentsIndex
 from clayrs.recsys.content_based_algorithm.exceptions import NotPredictionAlg, OnlyNegativeItems, EmptyUserRatings
 from clayrs.recsys.content_based_algorithm.index_query.index_query import IndexQuery
+from clayrs.recsys.methodology import AllItemsMethodology
 from test import dir_test_files
 
 
@@ -85,6 +87,96 @@ class TestIndexQuery(TestCase):
         res_n_recs = alg.rank_single_user(user_idx, self.ratings, self.available_loaded_items, n_recs, self.filter_list)
         self.assertEqual(len(res_n_recs), n_recs)
 
+    def test_fit_weighted_terms(self):
+        alg = IndexQuery({'Plot': 'index_original'}, threshold=0)
+
+        # two positive documents, rated 2 and 0.5: a term counts once for each document, even if repeated
+        alg._positive_user_docs = [('tt0000001', {'Plot#0#index_original': ['jungle', 'board', 'game', 'jungle']}),
+                                   ('tt0000002', {'Plot#0#index_original': ['board', 'fire']})]
+        alg._scores = [2, 0.5]
+        alg.fit_single_user()
+
+        # terms are sorted by decreasing weight, ties are broken with the term itself
+        expected = [(('Plot#0#index_original', 'board'), 2.5),
+                    (('Plot#0#index_original', 'game'), 2),
+                    (('Plot#0#index_original', 'jungle'), 2),
+                    (('Plot#0#index_original', 'fire'), 0.5)]
+        self.assertEqual(expected, list(alg._weighted_terms.items()))
+
+        # the query of the user is stored in its fit entry
+        rank_fn, predict_fn, weighted_terms = alg._fit_fns()
+        self.assertEqual(dict(expected), weighted_terms)
+        self.assertEqual(dict(expected), rank_fn.__self__._weighted_terms)
+
+    def test_top_n_terms(self):
+        alg = IndexQuery({'Plot': 'index_original'}, threshold=0)
+        alg_top_n = IndexQuery({'Plot': 'index_original'}, threshold=0, top_n_terms=5)
+        user_idx = self.ratings.user_map['A000']
+
+        for index_query in [alg, alg_top_n]:
+            index_query.process_rated(user_idx, self.ratings, self.available_loaded_items)
+            index_query.fit_single_user()
+
+        self.assertEqual(5, len(alg_top_n._weighted_terms))
+        self.assertEqual(list(alg._weighted_terms.items())[:5], list(alg_top_n._weighted_terms.items()))
+
+        res = alg_top_n.rank_single_user(user_idx, self.ratings, self.available_loaded_items,
+                                         recs_number=None, filter_list=self.filter_list)
+        self.assertTrue(len(res) <= len(self.filter_list))
+
+        with self.assertRaises(ValueError):
+            IndexQuery({'Plot': 'index_original'}, top_n_terms=0)
+
+        with self.assertRaises(ValueError):
+            IndexQuery({'Plot': 'index_original'}, rank_batch_size=0)
+
+    def test_build_mask_list(self):
+        alg = IndexQuery({'Plot': 'index_original'}, threshold=0)
+
+        # items to rank which were already seen by the user are not masked
+        mask = alg._build_mask_list(['tt0114576', 'tt0112453', 'tt0113041'], ['tt0112453', 'tt0112641'])
+        self.assertEqual({'tt0114576', 'tt0113041'}, mask)
+
+        mask = alg._build_mask_list(['tt0114576', 'tt0112453'], None)
+        self.assertEqual({'tt0114576', 'tt0112453'}, mask)
+
+    def test_rank_batch(self):
+        index_path = os.path.join(dir_test_files, 'complex_contents', 'index')
+        methodology = AllItemsMethodology().setup(self.ratings, self.ratings)
+        users = [self.ratings.user_map[user_id] for user_id in ['A000', 'A001', 'A002', 'A003']]
+
+        # small batches so that users are ranked in more than one batch
+        alg = IndexQuery({'Plot': ['index_original', 'index_preprocessed']}, threshold=0, rank_batch_size=2)
+
+        # the index opened by fit_rank and rank is closed when they are done
+        with mock.patch.object(LoadedContentsIndex, 'close', autospec=True,
+                               side_effect=LoadedContentsIndex.close) as mocked_close:
+            users_fit_dict, fit_rank_result = alg.fit_rank(self.ratings, self.ratings, index_path, users, n_recs=3,
+                                                           methodology=methodology, num_cpus=1, save_fit=True)
+            self.assertEqual(1, mocked_close.call_count)
+
+            rank_result = alg.rank(users_fit_dict, self.ratings, self.ratings, index_path, users, n_recs=3,
+                                   methodology=methodology, num_cpus=1)
+            self.assertEqual(2, mocked_close.call_count)
+
+        # the user with only negative items is skipped
+        self.assertNotIn(self.ratings.user_map['A003'], users_fit_dict)
+        self.assertEqual(0, len(fit_rank_result[3]))
+        self.assertEqual(0, len(rank_result[3]))
+
+        # batched rank is the same of the rank computed for each user
+        for user_idx, user_fit_rank, user_rank in zip(users[:3], fit_rank_result, rank_result):
+            rank_fn = users_fit_dict[user_idx][0]
+            filter_list = self.ratings.item_map.convert_seq_int2str(
+                methodology.filter_single(user_idx, self.ratings, self.ratings).astype(int))
+            expected = rank_fn(user_idx, self.ratings, self.available_loaded_items, 3, filter_list)
+
+            self.assertTrue(0 < len(expected) <= 3)
+            np.testing.assert_array_equal(expected[:, :2], user_fit_rank[:, :2])
+            np.testing.assert_array_almost_equal(expected[:, 2], user_fit_rank[:, 2])
+            np.testing.assert_array_equal(expected[:, :2], user_rank[:, :2])
+            np.testing.assert_array_almost_equal(expected[:, 2], user_rank[:, 2])
+
     def test_raise_errors(self):
         # Only negative available
         ratings = pd.DataFrame.from_records([
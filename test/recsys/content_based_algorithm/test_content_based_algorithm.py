@@ -8,7 +8,7 @@ from scipy import sparse
 from sklearn.feature_extraction import DictVectorizer
 
 from clayrs.content_analyzer import Centroid, Ratings
-from clayrs.recsys import IndexQuery, LinearPredictor, SkLinearRegression
+from clayrs.recsys import IndexQuery, LinearPredictor, SkLinearRegression, ClassifierRecommender, SkSVC
 from clayrs.recsys.content_based_algorithm.contents_loader import LoadedContentsDict, LoadedContentsIndex
 from clayrs.utils.load_content import load_content_instance
 from clayrs.recsys.content_based_algorithm.centroid_vector.centroid_vector import CentroidVector
@@ -411,6 +411,50 @@ class TestPerUserCBAlgorithm(TestCase):
         # save_fit == False, so we check algorithm not fit
         self.assertIsNone(fit_alg)
 
+    def test_items_features_cache(self):
+        items_id = ["tt0114576", "not_existent1", "tt0112896", "tt0114576", "tt0113041"]
+        loaded_items = LoadedContentsDict(self.movies_multiple)
+
+        for item_field in [{'Plot': ['tfidf']}, {'Plot': ['embedding']}]:
+            alg = CentroidVector(item_field, CosineSimilarity())
+            alg_cache = CentroidVector(item_field, CosineSimilarity())
+
+            # without the cache features are extracted and fused on the fly
+            expected_items_id, expected_features = alg._fused_items_features(items_id, loaded_items, Centroid())
+
+            alg_cache._build_items_features(["tt0112896", "not_existent1"], loaded_items, Centroid())
+            self.assertEqual({"tt0112896": 0, "not_existent1": None}, alg_cache._cached_items_row)
+
+            # items not in the cache are added to it
+            result_items_id, result_features = alg_cache._fused_items_features(items_id, loaded_items, Centroid())
+            self.assertEqual(3, alg_cache._cached_items_matrix.shape[0])
+
+            # unavailable items are skipped, duplicates are kept
+            self.assertEqual(["tt0114576", "tt0112896", "tt0114576", "tt0113041"], result_items_id)
+            self.assertEqual(expected_items_id, result_items_id)
+
+            if sparse.issparse(expected_features):
+                expected_features = expected_features.toarray()
+                result_features = result_features.toarray()
+            np.testing.assert_array_almost_equal(expected_features, result_features)
+
+            self.assertEqual(([], None), alg_cache._fused_items_features(["not_existent2"], loaded_items, Centroid()))
+
+        # the cache is freed at the end of each session
+        alg = CentroidVector({'Plot': ['embedding']}, CosineSimilarity())
+        alg.fit(train_ratings, self.movies_multiple, num_cpus=1)
+        self.assertIsNone(alg._cached_items_matrix)
+        self.assertIsNone(alg._cached_items_row)
+
+        # users fit by other processes are bound to copies of the algorithm which don't keep the cache
+        alg = ClassifierRecommender({'Plot': ['tfidf']}, SkSVC(), threshold=3)
+        users_fit_dict = alg.fit(train_ratings, self.movies_multiple, num_cpus=2)
+        self.assertEqual(4, len(users_fit_dict))
+        for rank_fn, predict_fn in users_fit_dict.values():
+            for fit_alg in [rank_fn.__self__, predict_fn.__self__]:
+                self.assertIsNone(fit_alg._cached_items_matrix)
+                self.assertIsNone(fit_alg._cached_items_row)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -3,7 +3,7 @@ import unittest
 from os import listdir
 from os.path import splitext, isfile, join
 
-from clayrs.content_analyzer import SearchIndex
+from clayrs.content_analyzer import SearchIndex, SparseSearchIndex
 from clayrs.recsys.content_based_algorithm.contents_loader import LoadedContentsDict, LoadedContentsIndex
 from test import dir_test_files
 
@@ -47,3 +47,45 @@ class TestLoadedContentsIndex(unittest.TestCase):
         index = "../test/test_files/index"
 
         self.assertIsInstance(LoadedContentsIndex(index).get_contents_interface(), SearchIndex)
+
+    def test_shared_reader(self):
+        index = LoadedContentsIndex(os.path.join(dir_test_files, 'complex_contents', 'index'))
+        ix = index.get_contents_interface()
+
+        ix.query('tt0112641', results_number=1)
+        searcher = ix._get_searcher()
+
+        # following queries re-use the index already opened
+        ix.query('tt0112760', results_number=1)
+        self.assertIs(searcher, ix._get_searcher())
+
+        index.close()
+
+    def test_context_manager(self):
+        with LoadedContentsIndex(os.path.join(dir_test_files, 'complex_contents', 'index')) as index:
+            ix = index.get_contents_interface()
+            ix.query('tt0112641', results_number=1)
+            searcher = ix._get_searcher()
+
+        # readers are closed when exiting the context, the index is opened again if read after
+        self.assertTrue(searcher.reader().is_closed)
+        ix.query('tt0112641', results_number=1)
+        self.assertIsNot(searcher, ix._get_searcher())
+        ix.close()
+
+    def test_sparse_index(self):
+        sparse_index = SparseSearchIndex("./sparse_loaded_index")
+        try:
+            sparse_index.init_writing()
+            sparse_index.new_content()
+            sparse_index.new_field("content_id", "tt0112641")
+            sparse_index.serialize_content()
+            sparse_index.stop_writing()
+
+            # indexes serialized by a sparse interface are read with it
+            index = LoadedContentsIndex("./sparse_loaded_index")
+            self.assertIsInstance(index.get_contents_interface(), SparseSearchIndex)
+            self.assertEqual(["tt0112641"], list(index.get_contents_interface().query("tt0112641", 1).keys()))
+            index.close()
+        finally:
+            sparse_index.delete()
@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+import numpy as np
+
+from clayrs.utils.top_k import top_k_indices, top_k_uir
+
+
+class TestTopK(TestCase):
+
+    def test_top_k_indices(self):
+        scores = np.array([0.2, 0.9, 0.5, 0.9, 0.1, 0.5])
+
+        np.testing.assert_array_equal([1, 3, 2, 5, 0, 4], top_k_indices(scores, None))
+        np.testing.assert_array_equal([1, 3, 2], top_k_indices(scores, 3))
+        np.testing.assert_array_equal([1, 3, 2, 5, 0, 4], top_k_indices(scores, 10))
+        self.assertEqual(0, len(top_k_indices(scores, 0)))
+
+        # ties on the boundary are broken by the tie breaker
+        np.testing.assert_array_equal([3, 1, 5], top_k_indices(scores, 3, tie_breaker=np.array([6, 5, 4, 3, 2, 1])))
+
+        # nan scores are ranked last
+        scores_nan = np.array([np.nan, 0.3, 0.7])
+        np.testing.assert_array_equal([2, 1, 0], top_k_indices(scores_nan, None))
+        np.testing.assert_array_equal([2, 1], top_k_indices(scores_nan, 2))
+
+    def test_same_results_of_full_sort(self):
+        rng = np.random.default_rng(42)
+        # few distinct values so that there are many ties
+        scores = rng.integers(0, 20, size=1000).astype(float)
+        items = rng.permutation(1000)
+
+        expected = np.lexsort((items, -scores))
+        for k in [1, 10, 999, 1000]:
+            np.testing.assert_array_equal(expected[:k], top_k_indices(scores, k, items))
+
+    def test_top_k_uir(self):
+        items = np.array([10, 4, 7, 2])
+        scores = np.array([0.1, 0.8, 0.8, 0.4])
+
+        uir = top_k_uir(3, items, scores, 3)
+
+        self.assertEqual((3, 3), uir.shape)
+        np.testing.assert_array_equal([[3, 4, 0.8], [3, 7, 0.8], [3, 2, 0.4]], uir)
+
+        uir_all = top_k_uir(3, items, scores, None)
+        self.assertEqual((4, 3), uir_all.shape)
+
+        # users and items which are not numbers
+        uir_str = top_k_uir('u1', np.array(['i1', 'i2']), np.array([0.3, 0.5]), None, dtype=object)
+        self.assertEqual([['u1', 'i2', 0.5], ['u1', 'i1', 0.3]], uir_str.tolist())